@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Замер разбора iptables-save и поиска правил по индексу (services/iptables_index.py).
+
+Скрипт строит синтетический набор правил в формате iptables-save -c
+(цепочки перенаправления nat, как их создаёт CDM, плюс правила NGFW_INPUT)
+и сравнивает два способа проверить наличие правила:
+    regex  - прежний: регулярное выражение "сеть.*dpt:порт" по каждой строке
+             вывода iptables -t nat -L -n -v (текст строится из тех же правил);
+    index  - разбор iptables-save один раз и IptablesIndex.find по словарям.
+Прежний способ на 10 000 правил тратит сотни миллисекунд на проверку,
+поэтому он выполняется только для первых --regex-queries запросов; на них
+ответы обоих способов сверяются, расхождение - код возврата 1.
+
+Внешние команды не запускаются, root не нужен.
+
+ИСПОЛЬЗОВАНИЕ:
+    python3 bench_iptables_index.py                  # 10 000 правил, 1000 проверок
+    python3 bench_iptables_index.py --rules 50000 --regex-queries 5 --output bench.json
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+
+from services.iptables_index import IptablesIndex
+
+
+def build_ruleset(count: int, seed: int = 1):
+    """Возвращает (текст iptables-save -c, строки iptables -t nat -L -n -v, список (сеть, порт) nat-правил)."""
+    rng = random.Random(seed)
+    nat_lines, listing, forward = [], [], []
+    filter_lines = []
+    chain_rules = {}
+    for i in range(count):
+        if i % 10 == 9:
+            port = rng.randint(1, 65535)
+            filter_lines.append(f"[{i}:{i * 60}] -A NGFW_INPUT -i eth{i % 4} -p tcp -m tcp --dport {port} -j ACCEPT")
+            continue
+        chain = f"N{i // 20}"
+        network = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}/32" if i % 3 else \
+            f"172.{16 + (i >> 16) % 16}.{(i >> 8) & 255}.0/24"
+        port = rng.choice((80, 443, 8080, 3128, 25, 110, 143, 21))
+        direction = "-s" if i % 2 else "-d"
+        chain_rules.setdefault(chain, []).append(
+            f"[{i}:{i * 60}] -A {chain} {direction} {network} -p tcp -m tcp --dport {port} -j REDIRECT --to-ports 3128")
+        forward.append((network, port))
+        shown = network[:-3] if network.endswith("/32") else network
+        source, destination = (shown, "0.0.0.0/0") if direction == "-s" else ("0.0.0.0/0", shown)
+        listing.append(f"{i:>8} {i * 60:>8} REDIRECT   tcp  --  *      *       {source:<20} {destination:<20} "
+                       f"tcp dpt:{port} redir ports 3128")
+
+    nat_lines.append("*nat")
+    nat_lines.append(":PREROUTING ACCEPT [0:0]")
+    nat_lines.extend(f":{chain} - [0:0]" for chain in chain_rules)
+    nat_lines.extend(f"[0:0] -A PREROUTING -j {chain}" for chain in chain_rules)
+    for rules in chain_rules.values():
+        nat_lines.extend(rules)
+    nat_lines.append("COMMIT")
+    text = "\n".join(["# Generated by bench_iptables_index.py"] + nat_lines +
+                     ["*filter", ":INPUT ACCEPT [0:0]", ":NGFW_INPUT - [0:0]"] + filter_lines + ["COMMIT", ""])
+    return text, listing, forward
+
+
+def regex_exists(listing, full_addr: str, port: int) -> bool:
+    """Прежняя проверка forwardRules: регулярное выражение по каждой строке вывода -L -n -v.
+
+    Границы после адреса и порта добавлены, чтобы 10.0.0.5 не совпадал с 10.0.0.50, а dpt:80 - с dpt:8080.
+    """
+    escaped_addr = full_addr.replace('.', r'\.')
+    if full_addr.endswith('/32'):
+        base_ip = full_addr[:-3].replace('.', r'\.')
+        pattern = rf".*({escaped_addr}|{base_ip})\s.*dpt:{port}\b"
+    else:
+        pattern = rf".*{escaped_addr}\s.*dpt:{port}\b"
+    return any(re.search(pattern, line) for line in listing)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Замер разбора iptables-save и поиска по индексу")
+    parser.add_argument("--rules", type=int, default=10000, help="число правил в наборе")
+    parser.add_argument("--queries", type=int, default=1000, help="число проверок наличия правила")
+    parser.add_argument("--regex-queries", type=int, default=20,
+                        help="сколько первых проверок выполнить и прежним способом")
+    parser.add_argument("--seed", type=int, default=1, help="seed генератора набора и запросов")
+    parser.add_argument("--output", default=None, help="сохранить результаты в JSON-файл")
+    args = parser.parse_args(argv)
+
+    text, listing, forward = build_ruleset(args.rules, args.seed)
+    rng = random.Random(args.seed + 1)
+    queries = []
+    for _ in range(args.queries):
+        network, port = rng.choice(forward)
+        # Половина запросов - заведомо отсутствующий порт
+        queries.append((network, port if rng.random() < 0.5 else 9))
+
+    started = time.perf_counter()
+    index = IptablesIndex.from_save(text)
+    parse_ms = (time.perf_counter() - started) * 1000
+
+    regex_sample = queries[:args.regex_queries]
+    started = time.perf_counter()
+    expected = [regex_exists(listing, network, port) for network, port in regex_sample]
+    regex_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    actual = [index.exists(table="nat", address=network, dport=port) for network, port in queries]
+    index_ms = (time.perf_counter() - started) * 1000
+
+    mismatches = sum(1 for a, b in zip(expected, actual) if a != b)
+    print(f"rules: {len(index)}, queries: {len(queries)} (regex: {len(regex_sample)})")
+    print(f"{'parse iptables-save':<24} {parse_ms:>10.1f} ms")
+    print(f"{'regex over -L -n -v':<24} {regex_ms:>10.1f} ms "
+          f"{regex_ms * 1000 / max(1, len(regex_sample)):>12.1f} us/query")
+    print(f"{'index find':<24} {index_ms:>10.1f} ms {index_ms * 1000 / max(1, len(queries)):>12.1f} us/query")
+    if mismatches:
+        print(f"MISMATCH: {mismatches} queries answered differently")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"rules": len(index), "queries": len(queries), "regex_queries": len(regex_sample),
+                       "parse_ms": parse_ms, "regex_ms": regex_ms, "index_ms": index_ms,
+                       "mismatches": mismatches}, f, indent=2)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
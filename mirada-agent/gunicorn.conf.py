@@ -0,0 +1,60 @@
+"""
+Конфигурация gunicorn для Mirada Agent (MIRADA_SERVER=gunicorn в start.sh).
+
+Воркеры gthread: несколько процессов, в каждом пул потоков. Обработчики
+проверок почти всё время ждут subprocess (ip netns, iptables, docker exec)
+и HTTP-ответы CDM, поэтому потоки внутри процесса не упираются в GIL, а
+отдельные процессы изолируют падение или зависание одного обработчика.
+
+Состояние воркеров. Кэши агента свои у каждого процесса (после fork
+воркер их не делит с другими и не видит их invalidate), поэтому результат
+проверки не должен зависеть от того, какой воркер принял запрос:
+    - services/netns_state.py (iptables, tc, адреса): ответ "есть / нет"
+      строится по снимку, снятому не раньше начала проверки; снимок
+      старше - до MIRADA_SNAPSHOT_TTL (2 с) - только для диагностики после
+      проверки. invalidate() сбрасывает снимки своего воркера;
+    - services/process_table.py (процессы namespace): таблица до
+      MIRADA_PROCESS_TTL (1 с); без совпадения перечитывается, а процесс,
+      завершившийся за последнюю секунду, может ещё читаться как запущенный.
+      invalidate() - только в своём воркере;
+    - services/container_files.py: содержимое файлов с ключом (mtime в нс,
+      размер) - изменённый файл читается заново; точки монтирования
+      контейнера - до MIRADA_MOUNTS_TTL (30 с), раньше сбрасываются, если
+      контейнера нет или исчез каталог volume;
+    - services/objects/objects_db.py: база читается на месте или по копии,
+      обновляемой при изменении mtime/размера, - устаревших ответов нет;
+    - services/node_worker.py и services/http_client.py держат процесс node
+      и keep-alive соединения, а не данные;
+    - services/jobs.py: состояние задач - файлы в MIRADA_JOBS_DIR, их видит
+      любой воркер; в памяти - только записи задач, которые выполняет сам
+      воркер (запрос к задаче другого воркера читает её файл).
+
+Параметры переопределяются переменными окружения:
+    MIRADA_PORT     порт (по умолчанию 8000)
+    MIRADA_WORKERS  число процессов (по умолчанию min(4, CPU))
+    MIRADA_THREADS  потоков в процессе (по умолчанию 8)
+    MIRADA_TIMEOUT  предельное время запроса, с (по умолчанию 900 -
+                    генерация system-report и обновление BRP идут минутами)
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{int(os.environ.get('MIRADA_PORT', 8000))}"
+
+worker_class = "gthread"
+workers = int(os.environ.get("MIRADA_WORKERS", min(4, multiprocessing.cpu_count())))
+threads = int(os.environ.get("MIRADA_THREADS", 8))
+
+timeout = int(os.environ.get("MIRADA_TIMEOUT", 900))
+graceful_timeout = 30
+# Автотесты ходят сессией requests - держим соединение между запросами
+keepalive = 30
+
+# main.py импортируется один раз в мастере (проверка root, схемы, спецификация
+# OpenAPI), воркеры получают готовое приложение через fork
+preload_app = True
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("MIRADA_LOG_LEVEL", "info")
+capture_output = True
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Нагрузочная проверка Mirada Agent: задержка эндпоинта проверки при
+одновременных вызовах.
+
+Автотесты при запуске в несколько воркеров (pytest -n) обращаются к агенту
+одновременно. Скрипт для каждого уровня параллельности запускает столько же
+потоков (у каждого своя сессия requests с keep-alive), которые вызывают один
+эндпоинт, и печатает пропускную способность и перцентили задержки. Так
+удобно сравнивать режимы запуска start.sh (dev и gunicorn) на одном стенде.
+
+ИСПОЛЬЗОВАНИЕ:
+    # агент уже запущен (sudo ./start.sh или MIRADA_SERVER=dev sudo ./start.sh)
+    python3 load_test.py --concurrency 1,4,16,32 --requests 200
+
+    # проверка с телом запроса
+    python3 load_test.py --method POST --path /api/utils/ping \\
+        --json '{"addr": "10.0.0.1", "packetsAmount": 3}' --concurrency 1,8
+
+Пример вывода:
+    GET http://127.0.0.1:8000/api/health
+    callers  requests  errors    req/s   p50 ms   p95 ms   p99 ms   max ms
+          1       200       0    812.4      1.2      1.6      2.1      3.0
+         16      3200       0   2950.7      5.1      9.8     14.2     21.7
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import requests
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(percent / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def _caller(url: str, method: str, body: Optional[dict], count: int, timeout: float, start: threading.Event):
+    """Один вызывающий: count последовательных запросов в своей сессии."""
+    latencies, errors = [], 0
+    session = requests.Session()
+    start.wait()
+    for _ in range(count):
+        began = time.perf_counter()
+        try:
+            response = session.request(method, url, json=body, timeout=timeout)
+            response.content
+            if response.status_code >= 500:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+        latencies.append(time.perf_counter() - began)
+    session.close()
+    return latencies, errors
+
+
+def run_level(url: str, method: str, body: Optional[dict], callers: int, per_caller: int, timeout: float) -> dict:
+    """Прогон одного уровня параллельности; все вызывающие стартуют одновременно."""
+    start = threading.Event()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        futures = [pool.submit(_caller, url, method, body, per_caller, timeout, start) for _ in range(callers)]
+        began = time.perf_counter()
+        start.set()
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - began
+
+    latencies = sorted(latency for caller_latencies, _ in results for latency in caller_latencies)
+    return {
+        "callers": callers,
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": _percentile(latencies, 50) * 1000,
+        "p95": _percentile(latencies, 95) * 1000,
+        "p99": _percentile(latencies, 99) * 1000,
+        "max": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Задержка эндпоинта Mirada Agent при одновременных вызовах")
+    parser.add_argument("--base-url", default=f"http://127.0.0.1:{os.environ.get('MIRADA_PORT', 8000)}",
+                        help="адрес агента (по умолчанию http://127.0.0.1:$MIRADA_PORT)")
+    parser.add_argument("--path", default="/api/health", help="путь эндпоинта")
+    parser.add_argument("--method", default="GET", help="HTTP-метод")
+    parser.add_argument("--json", dest="body", default=None, help="тело запроса (JSON)")
+    parser.add_argument("--concurrency", default="1,4,16",
+                        help="уровни параллельности через запятую")
+    parser.add_argument("--requests", type=int, default=100, help="запросов на одного вызывающего")
+    parser.add_argument("--timeout", type=float, default=60.0, help="таймаут одного запроса, с")
+    parser.add_argument("--output", default=None, help="сохранить результаты в JSON-файл")
+    args = parser.parse_args(argv)
+
+    url = args.base_url.rstrip("/") + args.path
+    method = args.method.upper()
+    body = json.loads(args.body) if args.body else None
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    print(f"{method} {url}")
+    print(f"{'callers':>7} {'requests':>9} {'errors':>7} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    results = []
+    for callers in levels:
+        row = run_level(url, method, body, callers, args.requests, args.timeout)
+        results.append(row)
+        print(f"{row['callers']:>7} {row['requests']:>9} {row['errors']:>7} {row['rps']:>8.1f} "
+              f"{row['p50']:>8.1f} {row['p95']:>8.1f} {row['p99']:>8.1f} {row['max']:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "method": method, "levels": results}, f, indent=2)
+    return 1 if any(row["errors"] for row in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
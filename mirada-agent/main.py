@@ -3,14 +3,14 @@
 Mirada Agent - API для проверки объектов
 """
 
+import json
 import logging
 import os
 import sys
 import subprocess
 import time
 from datetime import datetime
-import importlib.util
-from flask import Flask
+from flask import Flask, Response, jsonify, stream_with_context
 from flask_smorest import Api, Blueprint, abort
 from marshmallow import Schema, fields, INCLUDE, ValidationError
 from flask import request as _request
@@ -65,6 +65,12 @@ class ObjectResponseSchema(Schema):
     result = fields.Str(metadata={"description": "Результат проверки"})
     message = fields.Str(required=False, metadata={"description": "Сообщение об ошибке"})
 
+class ObjectBatchRequestSchema(Schema):
+    objects = fields.List(fields.Nested(ObjectRequestSchema), required=True, metadata={"description": "Объекты для проверки"})
+
+class ObjectBatchResponseSchema(Schema):
+    results = fields.List(fields.Nested(ObjectResponseSchema), metadata={"description": "Результаты в порядке запроса"})
+
 class FilterRequestSchema(Schema):
     overwrite = fields.Bool(required=False, metadata={"description": "Перезаписать существующие правила"})
     data = fields.List(fields.Raw(), required=True, metadata={"description": "Список правил фильтрации"})
@@ -306,6 +312,7 @@ class ForwardRulesResponseSchema(Schema):
 
 # Импортируем сервисы
 from services.objects.object import handle as object_handler
+from services.objects.object import handle_many as objects_handler
 from services.vswitch.filter import handle as filter_handler
 from services.vswitch.certificates_certs_set import handle as certificate_handler
 from services.vswitch.certificates_certs import handle as certificates_certs_handler
@@ -324,67 +331,17 @@ from services.vswitch.localRules import handle as local_rules_handler
 from services.vswitch.forwardRules import handle as forward_rules_handler
 from services.vswitch.managers_iptablesMap import handle as iptables_map_handler
 
-# CSI server services - динамический импорт для модулей с дефисом
-def _load_manager_settings_timezone_handler():
-    """Динамически загружает обработчик manager_settings_timezone."""
-    import importlib.util
-    import os
-    module_path = os.path.join(os.path.dirname(__file__), "services", "csi-server", "manager_settings_timezone.py")
-    spec = importlib.util.spec_from_file_location("manager_settings_timezone", module_path)
-    if spec is None or spec.loader is None:
-        raise ImportError("manager_settings_timezone module not found")
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
-    return getattr(mod, "handle", None)
-
-# Динамический импорт для модуля с дефисом в имени
-def _load_integrity_test_handler():
-    """Динамически загружает обработчик integrity_test."""
-    import importlib.util
-    import os
-    module_path = os.path.join(os.path.dirname(__file__), "services", "csi-server", "integrity_test.py")
-    spec = importlib.util.spec_from_file_location("integrity_test", module_path)
-    if spec is None or spec.loader is None:
-        raise ImportError("integrity_test module not found")
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
-    return getattr(mod, "handle", None)
-
-def _load_manager_uploader_password_handler():
-    """Динамически загружает обработчик manager_uploaderPassword."""
-    import importlib.util
-    import os
-    module_path = os.path.join(os.path.dirname(__file__), "services", "csi-server", "manager_uploaderPassword.py")
-    spec = importlib.util.spec_from_file_location("manager_uploaderPassword", module_path)
-    if spec is None or spec.loader is None:
-        raise ImportError("manager_uploaderPassword module not found")
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
-    return getattr(mod, "handle", None)
-
-def _load_manager_config_handler():
-    """Динамически загружает обработчик manager_config."""
-    import importlib.util
-    import os
-    module_path = os.path.join(os.path.dirname(__file__), "services", "csi-server", "manager_config.py")
-    spec = importlib.util.spec_from_file_location("manager_config", module_path)
-    if spec is None or spec.loader is None:
-        raise ImportError("manager_config module not found")
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
-    return getattr(mod, "handle", None)
-
-def _load_update_images_start_download_handler():
-    """Динамически загружает обработчик update_images_start-download."""
-    import importlib.util
-    import os
-    module_path = os.path.join(os.path.dirname(__file__), "services", "csi-server", "update_images_start-download.py")
-    spec = importlib.util.spec_from_file_location("update_images_start_download", module_path)
-    if spec is None or spec.loader is None:
-        raise ImportError("update_images_start-download module not found")
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
-    return getattr(mod, "handle", None)
+# CSI server services - модули с дефисом в имени загружаются через реестр:
+# один импорт на процесс, MIRADA_HANDLER_RELOAD=1 - перезагрузка изменённых файлов
+from services.handler_registry import HandlerNotFound, HandlerRegistry
+from services import batch as batch_runner
+from services.jobs import JobNotFound, job_manager
+
+csi_handlers = HandlerRegistry(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "services", "csi-server"),
+    reload=os.environ.get("MIRADA_HANDLER_RELOAD") == "1",
+)
+
 
 
 class UpdateCallOnHostRequestSchema(Schema):
@@ -556,8 +513,7 @@ def health():
 def check_object(args):
     """Проверка создания объекта"""
     try:
-        result = object_handler(args)
-        return {"result": "OK"}
+        return object_handler(args)
     except ValidationError as e:
         logger.error(f"Ошибка валидации: {e}")
         return {"result": "ERROR", "message": f"Validation error: {str(e)}"}
@@ -565,6 +521,17 @@ def check_object(args):
         logger.error(f"Ошибка при проверке объекта: {e}")
         return {"result": "ERROR", "message": f"Internal error: {str(e)}"}
 
+@blp.route("/object/batch", methods=["POST"])
+@blp.arguments(ObjectBatchRequestSchema, location="json")
+@blp.response(200, ObjectBatchResponseSchema, description="Проверка многих объектов одним запросом")
+def check_objects(args):
+    """Проверка многих объектов: один поиск по базе объектов на весь список"""
+    try:
+        return {"results": objects_handler(args["objects"])}
+    except Exception as e:
+        logger.error(f"Ошибка при проверке объектов: {e}")
+        return {"results": [{"result": "ERROR", "message": f"Internal error: {str(e)}"} for _ in args["objects"]]}
+
 @blp.route("/filter", methods=["POST"])
 @blp.arguments(FilterRequestSchema, location="json")
 @blp.response(200, FilterResponseSchema, description="Проверка наличия правил фильтрации")
@@ -946,17 +913,10 @@ def update_call_on_host(args):
         if not isinstance(cmd_args, list) or not all(isinstance(x, str) for x in cmd_args):
             return {"result": "ERROR", "message": "Invalid 'args'"}
 
-        # Динамический импорт обработчика (директория содержит '-')
-        module_path = os.path.join(os.path.dirname(__file__), "services", "csi-server", "update_call-on-host.py")
-        logger.info("Handler module path: %s exists=%s", module_path, os.path.exists(module_path))
-        spec = importlib.util.spec_from_file_location("update_call_on_host", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}
-        mod = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}
+        try:
+            handler = csi_handlers.get("update_call-on-host")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}
 
         result = handler(command, cmd_args)
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -986,9 +946,7 @@ def integrity_test(args):
         if not state:
             return {"result": "ERROR", "message": "Missing 'state' parameter"}
         
-        integrity_test_handler = _load_integrity_test_handler()
-        if integrity_test_handler is None:
-            return {"result": "ERROR", "message": "Integrity test handler not found"}
+        integrity_test_handler = csi_handlers.get("integrity_test")
         
         result = integrity_test_handler(state)
         logger.info(f"Результат обработки: {result}")
@@ -1014,20 +972,10 @@ def security_settings(args):
     Возвращает OK, если переданные в запросе значения совпадают с текущими.
     """
     try:
-        # Динамический импорт обработчика (директория содержит '-')
-        import importlib.util as _importlib_util
-        import os as _os
-
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "security-settings.py")
-        logger.info("Security settings handler path: %s exists=%s", module_path, _os.path.exists(module_path))
-        spec = _importlib_util.spec_from_file_location("security_settings", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}
+        try:
+            handler = csi_handlers.get("security-settings")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}
 
         result = handler(args if isinstance(args, dict) else {})
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -1048,8 +996,6 @@ def system_report_check():
     """
     try:
         from flask import request as _request
-        import importlib.util as _importlib_util
-        import os as _os
 
         # Извлекаем JSON, но не требуем строгий Content-Type
         try:
@@ -1065,16 +1011,10 @@ def system_report_check():
         if status is None:
             status = "GENERATION_IN_PROGRESS"
 
-        # Динамический импорт обработчика агента
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "system-report_check.py")
-        spec = _importlib_util.spec_from_file_location("system_report_check", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}
+        try:
+            handler = csi_handlers.get("system-report_check")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}
 
         result = handler(status)
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -1089,18 +1029,10 @@ def system_report_check():
 def system_report_generate():
     """Генерирует системный отчет и отслеживает его завершение."""
     try:
-        import importlib.util as _importlib_util
-        import os as _os
-
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "system-report_generate.py")
-        spec = _importlib_util.spec_from_file_location("system_report_generate", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}
+        try:
+            handler = csi_handlers.get("system-report_generate")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}
 
         result = handler()
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -1115,18 +1047,10 @@ def system_report_generate():
 def system_report_generate_prepare():
     """Удаляет существующий файл system-report.log.zip для подготовки к новой генерации."""
     try:
-        import importlib.util as _importlib_util
-        import os as _os
-
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "system-report_generate_prepare.py")
-        spec = _importlib_util.spec_from_file_location("system_report_generate_prepare", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}
+        try:
+            handler = csi_handlers.get("system-report_generate_prepare")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}
 
         result = handler()
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -1138,16 +1062,6 @@ def system_report_generate_prepare():
 
 # ---- CSI config endpoint ----
 
-def _load_config_handler():
-    import importlib.util
-    import os
-    module_path = os.path.join(os.path.dirname(__file__), "services", "csi-server", "config.py")
-    spec = importlib.util.spec_from_file_location("config", module_path)
-    if spec is None or spec.loader is None:
-        raise ImportError("config module not found")
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
-    return getattr(mod, "handle", None)
 
 
 class ConfigRequestSchema(Schema):
@@ -1163,9 +1077,7 @@ class ConfigResponseSchema(Schema):
 def check_config(args):
     """Проверка конфигурации CSI через /config."""
     try:
-        config_handler = _load_config_handler()
-        if config_handler is None:
-            return {"result": "ERROR", "message": "Config handler not found"}
+        config_handler = csi_handlers.get("config")
         result = config_handler(args)
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
             return result
@@ -1202,8 +1114,6 @@ class UsersResponseSchema(Schema):
 def check_user(args):
     """Проверяет пользователя через ngfw.core и сверяет с запросом."""
     try:
-        import importlib.util as _importlib_util
-        import os as _os
         
         # Извлекаем данные из payload или корневых полей
         user_data = {}
@@ -1213,15 +1123,10 @@ def check_user(args):
             else:
                 user_data = {k: v for k, v in args.items() if k in ["id", "userRoleIds"]}
         
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "users.py")
-        spec = _importlib_util.spec_from_file_location("users", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}
+        try:
+            handler = csi_handlers.get("users")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}
         result = handler(user_data)
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
             return result
@@ -1246,9 +1151,7 @@ def manager_settings_timezone(args):
         logger.info("=== ОБРАБОТКА ЗАПРОСА ПРОВЕРКИ TIMEZONE ===")
         logger.info(f"Полученные аргументы: {args}")
         
-        manager_settings_timezone_handler = _load_manager_settings_timezone_handler()
-        if manager_settings_timezone_handler is None:
-            return {"result": "ERROR", "message": "Manager settings timezone handler not found"}
+        manager_settings_timezone_handler = csi_handlers.get("manager_settings_timezone")
         
         result = manager_settings_timezone_handler(args)
         logger.info(f"Результат обработки: {result}")
@@ -1278,9 +1181,7 @@ def manager_uploader_password():
     try:
         logger.info("=== ОБРАБОТКА ЗАПРОСА ПРОВЕРКИ ИЗМЕНЕНИЯ ПАРОЛЯ UPLOADER ===")
         
-        manager_uploader_password_handler = _load_manager_uploader_password_handler()
-        if manager_uploader_password_handler is None:
-            return {"result": "ERROR", "message": "Manager uploader password handler not found"}
+        manager_uploader_password_handler = csi_handlers.get("manager_uploaderPassword")
         
         result = manager_uploader_password_handler()
         logger.info(f"Результат обработки: {result}")
@@ -1306,9 +1207,7 @@ def manager_config():
     try:
         logger.info("=== ОБРАБОТКА ЗАПРОСА ПРОВЕРКИ ИМПОРТА КОНФИГУРАЦИИ ===")
         
-        manager_config_handler = _load_manager_config_handler()
-        if manager_config_handler is None:
-            return {"result": "ERROR", "message": "Manager config handler not found"}
+        manager_config_handler = csi_handlers.get("manager_config")
         
         result = manager_config_handler()
         logger.info(f"Результат обработки: {result}")
@@ -1337,9 +1236,7 @@ def update_images_start_download(args):
         logger.info("=== ОБРАБОТКА ЗАПРОСА /update/images/start-download ===")
         logger.info(f"Полученные аргументы: {args}")
         
-        update_images_start_download_handler = _load_update_images_start_download_handler()
-        if update_images_start_download_handler is None:
-            return {"result": "ERROR", "message": "Update images start download handler not found"}
+        update_images_start_download_handler = csi_handlers.get("update_images_start-download")
         
         result = update_images_start_download_handler(args)
         logger.info(f"Результат обработки: {result}")
@@ -1361,19 +1258,12 @@ def licenses_apply_activation_key(args):
     Возвращает {"result":"OK"} при валидном токене; иначе 401 с JSON.
     """
     try:
-        import importlib.util as _importlib_util
-        import os as _os
         from flask import request as _request  # для безопасного чтения тела при необходимости
 
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "licenses_apply-activation-key.py")
-        spec = _importlib_util.spec_from_file_location("licenses_apply_activation_key", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}, 500
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}, 500
+        try:
+            handler = csi_handlers.get("licenses_apply-activation-key")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}, 500
 
         result = handler(args if isinstance(args, dict) else {})
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -1394,18 +1284,10 @@ def licenses_generate_activation_code():
     иначе {"result":"ERROR","message":...}.
     """
     try:
-        import importlib.util as _importlib_util
-        import os as _os
-
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "licenses_generate-activation-code.py")
-        spec = _importlib_util.spec_from_file_location("licenses_generate_activation_code", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}, 500
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}, 500
+        try:
+            handler = csi_handlers.get("licenses_generate-activation-code")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}, 500
 
         result = handler()
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -1426,22 +1308,17 @@ def manager_maintenance_update_brp(args):
     Возвращает {"result":"OK"} или {"result":"ERROR","message": "..."}
     """
     try:
-        import importlib.util as _importlib_util
-        import os as _os
-
         logger.info("=== ОБРАБОТКА ЗАПРОСА /manager/maintenanceUpdateBrp ===")
         if isinstance(args, dict):
             logger.info("request keys: %s", ",".join(sorted(args.keys())))
 
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "manager_maintenanceUpdateBrp.py")
-        spec = _importlib_util.spec_from_file_location("manager_maintenanceUpdateBrp", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}, 500
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}, 500
+        try:
+            handler = csi_handlers.get("manager_maintenanceUpdateBrp")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}, 500
+
+        if _async_requested():
+            return _submit_job("manager_maintenanceUpdateBrp", handler, args)
 
         logger.info("calling handler: manager_maintenanceUpdateBrp.handle")
         result = handler(args if isinstance(args, dict) else {})
@@ -1469,18 +1346,10 @@ def manager_reset(args):
       - При иных ошибках: 500 с JSON
     """
     try:
-        import importlib.util as _importlib_util
-        import os as _os
-
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "manager_reset.py")
-        spec = _importlib_util.spec_from_file_location("manager_reset", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}, 500
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}, 500
+        try:
+            handler = csi_handlers.get("manager_reset")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}, 500
 
         # Передаем всё тело запроса (аргументы уже провалидированы схемой)
         result = handler(args if isinstance(args, dict) else {})
@@ -1510,18 +1379,10 @@ def manager_reboot(args):
       - При иных ошибках: 500 с JSON
     """
     try:
-        import importlib.util as _importlib_util
-        import os as _os
-
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "manager_reboot.py")
-        spec = _importlib_util.spec_from_file_location("manager_reboot", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}, 500
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}, 500
+        try:
+            handler = csi_handlers.get("manager_reboot")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}, 500
 
         result = handler(args if isinstance(args, dict) else {})
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -1548,9 +1409,6 @@ def notifications_delete_all():
     Возвращает {"result":"OK"} или {"result":"ERROR","message":"..."}
     """
     try:
-        import importlib.util as _importlib_util
-        import os as _os
-
         # Безопасно читаем JSON-тело; допускаем отсутствие Content-Type
         try:
             body = _request.get_json(silent=True) or {}
@@ -1561,15 +1419,10 @@ def notifications_delete_all():
         header_token = _request.headers.get("x-access-token")
         query_token = _request.args.get("access_token")
 
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "notifications_delete-all.py")
-        spec = _importlib_util.spec_from_file_location("notifications_delete_all", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}
+        try:
+            handler = csi_handlers.get("notifications_delete-all")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}
 
         result = handler(body if isinstance(body, dict) else {}, header_token=header_token, query_token=query_token)
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -1594,8 +1447,6 @@ def notifications_read():
     Возвращает {"result":"OK", "count": <int>} или {"result":"ERROR","message":"..."}
     """
     try:
-        import importlib.util as _importlib_util
-        import os as _os
         from flask import request as _request
 
         # Безопасно читаем JSON-тело; допускаем отсутствие Content-Type
@@ -1604,15 +1455,10 @@ def notifications_read():
         except Exception:
             body = {}
 
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "notifications_read.py")
-        spec = _importlib_util.spec_from_file_location("notifications_read", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}, 500
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}, 500
+        try:
+            handler = csi_handlers.get("notifications_read")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}, 500
 
         result = handler(body if isinstance(body, dict) else {})
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -1640,22 +1486,17 @@ def update_rules_download_and_apply(args):
       5) Возвращает OK при успехе, ERROR иначе
     """
     try:
-        import importlib.util as _importlib_util
-        import os as _os
-
         logger.info("=== ОБРАБОТКА ЗАПРОСА /update/rules/download-and-apply ===")
         if isinstance(args, dict):
             logger.info("request keys: %s", ",".join(sorted(args.keys())))
 
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "update_rules_download-and-apply.py")
-        spec = _importlib_util.spec_from_file_location("update_rules_download_and_apply", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}, 500
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}, 500
+        try:
+            handler = csi_handlers.get("update_rules_download-and-apply")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}, 500
+
+        if _async_requested():
+            return _submit_job("update_rules_download-and-apply", handler, args)
 
         logger.info("calling handler: update_rules_download_and_apply.handle")
         result = handler(args if isinstance(args, dict) else {})
@@ -1681,22 +1522,17 @@ def update_rules_check_for_updates(args):
     Возвращает {"result":"OK"} или {"result":"ERROR","message":"..."}
     """
     try:
-        import importlib.util as _importlib_util
-        import os as _os
-
         logger.info("=== ОБРАБОТКА ЗАПРОСА /update/rules/check-for-updates ===")
         if isinstance(args, dict):
             logger.info("request keys: %s", ",".join(sorted(args.keys())))
 
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "update_rules_check-for-updates.py")
-        spec = _importlib_util.spec_from_file_location("update_rules_check_for_updates", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}, 500
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}, 500
+        try:
+            handler = csi_handlers.get("update_rules_check-for-updates")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}, 500
+
+        if _async_requested():
+            return _submit_job("update_rules_check-for-updates", handler, args)
 
         result = handler(args if isinstance(args, dict) else {})
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -1728,22 +1564,17 @@ def update_rules_start_download(args):
       6) Повторный POST на /api/update/rules/start-download {x-access-token}, ожидаем {"ok": 1}
     """
     try:
-        import importlib.util as _importlib_util
-        import os as _os
-
         logger.info("=== ОБРАБОТКА ЗАПРОСА /update/rules/start-download ===")
         if isinstance(args, dict):
             logger.info("request keys: %s", ",".join(sorted(args.keys())))
 
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "update_rules_start-download.py")
-        spec = _importlib_util.spec_from_file_location("update_rules_start_download", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}, 500
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}, 500
+        try:
+            handler = csi_handlers.get("update_rules_start-download")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}, 500
+
+        if _async_requested():
+            return _submit_job("update_rules_start-download", handler, args)
 
         result = handler(args if isinstance(args, dict) else {})
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -1780,22 +1611,17 @@ def update_rules_cancel_download(args):
          После выполнения шага 9, вызов в шаге 8 должен прерваться
     """
     try:
-        import importlib.util as _importlib_util
-        import os as _os
-
         logger.info("=== ОБРАБОТКА ЗАПРОСА /update/rules/cancel-download ===")
         if isinstance(args, dict):
             logger.info("request keys: %s", ",".join(sorted(args.keys())))
 
-        module_path = _os.path.join(_os.path.dirname(__file__), "services", "csi-server", "update_rules_cancel-download.py")
-        spec = _importlib_util.spec_from_file_location("update_rules_cancel_download", module_path)
-        if spec is None or spec.loader is None:
-            return {"result": "ERROR", "message": "Handler module not found"}, 500
-        mod = _importlib_util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        handler = getattr(mod, "handle", None)
-        if handler is None:
-            return {"result": "ERROR", "message": "Handler function missing"}, 500
+        try:
+            handler = csi_handlers.get("update_rules_cancel-download")
+        except HandlerNotFound as e:
+            return {"result": "ERROR", "message": str(e)}, 500
+
+        if _async_requested():
+            return _submit_job("update_rules_cancel-download", handler, args)
 
         result = handler(args if isinstance(args, dict) else {})
         if isinstance(result, dict) and result.get("result") in ("OK", "ERROR"):
@@ -1808,9 +1634,163 @@ def update_rules_cancel_download(args):
         logger.error(f"Ошибка при обработке /update/rules/cancel-download: {e}")
         return {"result": "ERROR", "message": f"Internal error: {str(e)}"}, 500
 
+# ---- Фоновые задачи ----
+# Долгие сценарии (опрос статуса CDM минутами): POST ...?async=1 или POST /jobs
+# сразу возвращают id задачи, ход и результат - GET /jobs/<id> или /jobs/<id>/events
+JOB_HANDLERS = (
+    "manager_maintenanceUpdateBrp",
+    "update_rules_check-for-updates",
+    "update_rules_start-download",
+    "update_rules_cancel-download",
+    "update_rules_download-and-apply",
+)
+
+def _async_requested():
+    return _request.args.get("async", "").lower() in ("1", "true", "yes")
+
+def _submit_job(kind, handler, args):
+    """Ставит обработчик в очередь задач: 202 и запись задачи без progress."""
+    job = job_manager.submit(kind, handler, args if isinstance(args, dict) else {})
+    return jsonify(JobSummarySchema().dump(job)), 202
+
+class JobSubmitRequestSchema(Schema):
+    handler = fields.Str(required=True, metadata={"description": f"Сценарий: {', '.join(JOB_HANDLERS)}"})
+    payload = fields.Dict(required=False, metadata={"description": "Тело запроса сценария, например {\"x-access-token\": \"...\"}"})
+
+class JobProgressSchema(Schema):
+    seq = fields.Int(metadata={"description": "Номер сообщения"})
+    ts = fields.Float(metadata={"description": "Время сообщения (unix)"})
+    level = fields.Str(metadata={"description": "Уровень лога"})
+    message = fields.Str(metadata={"description": "Сообщение"})
+
+class JobSummarySchema(Schema):
+    id = fields.Str(metadata={"description": "Идентификатор задачи"})
+    kind = fields.Str(metadata={"description": "Сценарий"})
+    status = fields.Str(metadata={"description": "queued, running, succeeded, failed, cancelled"})
+    pid = fields.Int(metadata={"description": "Процесс агента, выполняющий задачу"})
+    created = fields.Float(metadata={"description": "Время постановки (unix)"})
+    updated = fields.Float(metadata={"description": "Время последнего изменения (unix)"})
+    started = fields.Float(allow_none=True, metadata={"description": "Время запуска (unix)"})
+    finished = fields.Float(allow_none=True, metadata={"description": "Время завершения (unix)"})
+    result = fields.Raw(allow_none=True, metadata={"description": "Ответ сценария ({result: OK|ERROR, message})"})
+    error = fields.Str(allow_none=True, metadata={"description": "Исключение исполнителя"})
+    cancel_requested = fields.Bool(metadata={"description": "Запрошена отмена"})
+
+class JobSchema(JobSummarySchema):
+    progress = fields.List(fields.Nested(JobProgressSchema), metadata={"description": "Последние сообщения хода выполнения"})
+
+class JobListResponseSchema(Schema):
+    jobs = fields.List(fields.Nested(JobSummarySchema), metadata={"description": "Задачи, новые первыми"})
+
+@blp.route("/jobs", methods=["POST"])
+@blp.arguments(JobSubmitRequestSchema, location="json")
+@blp.response(202, JobSummarySchema, description="Запуск долгого сценария фоновой задачей")
+def submit_job(args):
+    """Ставит сценарий в очередь и сразу возвращает id задачи.
+
+    Тело запроса: {"handler": "update_rules_start-download", "payload": {"x-access-token": "token"}}
+    То же самое - POST на маршрут сценария с ?async=1.
+    """
+    kind = args["handler"]
+    if kind not in JOB_HANDLERS:
+        abort(400, message=f"Unknown handler '{kind}', expected one of: {', '.join(JOB_HANDLERS)}")
+    try:
+        handler = csi_handlers.get(kind)
+    except HandlerNotFound as e:
+        abort(500, message=str(e))
+    return job_manager.submit(kind, handler, args.get("payload") or {})
+
+@blp.route("/jobs", methods=["GET"])
+@blp.response(200, JobListResponseSchema, description="Список фоновых задач")
+def list_jobs():
+    return {"jobs": job_manager.list()}
+
+@blp.route("/jobs/<job_id>", methods=["GET"])
+@blp.response(200, JobSchema, description="Состояние, ход выполнения и результат задачи")
+def get_job(job_id):
+    try:
+        return job_manager.get(job_id)
+    except JobNotFound:
+        abort(404, message=f"Job {job_id} not found")
+
+@blp.route("/jobs/<job_id>/cancel", methods=["POST"])
+@blp.response(200, JobSummarySchema, description="Отмена задачи")
+def cancel_job(job_id):
+    """Запрашивает отмену: задача завершится со статусом cancelled в ближайшей паузе опроса."""
+    try:
+        return job_manager.cancel(job_id)
+    except JobNotFound:
+        abort(404, message=f"Job {job_id} not found")
+
+@blp.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """Поток text/event-stream: события progress, status, ping и done (последнее - с результатом)."""
+    events = job_manager.events(job_id)
+    try:
+        first = next(events)
+    except (JobNotFound, StopIteration):
+        abort(404, message=f"Job {job_id} not found")
+
+    def sse(event, data):
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+    def stream():
+        yield sse(*first)
+        for event, data in events:
+            yield sse(event, data)
+
+    return Response(stream_with_context(stream()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ---- Batch endpoint ----
+class BatchCheckSchema(Schema):
+    endpoint = fields.Str(required=True, metadata={"description": "Путь проверки без /api, например /filter"})
+    payload = fields.Raw(required=False, allow_none=True, metadata={"description": "Тело запроса проверки"})
+    method = fields.Str(required=False, metadata={"description": "HTTP-метод (по умолчанию POST)"})
+
+class BatchRequestSchema(Schema):
+    checks = fields.List(fields.Nested(BatchCheckSchema), required=True, metadata={"description": "Список проверок"})
+    concurrency = fields.Int(required=False, metadata={"description": "Сколько проверок выполнять одновременно"})
+
+class BatchResultSchema(Schema):
+    endpoint = fields.Str(metadata={"description": "Путь проверки"})
+    status = fields.Int(metadata={"description": "HTTP-код ответа проверки"})
+    body = fields.Raw(metadata={"description": "Ответ проверки"})
+    ms = fields.Float(metadata={"description": "Время выполнения проверки, мс"})
+
+class BatchResponseSchema(Schema):
+    results = fields.List(fields.Nested(BatchResultSchema), metadata={"description": "Результаты в порядке проверок"})
+
+@blp.route("/batch", methods=["POST"])
+@blp.arguments(BatchRequestSchema, location="json")
+@blp.response(200, BatchResponseSchema, description="Пакетное выполнение проверок агента")
+def batch(args):
+    """Выполняет несколько проверок одним запросом.
+
+    Тело запроса: {"checks": [{"endpoint": "/filter", "payload": {...}}, ...], "concurrency": 8}
+    Проверки идут параллельно; одновременные проверки iptables, tc и адресов
+    ждут один снимок состояния namespace (services/netns_state.py).
+    Результаты возвращаются в порядке проверок: {"results": [{"endpoint", "status", "body", "ms"}]}
+    """
+    try:
+        checks = args.get("checks", [])
+        concurrency = args.get("concurrency") or batch_runner.MAX_WORKERS
+        logger.info(f"=== ПАКЕТ ПРОВЕРОК: {len(checks)} ===")
+        return {"results": batch_runner.run_batch(app, checks, max_workers=concurrency)}
+    except ValueError as e:
+        abort(400, message=str(e))
+
 # Регистрируем blueprint
 api.register_blueprint(blp)
 
+# Загружаем обработчики csi-server при старте (в режиме gunicorn - один раз в мастере
+# до fork воркеров); MIRADA_HANDLER_PRELOAD=0 - загрузка при первом запросе
+if os.environ.get("MIRADA_HANDLER_PRELOAD", "1") != "0":
+    csi_handlers.load_all()
+    logger.info(csi_handlers.format_report())
+
+# Встроенный сервер Flask - режим MIRADA_SERVER=dev; в режиме gunicorn
+# (по умолчанию в start.sh) приложение импортируется как main:app
 if __name__ == "__main__":
     logger.info("Запуск Mirada Agent...")
     
@@ -38,6 +38,9 @@ if [ ! -x "./start.sh" ]; then
     chmod +x ./start.sh
 fi
 
+# stop.sh без --purge сохраняет виртуальное окружение: start.sh переустанавливает
+# зависимости только если изменились requirements.txt или Python
+# (полная переустановка: sudo MIRADA_REBUILD_VENV=1 ./restart.sh)
 echo "Останавливаем сервис..."
 if ./stop.sh; then
     echo "✓ Сервис успешно остановлен"
@@ -45,12 +48,8 @@ else
     echo "Предупреждение: Возникли проблемы при остановке сервиса"
 fi
 
-# Небольшая пауза между остановкой и запуском
-echo "Пауза перед запуском..."
-sleep 3
-
 echo "Запускаем сервис..."
-if ./start.sh; then
+if ./start.sh "$@"; then
     echo "✓ Сервис успешно запущен"
 else
     echo "✗ ОШИБКА: Не удалось запустить сервис"
@@ -0,0 +1,80 @@
+"""
+Пакетное выполнение проверок агента (POST /api/batch).
+
+Автотест присылает список проверок [{endpoint, payload}] одним запросом
+вместо отдельного HTTP-запроса через SSH-туннель на каждую. Проверки
+выполняются параллельно в ограниченном пуле потоков. Каждая проходит через
+обычный маршрут Flask (валидация marshmallow, коды ответа), поэтому
+результат такой же, как при одиночном вызове. Результаты возвращаются в
+порядке проверок.
+
+Отдельного кэша на пакет нет: состояние namespace ngfw (iptables, tc,
+адреса) проверки берут из снимков services/netns_state.py - параллельные
+проверки одного вида ждут один запуск команды, - процессы из
+services/process_table.py, базу объектов из services/objects/objects_db.py.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.environ.get("MIRADA_BATCH_WORKERS", 8))
+MAX_CHECKS = int(os.environ.get("MIRADA_BATCH_MAX_CHECKS", 200))
+
+
+def _run_check(app, prefix: str, check: dict) -> dict:
+    endpoint = check.get("endpoint")
+    method = str(check.get("method") or "POST").upper()
+    started = time.perf_counter()
+    if not isinstance(endpoint, str) or not endpoint.startswith("/"):
+        return {"endpoint": endpoint, "status": 400,
+                "body": {"result": "ERROR", "message": "Invalid 'endpoint'"}, "ms": 0.0}
+    if endpoint.rstrip("/") == "/batch":
+        return {"endpoint": endpoint, "status": 400,
+                "body": {"result": "ERROR", "message": "Nested batch is not allowed"}, "ms": 0.0}
+
+    payload = check.get("payload")
+    kwargs = {"json": payload} if payload is not None else {}
+    try:
+        response = app.test_client().open(prefix + endpoint, method=method, **kwargs)
+        body = response.get_json(silent=True)
+        if body is None:
+            body = response.get_data(as_text=True)
+        status = response.status_code
+    except Exception as e:
+        logger.error(f"Пакетная проверка {endpoint} завершилась исключением: {e}")
+        status, body = 500, {"result": "ERROR", "message": f"Internal error: {e}"}
+    return {"endpoint": endpoint, "status": status, "body": body,
+            "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+def run_batch(app, checks: List[dict], max_workers: int = MAX_WORKERS, prefix: str = "/api") -> List[dict]:
+    """
+    Выполняет проверки параллельно и возвращает результаты в исходном порядке.
+
+    Результат проверки: {"endpoint", "status" (HTTP-код маршрута), "body" (JSON ответа), "ms"}.
+
+    ИСКЛЮЧЕНИЯ:
+        ValueError: checks - не список или проверок больше MAX_CHECKS
+    """
+    if not isinstance(checks, list):
+        raise ValueError("'checks' must be a list")
+    if len(checks) > MAX_CHECKS:
+        raise ValueError(f"Too many checks: {len(checks)} > {MAX_CHECKS}")
+    if not checks:
+        return []
+
+    started = time.perf_counter()
+    workers = max(1, min(max_workers, MAX_WORKERS, len(checks)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        futures = [
+            pool.submit(_run_check, app, prefix, check if isinstance(check, dict) else {})
+            for check in checks
+        ]
+        results = [future.result() for future in futures]
+    logger.info(f"Пакет из {len(checks)} проверок выполнен за "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms ({workers} потоков)")
+    return results
@@ -0,0 +1,333 @@
+"""
+Чтение файлов контейнеров без docker cp на каждую проверку.
+
+Обработчики агента копировали файлы из контейнеров (docker cp во временный
+файл или каталог) на каждый запрос, иногда по несколько раз за запрос: файл
+конфигурации - отдельно для проверки наличия и для размера, лог - для
+наличия и для разбора. Этот модуль:
+    1) читает точки монтирования контейнера (docker inspect, результат
+       живёт MIRADA_MOUNTS_TTL секунд, по умолчанию 30) и, если путь лежит
+       в volume/bind, читает файл прямо с хоста - без копии и без запуска
+       внешних команд;
+    2) если точки монтирования нет, узнаёт время изменения и размер файла
+       (docker exec stat) и копирует содержимое потоком tar
+       (docker cp контейнер:путь -) без временных файлов на диске;
+    3) держит содержимое в LRU-кэше с ключом (контейнер, путь, mtime в
+       наносекундах, размер): неизменённый файл повторно не читается и не
+       копируется.
+Размер кэша - MIRADA_FILE_CACHE_BYTES (по умолчанию 64 МБ); файлы больше
+четверти кэша не кэшируются. Время изменения файла в контейнере берётся из
+stat %y (с долями секунды); если stat в контейнере нет, - из заголовка tar
+с точностью до секунды.
+
+Точки монтирования контейнера сбрасываются досрочно, если docker сообщает,
+что контейнера нет, или каталог-источник volume исчез: пересозданный
+контейнер читается по своим новым точкам монтирования.
+
+ИСПОЛЬЗОВАНИЕ:
+    from services.container_files import container_files
+
+    info = container_files.stat("csi.csi-server", "/tmp/miradaexport/config.bkp")   # FileInfo или None
+    data = container_files.read("csi.csi-server", "/app/ctld-logs/configuration-restore")  # bytes или None
+    listing = container_files.listdir("ngfw.vswitch", "/storage/cert")   # {имя: FileInfo} или None
+    host_path = container_files.host_path("shared.objects", "/objects/database")
+
+ИСКЛЮЧЕНИЯ:
+    ContainerFileError: docker недоступен или вернул ошибку, не означающую
+    отсутствие файла (отсутствующий файл - None)
+"""
+import json
+import logging
+import os
+import posixpath
+import re
+import stat as stat_module
+import subprocess
+import tarfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_BYTES = int(os.environ.get("MIRADA_FILE_CACHE_BYTES", 64 * 1024 * 1024))
+MOUNTS_TTL = float(os.environ.get("MIRADA_MOUNTS_TTL", 30.0))
+
+# docker exec stat и docker cp сообщают об отсутствующем пути так
+_MISSING_MARKERS = ("No such file", "Could not find the file")
+_NO_CONTAINER_MARKERS = ("No such container", "is not running")
+_STAT_TIME = re.compile(r"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)(?:\.(\d+))? ([+-]\d{4})")
+
+
+class ContainerFileError(RuntimeError):
+    """Файл контейнера не удалось прочитать (кроме случая, когда его нет)."""
+
+
+class FileInfo(NamedTuple):
+    mtime: float
+    size: int
+    is_dir: bool = False
+    mtime_ns: int = 0
+
+
+def _run(cmd: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, capture_output=True, text=True, check=False)
+
+
+def _is_missing(stderr: str) -> bool:
+    return any(marker in stderr for marker in _MISSING_MARKERS)
+
+
+def _stat_time_ns(text: str) -> Optional[int]:
+    """Время stat %y ("2024-05-01 10:00:00.123456789 +0000") в наносекундах (None - не разобрано)."""
+    match = _STAT_TIME.search(text)
+    if not match:
+        return None
+    moment = datetime.strptime(f"{match.group(1)} {match.group(3)}", "%Y-%m-%d %H:%M:%S %z")
+    fraction = (match.group(2) or "").ljust(9, "0")[:9]
+    return int(moment.timestamp()) * 1_000_000_000 + int(fraction)
+
+
+class ContainerFiles:
+    def __init__(self, cache_bytes: int = CACHE_BYTES, mounts_ttl: float = MOUNTS_TTL):
+        self.cache_bytes = cache_bytes
+        self.mounts_ttl = mounts_ttl
+        self._lock = threading.Lock()
+        self._mounts: Dict[str, Tuple[float, List[Tuple[str, str]]]] = {}
+        self._cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    # --- точки монтирования ---
+
+    def _container_mounts(self, container: str) -> List[Tuple[str, str]]:
+        with self._lock:
+            cached = self._mounts.get(container)
+            if cached is not None and time.monotonic() - cached[0] <= self.mounts_ttl:
+                return cached[1]
+        taken = time.monotonic()
+        result = _run(["docker", "inspect", "--format", "{{json .Mounts}}", container])
+        mounts: List[Tuple[str, str]] = []
+        if result.returncode == 0:
+            try:
+                for mount in json.loads(result.stdout or "[]") or []:
+                    destination = (mount.get("Destination") or "").rstrip("/") or "/"
+                    if mount.get("Source"):
+                        mounts.append((destination, mount["Source"]))
+            except ValueError:
+                logger.warning(f"docker inspect {container}: неразборчивый вывод")
+        else:
+            # Контейнер мог ещё не запуститься - не запоминаем, спросим в следующий раз
+            logger.warning(f"docker inspect {container}: {result.stderr.strip()}")
+            return []
+        # Сначала самые длинные точки монтирования: вложенный volume важнее родительского
+        mounts.sort(key=lambda item: len(item[0]), reverse=True)
+        with self._lock:
+            previous = self._mounts.get(container)
+            self._mounts[container] = (taken, mounts)
+        if previous is not None and previous[1] == mounts:
+            return mounts
+        logger.info(f"Точки монтирования {container}: {mounts}")
+        return mounts
+
+    def host_path(self, container: str, path: str) -> Optional[str]:
+        """Путь на хосте для пути в контейнере (None - путь не лежит в volume/bind)."""
+        path = posixpath.normpath(path)
+        for destination, source in self._container_mounts(container):
+            if path == destination:
+                return source
+            if destination == "/" or path.startswith(destination + "/"):
+                if os.path.isdir(source):
+                    return os.path.join(source, path[len(destination):].lstrip("/"))
+                if not os.path.exists(source):
+                    # Volume удалён - контейнер, скорее всего, пересоздан с другими точками монтирования
+                    logger.info(f"Источник {source} точки монтирования {container}:{destination} исчез")
+                    self.forget(container)
+                    return None
+        return None
+
+    def _check_container(self, container: str, stderr: str) -> None:
+        """Контейнера нет или он остановлен - его точки монтирования больше не верны."""
+        if any(marker in stderr for marker in _NO_CONTAINER_MARKERS):
+            self.forget(container)
+
+    def forget(self, container: Optional[str] = None) -> None:
+        """Сбрасывает точки монтирования (после пересоздания контейнера) и кэш содержимого."""
+        with self._lock:
+            if container is None:
+                self._mounts.clear()
+            else:
+                self._mounts.pop(container, None)
+            for key in [k for k in self._cache if container is None or k[0] == container]:
+                self._cached_bytes -= len(self._cache.pop(key))
+
+    # --- LRU ---
+
+    def _cache_get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            data = self._cache.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def _cache_put(self, key: tuple, data: bytes) -> None:
+        if len(data) > self.cache_bytes // 4:
+            return
+        with self._lock:
+            # Старые версии того же файла больше не понадобятся
+            for stale in [k for k in self._cache if k[:2] == key[:2] and k != key]:
+                self._cached_bytes -= len(self._cache.pop(stale))
+            if key not in self._cache:
+                self._cached_bytes += len(data)
+            self._cache[key] = data
+            self._cache.move_to_end(key)
+            while self._cached_bytes > self.cache_bytes and self._cache:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+
+    # --- без точки монтирования ---
+
+    def _exec_stat(self, container: str, path: str) -> Optional[FileInfo]:
+        result = _run(["docker", "exec", container, "stat", "-c", "%Y|%s|%F|%y", path])
+        if result.returncode != 0:
+            if _is_missing(result.stderr):
+                return None
+            self._check_container(container, result.stderr)
+            raise ContainerFileError(f"docker exec {container} stat {path}: {result.stderr.strip()}")
+        parts = result.stdout.strip().split("|", 3)
+        if len(parts) < 4:
+            raise ContainerFileError(f"docker exec {container} stat {path}: {result.stdout.strip()!r}")
+        seconds = int(parts[0])
+        mtime_ns = _stat_time_ns(parts[3]) or seconds * 1_000_000_000
+        return FileInfo(mtime_ns / 1e9, int(parts[1]), parts[2] == "directory", mtime_ns)
+
+    def _stream_tar(self, container: str, path: str) -> Optional[Dict[str, Tuple[FileInfo, Optional[bytes]]]]:
+        """docker cp контейнер:путь - потоком: {путь в архиве: (FileInfo, содержимое файла)}."""
+        cmd = ["docker", "cp", f"{container}:{path}", "-"]
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        members: Dict[str, Tuple[FileInfo, Optional[bytes]]] = {}
+        try:
+            with tarfile.open(fileobj=process.stdout, mode="r|") as archive:
+                for member in archive:
+                    info = FileInfo(float(member.mtime), member.size, member.isdir(),
+                                    int(member.mtime) * 1_000_000_000)
+                    data = None
+                    if member.isfile():
+                        extracted = archive.extractfile(member)
+                        data = extracted.read() if extracted else b""
+                    members[member.name.rstrip("/")] = (info, data)
+        except tarfile.ReadError:
+            members = {}
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read().decode(errors="replace")
+            process.stderr.close()
+            process.wait()
+        if process.returncode != 0:
+            if _is_missing(stderr):
+                return None
+            self._check_container(container, stderr)
+            raise ContainerFileError(f"{' '.join(cmd)}: rc={process.returncode} {stderr.strip()}")
+        return members
+
+    def _remote_stat(self, container: str, path: str) -> Optional[FileInfo]:
+        try:
+            return self._exec_stat(container, path)
+        except ContainerFileError as e:
+            # В контейнере может не быть stat - время и размер берём из заголовка tar
+            logger.warning(f"{e}; используется docker cp")
+        members = self._stream_tar(container, path)
+        if not members:
+            return None
+        info, data = next(iter(members.values()))
+        if data is not None:
+            self._cache_put((container, path, info.mtime_ns, info.size), data)
+        return info
+
+    # --- чтение ---
+
+    def stat(self, container: str, path: str) -> Optional[FileInfo]:
+        """Время изменения и размер файла или каталога (None - не существует)."""
+        host_path = self.host_path(container, path)
+        if host_path is not None:
+            try:
+                st = os.stat(host_path)
+            except FileNotFoundError:
+                return None
+            return FileInfo(st.st_mtime, st.st_size, stat_module.S_ISDIR(st.st_mode), st.st_mtime_ns)
+        return self._remote_stat(container, path)
+
+    def read(self, container: str, path: str) -> Optional[bytes]:
+        """Содержимое файла (None - не существует)."""
+        host_path = self.host_path(container, path)
+        if host_path is not None:
+            try:
+                st = os.stat(host_path)
+            except FileNotFoundError:
+                return None
+            key = (container, path, st.st_mtime_ns, st.st_size)
+            data = self._cache_get(key)
+            if data is None:
+                with open(host_path, "rb") as f:
+                    data = f.read()
+                self._cache_put(key, data)
+            return data
+
+        info = self._remote_stat(container, path)
+        if info is None:
+            return None
+        if info.is_dir:
+            raise ContainerFileError(f"{container}:{path} is a directory")
+        key = (container, path, info.mtime_ns, info.size)
+        data = self._cache_get(key)
+        if data is None:
+            members = self._stream_tar(container, path)
+            if not members:
+                return None
+            _, data = next(iter(members.values()))
+            self._cache_put(key, data or b"")
+        return data
+
+    def read_text(self, container: str, path: str, encoding: str = "utf-8") -> Optional[str]:
+        data = self.read(container, path)
+        return None if data is None else data.decode(encoding, errors="ignore")
+
+    def listdir(self, container: str, path: str) -> Optional[Dict[str, FileInfo]]:
+        """Файлы каталога с временем изменения и размером (None - каталога нет)."""
+        host_path = self.host_path(container, path)
+        if host_path is not None:
+            try:
+                listing = {}
+                with os.scandir(host_path) as entries:
+                    for entry in entries:
+                        st = entry.stat()
+                        listing[entry.name] = FileInfo(st.st_mtime, st.st_size, stat_module.S_ISDIR(st.st_mode),
+                                                       st.st_mtime_ns)
+                return listing
+            except (FileNotFoundError, NotADirectoryError):
+                return None
+
+        # Без точки монтирования каталог копируется одним потоком tar, содержимое файлов - в кэш
+        members = self._stream_tar(container, path)
+        if members is None:
+            return None
+        root = posixpath.basename(posixpath.normpath(path))
+        listing: Dict[str, FileInfo] = {}
+        for name, (info, data) in members.items():
+            parent, base = posixpath.split(name)
+            if parent != root:
+                continue
+            listing[base] = info
+            if data is not None:
+                member_path = posixpath.join(path, base)
+                self._cache_put((container, member_path, info.mtime_ns, info.size), data)
+        return listing
+
+
+container_files = ContainerFiles()
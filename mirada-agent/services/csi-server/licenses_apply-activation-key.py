@@ -22,7 +22,7 @@ import time
 import json
 import shlex
 import subprocess
-import requests
+from services.http_client import http_client
 import re
 
 
@@ -70,7 +70,7 @@ def _run_sh(cmd: str) -> subprocess.CompletedProcess:
 def _http_json(method: str, url: str, headers: Dict[str, str], body: Optional[Dict[str, Any]] = None) -> tuple[int, Dict[str, Any]]:
     # Глобальная пауза перед каждым HTTP-запросом для стабилизации последовательности
     time.sleep(1)
-    resp = requests.request(method=method.upper(), url=url, headers=headers, json=body, timeout=10)
+    resp = http_client.request(method=method.upper(), url=url, headers=headers, json=body, timeout=10)
     status = resp.status_code
     try:
         data = resp.json() if resp.content else {}
@@ -25,7 +25,7 @@ import os
 import shlex
 import subprocess
 
-import requests
+from services.http_client import http_client
 
 
 logger = logging.getLogger(__name__)
@@ -38,7 +38,7 @@ def _env(name: str, default: Optional[str] = None) -> Optional[str]:
 
 def _http_json(method: str, url: str, headers: Optional[Dict[str, str]] = None, body: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None) -> tuple[int, Any]:
     try:
-        resp = requests.request(method=method.upper(), url=url, headers=headers or {}, json=body, params=params, timeout=15)
+        resp = http_client.request(method=method.upper(), url=url, headers=headers or {}, json=body, params=params, timeout=15)
         status = resp.status_code
         try:
             data = resp.json() if resp.content else None
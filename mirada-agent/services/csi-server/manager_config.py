@@ -13,257 +13,151 @@ Behavior:
 2. Check configuration-restore log for import completion
 3. Return {"result": "OK"} if both checks pass, otherwise {"result": "ERROR", "message": "..."}
 
-No side effects. Uses subprocess.run with check=False only.
+No side effects. Files are read through services/container_files.py: directly
+from the host when the path is in a volume, otherwise one streamed docker cp
+per changed file.
 """
 
 from __future__ import annotations
 
 import logging
 import os
-import subprocess
 from typing import Dict, Any
 
+from services.container_files import ContainerFileError, container_files
+
 logger = logging.getLogger(__name__)
 
 
+def _config_location() -> tuple:
+    return (os.environ.get("CSI_SERVER_CONTAINER", "csi.csi-server"),
+            os.environ.get("CONFIG_BACKUP_PATH", "/tmp/miradaexport/config.bkp"))
+
+
+def _restore_log_location() -> tuple:
+    return (os.environ.get("CSI_SERVER_CONTAINER", "csi.csi-server"),
+            os.environ.get("CONFIG_RESTORE_LOG_PATH", "/app/ctld-logs/configuration-restore"))
+
+
+def _stat(container: str, path: str):
+    """FileInfo of a container file, None if it does not exist or cannot be checked."""
+    try:
+        return container_files.stat(container, path)
+    except ContainerFileError as e:
+        logger.error("Failed to stat %s:%s: %s", container, path, e)
+        return None
+
+
 def _check_config_file_exists() -> bool:
-    """Check if config.bkp file exists in csi.csi-server container by copying it to host.
+    """Check if config.bkp file exists (and is not empty) in csi.csi-server container.
     
     Returns:
-        True if file exists and can be copied, False otherwise
+        True if file exists and is not empty, False otherwise
     """
-    container = os.environ.get("CSI_SERVER_CONTAINER", "csi.csi-server")
-    config_path = os.environ.get("CONFIG_BACKUP_PATH", "/tmp/miradaexport/config.bkp")
-    
-    # Создаем временный файл на хосте
-    import tempfile
-    temp_dir = tempfile.gettempdir()
-    temp_path = os.path.join(temp_dir, f"config_check_{os.getpid()}.bkp")
-    
-    cmd = ["docker", "cp", f"{container}:{config_path}", temp_path]
-    logger.info("Copying config file to check existence: %s", " ".join(cmd))
-    
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        if result.returncode == 0:
-            logger.info("Config file %s successfully copied from container %s", config_path, container)
-            # Проверяем, что файл действительно скопировался
-            if os.path.exists(temp_path):
-                file_size = os.path.getsize(temp_path)
-                logger.info("Temporary config file exists on host: %s, size: %d bytes", temp_path, file_size)
-                file_exists = file_size > 0
-                if not file_exists:
-                    logger.warning("Config file copied but has zero size")
-            else:
-                logger.warning("Config file copied but temporary file doesn't exist on host: %s", temp_path)
-                file_exists = False
-            return file_exists
-        else:
-            logger.warning("Config file %s not found in container %s: %s", config_path, container, result.stderr)
-            return False
-    except Exception as e:
-        logger.error("Failed to copy config file: %s", e)
+    container, config_path = _config_location()
+    info = _stat(container, config_path)
+    if info is None or info.is_dir:
+        logger.warning("Config file %s not found in container %s", config_path, container)
         return False
-    finally:
-        # Удаляем временный файл
-        try:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-                logger.debug("Temporary file %s removed", temp_path)
-        except Exception as e:
-            logger.warning("Failed to remove temporary file %s: %s", temp_path, e)
+    logger.info("Config file %s found in container %s, size: %d bytes", config_path, container, info.size)
+    if info.size == 0:
+        logger.warning("Config file exists but has zero size")
+    return info.size > 0
 
 
 def _check_config_file_size() -> int:
-    """Get size of config.bkp file in bytes by copying it to host.
+    """Get size of config.bkp file in bytes.
     
     Returns:
         File size in bytes, or -1 if error
     """
-    container = os.environ.get("CSI_SERVER_CONTAINER", "csi.csi-server")
-    config_path = os.environ.get("CONFIG_BACKUP_PATH", "/tmp/miradaexport/config.bkp")
-    
-    # Создаем временный файл на хосте
-    import tempfile
-    temp_dir = tempfile.gettempdir()
-    temp_path = os.path.join(temp_dir, f"config_size_{os.getpid()}.bkp")
-    
-    cmd = ["docker", "cp", f"{container}:{config_path}", temp_path]
-    logger.info("Copying config file to check size: %s", " ".join(cmd))
-    
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        if result.returncode == 0:
-            # Получаем размер скопированного файла
-            file_size = -1
-            if os.path.exists(temp_path):
-                file_size = os.path.getsize(temp_path)
-                logger.info("Config file size: %d bytes", file_size)
-            else:
-                logger.warning("Config file was copied but doesn't exist on host")
-            
-            return file_size
-        else:
-            logger.warning("Failed to copy config file for size check: %s", result.stderr)
-            return -1
-    except Exception as e:
-        logger.error("Error copying config file for size check: %s", e)
+    container, config_path = _config_location()
+    info = _stat(container, config_path)
+    if info is None:
+        logger.warning("Config file %s not found for size check", config_path)
         return -1
-    finally:
-        # Удаляем временный файл
-        try:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-                logger.debug("Temporary file %s removed", temp_path)
-        except Exception as e:
-            logger.warning("Failed to remove temporary file %s: %s", temp_path, e)
+    logger.info("Config file size: %d bytes", info.size)
+    return info.size
 
 
 def _check_restore_log_exists() -> bool:
-    """Check if configuration-restore log exists in csi.csi-server container by copying it.
+    """Check if configuration-restore log exists in csi.csi-server container.
     
     Returns:
-        True if log exists and can be copied, False otherwise
+        True if log exists, False otherwise
     """
-    container = os.environ.get("CSI_SERVER_CONTAINER", "csi.csi-server")
-    log_path = os.environ.get("CONFIG_RESTORE_LOG_PATH", "/app/ctld-logs/configuration-restore")
-    
-    # Создаем временный файл на хосте
-    import tempfile
-    temp_dir = tempfile.gettempdir()
-    temp_path = os.path.join(temp_dir, f"restore_log_check_{os.getpid()}.log")
-    
-    cmd = ["docker", "cp", f"{container}:{log_path}", temp_path]
-    logger.info("Copying restore log to check existence: %s", " ".join(cmd))
-    
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        if result.returncode == 0:
-            logger.info("Restore log %s successfully copied from container %s", log_path, container)
-            # Проверяем, что файл действительно скопировался
-            if os.path.exists(temp_path):
-                file_size = os.path.getsize(temp_path)
-                logger.info("Temporary restore log exists on host: %s, size: %d bytes", temp_path, file_size)
-                log_exists = True
-            else:
-                logger.warning("Restore log copied but temporary file doesn't exist on host: %s", temp_path)
-                log_exists = False
-            return log_exists
-        else:
-            logger.warning("Restore log %s not found in container %s: %s", log_path, container, result.stderr)
-            return False
-    except Exception as e:
-        logger.error("Failed to copy restore log: %s", e)
+    container, log_path = _restore_log_location()
+    info = _stat(container, log_path)
+    if info is None or info.is_dir:
+        logger.warning("Restore log %s not found in container %s", log_path, container)
         return False
-    finally:
-        # Удаляем временный файл
-        try:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-                logger.debug("Temporary file %s removed", temp_path)
-        except Exception as e:
-            logger.warning("Failed to remove temporary file %s: %s", temp_path, e)
+    logger.info("Restore log %s found in container %s, size: %d bytes", log_path, container, info.size)
+    return True
 
 
 def _analyze_restore_log() -> Dict[str, Any]:
-    """Analyze configuration-restore log for import completion markers by copying it to host.
+    """Analyze configuration-restore log for import completion markers.
     
     Returns:
         Dict with analysis results: {"success": bool, "messages": list, "error": str}
     """
-    container = os.environ.get("CSI_SERVER_CONTAINER", "csi.csi-server")
-    log_path = os.environ.get("CONFIG_RESTORE_LOG_PATH", "/app/ctld-logs/configuration-restore")
-    
-    # Создаем временный файл на хосте
-    import tempfile
-    temp_dir = tempfile.gettempdir()
-    temp_path = os.path.join(temp_dir, f"restore_log_analysis_{os.getpid()}.log")
-    
-    cmd = ["docker", "cp", f"{container}:{log_path}", temp_path]
-    logger.info("Copying restore log for analysis: %s", " ".join(cmd))
-    
+    container, log_path = _restore_log_location()
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        if result.returncode != 0:
-            logger.error("Failed to copy restore log: %s", result.stderr)
-            return {"success": False, "messages": [], "error": "Failed to copy restore log"}
-        
-        # Читаем скопированный файл
-        if not os.path.exists(temp_path):
-            logger.error("Copied restore log file doesn't exist on host")
-            return {"success": False, "messages": [], "error": "Copied restore log file not found"}
-        
-        analysis_result = {"success": False, "messages": [], "error": None}
-        
-        try:
-            with open(temp_path, 'r', encoding='utf-8', errors='ignore') as f:
-                log_content = f.read()
-            
-            lines = log_content.split('\n')
-            
-            # Ищем признаки успешного импорта
-            success_patterns = [
-                "done dumping",
-                "writing",
-                "archive on stdout"
-            ]
-            
-            error_patterns = [
-                "error",
-                "failed",
-                "exception"
-            ]
-            
-            success_count = 0
-            error_count = 0
-            messages = []
-            
-            for line in lines:
-                line_lower = line.lower()
-                
-                # Проверяем на ошибки
-                for error_pattern in error_patterns:
-                    if error_pattern in line_lower:
-                        error_count += 1
-                        messages.append(f"Error found: {line.strip()}")
-                        break
-                
-                # Проверяем на успешные операции
-                for success_pattern in success_patterns:
-                    if success_pattern in line_lower:
-                        success_count += 1
-                        break
-            
-            logger.info("Restore log analysis: success_count=%d, error_count=%d", success_count, error_count)
-            
-            # Считаем импорт успешным если есть успешные операции и нет критических ошибок
-            is_success = success_count > 0 and error_count == 0
-            
-            analysis_result = {
-                "success": is_success,
-                "messages": messages,
-                "error": None,
-                "success_count": success_count,
-                "error_count": error_count
-            }
-            
-        except Exception as e:
-            logger.error("Error reading restore log file: %s", e)
-            analysis_result = {"success": False, "messages": [], "error": f"File reading error: {str(e)}"}
-        
-        return analysis_result
-        
-    except Exception as e:
-        logger.error("Error analyzing restore log: %s", e)
-        return {"success": False, "messages": [], "error": f"Analysis error: {str(e)}"}
-    finally:
-        # Удаляем временный файл
-        try:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-                logger.debug("Temporary file %s removed", temp_path)
-        except Exception as e:
-            logger.warning("Failed to remove temporary file %s: %s", temp_path, e)
+        log_content = container_files.read_text(container, log_path)
+    except (ContainerFileError, OSError) as e:
+        logger.error("Failed to read restore log: %s", e)
+        return {"success": False, "messages": [], "error": "Failed to read restore log"}
+    if log_content is None:
+        logger.error("Restore log %s not found in container %s", log_path, container)
+        return {"success": False, "messages": [], "error": "Restore log file not found"}
+
+    lines = log_content.split('\n')
+
+    # Ищем признаки успешного импорта
+    success_patterns = [
+        "done dumping",
+        "writing",
+        "archive on stdout"
+    ]
+
+    error_patterns = [
+        "error",
+        "failed",
+        "exception"
+    ]
+
+    success_count = 0
+    error_count = 0
+    messages = []
+
+    for line in lines:
+        line_lower = line.lower()
+
+        # Проверяем на ошибки
+        for error_pattern in error_patterns:
+            if error_pattern in line_lower:
+                error_count += 1
+                messages.append(f"Error found: {line.strip()}")
+                break
+
+        # Проверяем на успешные операции
+        for success_pattern in success_patterns:
+            if success_pattern in line_lower:
+                success_count += 1
+                break
+
+    logger.info("Restore log analysis: success_count=%d, error_count=%d", success_count, error_count)
+
+    # Считаем импорт успешным если есть успешные операции и нет критических ошибок
+    is_success = success_count > 0 and error_count == 0
+
+    return {
+        "success": is_success,
+        "messages": messages,
+        "error": None,
+        "success_count": success_count,
+        "error_count": error_count
+    }
 
 
 def handle() -> Dict[str, Any]:
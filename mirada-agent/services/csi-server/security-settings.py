@@ -14,12 +14,14 @@ Input JSON examples:
   {}
 
 Behavior:
-  1) Executes a safe docker exec command to read current values
+  1) Reads current values through a long-lived node worker in the container
+     (services/node_worker.py); falls back to a one-shot docker exec when the
+     worker is unavailable or SECURITY_SETTINGS_* overrides are set
   2) Parses JSON output: {bad_auth_decay_s, block_time_s, max_bad_auth_attempts}
   3) Compares only fields present in request payload
   4) Returns {result: "OK"} if all provided fields match, otherwise {result: "ERROR", message}
 
-No side effects. Uses subprocess.run with check=False only.
+No side effects. The one-shot path uses subprocess.run with check=False only.
 """
 
 from __future__ import annotations
@@ -27,10 +29,11 @@ from __future__ import annotations
 import json
 import logging
 import os
-import shlex
 import subprocess
 from typing import Any, Dict, List
 
+from services.node_worker import NodeScriptError, NodeWorkerError, get_worker
+
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +57,39 @@ def _build_node_script() -> str:
     )
 
 
+# Body of an async function run by the node worker; the bus connection is kept
+# in globalThis between requests and dropped after any failure.
+_WORKER_SCRIPT = (
+    "const Bus=require(\"@codemaster/bus\");"
+    "if(!globalThis.__securitySettingsCall){globalThis.__securitySettingsCall="
+    "new Bus(process.env.BUS_SOCKET).rpc(\"configuration\",Bus.EMITTER,Bus.json_convert).call;}"
+    "const call=globalThis.__securitySettingsCall;"
+    "try{const cur=await call({\"current-revision\":{domain:\"auth-settings\"}});"
+    "const v=(await call({get:{revision:cur.id,path:\"\"}}))||{};"
+    "return {bad_auth_decay_s:Number(v.bad_auth_decay_s),block_time_s:Number(v.block_time_s),max_bad_auth_attempts:Number(v.max_bad_auth_attempts)};}"
+    "catch(e){delete globalThis.__securitySettingsCall;throw e;}"
+)
+
+
+def _worker_enabled() -> bool:
+    """The worker runs the built-in query only: script/command overrides use the one-shot path."""
+    if os.environ.get("SECURITY_SETTINGS_NODE_SCRIPT") or os.environ.get("SECURITY_SETTINGS_QUERY_CMD"):
+        return False
+    return os.environ.get("SECURITY_SETTINGS_WORKER", "1").lower() not in ("0", "false", "no")
+
+
+def _query_via_worker() -> Any:
+    """Run the settings query in the long-lived node worker of the csi-server container.
+
+    Raises:
+        NodeScriptError: the query itself failed (bus error)
+        NodeWorkerError: the worker is unavailable (it is restarted on the next call)
+    """
+    container = os.environ.get("CSI_SERVER_CONTAINER", "csi.csi-server")
+    node_bin = os.environ.get("NODE_BIN", "node")
+    return get_worker(container, node_bin).call(_WORKER_SCRIPT)
+
+
 def _execute_query() -> subprocess.CompletedProcess:
     """Execute the docker+node command safely and return CompletedProcess.
 
@@ -73,13 +109,10 @@ def _execute_query() -> subprocess.CompletedProcess:
     node_bin = os.environ.get("NODE_BIN", "node")
     script = _build_node_script()
 
-    # Build a safe shell command; script goes inside single quotes for -e '...'
-    # We quote container name to avoid injection; node -e body is a literal
-    cmd = (
-        f"docker exec -i {shlex.quote(container)} {shlex.quote(node_bin)} -e '" + script + "'"
-    )
+    # Arguments go to docker directly, no shell quoting of the script is involved
+    cmd = ["docker", "exec", "-i", container, node_bin, "-e", script]
     logger.info("Executing security settings query: docker exec to %s", container)
-    return subprocess.run(["bash", "-lc", cmd], capture_output=True, text=True, check=False)
+    return subprocess.run(cmd, capture_output=True, text=True, check=False)
 
 
 def _parse_current_settings(stdout_text: str) -> Dict[str, int] | None:
@@ -103,6 +136,11 @@ def _parse_current_settings(stdout_text: str) -> Dict[str, int] | None:
                 data = json.loads(m.group(0))
             except Exception:
                 data = None
+    return _normalize_settings(data)
+
+
+def _normalize_settings(data: Any) -> Dict[str, int] | None:
+    """Keep known keys with int-convertible values; None if data is not an object."""
     if not isinstance(data, dict):
         return None
 
@@ -158,17 +196,30 @@ def handle(request_body: Dict[str, Any]) -> Dict[str, Any]:
         return {"result": "ERROR", "message": vr}
     expected = vr  # dict of keys to verify
 
-    try:
-        proc = _execute_query()
-    except Exception as e:
-        logger.error("Failed to execute security settings query: %s", e)
-        return {"result": "ERROR", "message": f"Execution failure: {e}"}
+    current = None
+    use_one_shot = True
+    if _worker_enabled():
+        try:
+            current = _normalize_settings(_query_via_worker())
+            use_one_shot = False
+        except NodeScriptError as e:
+            return {"result": "ERROR", "message": str(e) or "Query command failed"}
+        except NodeWorkerError as e:
+            logger.warning("Node worker unavailable, falling back to one-shot docker exec: %s", e)
+
+    if use_one_shot:
+        try:
+            proc = _execute_query()
+        except Exception as e:
+            logger.error("Failed to execute security settings query: %s", e)
+            return {"result": "ERROR", "message": f"Execution failure: {e}"}
+
+        if proc.returncode != 0:
+            stderr = (proc.stderr or "").strip()
+            return {"result": "ERROR", "message": stderr or "Query command failed"}
 
-    if proc.returncode != 0:
-        stderr = (proc.stderr or "").strip()
-        return {"result": "ERROR", "message": stderr or "Query command failed"}
+        current = _parse_current_settings(proc.stdout or "")
 
-    current = _parse_current_settings(proc.stdout or "")
     if current is None:
         # Provide stderr snippet for easier diagnostics but keep deterministic message
         return {"result": "ERROR", "message": "Invalid JSON from query"}
@@ -52,7 +52,8 @@ import logging
 import threading
 from typing import Any, Dict, Optional, Tuple
 
-import requests
+from services import jobs
+from services.http_client import http_client
 
 
 logger = logging.getLogger(__name__)
@@ -81,7 +82,7 @@ def _http_json(method: str, url: str, headers: Dict[str, str], body: Optional[Di
     kwargs: Dict[str, Any] = {"headers": headers, "timeout": timeout}
     if body is not None:
         kwargs["json"] = body
-    resp = requests.request(method=method.upper(), url=url, **kwargs)
+    resp = http_client.request(method=method.upper(), url=url, **kwargs)
     status = resp.status_code
     try:
         data = resp.json() if resp.content else {}
@@ -156,7 +157,7 @@ def _maintenance_update_brp(local_base: str, token: str) -> Tuple[bool, str]:
     """Выполняет обновление BRP и ожидает завершения"""
     # 4) Основной POST: /manager/maintenanceUpdateBrp
     logger.info("step4: POST maintenanceUpdateBrp")
-    post_headers = {"x-access-token": token, "Connection": "keep-alive", "Keep-Alive": "timeout=60, max=1000"}
+    post_headers = {"x-access-token": token}
     post_timeout = int(_env("MAINTENANCE_POST_TIMEOUT", "60") or 60)
     st, resp = _http_json("POST", f"{local_base}/manager/maintenanceUpdateBrp", post_headers, body=None, timeout=post_timeout)
     if st != 200:
@@ -168,7 +169,7 @@ def _maintenance_update_brp(local_base: str, token: str) -> Tuple[bool, str]:
     interval_s = int(_env("MAINTENANCE_STATUS_INTERVAL", "2") or 2)
     start_ts = time.time()
     while True:
-        st_s, resp_s = _http_json("GET", f"{local_base}/manager/maintenanceUpdateBrpStatus", {"x-access-token": token, "Connection": "keep-alive"}, body=None, timeout=max(interval_s * 2, 10))
+        st_s, resp_s = _http_json("GET", f"{local_base}/manager/maintenanceUpdateBrpStatus", {"x-access-token": token}, body=None, timeout=max(interval_s * 2, 10))
         if st_s != 200:
             return False, f"status GET failed: {st_s}"
         msg = resp_s.get("message") if isinstance(resp_s, dict) else None
@@ -177,11 +178,11 @@ def _maintenance_update_brp(local_base: str, token: str) -> Tuple[bool, str]:
             break
         if time.time() - start_ts > max_wait_s:
             return False, "status timeout"
-        time.sleep(interval_s)
+        jobs.sleep(interval_s)
 
     # 4.2) Получить статус и логи
     logger.info("step4.2: GET maintenanceUpdateBrpStatusAndLogs")
-    st_l, resp_l = _http_json("GET", f"{local_base}/manager/maintenanceUpdateBrpStatusAndLogs", {"x-access-token": token, "Connection": "keep-alive"}, body=None, timeout=30)
+    st_l, resp_l = _http_json("GET", f"{local_base}/manager/maintenanceUpdateBrpStatusAndLogs", {"x-access-token": token}, body=None, timeout=30)
     if st_l != 200:
         return False, f"statusAndLogs GET failed: {st_l}"
     if not isinstance(resp_l, dict) or resp_l.get("message") != "OK":
@@ -40,7 +40,8 @@ import time
 import logging
 from typing import Any, Dict, Optional, Tuple
 
-import requests
+from services import jobs
+from services.http_client import http_client
 import importlib.util as _importlib_util
 
 
@@ -70,7 +71,7 @@ def _http_json(method: str, url: str, headers: Dict[str, str], body: Optional[Di
     kwargs: Dict[str, Any] = {"headers": headers, "timeout": timeout}
     if body is not None:
         kwargs["json"] = body
-    resp = requests.request(method=method.upper(), url=url, **kwargs)
+    resp = http_client.request(method=method.upper(), url=url, **kwargs)
     status = resp.status_code
     try:
         data = resp.json() if resp.content else {}
@@ -137,7 +138,7 @@ def _poll_ruleset_stats(local_base: str, token: str) -> Tuple[bool, str]:
                 return True, "ok"
         if time.time() - start_ts > max_wait_s:
             return False, "ruleset-stats timeout"
-        time.sleep(interval_s)
+        jobs.sleep(interval_s)
 
 
 def handle(body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
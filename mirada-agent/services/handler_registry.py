@@ -0,0 +1,144 @@
+"""
+Реестр обработчиков csi-server: модуль импортируется один раз, handle() кэшируется.
+
+Файлы services/csi-server/*.py имеют дефисы в именах и не импортируются
+обычным import, поэтому раньше каждый маршрут main.py на каждом запросе
+строил spec и выполнял spec.loader.exec_module - модуль заново читался,
+компилировался и исполнялся. Реестр делает это один раз: при старте
+(load_all) или при первом обращении к обработчику, дальше отдаёт
+закэшированную функцию.
+
+Для разработки есть перезагрузка по mtime (MIRADA_HANDLER_RELOAD=1): перед
+выдачей обработчика сверяется время изменения файла, изменённый модуль
+импортируется заново.
+
+ИСПОЛЬЗОВАНИЕ:
+    registry = HandlerRegistry(os.path.join(BASE_DIR, "services", "csi-server"))
+    registry.load_all()
+    logger.info(registry.format_report())
+
+    handler = registry.get("update_rules_start-download")
+    result = handler(args)
+"""
+import importlib.util
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class HandlerNotFound(ImportError):
+    """Модуль обработчика отсутствует, не импортируется или в нём нет функции."""
+
+
+class _Entry:
+    def __init__(self, handler: Callable, mtime: float, load_ms: float):
+        self.handler = handler
+        self.mtime = mtime
+        self.load_ms = load_ms
+
+
+class HandlerRegistry:
+    def __init__(self, directory: str, attribute: str = "handle", reload: bool = False):
+        self.directory = directory
+        self.attribute = attribute
+        self.reload = reload
+        self._entries: Dict[str, _Entry] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.py")
+
+    def names(self) -> List[str]:
+        """Имена всех модулей каталога (имя файла без .py)."""
+        try:
+            files = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(f[:-3] for f in files if f.endswith(".py") and not f.startswith("_"))
+
+    def _load(self, name: str) -> _Entry:
+        path = self._path(name)
+        started = time.perf_counter()
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            raise HandlerNotFound(f"Handler module not found: {name}")
+        spec = importlib.util.spec_from_file_location(name.replace("-", "_"), path)
+        if spec is None or spec.loader is None:
+            raise HandlerNotFound(f"Handler module not found: {name}")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        handler = getattr(module, self.attribute, None)
+        if handler is None:
+            raise HandlerNotFound(f"Handler function missing: {name}.{self.attribute}")
+        return _Entry(handler, mtime, (time.perf_counter() - started) * 1000)
+
+    def _stale(self, name: str, entry: _Entry) -> bool:
+        try:
+            return os.path.getmtime(self._path(name)) != entry.mtime
+        except OSError:
+            return False
+
+    def get(self, name: str) -> Callable:
+        """
+        Обработчик модуля name; при первом обращении модуль импортируется.
+
+        ИСКЛЮЧЕНИЯ:
+            HandlerNotFound: нет файла или функции handle
+            Exception: ошибка при исполнении модуля пробрасывается как есть
+        """
+        entry = self._entries.get(name)
+        if entry is not None and not (self.reload and self._stale(name, entry)):
+            return entry.handler
+        with self._lock:
+            # Другой поток мог загрузить модуль, пока ждали блокировку
+            entry = self._entries.get(name)
+            if entry is None or (self.reload and self._stale(name, entry)):
+                if entry is not None:
+                    logger.info(f"Перезагрузка обработчика {name}: файл изменён")
+                try:
+                    entry = self._load(name)
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._entries[name] = entry
+                self._errors.pop(name, None)
+            return entry.handler
+
+    def load_all(self) -> None:
+        """Импортирует все модули каталога; ошибки запоминаются для отчёта, не прерывают старт."""
+        for name in self.names():
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"Обработчик {name} не загружен: {e}")
+
+    def report(self) -> List[dict]:
+        """Время загрузки каждого модуля: [{"name", "load_ms", "error"}] в порядке имён."""
+        with self._lock:
+            names = sorted(set(self._entries) | set(self._errors))
+            return [
+                {
+                    "name": name,
+                    "load_ms": round(self._entries[name].load_ms, 1) if name in self._entries else None,
+                    "error": self._errors.get(name),
+                }
+                for name in names
+            ]
+
+    def format_report(self) -> str:
+        rows = self.report()
+        loaded = [row for row in rows if row["error"] is None]
+        total = sum(row["load_ms"] for row in loaded)
+        lines = [f"Обработчики csi-server: загружено {len(loaded)} из {len(rows)} за {total:.1f} ms"]
+        for row in rows:
+            if row["error"] is None:
+                lines.append(f"  {row['name']:<40} {row['load_ms']:>8.1f} ms")
+            else:
+                lines.append(f"  {row['name']:<40}   ERROR: {row['error']}")
+        return "\n".join(lines)
@@ -0,0 +1,123 @@
+"""
+Общий HTTP-клиент агента: пул keep-alive соединений на каждый upstream.
+
+Обработчики вызывали requests.request / requests.get на уровне модуля:
+каждый вызов создаёт временную сессию и новое TCP-соединение, поэтому
+заголовки Connection: keep-alive в циклах опроса статуса ничего не
+переиспользовали. Клиент держит по одной requests.Session на upstream
+(схема, хост, порт) с собственным пулом соединений urllib3:
+    - последовательные запросы к одному upstream (например, опрос
+      maintenanceUpdateBrpStatus) идут по одному keep-alive соединению;
+    - параллельные запросы из потоков gunicorn берут соединения из пула
+      размером MIRADA_HTTP_POOL (по умолчанию 16);
+    - повтор при ошибке установки соединения - MIRADA_HTTP_RETRIES раз
+      (по умолчанию 2) с паузой MIRADA_HTTP_BACKOFF; повтор после ошибки
+      чтения - только для идемпотентных методов (POST не повторяется);
+    - таймаут соединения MIRADA_HTTP_CONNECT_TIMEOUT (по умолчанию 5 с),
+      таймаут ответа - аргумент timeout или MIRADA_HTTP_TIMEOUT (15 с).
+Cookies сессии не сохраняет: обработчики авторизуются заголовком
+x-access-token, и ответ одного обработчика не должен влиять на другой.
+
+Сессии свои у каждого процесса агента (после fork воркера gunicorn
+соединения родителя не используются).
+
+ИСПОЛЬЗОВАНИЕ:
+    from services.http_client import http_client
+
+    resp = http_client.request("POST", url, headers=headers, json=body, timeout=30)
+    resp = http_client.get("http://localhost:7779/api/forwardRules")
+
+ИСКЛЮЧЕНИЯ:
+    requests.RequestException: как у requests.request (соединение не
+    установлено после всех повторов, таймаут ответа)
+"""
+import http.cookiejar
+import logging
+import os
+import threading
+from typing import Dict, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.environ.get("MIRADA_HTTP_POOL", 16))
+RETRIES = int(os.environ.get("MIRADA_HTTP_RETRIES", 2))
+BACKOFF = float(os.environ.get("MIRADA_HTTP_BACKOFF", 0.2))
+CONNECT_TIMEOUT = float(os.environ.get("MIRADA_HTTP_CONNECT_TIMEOUT", 5.0))
+DEFAULT_TIMEOUT = float(os.environ.get("MIRADA_HTTP_TIMEOUT", 15.0))
+
+Timeout = Union[None, float, Tuple[float, float]]
+
+
+def _retry_policy() -> Retry:
+    return Retry(
+        total=RETRIES,
+        connect=RETRIES,
+        read=RETRIES,
+        status=0,
+        backoff_factor=BACKOFF,
+        # Ошибка чтения после отправки POST не повторяется: запрос мог выполниться
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}),
+        raise_on_status=False,
+    )
+
+
+class HttpClient:
+    def __init__(self, pool_size: int = POOL_SIZE):
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._pid = os.getpid()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=_retry_policy())
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        return session
+
+    def session(self, url: str) -> requests.Session:
+        """Сессия upstream адреса url (создаётся при первом обращении)."""
+        parts = urlsplit(url)
+        upstream = f"{parts.scheme}://{parts.netloc}".lower()
+        with self._lock:
+            if self._pid != os.getpid():
+                # После fork пул соединений родителя не наш
+                self._sessions = {}
+                self._pid = os.getpid()
+            session = self._sessions.get(upstream)
+            if session is None:
+                session = self._sessions[upstream] = self._new_session()
+                logger.debug(f"HTTP пул для {upstream} создан")
+            return session
+
+    def request(self, method: str, url: str, timeout: Timeout = None, **kwargs) -> requests.Response:
+        """requests.request через пул upstream; timeout - секунды ответа или (соединение, ответ)."""
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        if not isinstance(timeout, tuple):
+            timeout = (min(CONNECT_TIMEOUT, timeout), timeout)
+        return self.session(url).request(method=method.upper(), url=url, timeout=timeout, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+
+http_client = HttpClient()
@@ -0,0 +1,386 @@
+"""
+Фоновые задачи агента для долгих сценариев (обновление BRP, загрузка правил IDS).
+
+Обработчики /update/rules/* и /manager/maintenanceUpdateBrp опрашивают
+статус CDM минутами (MAINTENANCE_STATUS_TIMEOUT по умолчанию 300 с), и всё
+это время держат поток запроса и HTTP-соединение автотеста. Задача
+выполняет обработчик в пуле потоков процесса (MIRADA_JOB_WORKERS, по
+умолчанию 4), а запрос сразу получает id:
+    - состояние задачи - JSON-файл в MIRADA_JOBS_DIR (по умолчанию
+      <tmp>/mirada-agent-jobs), поэтому его видит любой воркер gunicorn,
+      а не только тот, что выполняет задачу;
+    - ход выполнения - сообщения логов INFO и выше из потока задачи
+      (последние MAX_PROGRESS) в поле progress; файл задачи переписывается
+      не чаще раза в PROGRESS_FLUSH_INTERVAL секунд (накопленное
+      дописывается в точках проверки отмены и при смене состояния);
+    - отмена - файл-флаг <id>.cancel: задача завершается в ближайшей
+      точке проверки (jobs.sleep / jobs.checkpoint в циклах опроса);
+    - задача процесса, который завершился, читается как failed (процесс
+      сверяется по pid и времени запуска из /proc/<pid>/stat, поэтому pid,
+      доставшийся другому процессу, не считается живым агентом).
+Файлы завершённых задач удаляются через MIRADA_JOB_TTL секунд (3600).
+
+Состояния: queued -> running -> succeeded | failed | cancelled
+(succeeded - обработчик вернул результат, сам результат может быть ERROR).
+
+ИСПОЛЬЗОВАНИЕ:
+    from services import jobs
+    from services.jobs import job_manager
+
+    job = job_manager.submit("update_rules_start-download", handler, payload)   # {"id", "status", ...}
+    job_manager.get(job["id"])
+    job_manager.cancel(job["id"])
+    for event, data in job_manager.events(job["id"]): ...   # для text/event-stream
+
+    # в цикле опроса обработчика - вместо time.sleep
+    jobs.sleep(interval_s)
+
+ИСКЛЮЧЕНИЯ:
+    JobNotFound: задачи с таким id нет (или её файл уже удалён)
+    JobCancelled: задача отменена (бросается из jobs.sleep / jobs.checkpoint)
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.environ.get("MIRADA_JOBS_DIR") or os.path.join(tempfile.gettempdir(), "mirada-agent-jobs")
+MAX_WORKERS = int(os.environ.get("MIRADA_JOB_WORKERS", 4))
+JOB_TTL = float(os.environ.get("MIRADA_JOB_TTL", 3600))
+MAX_PROGRESS = 200
+CHECK_INTERVAL = 0.2
+PROGRESS_FLUSH_INTERVAL = 0.5
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class JobNotFound(KeyError):
+    """Задачи с таким id нет."""
+
+
+class JobCancelled(BaseException):
+    """
+    Задача отменена. Наследуется от BaseException: обработчики ловят
+    Exception и превращают его в {"result": "ERROR"}, а отмена должна
+    дойти до исполнителя задачи.
+    """
+
+
+_current = threading.local()
+
+
+def checkpoint() -> None:
+    """Бросает JobCancelled, если задача текущего потока отменена (вне задачи - ничего)."""
+    job_id = getattr(_current, "job_id", None)
+    if job_id is None:
+        return
+    job_manager._flush_progress(job_id)
+    if job_manager.is_cancel_requested(job_id):
+        raise JobCancelled(job_id)
+
+
+def sleep(seconds: float) -> None:
+    """time.sleep с проверкой отмены задачи каждые CHECK_INTERVAL секунд."""
+    deadline = time.monotonic() + seconds
+    while True:
+        checkpoint()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(CHECK_INTERVAL, remaining))
+
+
+def _process_start(pid: int) -> Optional[int]:
+    """Время запуска процесса в тиках с загрузки системы (поле 22 /proc/<pid>/stat; None - не прочитать)."""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="utf-8", errors="replace") as f:
+            stat = f.read()
+        # Имя процесса в скобках может содержать пробелы - поля считаем после последней ")"
+        return int(stat[stat.rindex(")") + 2:].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _pid_alive(pid: int, started: Optional[int] = None) -> bool:
+    """Процесс pid жив и это тот же процесс (started - его время запуска при создании задачи)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    if started is None:
+        return True
+    current = _process_start(pid)
+    return current is None or current == started
+
+
+class _ProgressHandler(logging.Handler):
+    """Сообщения логов потока задачи - в progress задачи."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        job_id = getattr(_current, "job_id", None)
+        if job_id is None or getattr(_current, "emitting", False):
+            return
+        _current.emitting = True
+        try:
+            job_manager._add_progress(job_id, record.levelname, record.getMessage())
+        except Exception:
+            pass
+        finally:
+            _current.emitting = False
+
+
+class JobManager:
+    def __init__(self, jobs_dir: str = JOBS_DIR, max_workers: int = MAX_WORKERS):
+        self.jobs_dir = jobs_dir
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._records: Dict[str, dict] = {}
+        self._log_handler: Optional[_ProgressHandler] = None
+
+    # --- файлы задач ---
+
+    def _path(self, job_id: str, suffix: str = ".json") -> str:
+        # id - uuid4 hex: в имени файла нет разделителей пути
+        if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+            raise JobNotFound(job_id)
+        return os.path.join(self.jobs_dir, job_id + suffix)
+
+    def _write(self, job_id: str, data: str) -> None:
+        # Файл задачи пишет только её поток, поэтому запись идёт вне self._lock
+        path = self._path(job_id)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _public(record: dict) -> dict:
+        # Поля с "_" - служебные поля процесса-исполнителя, в файл и ответы не попадают
+        return {k: v for k, v in record.items() if not k.startswith("_")}
+
+    def _dump(self, record: dict) -> str:
+        return json.dumps(self._public(record), ensure_ascii=False, default=str)
+
+    def _read(self, job_id: str) -> dict:
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            raise JobNotFound(job_id)
+
+    def _update(self, job_id: str, **changes) -> dict:
+        # Запись задачи меняет только процесс, который её выполняет; смена состояния
+        # пишется сразу вместе с накопленным progress
+        with self._lock:
+            record = self._records[job_id]
+            record.update(changes)
+            record["updated"] = time.time()
+            record["_dirty"] = False
+            record["_flushed"] = time.monotonic()
+            data = self._dump(record)
+            snapshot = self._public(record)
+        self._write(job_id, data)
+        return snapshot
+
+    def _add_progress(self, job_id: str, level: str, message: str) -> None:
+        with self._lock:
+            record = self._records.get(job_id)
+            if record is None:
+                return
+            record["progress_seq"] += 1
+            progress = record["progress"]
+            progress.append({"seq": record["progress_seq"], "ts": round(time.time(), 3),
+                             "level": level, "message": message})
+            del progress[:-MAX_PROGRESS]
+            record["updated"] = time.time()
+            record["_dirty"] = True
+        self._flush_progress(job_id)
+
+    def _flush_progress(self, job_id: str) -> None:
+        """Пишет накопленный progress, если с прошлой записи прошло PROGRESS_FLUSH_INTERVAL секунд."""
+        with self._lock:
+            record = self._records.get(job_id)
+            if record is None or not record.get("_dirty"):
+                return
+            if time.monotonic() - record.get("_flushed", 0.0) < PROGRESS_FLUSH_INTERVAL:
+                return
+            record["_dirty"] = False
+            record["_flushed"] = time.monotonic()
+            data = self._dump(record)
+        self._write(job_id, data)
+
+    def _cleanup(self) -> None:
+        now = time.time()
+        try:
+            names = os.listdir(self.jobs_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(self.jobs_dir, name)
+            try:
+                if now - os.path.getmtime(path) > JOB_TTL:
+                    os.unlink(path)
+            except OSError:
+                continue
+
+    # --- исполнение ---
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                # После fork пул потоков родителя не наш
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+                self._pid = os.getpid()
+                self._records = {}
+            if self._log_handler is None:
+                self._log_handler = _ProgressHandler(level=logging.INFO)
+                logging.getLogger().addHandler(self._log_handler)
+            return self._pool
+
+    def _run(self, job_id: str, handler: Callable[[dict], object], payload: dict) -> None:
+        _current.job_id = job_id
+        try:
+            if self.is_cancel_requested(job_id):
+                raise JobCancelled(job_id)
+            self._update(job_id, status="running", started=time.time())
+            logger.info(f"Задача {job_id} ({self._records[job_id]['kind']}) запущена")
+            result = handler(payload)
+            self._update(job_id, status="succeeded", result=result, finished=time.time())
+            logger.info(f"Задача {job_id} завершена: {result}")
+        except JobCancelled:
+            logger.info(f"Задача {job_id} отменена")
+            self._update(job_id, status="cancelled", finished=time.time(),
+                         result={"result": "ERROR", "message": "Job cancelled"})
+        except Exception as e:
+            logger.exception(f"Задача {job_id} завершилась исключением")
+            self._update(job_id, status="failed", error=str(e), finished=time.time(),
+                         result={"result": "ERROR", "message": f"Internal error: {e}"})
+        finally:
+            _current.job_id = None
+            with self._lock:
+                self._records.pop(job_id, None)
+            try:
+                os.unlink(self._path(job_id, ".cancel"))
+            except OSError:
+                pass
+
+    # --- API ---
+
+    def submit(self, kind: str, handler: Callable[[dict], object], payload: Optional[dict] = None) -> dict:
+        """Ставит обработчик в очередь пула и сразу возвращает запись задачи."""
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._cleanup()
+        pool = self._executor()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        record = {
+            "id": job_id, "kind": kind, "status": "queued", "pid": os.getpid(),
+            "pid_start": _process_start(os.getpid()),
+            "created": now, "updated": now, "started": None, "finished": None,
+            "progress": [], "progress_seq": 0, "result": None, "error": None,
+        }
+        with self._lock:
+            self._records[job_id] = record
+            data = self._dump(record)
+            submitted = dict(record)
+        self._write(job_id, data)
+        pool.submit(self._run, job_id, handler, payload or {})
+        logger.info(f"Задача {job_id} ({kind}) поставлена в очередь")
+        return submitted
+
+    def get(self, job_id: str) -> dict:
+        """
+        Текущая запись задачи.
+
+        ИСКЛЮЧЕНИЯ:
+            JobNotFound: задачи нет
+        """
+        record = self._read(job_id)
+        if record["status"] not in FINISHED and not _pid_alive(record["pid"], record.get("pid_start")):
+            record.update(status="failed", error=f"agent process {record['pid']} exited",
+                          result={"result": "ERROR", "message": "Agent process exited"})
+        record["cancel_requested"] = self.is_cancel_requested(job_id)
+        return record
+
+    def list(self) -> List[dict]:
+        """Задачи без progress, новые первыми."""
+        records = []
+        try:
+            names = os.listdir(self.jobs_dir)
+        except FileNotFoundError:
+            return []
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                record = self.get(name[:-len(".json")])
+            except JobNotFound:
+                continue
+            record.pop("progress", None)
+            records.append(record)
+        return sorted(records, key=lambda r: r["created"], reverse=True)
+
+    def cancel(self, job_id: str) -> dict:
+        """
+        Запрашивает отмену: задача остановится в ближайшей точке проверки.
+
+        ИСКЛЮЧЕНИЯ:
+            JobNotFound: задачи нет
+        """
+        record = self.get(job_id)
+        if record["status"] not in FINISHED:
+            with open(self._path(job_id, ".cancel"), "w"):
+                pass
+            record["cancel_requested"] = True
+        return record
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        return os.path.exists(self._path(job_id, ".cancel"))
+
+    def events(self, job_id: str, poll_interval: float = 0.5,
+               heartbeat: float = 15.0) -> Iterator[Tuple[str, dict]]:
+        """
+        События задачи для text/event-stream: ("progress", запись) на каждое
+        новое сообщение, ("status", запись без progress) при смене состояния,
+        ("ping", {}) раз в heartbeat секунд, в конце - ("done", запись).
+
+        ИСКЛЮЧЕНИЯ:
+            JobNotFound: задачи нет (до первого события)
+        """
+        record = self.get(job_id)
+        sent_seq, last_status, last_event = 0, None, time.monotonic()
+        while True:
+            # Сообщения старше окна MAX_PROGRESS уже вытеснены - отдаются только доступные
+            for entry in record.pop("progress", []):
+                if entry["seq"] > sent_seq:
+                    yield "progress", entry
+                    sent_seq, last_event = entry["seq"], time.monotonic()
+            if record["status"] != last_status:
+                last_status = record["status"]
+                yield "status", record
+                last_event = time.monotonic()
+            if record["status"] in FINISHED:
+                yield "done", record
+                return
+            if time.monotonic() - last_event >= heartbeat:
+                yield "ping", {}
+                last_event = time.monotonic()
+            time.sleep(poll_interval)
+            try:
+                record = self.get(job_id)
+            except JobNotFound:
+                return
+
+
+job_manager = JobManager()
@@ -0,0 +1,224 @@
+"""
+Снимки состояния namespace ngfw с коротким TTL: iptables, tc, адреса.
+
+Проверки агента читают состояние namespace внешними командами: iptables -L,
+tc filter show, ip addr show - и на каждый запрос заново запускают
+ip netns exec ngfw .... Этот модуль снимает состояние целиком одной
+командой (iptables-save -c, ip -j addr show,
+tc filter show dev X <направление>), разбирает его и хранит снимок TTL
+секунд (MIRADA_SNAPSHOT_TTL, по умолчанию 2; 0 - без кэша). Обработчики
+обращаются к разобранным структурам, а не к тексту команд; снимок iptables -
+индекс правил services/iptables_index.py. Процессы namespace читаются из
+/proc (services/process_table.py).
+
+Свежесть:
+    - current(kind) и lookup(kind, predicate) отвечают только по снимку,
+      команда которого запущена не раньше самого вызова: ни положительный,
+      ни отрицательный ответ проверки не берётся из снимка, сделанного до
+      того, как CDM или другой воркер агента изменил состояние. Выигрыш -
+      параллельные проверки одного вида ждут один запуск команды, а не
+      запускают свои.
+    - get(kind) отдаёт снимок не старше TTL. Он для чтений, которые следуют
+      за current/lookup в том же запросе (диагностика, разбор найденного),
+      а не для решения "есть / нет".
+    - Операции самого агента, которые меняют состояние (iptables -D/-F/-X,
+      ip addr del), вызывают invalidate(kind): следующий get снимет
+      состояние заново.
+    - Кэш свой у каждого процесса агента (воркера gunicorn): invalidate
+      действует в пределах воркера, снимок get в остальных устаревает
+      не дольше чем через TTL.
+
+ИСПОЛЬЗОВАНИЕ:
+    from services.netns_state import netns_state, SnapshotError
+
+    found = netns_state.lookup("iptables", lambda s: s.exists(table="nat", address=net, dport=80))
+    rules = netns_state.current("iptables").rules("filter", "FORWARD")
+    rules = netns_state.get("iptables").rules("nat", "PREROUTING")   # диагностика после lookup
+    netns_state.lookup("tc", lambda s: s.lines_with(f"cdm-ngfw-vswitch:{target}"), dev, "ingress")
+
+    subprocess.run([... "iptables", "-t", "nat", "-D", chain, ...])
+    netns_state.invalidate("iptables")
+
+ИСКЛЮЧЕНИЯ:
+    SnapshotError: команда снимка завершилась с ошибкой (снимок не кэшируется)
+"""
+import json
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.iptables_index import IptablesIndex
+
+logger = logging.getLogger(__name__)
+
+NETNS_NAME = "ngfw"
+DEFAULT_TTL = float(os.environ.get("MIRADA_SNAPSHOT_TTL", 2.0))
+
+KINDS = ("iptables", "tc", "addr")
+
+
+class SnapshotError(RuntimeError):
+    """Команда снимка завершилась с ошибкой."""
+
+
+class TcSnapshot:
+    """Вывод tc filter show dev X <направление>: строки фильтров с номером pref."""
+
+    _PREF = re.compile(r"\bpref\s+(\d+)")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.filters: List[Tuple[Optional[str], str]] = []
+        for line in text.splitlines():
+            line = line.strip()
+            if line:
+                match = self._PREF.search(line)
+                self.filters.append((match.group(1) if match else None, line))
+
+    def lines_with(self, needle: str) -> List[Tuple[Optional[str], str]]:
+        """Фильтры (pref, строка), в строке которых есть needle."""
+        return [(pref, line) for pref, line in self.filters if needle in line]
+
+
+class AddrSnapshot:
+    """Вывод ip -j addr show: интерфейсы и их адреса в виде "адрес/префикс"."""
+
+    def __init__(self, text: str):
+        self.links: Dict[str, List[str]] = {}
+        for link in json.loads(text or "[]"):
+            name = link.get("ifname")
+            if not name:
+                continue
+            self.links[name] = [
+                f"{info['local']}/{info['prefixlen']}"
+                for info in link.get("addr_info", [])
+                if "local" in info and "prefixlen" in info
+            ]
+
+    def exists(self, interface: str) -> bool:
+        return interface in self.links
+
+    def addresses(self, interface: str) -> List[str]:
+        return list(self.links.get(interface, []))
+
+    def has_address(self, interface: str, address: str) -> bool:
+        """address с префиксом сравнивается целиком, без префикса - только сам адрес."""
+        for item in self.links.get(interface, []):
+            if item == address or item.split("/", 1)[0] == address:
+                return True
+        return False
+
+
+class _Snapshot:
+    def __init__(self, value, taken: float):
+        self.value = value
+        self.taken = taken
+
+
+class NetnsState:
+    def __init__(self, netns: str = NETNS_NAME, ttl: float = DEFAULT_TTL):
+        self.netns = netns
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._key_locks: Dict[tuple, threading.Lock] = {}
+        self._entries: Dict[tuple, _Snapshot] = {}
+        self._generation: Dict[str, int] = {kind: 0 for kind in KINDS}
+        self.hits = 0
+        self.misses = 0
+
+    def _command(self, kind: str, key: tuple) -> List[str]:
+        prefix = ["ip", "netns", "exec", self.netns]
+        if kind == "iptables":
+            return prefix + ["iptables-save", "-c"]
+        if kind == "tc":
+            dev, direction = key
+            return prefix + ["tc", "filter", "show", "dev", dev, direction]
+        if kind == "addr":
+            return prefix + ["ip", "-j", "addr", "show"]
+        raise ValueError(f"Unknown snapshot kind: {kind}")
+
+    @staticmethod
+    def _parse(kind: str, text: str):
+        if kind == "iptables":
+            return IptablesIndex.from_save(text)
+        if kind == "tc":
+            return TcSnapshot(text)
+        return AddrSnapshot(text)
+
+    def _fetch(self, kind: str, key: tuple) -> _Snapshot:
+        cmd = self._command(kind, key)
+        taken = time.monotonic()
+        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        if result.returncode != 0:
+            raise SnapshotError(f"{' '.join(cmd)}: rc={result.returncode} {result.stderr.strip()}")
+        try:
+            value = self._parse(kind, result.stdout)
+        except ValueError as e:
+            raise SnapshotError(f"{' '.join(cmd)}: unparsable output: {e}")
+        return _Snapshot(value, taken)
+
+    def _get(self, kind: str, key: tuple, max_age: Optional[float],
+             not_before: Optional[float] = None) -> _Snapshot:
+        max_age = self.ttl if max_age is None else max_age
+        full_key = (kind,) + key
+        with self._lock:
+            lock = self._key_locks.setdefault(full_key, threading.Lock())
+        # Блокировка на ключ: параллельные запросы ждут один снимок, а не запускают свои
+        with lock:
+            entry = self._entries.get(full_key)
+            if (entry is not None and time.monotonic() - entry.taken <= max_age
+                    and (not_before is None or entry.taken >= not_before)):
+                with self._lock:
+                    self.hits += 1
+                return entry
+            generation = self._generation[kind]
+            entry = self._fetch(kind, key)
+            with self._lock:
+                self.misses += 1
+                # Снимок, начатый до invalidate(), мог не увидеть изменение - не кэшируем его
+                if self._generation[kind] == generation:
+                    self._entries[full_key] = entry
+            return entry
+
+    def get(self, kind: str, *key, max_age: Optional[float] = None):
+        """
+        Снимок вида kind (для "tc" ключ - dev, direction) не старше max_age секунд (по умолчанию TTL).
+
+        ИСКЛЮЧЕНИЯ:
+            SnapshotError: команда снимка завершилась с ошибкой
+        """
+        return self._get(kind, tuple(key), max_age).value
+
+    def current(self, kind: str, *key):
+        """
+        Снимок, команда которого запущена не раньше этого вызова.
+
+        ИСКЛЮЧЕНИЯ:
+            SnapshotError: команда снимка завершилась с ошибкой
+        """
+        return self._get(kind, tuple(key), None, not_before=time.monotonic()).value
+
+    def lookup(self, kind: str, predicate: Callable, *key):
+        """
+        predicate(снимок) на снимке current(kind, *key).
+
+        ИСКЛЮЧЕНИЯ:
+            SnapshotError: команда снимка завершилась с ошибкой
+        """
+        return predicate(self.current(kind, *key))
+
+    def invalidate(self, *kinds: str) -> None:
+        """Сбрасывает снимки указанных видов (без аргументов - все)."""
+        kinds = kinds or KINDS
+        with self._lock:
+            for kind in kinds:
+                self._generation[kind] += 1
+            for full_key in [k for k in self._entries if k[0] in kinds]:
+                del self._entries[full_key]
+
+
+netns_state = NetnsState()
@@ -0,0 +1,210 @@
+"""
+Долгоживущий процесс node в контейнере для запросов к шине CDM.
+
+Обработчики, которые читают состояние через @codemaster/bus, на каждый
+запрос запускали bash -lc "docker exec -i <контейнер> node -e '<скрипт>'":
+login shell, docker exec и холодный старт Node.js с загрузкой модулей - это
+секунды на вызов. Воркер запускает docker exec -i <контейнер> node -e
+<RPC-сервер> один раз и держит его: запросы идут строками JSON в stdin
+({"id", "script"}), ответы - строками JSON из stdout ({"id", "ok",
+"result" | "error"}). script - тело async-функции с аргументом require;
+её return - результат вызова. Глобальные объекты Node (globalThis)
+переживают вызов, поэтому скрипт может держать соединение с шиной между
+запросами.
+
+Ответы сопоставляются запросам по id, параллельные вызовы не ждут друг
+друга. Если процесс завершился, не ответил за timeout или его stdout
+сломан, ожидающие вызовы получают NodeWorkerError, процесс
+останавливается и следующий вызов запускает новый. Вывод console.log
+скрипта уходит в stderr процесса и не мешает протоколу.
+
+Воркер свой у каждого процесса агента (после fork воркера gunicorn процесс
+родителя не используется).
+
+ИСПОЛЬЗОВАНИЕ:
+    from services.node_worker import get_worker, NodeScriptError, NodeWorkerError
+
+    worker = get_worker("csi.csi-server")
+    value = worker.call('return require("os").hostname();', timeout=10)
+
+ИСКЛЮЧЕНИЯ:
+    NodeWorkerError: процесс не запустился, завершился или не ответил вовремя
+    NodeScriptError: скрипт выбросил исключение (процесс продолжает работать)
+"""
+import collections
+import itertools
+import json
+import logging
+import os
+import subprocess
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = float(os.environ.get("MIRADA_NODE_WORKER_TIMEOUT", 15.0))
+
+# RPC-сервер внутри контейнера: строка JSON на запрос, строка JSON на ответ
+SERVER_SCRIPT = (
+    "const readline=require(\"readline\");"
+    "const AsyncFunction=Object.getPrototypeOf(async function(){}).constructor;"
+    "const out=process.stdout.write.bind(process.stdout);"
+    "console.log=(...a)=>process.stderr.write(a.map(String).join(\" \")+\"\\n\");"
+    "const rl=readline.createInterface({input:process.stdin});"
+    "rl.on(\"line\",async(line)=>{let req;try{req=JSON.parse(line);}catch(e){return;}"
+    "try{const result=await new AsyncFunction(\"require\",req.script)(require);"
+    "out(JSON.stringify({id:req.id,ok:true,result:result===undefined?null:result})+\"\\n\");}"
+    "catch(e){out(JSON.stringify({id:req.id,ok:false,error:String((e&&e.message)||e)})+\"\\n\");}});"
+    "rl.on(\"close\",()=>process.exit(0));"
+)
+
+
+class NodeWorkerError(RuntimeError):
+    """Процесс node недоступен: не запустился, завершился или не ответил вовремя."""
+
+
+class NodeScriptError(NodeWorkerError):
+    """Скрипт выбросил исключение; процесс node продолжает работать."""
+
+
+class _Pending:
+    def __init__(self):
+        self.event = threading.Event()
+        self.response: Optional[dict] = None
+        self.error: Optional[str] = None
+
+
+class NodeWorker:
+    def __init__(self, container: str, node_bin: str = "node", timeout: float = DEFAULT_TIMEOUT):
+        self.container = container
+        self.node_bin = node_bin
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._pid: Optional[int] = None
+        self._pending: Dict[int, _Pending] = {}
+        self._ids = itertools.count(1)
+        self._stderr_tail: collections.deque = collections.deque(maxlen=20)
+        self.starts = 0
+        self.calls = 0
+
+    def _command(self):
+        return ["docker", "exec", "-i", self.container, self.node_bin, "-e", SERVER_SCRIPT]
+
+    def _ensure_started(self) -> subprocess.Popen:
+        with self._lock:
+            process = self._process
+            if process is not None and self._pid == os.getpid() and process.poll() is None:
+                return process
+            if process is not None and self._pid == os.getpid():
+                self._fail_pending(process, f"node worker exited with rc={process.returncode}")
+            else:
+                # После fork процесс и потоки чтения родителя не наши
+                self._pending = {}
+            try:
+                process = subprocess.Popen(self._command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                           stderr=subprocess.PIPE, text=True, bufsize=1)
+            except OSError as e:
+                self._process = None
+                raise NodeWorkerError(f"Failed to start node worker in {self.container}: {e}")
+            self._process, self._pid = process, os.getpid()
+            self.starts += 1
+            threading.Thread(target=self._read_stdout, args=(process,), name="node-worker-out", daemon=True).start()
+            threading.Thread(target=self._read_stderr, args=(process,), name="node-worker-err", daemon=True).start()
+            logger.info(f"Запущен node worker в {self.container} (pid {process.pid}, запуск №{self.starts})")
+            return process
+
+    def _read_stdout(self, process: subprocess.Popen) -> None:
+        for line in process.stdout:
+            try:
+                response = json.loads(line)
+            except ValueError:
+                logger.warning(f"node worker: неразборчивая строка stdout: {line.strip()[:200]}")
+                continue
+            with self._lock:
+                pending = self._pending.pop(response.get("id"), None)
+            if pending is not None:
+                pending.response = response
+                pending.event.set()
+        process.wait()
+        with self._lock:
+            self._fail_pending(process, f"node worker exited with rc={process.returncode}")
+
+    def _read_stderr(self, process: subprocess.Popen) -> None:
+        for line in process.stderr:
+            self._stderr_tail.append(line.rstrip())
+            logger.debug(f"node worker stderr: {line.rstrip()}")
+
+    def _fail_pending(self, process: subprocess.Popen, reason: str) -> None:
+        # Вызывается под self._lock; ожидающие вызовы этого процесса получают ошибку
+        if process is not self._process:
+            return
+        tail = "; ".join(list(self._stderr_tail)[-3:])
+        for pending in self._pending.values():
+            pending.error = f"{reason}: {tail}" if tail else reason
+            pending.event.set()
+        self._pending.clear()
+        self._process = None
+
+    def _kill(self, process: subprocess.Popen, reason: str) -> None:
+        logger.warning(f"node worker в {self.container} остановлен: {reason}")
+        with self._lock:
+            self._fail_pending(process, reason)
+        try:
+            process.kill()
+        except OSError:
+            pass
+
+    def call(self, script: str, timeout: Optional[float] = None):
+        """
+        Выполняет script (тело async-функции с аргументом require) и возвращает его результат.
+
+        ИСКЛЮЧЕНИЯ:
+            NodeWorkerError: процесс недоступен (следующий вызов запустит новый)
+            NodeScriptError: скрипт выбросил исключение
+        """
+        timeout = self.timeout if timeout is None else timeout
+        process = self._ensure_started()
+        request_id = next(self._ids)
+        pending = _Pending()
+        with self._lock:
+            if self._process is not process:
+                raise NodeWorkerError(f"node worker in {self.container} exited before the request was sent")
+            self._pending[request_id] = pending
+            self.calls += 1
+        try:
+            with self._write_lock:
+                process.stdin.write(json.dumps({"id": request_id, "script": script}) + "\n")
+                process.stdin.flush()
+        except (OSError, ValueError) as e:
+            self._kill(process, f"stdin write failed: {e}")
+            raise NodeWorkerError(f"node worker in {self.container} is not accepting requests: {e}")
+
+        if not pending.event.wait(timeout):
+            self._kill(process, f"no response in {timeout}s")
+            raise NodeWorkerError(f"node worker in {self.container} did not respond in {timeout}s")
+        if pending.error is not None:
+            raise NodeWorkerError(pending.error)
+        if not pending.response.get("ok"):
+            raise NodeScriptError(pending.response.get("error") or "node script failed")
+        return pending.response.get("result")
+
+    def close(self) -> None:
+        with self._lock:
+            process = self._process
+        if process is not None and self._pid == os.getpid():
+            self._kill(process, "closed")
+
+
+_workers: Dict[tuple, NodeWorker] = {}
+_workers_lock = threading.Lock()
+
+
+def get_worker(container: str, node_bin: str = "node") -> NodeWorker:
+    """Воркер процесса агента для контейнера (создаётся при первом обращении)."""
+    with _workers_lock:
+        worker = _workers.get((container, node_bin))
+        if worker is None:
+            worker = _workers[(container, node_bin)] = NodeWorker(container, node_bin)
+        return worker
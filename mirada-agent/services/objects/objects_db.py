@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Чтение базы объектов shared.objects без копирования на каждую проверку.
+
+Раньше каждая проверка /object копировала файл /objects/database из
+контейнера (docker cp) во временный файл, читала SELECT * FROM entity и
+перебирала все строки в Python. Читатель:
+    1) находит каталог базы на хосте по точкам монтирования контейнера
+       (services/container_files.py) и открывает файл только для чтения на месте
+       (sqlite file:...?mode=ro) - запись CDM видна сразу, копии нет;
+    2) если файл на хосте недоступен (база не в volume, нет прав), держит
+       локальную копию и обновляет её docker cp только при изменении mtime
+       или размера файла в контейнере;
+    3) ищет объект запросом WHERE name = ? AND type IN (?, ?) - тип строкой
+       и числом, без CAST над колонкой, чтобы работал индекс (sqlite кэширует
+       подготовленные выражения соединения), для многих объектов - пачками
+       WHERE name IN (...).
+
+Соединение одно на процесс, запросы идут под блокировкой.
+
+ИСПОЛЬЗОВАНИЕ:
+    from services.objects.objects_db import objects_db
+
+    contents_list = objects_db.find("net1", "2")              # [contents, ...]
+    found = objects_db.find_many([("net1", "2"), ("svc1", "1")])  # {(name, type): [contents, ...]}
+
+ИСКЛЮЧЕНИЯ:
+    ObjectsDbError: базу не удалось ни открыть на месте, ни скопировать
+"""
+
+import logging
+import os
+import sqlite3
+import subprocess
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.container_files import ContainerFileError, container_files
+
+logger = logging.getLogger(__name__)
+
+CONTAINER_NAME = "shared.objects"
+DATABASE_PATH = "/objects/database"
+TABLE_NAME = "entity"
+
+# Позиции полей entity, если в схеме нет колонок с ожидаемыми именами:
+# id, None, None, timestamp, name, type, None, contents, type_id, None
+_FALLBACK_COLUMNS = {"name": 4, "type": 5, "contents": 7}
+_BATCH_SIZE = 500
+
+
+class ObjectsDbError(RuntimeError):
+    """База объектов недоступна."""
+
+
+def _run(cmd: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, capture_output=True, text=True, check=False)
+
+
+def _type_params(obj_type) -> Tuple[object, object]:
+    """
+    Тип объекта строкой и числом: колонку type сравниваем без CAST, чтобы работал индекс.
+    Число - только для канонической записи ("2", не "02" или " 2"): прежний
+    CAST(type AS TEXT) = ? такие строки с числом 2 не совмещал.
+    """
+    text = str(obj_type)
+    try:
+        number = int(text)
+    except ValueError:
+        return text, text
+    return (text, number) if str(number) == text else (text, text)
+
+
+class ObjectsDb:
+    def __init__(self, container: str = CONTAINER_NAME, path: str = DATABASE_PATH):
+        self.container = container
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._source: Optional[tuple] = None
+        self._copy_path: Optional[str] = None
+        self._host_path: Optional[str] = None
+        self._host_path_checked = False
+        self._columns: Optional[Dict[str, str]] = None
+
+    # --- где лежит база ---
+
+    def _resolve_host_path(self) -> Optional[str]:
+        """Путь к файлу базы на хосте через точки монтирования контейнера (None - не смонтирован)."""
+        host_path = container_files.host_path(self.container, self.path)
+        return host_path if host_path and os.access(host_path, os.R_OK) else None
+
+    def _container_stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            info = container_files.stat(self.container, self.path)
+        except ContainerFileError as e:
+            logger.warning(f"Не удалось узнать mtime базы объектов: {e}")
+            return None
+        return (info.mtime_ns, info.size) if info else None
+
+    # --- соединение ---
+
+    def _open_in_place(self, host_path: str) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{host_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def _refresh_copy(self) -> sqlite3.Connection:
+        stat = self._container_stat()
+        source = ("copy",) + stat if stat else None
+        if self._conn is not None and source is not None and source == self._source:
+            return self._conn
+
+        with tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False) as temp_db:
+            copy_path = temp_db.name
+        result = _run(["docker", "cp", f"{self.container}:{self.path}", copy_path])
+        if result.returncode != 0:
+            os.unlink(copy_path)
+            raise ObjectsDbError(f"Failed to copy database from container: {result.stderr.strip()}")
+        logger.info(f"База объектов скопирована из контейнера: {os.path.getsize(copy_path)} байт")
+        self._replace(sqlite3.connect(copy_path, check_same_thread=False), source, copy_path)
+        return self._conn
+
+    def _replace(self, conn: Optional[sqlite3.Connection], source: Optional[tuple],
+                 copy_path: Optional[str]) -> None:
+        if self._conn is not None:
+            self._conn.close()
+        if self._copy_path:
+            try:
+                os.unlink(self._copy_path)
+            except OSError:
+                pass
+        self._conn, self._source, self._copy_path = conn, source, copy_path
+        self._columns = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if not self._host_path_checked:
+            self._host_path_checked = True
+            self._host_path = self._resolve_host_path()
+            logger.info(f"База объектов на хосте: {self._host_path or 'недоступна, используется копия'}")
+        if self._host_path:
+            # Файл могли пересоздать - открытое соединение читало бы старый inode
+            try:
+                stat = os.stat(self._host_path)
+                source = ("host", self._host_path, stat.st_dev, stat.st_ino)
+            except OSError:
+                source = None
+            if self._conn is None or source is None or self._source != source:
+                try:
+                    self._replace(self._open_in_place(self._host_path), source, None)
+                except sqlite3.Error as e:
+                    logger.warning(f"Не удалось открыть базу на месте ({e}), используется копия")
+                    self._host_path = None
+                    return self._refresh_copy()
+            return self._conn
+        return self._refresh_copy()
+
+    def _column_names(self, conn: sqlite3.Connection) -> Dict[str, str]:
+        if self._columns is None:
+            names = [row[1] for row in conn.execute(f"PRAGMA table_info({TABLE_NAME})")]
+            columns = {}
+            for field, position in _FALLBACK_COLUMNS.items():
+                if field in names:
+                    columns[field] = field
+                elif position < len(names):
+                    columns[field] = names[position]
+                else:
+                    raise ObjectsDbError(f"Unexpected {TABLE_NAME} schema: {names}")
+            self._columns = {field: '"' + name.replace('"', '""') + '"' for field, name in columns.items()}
+        return self._columns
+
+    def _query(self, sql_builder, params) -> list:
+        with self._lock:
+            conn = self._connection()
+            try:
+                return conn.execute(sql_builder(self._column_names(conn)), params).fetchall()
+            except sqlite3.DatabaseError as e:
+                # Файл мог быть заменён (пересоздание базы) - переоткрываем один раз
+                logger.warning(f"Ошибка чтения базы объектов ({e}), переоткрываем")
+                self._replace(None, None, None)
+                conn = self._connection()
+                return conn.execute(sql_builder(self._column_names(conn)), params).fetchall()
+
+    # --- поиск ---
+
+    def find(self, name: str, obj_type: str) -> List[object]:
+        """Содержимое (contents) всех записей entity с этими именем и типом."""
+        def sql(c):
+            return (f"SELECT {c['contents']} FROM {TABLE_NAME} "
+                    f"WHERE {c['name']} = ? AND {c['type']} IN (?, ?)")
+        return [row[0] for row in self._query(sql, (name, *_type_params(obj_type)))]
+
+    def find_many(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], List[object]]:
+        """Содержимое записей для многих (имя, тип) сразу: запросы пачками по _BATCH_SIZE имён."""
+        wanted = {(name, str(obj_type)) for name, obj_type in keys}
+        found: Dict[Tuple[str, str], List[object]] = {key: [] for key in wanted}
+        names = sorted({name for name, _ in wanted})
+        for start in range(0, len(names), _BATCH_SIZE):
+            chunk = names[start:start + _BATCH_SIZE]
+
+            def sql(c, count=len(chunk)):
+                return (f"SELECT {c['name']}, CAST({c['type']} AS TEXT), {c['contents']} FROM {TABLE_NAME} "
+                        f"WHERE {c['name']} IN ({','.join('?' * count)})")
+            for name, obj_type, contents in self._query(sql, chunk):
+                if (name, obj_type) in found:
+                    found[(name, obj_type)].append(contents)
+        return found
+
+
+objects_db = ObjectsDb()
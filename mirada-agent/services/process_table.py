@@ -0,0 +1,169 @@
+"""
+Таблица процессов namespace ngfw из /proc: индекс по имени программы и argv.
+
+Проверки ping и traceroute искали процесс запуском ip netns exec ngfw
+ps aux / pgrep -a и разбором текста: командная строка резалась по пробелам,
+аргументы с пробелами и пустые аргументы терялись, а ps внутри ip netns exec
+всё равно показывает процессы всех namespace. Модуль читает /proc напрямую:
+    - процесс относится к namespace, если /proc/<pid>/ns/net указывает на
+      тот же inode, что и /run/netns/ngfw;
+    - argv - точные аргументы из /proc/<pid>/cmdline (разделитель \\0);
+    - процессы индексируются по имени программы (basename argv[0]).
+Таблица живёт MIRADA_PROCESS_TTL секунд (по умолчанию 1). find() на
+закэшированной таблице без совпадения перечитывает /proc, как lookup в
+services/netns_state.py; wait_for() ждёт появления процесса сам, вызывающему
+не нужно опрашивать в цикле.
+
+Читать ns/net чужих процессов может только root - агент запускается через sudo.
+
+ИСПОЛЬЗОВАНИЕ:
+    from services.process_table import process_inspector
+
+    procs = process_inspector.find("ping", lambda p: "10.0.0.1" in p.args)
+    proc = process_inspector.wait_for(("traceroute", "traceroute6"), lambda p: addr in p.args, timeout=3)
+    process_inspector.invalidate()    # после запуска процесса самим агентом
+
+ИСКЛЮЧЕНИЯ:
+    ProcessTableError: namespace не существует (/run/netns/<имя> не найден)
+"""
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+NETNS_NAME = "ngfw"
+NETNS_DIR = "/run/netns"
+PROC_DIR = "/proc"
+DEFAULT_TTL = float(os.environ.get("MIRADA_PROCESS_TTL", 1.0))
+WAIT_INTERVAL = 0.1
+
+Names = Union[str, Tuple[str, ...]]
+
+
+class ProcessTableError(RuntimeError):
+    """Namespace не найден."""
+
+
+class ProcessInfo(NamedTuple):
+    pid: int
+    name: str
+    argv: Tuple[str, ...]
+
+    @property
+    def args(self) -> Tuple[str, ...]:
+        """Аргументы без имени программы."""
+        return self.argv[1:]
+
+    @property
+    def command_line(self) -> str:
+        return " ".join(self.argv)
+
+
+def _inode(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_dev, st.st_ino
+
+
+class ProcessTable:
+    """Процессы одного namespace, проиндексированные по имени программы."""
+
+    def __init__(self, processes: List[ProcessInfo]):
+        self.processes = processes
+        self.by_name: Dict[str, List[ProcessInfo]] = {}
+        for process in processes:
+            self.by_name.setdefault(process.name, []).append(process)
+
+    @classmethod
+    def read(cls, netns: Optional[str] = NETNS_NAME, proc_dir: str = PROC_DIR) -> "ProcessTable":
+        """Читает процессы namespace из /proc (netns=None - все процессы)."""
+        target = None
+        if netns is not None:
+            try:
+                target = _inode(os.path.join(NETNS_DIR, netns))
+            except OSError as e:
+                raise ProcessTableError(f"Network namespace {netns} not found: {e}")
+        processes = []
+        for entry in os.listdir(proc_dir):
+            if not entry.isdigit():
+                continue
+            base = os.path.join(proc_dir, entry)
+            try:
+                # Процесс мог завершиться между listdir и чтением - просто пропускаем
+                if target is not None and _inode(os.path.join(base, "ns", "net")) != target:
+                    continue
+                with open(os.path.join(base, "cmdline"), "rb") as f:
+                    raw = f.read()
+            except OSError:
+                continue
+            argv = tuple(part.decode("utf-8", "replace") for part in raw.rstrip(b"\0").split(b"\0")) if raw else ()
+            if not argv or not argv[0]:
+                continue  # потоки ядра и зомби без командной строки
+            processes.append(ProcessInfo(int(entry), os.path.basename(argv[0]), argv))
+        return cls(processes)
+
+    def __len__(self) -> int:
+        return len(self.processes)
+
+    def find(self, name: Names, predicate: Optional[Callable[[ProcessInfo], bool]] = None) -> List[ProcessInfo]:
+        """Процессы программы name (имя или кортеж имён), для которых predicate(процесс) истинно."""
+        names = (name,) if isinstance(name, str) else name
+        return [p for n in names for p in self.by_name.get(n, []) if predicate is None or predicate(p)]
+
+
+class ProcessInspector:
+    def __init__(self, netns: str = NETNS_NAME, ttl: float = DEFAULT_TTL):
+        self.netns = netns
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._table: Optional[ProcessTable] = None
+        self._taken = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def table(self, max_age: Optional[float] = None) -> ProcessTable:
+        """
+        Таблица процессов не старше max_age секунд (по умолчанию TTL).
+
+        ИСКЛЮЧЕНИЯ:
+            ProcessTableError: namespace не найден
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            if self._table is not None and time.monotonic() - self._taken <= max_age:
+                self.hits += 1
+                return self._table
+            taken = time.monotonic()
+            self._table = ProcessTable.read(self.netns)
+            self._taken = taken
+            self.misses += 1
+            return self._table
+
+    def find(self, name: Names, predicate: Optional[Callable[[ProcessInfo], bool]] = None) -> List[ProcessInfo]:
+        """Процессы name с predicate; без совпадения в закэшированной таблице /proc перечитывается."""
+        started = time.monotonic()
+        found = self.table().find(name, predicate)
+        if found or self._taken >= started:
+            return found
+        return self.table(max_age=0).find(name, predicate)
+
+    def wait_for(self, name: Names, predicate: Optional[Callable[[ProcessInfo], bool]] = None,
+                 timeout: float = 5.0, interval: float = WAIT_INTERVAL) -> Optional[ProcessInfo]:
+        """Ждёт появления процесса до timeout секунд; None - не появился."""
+        deadline = time.monotonic() + timeout
+        while True:
+            found = self.find(name, predicate)
+            if found:
+                return found[0]
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._table = None
+
+
+process_inspector = ProcessInspector()
@@ -7,27 +7,18 @@ import json
 import os
 import logging
 import subprocess
-import tempfile
-import shutil
 import re
 import threading
 import time
 
+from services.container_files import ContainerFileError, container_files
+
 logger = logging.getLogger(__name__)
 
 # Константы для контейнера ngfw.vswitch
 CONTAINER_NAME = "ngfw.vswitch"
 CONTAINER_CERT_DIR = "/storage/cert"
 
-def cleanup_temp_directory(temp_dir):
-    """Очищает временную директорию"""
-    if temp_dir and os.path.exists(temp_dir):
-        try:
-            shutil.rmtree(temp_dir)
-            logger.info(f"Временная директория удалена: {temp_dir}")
-        except Exception as e:
-            logger.warning(f"Не удалось удалить временную директорию {temp_dir}: {e}")
-
 def run_cleanup_certs_delayed():
     """Запускает скрипт cleanup_certs.py с задержкой 3 секунды"""
     def delayed_cleanup():
@@ -162,70 +153,42 @@ def check_openssl_errors(data):
         logger.error(f"Ошибка при проверке ошибок openssl: {e}")
         return False
 
-def copy_certs_from_container():
-    """Копирует сертификаты из контейнера ngfw.vswitch во временную директорию"""
+def list_certs_in_container():
+    """Файлы каталога сертификатов контейнера ngfw.vswitch: {имя: FileInfo} или None"""
     try:
-        # Создаем временную директорию
-        temp_dir = tempfile.mkdtemp()
-        logger.info(f"Создана временная директория: {temp_dir}")
-        
-        # Копируем директорию сертификатов из контейнера
-        copy_cmd = ["docker", "cp", f"{CONTAINER_NAME}:{CONTAINER_CERT_DIR}", temp_dir]
-        logger.info(f"Выполняем команду: {' '.join(copy_cmd)}")
-        
-        result = subprocess.run(copy_cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            logger.error(f"Ошибка копирования сертификатов:")
-            logger.error(f"  - returncode: {result.returncode}")
-            logger.error(f"  - stderr: {result.stderr}")
-            logger.error(f"  - stdout: {result.stdout}")
-            return None
-        
-        # Путь к скопированной директории
-        copied_cert_dir = os.path.join(temp_dir, "cert")
-        logger.info(f"Сертификаты скопированы в: {copied_cert_dir}")
-        
-        return copied_cert_dir
-        
-    except Exception as e:
-        logger.error(f"Ошибка при копировании сертификатов: {e}")
+        listing = container_files.listdir(CONTAINER_NAME, CONTAINER_CERT_DIR)
+    except ContainerFileError as e:
+        logger.error(f"Ошибка чтения каталога сертификатов: {e}")
         return None
+    if listing is None:
+        logger.error(f"Каталог {CONTAINER_NAME}:{CONTAINER_CERT_DIR} не найден")
+    return listing
 
-def check_certificate_exists(cert_name, cert_dir):
-    """Проверяет существование сертификата в директории"""
+def check_certificate_exists(cert_name, listing):
+    """Проверяет наличие файлов сертификата в списке файлов каталога"""
     try:
-        if not os.path.exists(cert_dir):
-            logger.warning(f"Директория {cert_dir} не существует")
-            return False
-        
         # Проверяем наличие файлов сертификата
         key_file = f"{cert_name}.key"
         crt_file = f"{cert_name}.crt"
-        
-        key_path = os.path.join(cert_dir, key_file)
-        crt_path = os.path.join(cert_dir, crt_file)
-        
+
         logger.info(f"Проверяем наличие файлов:")
-        logger.info(f"  - key_file: {key_path}")
-        logger.info(f"  - crt_file: {crt_path}")
-        
-        key_exists = os.path.exists(key_path)
-        crt_exists = os.path.exists(crt_path)
-        
+        logger.info(f"  - key_file: {CONTAINER_CERT_DIR}/{key_file}")
+        logger.info(f"  - crt_file: {CONTAINER_CERT_DIR}/{crt_file}")
+
+        key_exists = key_file in listing
+        crt_exists = crt_file in listing
+
         logger.info(f"Результат проверки:")
         logger.info(f"  - key_file exists: {key_exists}")
         logger.info(f"  - crt_file exists: {crt_exists}")
-        
+
         # Проверяем размеры файлов
         if key_exists:
-            key_size = os.path.getsize(key_path)
-            logger.info(f"  - key_file size: {key_size} bytes")
-        
+            logger.info(f"  - key_file size: {listing[key_file].size} bytes")
+
         if crt_exists:
-            crt_size = os.path.getsize(crt_path)
-            logger.info(f"  - crt_file size: {crt_size} bytes")
-        
+            logger.info(f"  - crt_file size: {listing[crt_file].size} bytes")
+
         # Сертификат считается сгенерированным, если есть хотя бы файл ключа
         if key_exists:
             logger.info("Сертификат найден (есть файл ключа)")
@@ -233,14 +196,13 @@ def check_certificate_exists(cert_name, cert_dir):
         else:
             logger.warning("Сертификат не найден (нет файла ключа)")
             return False
-        
+
     except Exception as e:
         logger.error(f"Ошибка при проверке существования сертификата: {e}")
         return False
 
 def handle(data):
     """Обработчик для проверки генерации сертификатов"""
-    temp_cert_dir = None
     try:
         logger.info("=== НАЧАЛО ПРОВЕРКИ ГЕНЕРАЦИИ СЕРТИФИКАТОВ ===")
         
@@ -258,14 +220,14 @@ def handle(data):
         
         logger.info(f"Извлеченное имя сертификата: {cert_name}")
         
-        # Копируем сертификаты из контейнера
-        temp_cert_dir = copy_certs_from_container()
-        if not temp_cert_dir:
-            logger.error("Не удалось скопировать сертификаты из контейнера")
+        # Список файлов каталога сертификатов (с хоста через volume или одним docker cp)
+        cert_listing = list_certs_in_container()
+        if cert_listing is None:
+            logger.error("Не удалось прочитать каталог сертификатов контейнера")
             return {"result": "ERROR", "message": "Failed to copy certificates from container"}
         
         # Проверяем существование сертификата
-        cert_exists = check_certificate_exists(cert_name, temp_cert_dir)
+        cert_exists = check_certificate_exists(cert_name, cert_listing)
         
         # Если сертификат существует, возвращаем "OK" независимо от ошибок openssl
         if cert_exists:
@@ -291,9 +253,6 @@ def handle(data):
         logger.info("Возвращаем результат: {'result': 'ERROR', 'message': 'Internal error'}")
         return {"result": "ERROR", "message": f"Internal error: {str(e)}"}
     finally:
-        # Очищаем временную директорию
-        cleanup_temp_directory(temp_cert_dir)
-        
         # Запускаем очистку старых сертификатов с задержкой
         run_cleanup_certs_delayed()
         
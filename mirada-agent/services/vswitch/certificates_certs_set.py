@@ -8,10 +8,10 @@ import os
 import base64
 import logging
 import subprocess
-import tempfile
-import shutil
 import sys
 
+from services.container_files import ContainerFileError, container_files
+
 logger = logging.getLogger(__name__)
 
 # Константы для контейнера ngfw.vswitch
@@ -39,15 +39,6 @@ def safe_base64_decode(data):
         logger.error(f"Ошибка декодирования base64 '{data}': {e}")
         raise
 
-def cleanup_temp_directory(temp_dir):
-    """Очищает временную директорию"""
-    if temp_dir and os.path.exists(temp_dir):
-        try:
-            shutil.rmtree(temp_dir)
-            logger.info(f"Временная директория удалена: {temp_dir}")
-        except Exception as e:
-            logger.warning(f"Не удалось удалить временную директорию {temp_dir}: {e}")
-
 def run_cleanup_script():
     """Запускает скрипт очистки старых TLS сертификатов в фоновом режиме с задержкой."""
     try:
@@ -143,53 +134,34 @@ def handle(data):
         except Exception as cleanup_error:
             logger.error(f"Ошибка при выполнении очистки сертификатов: {cleanup_error}")
 
-def copy_certs_from_container():
-    """Копирует сертификаты из контейнера ngfw.vswitch во временную директорию"""
+def list_certs_in_container():
+    """Файлы каталога сертификатов контейнера ngfw.vswitch: {имя: FileInfo} или None"""
     try:
-        # Создаем временную директорию
-        temp_dir = tempfile.mkdtemp()
-        logger.info(f"Создана временная директория: {temp_dir}")
-        
-        # Копируем директорию сертификатов из контейнера
-        copy_cmd = ["docker", "cp", f"{CONTAINER_NAME}:{CONTAINER_CERT_DIR}", temp_dir]
-        logger.info(f"Выполняем команду: {' '.join(copy_cmd)}")
-        
-        result = subprocess.run(copy_cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            logger.error(f"Ошибка копирования сертификатов:")
-            logger.error(f"  - returncode: {result.returncode}")
-            logger.error(f"  - stderr: {result.stderr}")
-            logger.error(f"  - stdout: {result.stdout}")
-            return None
-        
-        # Путь к скопированной директории
-        copied_cert_dir = os.path.join(temp_dir, "cert")
-        logger.info(f"Сертификаты скопированы в: {copied_cert_dir}")
-        
-        return copied_cert_dir
-        
-    except Exception as e:
-        logger.error(f"Ошибка при копировании сертификатов: {e}")
+        listing = container_files.listdir(CONTAINER_NAME, CONTAINER_CERT_DIR)
+    except ContainerFileError as e:
+        logger.error(f"Ошибка чтения каталога сертификатов: {e}")
         return None
+    if listing is None:
+        logger.error(f"Каталог {CONTAINER_NAME}:{CONTAINER_CERT_DIR} не найден")
+    return listing
+
+def read_cert_file(file_name):
+    """Содержимое файла из каталога сертификатов контейнера (None - файла нет)"""
+    return container_files.read(CONTAINER_NAME, f"{CONTAINER_CERT_DIR}/{file_name}")
 
-def get_newest_uuid_certpair(cert_dir):
+def get_newest_uuid_certpair(listing):
     """Находит самую новую пару UUID сертификатов"""
     try:
-        if not os.path.exists(cert_dir):
-            logger.warning(f"Директория {cert_dir} не существует")
-            return None, None
-        
-        files = [f for f in os.listdir(cert_dir) if f.endswith('.crt') and not f.startswith('cert')]
+        files = [f for f in listing if f.endswith('.crt') and not f.startswith('cert')]
         if not files:
-            logger.info(f"В директории {cert_dir} не найдены UUID сертификаты")
+            logger.info(f"В директории {CONTAINER_CERT_DIR} не найдены UUID сертификаты")
             return None, None
         
         # Находим самый новый .crt файл
-        crt_file = max(files, key=lambda x: os.path.getmtime(os.path.join(cert_dir, x)))
+        crt_file = max(files, key=lambda x: listing[x].mtime)
         key_file = crt_file.replace('.crt', '.key')
         
-        if not os.path.exists(os.path.join(cert_dir, key_file)):
+        if key_file not in listing:
             logger.warning(f"Не найден соответствующий ключ для {crt_file}")
             return None, None
             
@@ -201,17 +173,16 @@ def get_newest_uuid_certpair(cert_dir):
 
 def verify_tls_certificate(cert_bytes, key_bytes):
     """Проверяет установку TLS сертификата"""
-    temp_cert_dir = None
     try:
         logger.info("Проверка TLS сертификата")
         
-        # Копируем сертификаты из контейнера
-        temp_cert_dir = copy_certs_from_container()
-        if not temp_cert_dir:
+        # Список файлов каталога сертификатов (с хоста через volume или одним docker cp)
+        cert_listing = list_certs_in_container()
+        if cert_listing is None:
             return {"result": "fail", "reason": "failed to copy certificates from container"}
         
         # Находим самую новую пару UUID файлов
-        crt_file, key_file = get_newest_uuid_certpair(temp_cert_dir)
+        crt_file, key_file = get_newest_uuid_certpair(cert_listing)
         
         if not crt_file or not key_file:
             logger.warning("Не найдены UUID сертификаты")
@@ -222,11 +193,8 @@ def verify_tls_certificate(cert_bytes, key_bytes):
         logger.info(f"  - key_file: {key_file}")
         
         # Читаем содержимое файлов
-        with open(os.path.join(temp_cert_dir, crt_file), 'rb') as f:
-            file_cert = f.read()
-        
-        with open(os.path.join(temp_cert_dir, key_file), 'rb') as f:
-            file_key = f.read()
+        file_cert = read_cert_file(crt_file) or b''
+        file_key = read_cert_file(key_file) or b''
         
         # Добавляем отладочную информацию
         logger.info(f"Проверка TLS сертификатов:")
@@ -250,40 +218,29 @@ def verify_tls_certificate(cert_bytes, key_bytes):
     except Exception as e:
         logger.error(f"Ошибка при проверке TLS сертификата: {e}")
         return {"result": "ERROR", "message": f"TLS certificate verification error: {str(e)}"}
-    finally:
-        # Очищаем временную директорию
-        cleanup_temp_directory(temp_cert_dir)
 
 def verify_management_certificate(cert_bytes, key_bytes):
     """Проверяет установку management сертификата"""
-    temp_cert_dir = None
     try:
         logger.info("Проверка management сертификата")
         
-        # Копируем сертификаты из контейнера
-        temp_cert_dir = copy_certs_from_container()
-        if not temp_cert_dir:
+        # Список файлов каталога сертификатов (с хоста через volume или одним docker cp)
+        cert_listing = list_certs_in_container()
+        if cert_listing is None:
             return {"result": "ERROR", "message": "failed to copy certificates from container"}
         
-        # Пути к скопированным файлам
-        temp_cert_crt = os.path.join(temp_cert_dir, CERT_CRT_FILE)
-        temp_cert_key = os.path.join(temp_cert_dir, CERT_KEY_FILE)
-        
         # Проверяем существование стандартных файлов
-        if not os.path.exists(temp_cert_crt):
+        if CERT_CRT_FILE not in cert_listing:
             logger.error("Файл cert.crt не найден")
             return {"result": "ERROR", "message": "cert.crt file not found"}
         
-        if not os.path.exists(temp_cert_key):
+        if CERT_KEY_FILE not in cert_listing:
             logger.error("Файл cert.key не найден")
             return {"result": "ERROR", "message": "cert.key file not found"}
         
         # Читаем содержимое файлов
-        with open(temp_cert_crt, 'rb') as f:
-            file_cert = f.read()
-        
-        with open(temp_cert_key, 'rb') as f:
-            file_key = f.read()
+        file_cert = read_cert_file(CERT_CRT_FILE) or b''
+        file_key = read_cert_file(CERT_KEY_FILE) or b''
         
         # Добавляем отладочную информацию
         logger.info(f"Проверка management сертификатов:")
@@ -306,7 +263,4 @@ def verify_management_certificate(cert_bytes, key_bytes):
         
     except Exception as e:
         logger.error(f"Ошибка при проверке management сертификата: {e}")
-        return {"result": "ERROR", "message": f"Management certificate verification error: {str(e)}"}
-    finally:
-        # Очищаем временную директорию
-        cleanup_temp_directory(temp_cert_dir)
\ No newline at end of file
+        return {"result": "ERROR", "message": f"Management certificate verification error: {str(e)}"}
\ No newline at end of file
@@ -6,9 +6,11 @@
 import logging
 import subprocess
 import re
-import requests
 import json
 
+from services.http_client import http_client
+from services.netns_state import SnapshotError, netns_state
+
 logger = logging.getLogger(__name__)
 
 # Константы для сетевого пространства имен
@@ -66,93 +68,36 @@ def normalize_data(data):
     return normalized
 
 def check_forward_rule_exists(net_data, config_type):
-    """Проверяет существование правила перенаправления в iptables"""
+    """Проверяет существование правила перенаправления в iptables (снимок таблицы nat)"""
     try:
         full_addr = net_data['fullAddr']
         port = net_data['port']
         
         logger.info(f"Проверка существования правила перенаправления: сеть {full_addr}, порт {port}, конфигурация {config_type}")
         
-        cmd = [
-            "ip", "netns", "exec", NETNS_NAME,
-            "iptables", "-t", "nat", "-L", "-n", "-v"
-        ]
-        
-        logger.info(f"Выполняем команду: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        
-        if result.returncode != 0:
-            logger.error(f"Ошибка получения списка правил NAT:")
-            logger.error(f"  - returncode: {result.returncode}")
-            logger.error(f"  - stderr: {result.stderr}")
-            return False, f"Failed to check iptables NAT rules: {result.stderr}"
-        
-        # Ищем правило в выводе - ищем строку с нужной сетью и портом
-        # Для srcNets: сеть в source колонке, для dstNets: сеть в destination колонке
-        # REDIRECT находится в колонке target, поэтому ищем просто сеть и порт
-        # Для CIDR адресов экранируем только точки, но не слеш
-        # Для /32 адресов iptables может показывать как с /32, так и без него
-        escaped_addr = full_addr.replace('.', r'\.')
-        
-        # Если это /32 адрес, ищем оба варианта: с /32 и без него
-        if full_addr.endswith('/32'):
-            base_ip = full_addr[:-3].replace('.', r'\.')  # Убираем /32 и экранируем точки
-            pattern = rf".*({escaped_addr}|{base_ip}).*dpt:{port}"
-        else:
-            pattern = rf".*{escaped_addr}.*dpt:{port}"
-        
-        logger.info(f"Ищем паттерн: {pattern}")
-        logger.info(f"Полный вывод iptables:")
-        logger.info(result.stdout)
-        
-        lines = result.stdout.split('\n')
-        matching_lines = [line for line in lines if re.search(pattern, line)]
-        
-        logger.info(f"Найдено совпадающих строк: {len(matching_lines)}")
-        if matching_lines:
-            for line in matching_lines:
-                logger.info(f"  - {line.strip()}")
+        # Для srcNets сеть в -s, для dstNets - в -d; REDIRECT в -j, поэтому ищем сеть и порт.
+        # /32 адрес в индексе один ключ с записью без маски
+        try:
+            matching_rules = netns_state.lookup(
+                "iptables", lambda index: index.find(table="nat", address=full_addr, dport=port)
+            )
+        except SnapshotError as e:
+            logger.error(f"Ошибка получения снимка iptables: {e}")
+            return False, f"Failed to check iptables NAT rules: {e}"
+        
+        logger.info(f"Найдено совпадающих правил: {len(matching_rules)}")
+        if matching_rules:
+            for rule in matching_rules:
+                logger.info(f"  - {rule.chain}: {rule.spec}")
         else:
             logger.info("  (правил не найдено)")
-            # Дополнительная диагностика - показываем все правила REDIRECT
+            # Дополнительная диагностика - показываем все правила REDIRECT с портом
             logger.info("Дополнительная диагностика - все правила REDIRECT:")
-            for line in lines:
-                if "REDIRECT" in line and "dpt:" in line:
-                    logger.info(f"  Найдено правило: {line.strip()}")
-            
-            # Ищем по отдельности сеть и порт
-            logger.info(f"Поиск сети '{full_addr}':")
-            net_found = False
-            search_variants = [full_addr]
-            
-            # Для /32 адресов добавляем вариант без /32
-            if full_addr.endswith('/32'):
-                base_ip = full_addr[:-3]
-                search_variants.append(base_ip)
-                logger.info(f"  Также ищем вариант без /32: '{base_ip}'")
-            
-            for variant in search_variants:
-                for line in lines:
-                    if variant in line:
-                        logger.info(f"  Найдена строка с сетью '{variant}': {line.strip()}")
-                        net_found = True
-                        break
-                if net_found:
-                    break
-                    
-            if not net_found:
-                logger.info("  Сеть не найдена ни в одном из вариантов")
-                
-            logger.info(f"Поиск порта 'dpt:{port}':")
-            port_found = False
-            for line in lines:
-                if f"dpt:{port}" in line:
-                    logger.info(f"  Найдена строка с портом: {line.strip()}")
-                    port_found = True
-            if not port_found:
-                logger.info("  Порт не найден")
+            for rule in netns_state.get("iptables").find(table="nat", target="REDIRECT"):
+                if rule.dports:
+                    logger.info(f"  Найдено правило: {rule.chain}: {rule.spec}")
         
-        return len(matching_lines) > 0, None
+        return len(matching_rules) > 0, None
         
     except Exception as e:
         logger.error(f"Ошибка при проверке правила перенаправления: {e}")
@@ -307,6 +252,9 @@ def remove_forward_rule(net_data, config_type, net_type="src"):
                 logger.error(f"  - stderr: {result.stderr}")
                 return False, f"Failed to remove rule: {result.stderr}"
         
+        # Снимок iptables устарел после удаления
+        netns_state.invalidate("iptables")
+        
         # Проверяем, что правило действительно удалено
         logger.info("Проверяем, что правило удалено")
         rule_exists_after, error_msg = check_forward_rule_exists(net_data, config_type)
@@ -507,7 +455,7 @@ def handle(data):
         try:
             # Получаем список всех правил
             logger.info("Получаем список всех правил для удаления")
-            response = requests.get('http://localhost:7779/api/forwardRules')
+            response = http_client.get('http://localhost:7779/api/forwardRules')
             if response.status_code == 200:
                 rules = response.json()
                 logger.info(f"Найдено правил для удаления: {len(rules)}")
@@ -517,7 +465,7 @@ def handle(data):
                     rule_id = rule.get('id')
                     if rule_id:
                         logger.info(f"Удаляем правило с ID: {rule_id}")
-                        delete_response = requests.delete(
+                        delete_response = http_client.delete(
                             f'http://localhost:7779/api/forwardRules/{rule_id}',
                             headers={'Content-Type': 'application/json'}
                         )
@@ -5,7 +5,8 @@
 
 import logging
 import subprocess
-import re
+
+from services.netns_state import SnapshotError, netns_state
 
 logger = logging.getLogger(__name__)
 
@@ -42,41 +43,29 @@ def normalize_data(data):
     
     return normalized
 
+def _matching_rules(snapshot, port, interface):
+    """Правила NGFW_INPUT для порта: с указанным интерфейсом или без -i (любой интерфейс)"""
+    return [
+        rule for rule in snapshot.find(table="filter", chain="NGFW_INPUT", dport=port)
+        if rule.in_interface in (interface, None)
+    ]
+
 def check_rule_exists(port, interface):
     """Проверяет существование правила в iptables"""
     try:
         logger.info(f"Проверка существования правила: порт {port}, интерфейс {interface}")
         
-        cmd = [
-            "ip", "netns", "exec", NETNS_NAME,
-            "iptables", "-L", "NGFW_INPUT", "-n", "-v"
-        ]
-        
-        logger.info(f"Выполняем команду: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        
-        if result.returncode != 0:
-            logger.error(f"Ошибка получения списка правил:")
-            logger.error(f"  - returncode: {result.returncode}")
-            logger.error(f"  - stderr: {result.stderr}")
-            return False, f"Failed to check iptables rules: {result.stderr}"
-        
-        # Ищем правило в выводе
-        # Сначала ищем по конкретному интерфейсу
-        pattern = rf"{interface}.*dpt:{port}"
-        lines = result.stdout.split('\n')
-        matching_lines = [line for line in lines if re.search(pattern, line)]
-        
-        # Если не найдено, ищем по любому интерфейсу (*) для данного порта
-        if not matching_lines:
-            pattern = rf"\*.*dpt:{port}"
-            matching_lines = [line for line in lines if re.search(pattern, line)]
+        try:
+            matching_rules = netns_state.lookup("iptables", lambda s: _matching_rules(s, port, interface))
+        except SnapshotError as e:
+            logger.error(f"Ошибка получения снимка iptables: {e}")
+            return False, f"Failed to check iptables rules: {e}"
         
-        logger.info(f"Найдено совпадающих строк: {len(matching_lines)}")
-        for line in matching_lines:
-            logger.info(f"  - {line.strip()}")
+        logger.info(f"Найдено совпадающих правил: {len(matching_rules)}")
+        for rule in matching_rules:
+            logger.info(f"  - {rule.spec}")
         
-        return len(matching_lines) > 0, None
+        return len(matching_rules) > 0, None
         
     except Exception as e:
         logger.error(f"Ошибка при проверке правила: {e}")
@@ -87,27 +76,14 @@ def count_rule_duplicates(port, interface):
     try:
         logger.info(f"Подсчет дубликатов правила: порт {port}, интерфейс {interface}")
         
-        cmd = [
-            "ip", "netns", "exec", NETNS_NAME, "bash", "-c",
-            f"iptables -L NGFW_INPUT -n -v | grep -E '({interface}|\\*).*dpt:{port}' | wc -l"
-        ]
-        
-        logger.info(f"Выполняем команду: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        
-        if result.returncode != 0:
-            logger.error(f"Ошибка подсчета дубликатов:")
-            logger.error(f"  - returncode: {result.returncode}")
-            logger.error(f"  - stderr: {result.stderr}")
-            return 0, f"Failed to count rule duplicates: {result.stderr}"
-        
         try:
-            count = int(result.stdout.strip())
-            logger.info(f"Количество дубликатов: {count}")
-            return count, None
-        except ValueError:
-            logger.error(f"Некорректный вывод команды подсчета: '{result.stdout}'")
-            return 0, f"Invalid count output: {result.stdout}"
+            count = len(_matching_rules(netns_state.current("iptables"), port, interface))
+        except SnapshotError as e:
+            logger.error(f"Ошибка получения снимка iptables: {e}")
+            return 0, f"Failed to count rule duplicates: {e}"
+        
+        logger.info(f"Количество дубликатов: {count}")
+        return count, None
         
     except Exception as e:
         logger.error(f"Ошибка при подсчете дубликатов: {e}")
@@ -131,6 +107,7 @@ def remove_iptables_rule(port, interface):
         
         if result.returncode == 0:
             logger.info("Правило успешно удалено")
+            netns_state.invalidate("iptables")
             return True, None
         
         # Если не удалось удалить с конкретным интерфейсом, 
@@ -147,6 +124,7 @@ def remove_iptables_rule(port, interface):
         
         if result.returncode == 0:
             logger.info("Правило успешно удалено")
+            netns_state.invalidate("iptables")
             return True, None
         
         logger.error(f"Ошибка удаления правила:")
@@ -4,15 +4,11 @@
 """
 
 import logging
-import subprocess
-import re
+from services.netns_state import SnapshotError, netns_state
 from .utils.cleanup_iptables import schedule_delete_rule_by_number
 
 logger = logging.getLogger(__name__)
 
-# Константы для сетевого пространства имен
-NETNS_NAME = "ngfw"
-
 def extract_iptables_data(data):
     """Извлекает данные iptables из запроса"""
     try:
@@ -55,121 +51,48 @@ def extract_iptables_data(data):
         return None, None, None
 
 def get_iptables_rules(table, chain):
-    """Получает правила iptables для указанной цепочки"""
+    """Получает правила iptables для указанной цепочки из снимка iptables-save"""
     try:
         logger.info(f"Получение правил iptables: table={table}, chain={chain}")
         
-        # Используем iptables для получения правил
-        cmd = ["ip", "netns", "exec", NETNS_NAME, "iptables", "-t", table, "-L", chain, "--line-numbers", "-v"]
-        logger.info(f"Выполняем команду: {' '.join(cmd)}")
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        snapshot = netns_state.current("iptables")
         
-        if result.returncode != 0:
-            logger.error(f"Ошибка выполнения команды:")
-            logger.error(f"  - returncode: {result.returncode}")
-            logger.error(f"  - stderr: {result.stderr}")
+        if not snapshot.has_chain(table, chain):
+            logger.error(f"Цепочка {table}:{chain} не найдена")
             return None
         
-        logger.info("Команда выполнена успешно")
-        logger.info(f"Вывод команды: {result.stdout}")
-        
-        return result.stdout
-        
-    except Exception as e:
-        logger.error(f"Ошибка при получении правил iptables: {e}")
-        return None
-
-def parse_iptables_output(output, chain):
-    """Парсит вывод iptables и возвращает список правил"""
-    try:
-        logger.info("Парсинг вывода iptables")
-        
-        if not output or not output.strip():
-            logger.warning("Вывод команды пуст")
-            return []
-        
-        rules = []
-        lines = output.strip().split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Парсим строку правила
-            rule = parse_rule_line(line, chain)
-            if rule:
-                rules.append(rule)
-        
+        rules = [rule_to_dict(rule) for rule in snapshot.rules(table, chain)]
         logger.info(f"Найдено правил: {len(rules)}")
         return rules
         
+    except SnapshotError as e:
+        logger.error(f"Ошибка получения снимка iptables: {e}")
+        return None
     except Exception as e:
-        logger.error(f"Ошибка при парсинге вывода iptables: {e}")
-        return []
+        logger.error(f"Ошибка при получении правил iptables: {e}")
+        return None
 
-def parse_rule_line(line, chain):
-    """Парсит одну строку правила iptables"""
-    try:
-        # Примеры строк:
-        # Chain INPUT (policy ACCEPT 0 packets, 0 bytes)
-        # num   pkts bytes target     prot opt in     out     source               destination         
-        # 1        0     0 NGFW_INPUT all  --  any    any     anywhere             anywhere            
-        # 2 11147482 627423306 NGFW_INPUT all  --  any    any     anywhere             anywhere            
-        
-        # Пропускаем заголовки
-        if line.startswith('Chain ') or line.startswith('num ') or 'target' in line and 'prot' in line:
-            return None
-        
-        # Парсим правило
-        parts = line.split()
-        if len(parts) < 4:
-            return None
-        
-        # Номер правила — первый столбец
-        rule_number = None
-        try:
-            rule_number = int(parts[0])
-        except (ValueError, IndexError):
-            rule_number = None
+def rule_to_dict(rule):
+    """
+    Преобразует правило снимка в формат ответа.
 
-        # Извлекаем счетчики
-        try:
-            counter_packages = int(parts[1])
-            counter_bytes = int(parts[2])
-        except (ValueError, IndexError):
-            counter_packages = 0
-            counter_bytes = 0
-        
-        # Извлекаем target
-        target = parts[3] if len(parts) > 3 else ""
-        
-        # Формируем базовое правило
-        rule = {
-            "chain": chain,
-            "num": rule_number,
-            "counter_packages": counter_packages,
-            "counter_bytes": counter_bytes,
-            "target": target,
-            "line": line
-        }
-        
-        # Извлекаем дополнительные параметры
-        if len(parts) > 4:
-            # Ищем match параметры
-            match_params = []
-            for i, part in enumerate(parts[4:], 4):
-                if part.startswith('-m') or part.startswith('--'):
-                    match_params.append(part)
-            if match_params:
-                rule["match"] = match_params
-        
-        return rule
-        
-    except Exception as e:
-        logger.error(f"Ошибка при парсинге строки правила: {e}")
-        return None
+    line - правило в формате iptables-save ("-A <цепочка> <параметры>"), match -
+    опции правила, начинающиеся с "-m"/"--". До перехода на iptables-save это
+    были строка вывода iptables -L -v и её столбцы, начинающиеся с "--" (обычно
+    только столбец opt).
+    """
+    result = {
+        "chain": rule.chain,
+        "num": rule.num,
+        "counter_packages": rule.packets,
+        "counter_bytes": rule.bytes,
+        "target": rule.target,
+        "line": f"-A {rule.chain} {rule.spec}"
+    }
+    match_params = [token for token in rule.tokens if token.startswith('-m') or token.startswith('--')]
+    if match_params:
+        result["match"] = match_params
+    return result
 
 def handle(data):
     """Обработчик для проверки правил iptables"""
@@ -193,8 +116,8 @@ def handle(data):
         logger.info(f"Извлеченные данные: util={util}, table={table}, chain={chain}")
         
         # Получаем правила iptables
-        output = get_iptables_rules(table, chain)
-        if output is None:
+        rules = get_iptables_rules(table, chain)
+        if rules is None:
             logger.error(f"Не удалось получить правила iptables")
             # Для таблицы nat считаем отсутствие вывода допустимым успехом
             if table == "nat":
@@ -202,10 +125,6 @@ def handle(data):
                 return {"result": "OK"}
             return {"result": "ERROR", "message": "Не удалось получить правила iptables"}
         
-        # Парсим вывод и проверяем наличие правил
-        rules = parse_iptables_output(output, chain)
-        logger.info(f"Найдено правил: {len(rules)}")
-        
         # Проверяем, что цепочка существует и содержит правила
         if rules and len(rules) > 0:
             logger.info("Цепочка существует и содержит правила")
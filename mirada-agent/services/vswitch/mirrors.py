@@ -4,15 +4,12 @@
 """
 
 import logging
-import subprocess
 import re
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List
 
-logger = logging.getLogger(__name__)
-
-# Константы для сетевого пространства имен
-NETNS_NAME = "ngfw"
+from services.netns_state import SnapshotError, TcSnapshot, netns_state
 
+logger = logging.getLogger(__name__)
 
 def _validate_request_data(data: Dict[str, Any]) -> Dict[str, str]:
     """Валидирует и извлекает данные из запроса."""
@@ -55,73 +52,35 @@ def _extract_preference_from_id(mirror_id: str) -> str:
         raise ValueError(f"Некорректный формат ID mirror: {mirror_id}")
 
 
-def _get_tc_filter_output(dev: str, direction: str) -> Optional[str]:
-    """Получает вывод команды tc filter show для указанного устройства и направления."""
-    try:
-        cmd = ["ip", "netns", "exec", NETNS_NAME, "tc", "filter", "show", "dev", dev, direction]
-        logger.info(f"Выполняем команду: {' '.join(cmd)}")
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        
-        if result.returncode != 0:
-            logger.error(f"Ошибка выполнения tc filter show:")
-            logger.error(f"  - returncode: {result.returncode}")
-            logger.error(f"  - stderr: {result.stderr}")
-            logger.error(f"  - stdout: {result.stdout}")
-            return None
-        
-        logger.info(f"Команда tc filter show выполнена успешно")
-        logger.debug(f"Вывод tc filter show: {result.stdout}")
-        return result.stdout
-        
-    except Exception as e:
-        logger.error(f"Исключение при выполнении tc filter show: {e}")
-        return None
+def _find_mirror_preferences(snapshot: TcSnapshot, target: str) -> List[str]:
+    """Номера pref фильтров, в строке которых есть target в формате "cdm-ngfw-vswitch:target"."""
+    # Формат строки: "filter protocol all pref 49152 bpf chain 0 handle 0x1 cdm-ngfw-vswitch:dummy5.o:[mirror/ingress] ..."
+    return [pref for pref, _ in snapshot.lines_with(f"cdm-ngfw-vswitch:{target}") if pref is not None]
 
 
-def _check_mirror_in_output(output: str, target: str, expected_preference: str) -> bool:
-    """Проверяет наличие mirror в выводе tc filter show."""
+def _check_mirror(dev: str, direction: str, target: str, expected_preference: str) -> bool:
+    """Проверяет наличие mirror в снимке tc filter show для устройства и направления."""
+    logger.info(f"Поиск mirror на {dev} {direction} с target: {target} и preference: {expected_preference}")
     try:
-        logger.info(f"Поиск mirror с target: {target} и preference: {expected_preference}")
-        
-        if not output or not output.strip():
-            logger.warning("Вывод tc filter show пуст")
-            return False
-        
-        # Ищем строки, содержащие target в формате "cdm-ngfw-vswitch:target"
-        target_pattern = f"cdm-ngfw-vswitch:{re.escape(target)}"
-        logger.info(f"Ищем паттерн target: {target_pattern}")
-        
-        # Разбираем вывод по строкам
-        lines = output.split('\n')
-        for line in lines:
-            line = line.strip()
-            if target_pattern in line:
-                logger.info(f"Найдена строка с target: {line}")
-                
-                # Извлекаем preference number из строки
-                # Формат: "filter protocol all pref 49152 bpf chain 0 handle 0x1 cdm-ngfw-vswitch:dummy5.o:[mirror/ingress] ..."
-                pref_match = re.search(r'pref\s+(\d+)', line)
-                if pref_match:
-                    actual_preference = pref_match.group(1)
-                    logger.info(f"Найден preference: {actual_preference}")
-                    
-                    if actual_preference == expected_preference:
-                        logger.info(f"Mirror найден и preference совпадает: {actual_preference}")
-                        return True
-                    else:
-                        logger.warning(f"Mirror найден, но preference не совпадает. Ожидался: {expected_preference}, найден: {actual_preference}")
-                        return False
-                else:
-                    logger.warning(f"Не удалось извлечь preference из строки: {line}")
-        
-        logger.warning(f"Mirror с target {target} не найден в выводе")
-        return False
-        
-    except Exception as e:
-        logger.error(f"Ошибка при проверке mirror в выводе: {e}")
+        # Решение принимает первый фильтр с target, как и при разборе вывода построчно
+        matched = netns_state.lookup(
+            "tc", lambda s: _find_mirror_preferences(s, target)[:1] == [expected_preference], dev, direction
+        )
+    except SnapshotError as e:
+        logger.error(f"Ошибка выполнения tc filter show: {e}")
         return False
 
+    if matched:
+        logger.info(f"Mirror найден и preference совпадает: {expected_preference}")
+        return True
+
+    found = _find_mirror_preferences(netns_state.get("tc", dev, direction), target)
+    if found:
+        logger.warning(f"Mirror найден, но preference не совпадает. Ожидался: {expected_preference}, найден: {found[0]}")
+    else:
+        logger.warning(f"Mirror с target {target} не найден в выводе")
+    return False
+
 
 def _verify_mirror(params: Dict[str, str]) -> bool:
     """Проверяет наличие mirror для указанных параметров."""
@@ -150,15 +109,7 @@ def _verify_mirror(params: Dict[str, str]) -> bool:
         for direction in directions:
             logger.info(f"Проверяем направление: {direction}")
             
-            # Получаем вывод tc filter show
-            tc_output = _get_tc_filter_output(dev, direction)
-            if tc_output is None:
-                logger.error(f"Не удалось получить вывод tc filter show для {dev} {direction}")
-                return False
-            
-            # Проверяем наличие mirror в выводе
-            mirror_found = _check_mirror_in_output(tc_output, target, expected_preference)
-            if not mirror_found:
+            if not _check_mirror(dev, direction, target, expected_preference):
                 logger.error(f"Mirror не найден для направления {direction}")
                 return False
             
@@ -1,48 +1,126 @@
 #!/usr/bin/env python3
 """
 Утилита для удаления правил iptables в сетевом пространстве имён ngfw
+
+Удаления выполняются транзакцией iptables-restore --noflush: на таблицу один
+запуск, одна блокировка xtables, изменения применяются атомарно. Правило
+удаляется по спецификации (аргументы из iptables-save), а не по номеру, -
+номера сдвигаются после каждого удаления и от параллельных изменений.
+
+Отложенные удаления (schedule_*) ставятся в очередь с приоритетом по времени
+срабатывания. Её разбирает один фоновый поток: всё, что созрело к моменту
+пробуждения (с окном COALESCE_WINDOW), объединяется (повторная очистка
+цепочки -F - одна операция; одинаковые -D остаются все: одинаковых правил в
+цепочке может быть несколько) и применяется транзакцией на таблицу. Если транзакция отклонена
+(например, правило уже удалено кем-то другим), операции применяются по одной,
+чтобы остальные удаления не потерялись.
 """
 
+import heapq
+import itertools
 import logging
+import os
 import subprocess
 import threading
 import time
 
+from services.iptables_index import save_quote
+from services.netns_state import SnapshotError, netns_state
+
 
 logger = logging.getLogger(__name__)
 
 
 NETNS_NAME = "ngfw"
 
+# Операции, которые созреют в пределах окна после пробуждения, попадают в ту же транзакцию
+COALESCE_WINDOW = 0.05
 
-def _run_cmd(cmd):
+
+def _restore(table: str, operations: list[tuple]) -> bool:
+    """
+    Применяет операции одной транзакцией iptables-restore --noflush.
+
+    operations: [("-D", chain, [spec...]), ("-F", chain, [])]; аргументы
+    экранируются как в iptables-save (save_quote).
+    """
+    lines = [f"*{table}"]
+    for op, chain, spec in operations:
+        lines.append(" ".join([op, chain] + [save_quote(token) for token in spec]))
+    lines.append("COMMIT")
+    cmd = ["ip", "netns", "exec", NETNS_NAME, "iptables-restore", "--noflush"]
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        if result.returncode != 0:
-            logger.error(f"Ошибка выполнения команды: {' '.join(cmd)}")
-            logger.error(f"returncode={result.returncode} stderr={result.stderr}")
-            return False, result.stdout, result.stderr
-        return True, result.stdout, result.stderr
+        result = subprocess.run(cmd, input="\n".join(lines) + "\n", capture_output=True, text=True, check=False)
     except Exception as e:
-        logger.error(f"Исключение при выполнении команды {' '.join(cmd)}: {e}")
-        return False, "", str(e)
+        logger.error(f"Исключение при выполнении iptables-restore: {e}")
+        return False
+    if result.returncode != 0:
+        logger.error(f"iptables-restore отклонил транзакцию table={table} ({len(operations)} операций): "
+                     f"returncode={result.returncode} stderr={result.stderr.strip()}")
+        return False
+    # Снимок iptables устарел после изменения
+    netns_state.invalidate("iptables")
+    return True
+
+
+def _coalesce(operations: list[tuple]) -> list[tuple]:
+    # Повторная очистка той же цепочки ничего не меняет; одинаковые -D оставляем:
+    # каждое удаляет одно из одинаковых правил
+    result, flushed = [], set()
+    for op, chain, spec in operations:
+        if op == "-F":
+            if chain in flushed:
+                continue
+            flushed.add(chain)
+        result.append((op, chain, tuple(spec)))
+    return result
+
+
+def apply_operations(table: str, operations: list[tuple]) -> int:
+    """
+    Применяет операции транзакцией; если она отклонена - по одной. Возвращает число применённых.
+    """
+    unique = _coalesce(operations)
+    if not unique:
+        return 0
+    if _restore(table, unique):
+        return len(unique)
+    if len(unique) == 1:
+        return 0
+    applied = sum(1 for operation in unique if _restore(table, [operation]))
+    logger.info(f"Операции table={table} применены по одной: {applied} из {len(unique)}")
+    return applied
+
+
+def _rule_spec_by_number(table: str, chain: str, rule_number: int):
+    """Спецификация правила по номеру в текущем снимке iptables-save (None - правила нет)."""
+    try:
+        rules = netns_state.current("iptables").rules(table, chain)
+    except SnapshotError as e:
+        logger.error(f"Не удалось получить снимок iptables: {e}")
+        return None
+    if 1 <= rule_number <= len(rules):
+        return rules[rule_number - 1].tokens
+    logger.error(f"Правило №{rule_number} не найдено в {table}:{chain}")
+    return None
 
 
 def delete_rule_by_number(table: str, chain: str, rule_number: int) -> bool:
     """
     Удаляет правило по номеру строки в цепочке.
 
-    Аналог: ip netns exec ngfw iptables -t <table> -D <chain> <num>
+    Номер переводится в спецификацию по снимку iptables-save, удаляется правило
+    с этой спецификацией - параллельное изменение цепочки не приведёт к
+    удалению соседнего правила.
     """
     if not table or not chain or rule_number is None:
         logger.error("Некорректные параметры для удаления правила")
         return False
 
-    cmd = [
-        "ip", "netns", "exec", NETNS_NAME,
-        "iptables", "-t", table, "-D", chain, str(rule_number),
-    ]
-    ok, out, err = _run_cmd(cmd)
+    rule_spec = _rule_spec_by_number(table, chain, int(rule_number))
+    if rule_spec is None:
+        return False
+    ok = apply_operations(table, [("-D", chain, rule_spec)]) == 1
     if ok:
         logger.info(f"Удалено правило: table={table} chain={chain} number={rule_number}")
     return ok
@@ -58,11 +136,7 @@ def delete_rule_by_spec(table: str, chain: str, rule_spec: list[str]) -> bool:
         logger.error("Некорректные параметры для удаления по спецификации")
         return False
 
-    cmd = [
-        "ip", "netns", "exec", NETNS_NAME,
-        "iptables", "-t", table, "-D", chain,
-    ] + rule_spec
-    ok, out, err = _run_cmd(cmd)
+    ok = apply_operations(table, [("-D", chain, list(rule_spec))]) == 1
     if ok:
         logger.info(f"Удалено правило по спецификации: table={table} chain={chain} spec={' '.join(rule_spec)}")
     return ok
@@ -70,68 +144,96 @@ def delete_rule_by_spec(table: str, chain: str, rule_spec: list[str]) -> bool:
 
 def delete_all_chain_rules(table: str, chain: str) -> bool:
     """
-    Удаляет все правила в цепочке, проходя с конца к началу.
+    Удаляет все правила цепочки одной транзакцией (-F chain).
     """
     if not table or not chain:
         logger.error("Некорректные параметры для очистки цепочки")
         return False
 
-    # Получаем количество правил
-    list_cmd = [
-        "ip", "netns", "exec", NETNS_NAME,
-        "iptables", "-t", table, "-L", chain, "--line-numbers",
-    ]
-    ok, out, err = _run_cmd(list_cmd)
-    if not ok:
-        return False
-
-    # Считаем максимальный номер правила
-    max_num = 0
-    for line in out.splitlines():
-        parts = line.split()
-        if not parts:
-            continue
-        try:
-            num = int(parts[0])
-            if num > max_num:
-                max_num = num
-        except ValueError:
-            continue
+    ok = apply_operations(table, [("-F", chain, [])]) == 1
+    if ok:
+        logger.info(f"Цепочка очищена: table={table} chain={chain}")
+    return ok
 
-    # Удаляем с конца
-    success = True
-    for num in range(max_num, 0, -1):
-        if not delete_rule_by_number(table, chain, num):
-            success = False
 
-    return success
+class _CleanupScheduler:
+    """Один фоновый поток и очередь отложенных операций по времени срабатывания."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._queue: list[tuple] = []
+        self._sequence = itertools.count()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        # После fork (воркеры gunicorn с preload_app) поток родителя не существует - запускаем свой
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="iptables-cleanup", daemon=True)
+            self._thread.start()
+
+    def schedule(self, delay_seconds: float, table: str, operation: tuple) -> None:
+        with self._condition:
+            heapq.heappush(self._queue, (time.monotonic() + delay_seconds, next(self._sequence), table, operation))
+            self._ensure_thread()
+            self._condition.notify()
+
+    def _take_due(self) -> list[tuple]:
+        with self._condition:
+            while True:
+                if self._queue:
+                    wait = self._queue[0][0] - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._condition.wait(wait)
+                else:
+                    self._condition.wait()
+            horizon = time.monotonic() + COALESCE_WINDOW
+            due = []
+            while self._queue and self._queue[0][0] <= horizon:
+                due.append(heapq.heappop(self._queue))
+            return due
+
+    def _run(self):
+        while True:
+            due = self._take_due()
+            by_table: dict[str, list[tuple]] = {}
+            for _, _, table, operation in due:
+                by_table.setdefault(table, []).append(operation)
+            for table, operations in by_table.items():
+                try:
+                    applied = apply_operations(table, operations)
+                    logger.info(f"Отложенная очистка table={table}: применено {applied} из {len(operations)}")
+                except Exception as e:
+                    logger.error(f"Ошибка отложенной очистки table={table}: {e}")
+
+
+_scheduler = _CleanupScheduler()
+
+
+def schedule_delete_rule_by_spec(table: str, chain: str, rule_spec: list[str], delay_seconds: float = 2) -> None:
+    """
+    Планирует удаление правила по спецификации через delay_seconds.
+    """
+    _scheduler.schedule(delay_seconds, table, ("-D", chain, list(rule_spec)))
 
 
-def schedule_delete_rule_by_number(table: str, chain: str, rule_number: int, delay_seconds: int = 2) -> None:
-    """
-    Планирует удаление правила через delay_seconds в отдельном потоке.
+def schedule_delete_rule_by_number(table: str, chain: str, rule_number: int, delay_seconds: float = 2) -> None:
     """
-    def _delayed():
-        try:
-            time.sleep(delay_seconds)
-            delete_rule_by_number(table, chain, rule_number)
-        except Exception as e:
-            logger.error(f"Ошибка отложенного удаления правила: {e}")
+    Планирует удаление правила через delay_seconds.
 
-    threading.Thread(target=_delayed, daemon=True).start()
+    Номер переводится в спецификацию сейчас, пока он соответствует снимку, по
+    которому его выбрали; к моменту удаления номер мог сдвинуться.
+    """
+    rule_spec = _rule_spec_by_number(table, chain, int(rule_number))
+    if rule_spec is None:
+        return
+    schedule_delete_rule_by_spec(table, chain, rule_spec, delay_seconds)
 
 
-def schedule_delete_all_chain_rules(table: str, chain: str, delay_seconds: int = 2) -> None:
+def schedule_delete_all_chain_rules(table: str, chain: str, delay_seconds: float = 2) -> None:
     """
     Планирует удаление всех правил цепочки через задержку.
     """
-    def _delayed():
-        try:
-            time.sleep(delay_seconds)
-            delete_all_chain_rules(table, chain)
-        except Exception as e:
-            logger.error(f"Ошибка отложенной очистки цепочки: {e}")
-
-    threading.Thread(target=_delayed, daemon=True).start()
-
-
+    _scheduler.schedule(delay_seconds, table, ("-F", chain, []))
@@ -6,6 +6,8 @@
 import logging
 import subprocess
 
+from services.netns_state import netns_state
+
 logger = logging.getLogger(__name__)
 
 # Константы для сетевого пространства имен
@@ -16,6 +18,8 @@ def _execute_command(cmd, description):
     try:
         logger.info(f"Выполняем команду: {' '.join(cmd)}")
         result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        # Команды этого модуля меняют интерфейсы: снимок адресов устарел
+        netns_state.invalidate("addr")
         if result.returncode == 0:
             logger.info(f"Команда выполнена успешно: {description}")
             return True, result.stdout.strip(), None
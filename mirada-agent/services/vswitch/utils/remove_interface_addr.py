@@ -7,6 +7,8 @@ import logging
 import subprocess
 import ipaddress
 
+from services.netns_state import netns_state
+
 logger = logging.getLogger(__name__)
 
 # Константы для сетевого пространства имен
@@ -45,10 +47,7 @@ def check_interface_exists(interface_name):
     try:
         logger.info(f"Проверка существования интерфейса {interface_name}")
         
-        cmd = ["ip", "netns", "exec", NETNS_NAME, "ip", "link", "show", interface_name]
-        result = execute_command(cmd, "проверка существования интерфейса")
-        
-        if result["error"]:
+        if not netns_state.lookup("addr", lambda snapshot: snapshot.exists(interface_name)):
             logger.error(f"Интерфейс {interface_name} не существует")
             return False
         
@@ -64,18 +63,8 @@ def check_interface_address_exists(interface_name, address):
     try:
         logger.info(f"Проверка наличия IP адреса {address} на интерфейсе {interface_name}")
         
-        cmd = ["ip", "netns", "exec", NETNS_NAME, "ip", "addr", "show", interface_name]
-        result = execute_command(cmd, "проверка IP адресов интерфейса")
-        
-        if result["error"]:
-            logger.error(f"Ошибка при проверке IP адреса: {result['error']}")
-            return False
-        
-        output = result["res"]
-        logger.debug(f"Вывод команды ip addr show: {output}")
-        
-        # Проверяем наличие ожидаемого IP адреса
-        if address in output:
+        # Проверяем наличие ожидаемого IP адреса в снимке ip -j addr show
+        if netns_state.lookup("addr", lambda snapshot: snapshot.has_address(interface_name, address)):
             logger.info(f"IP адрес {address} найден на интерфейсе {interface_name}")
             return True
         else:
@@ -94,6 +83,7 @@ def remove_interface_address(interface_name, address):
         # Команда для удаления IP адреса
         cmd = ["ip", "netns", "exec", NETNS_NAME, "ip", "addr", "del", address, "dev", interface_name]
         result = execute_command(cmd, "удаление IP адреса из интерфейса")
+        netns_state.invalidate("addr")
         
         if result["error"]:
             # Проверяем, не является ли ошибка связанной с тем, что адрес уже отсутствует
@@ -116,27 +106,12 @@ def get_interface_addresses(interface_name):
     try:
         logger.info(f"Получение списка IP адресов интерфейса {interface_name}")
         
-        cmd = ["ip", "netns", "exec", NETNS_NAME, "ip", "addr", "show", interface_name]
-        result = execute_command(cmd, "получение IP адресов интерфейса")
-        
-        if result["error"]:
-            logger.error(f"Ошибка при получении IP адресов: {result['error']}")
+        snapshot = netns_state.current("addr")
+        if not snapshot.exists(interface_name):
+            logger.error(f"Ошибка при получении IP адресов: интерфейс {interface_name} не найден")
             return []
         
-        output = result["res"]
-        addresses = []
-        
-        # Парсим вывод для извлечения IP адресов
-        lines = output.split('\n')
-        for line in lines:
-            line = line.strip()
-            if line.startswith('inet ') or line.startswith('inet6 '):
-                # Извлекаем IP адрес с маской
-                parts = line.split()
-                if len(parts) >= 2:
-                    ip_with_mask = parts[1]
-                    addresses.append(ip_with_mask)
-        
+        addresses = snapshot.addresses(interface_name)
         logger.info(f"Найдено IP адресов на интерфейсе {interface_name}: {addresses}")
         return addresses
         
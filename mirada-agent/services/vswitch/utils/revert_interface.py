@@ -13,6 +13,8 @@ import logging
 import subprocess
 from typing import Dict, Tuple
 
+from services.netns_state import netns_state
+
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +25,8 @@ NETNS_NAME = "ngfw"
 def _run_cmd(cmd: list[str]) -> Tuple[bool, str, str]:
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        # Команды этого модуля меняют интерфейсы: снимок адресов устарел
+        netns_state.invalidate("addr")
         if result.returncode != 0:
             return False, result.stdout.strip(), result.stderr.strip()
         return True, result.stdout.strip(), ""
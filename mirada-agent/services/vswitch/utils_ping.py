@@ -7,8 +7,8 @@
   - { "addr": str, "packetsAmount"?: int, "timeout"?: int, "payloadSize"?: int, "source"?: str, "period"?: float, "pmtuDefinition"?: str }
 
 Алгоритм:
-  1) Выполнить: ip netns exec ngfw ps aux | grep ping
-  2) Спарсить вывод и убедиться, что есть процесс с аргументами, соответствующими полям тела (проверяем только переданные поля):
+  1) Взять процессы ping namespace ngfw из таблицы процессов /proc (services/process_table.py)
+  2) По argv из /proc/<pid>/cmdline убедиться, что есть процесс с аргументами, соответствующими полям тела (проверяем только переданные поля):
      - addr всегда должен присутствовать в аргументах команды
      - если задан packetsAmount — ожидается "-c <packetsAmount>" или "-c<packetsAmount>"
      - если задан timeout — ожидается "-W <timeout>" или "-W<timeout>"
@@ -25,6 +25,8 @@ import subprocess
 import re
 from typing import Dict, Any, List, Optional
 
+from services.process_table import ProcessInfo, ProcessTableError, process_inspector
+
 logger = logging.getLogger(__name__)
 
 # Константы
@@ -128,31 +130,10 @@ def _validate_request(data: Dict[str, Any]) -> Dict[str, Any]:
         "pmtuDefinition": pmtu_definition,
     }
 
-def _parse_ps_line(line: str) -> List[str]:
-    """Парсит строку из вывода ps aux и извлекает аргументы команды ping."""
-    # Формат ps aux: USER PID %CPU %MEM VSZ RSS TTY STAT START TIME COMMAND
-    # Нам нужна только часть COMMAND
-    parts = line.strip().split(None, 10)  # Разбиваем на максимум 11 частей
-    if len(parts) < 11:
-        return []
-    
-    command_line = parts[10]  # Последняя часть - командная строка
-    
-    # Разбиваем командную строку на аргументы
-    cmd_parts = command_line.split()
-    
-    # Находим ping в командной строке
-    ping_index = -1
-    for i, part in enumerate(cmd_parts):
-        if part.endswith("ping") or part == "ping":
-            ping_index = i
-            break
-    
-    if ping_index == -1:
-        return []
-    
-    # Возвращаем аргументы после ping (исключая сам ping)
-    return cmd_parts[ping_index + 1:]
+def _find_matching_ping(params: Dict[str, Any]) -> Optional[ProcessInfo]:
+    """Первый процесс ping с ожидаемыми аргументами."""
+    found = process_inspector.find("ping", lambda process: _matches_expected_ping_args(list(process.args), params))
+    return found[0] if found else None
 
 def _match_flag_with_value(args: List[str], flag: str, expected_value: str) -> bool:
     """Проверяет наличие флага с ожидаемым значением в формате -flag value или -flagvalue."""
@@ -234,44 +215,16 @@ def handle(data: Dict[str, Any]) -> Dict[str, Any]:
         params = _validate_request(data)
         logger.info(f"Валидированные параметры: {params}")
 
-        # Выполняем команду для поиска процессов ping
-        cmd = ["ip", "netns", "exec", NETNS_NAME, "ps", "aux"]
-        logger.info(f"Выполняем команду: {' '.join(cmd)}")
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        
-        if result.returncode != 0:
-            logger.error(f"Ошибка выполнения команды: rc={result.returncode}, stderr={result.stderr}")
+        # Ищем процесс ping с ожидаемыми аргументами в таблице процессов namespace
+        try:
+            matched = _find_matching_ping(params)
+        except ProcessTableError as e:
+            logger.error(f"Ошибка получения списка процессов: {e}")
             return {"result": "ERROR", "message": "Failed to execute ps command in ngfw namespace"}
 
-        stdout = (result.stdout or "").strip()
-        stderr = (result.stderr or "").strip()
-        
-        if not stdout:
-            logger.info("Нет вывода от команды ps")
-            return {"result": "ERROR", "message": "ping process not found in ngfw"}
-
-        # Фильтруем строки, содержащие ping
-        ping_lines = []
-        for line in stdout.splitlines():
-            if "ping" in line and "grep" not in line:  # Исключаем сам grep
-                ping_lines.append(line)
-
-        if not ping_lines:
-            logger.info("Не найдено процессов ping")
-            return {"result": "ERROR", "message": "ping process not found in ngfw"}
-
-        logger.info(f"Найдено {len(ping_lines)} процессов ping")
-        
-        # Проверяем каждый найденный процесс ping
-        for line in ping_lines:
-            logger.info(f"Анализируем строку: {line}")
-            args = _parse_ps_line(line)
-            logger.info(f"Извлеченные аргументы: {args}")
-            
-            if _matches_expected_ping_args(args, params):
-                logger.info("Найден соответствующий процесс ping")
-                return {"result": "OK"}
+        if matched:
+            logger.info(f"Найден соответствующий процесс ping: pid={matched.pid} {matched.command_line}")
+            return {"result": "OK"}
 
         # Если соответствующий процесс не найден, запускаем новый
         logger.info("Не найдено процесса ping с ожидаемыми аргументами, запускаем новый")
@@ -306,6 +259,7 @@ def handle(data: Dict[str, Any]) -> Dict[str, Any]:
         # Запускаем ping в фоновом режиме
         try:
             subprocess.Popen(ping_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            process_inspector.invalidate()
             logger.info("Процесс ping запущен успешно")
             return {"result": "OK"}
         except Exception as e:
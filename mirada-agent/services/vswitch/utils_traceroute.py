@@ -7,8 +7,9 @@
   - { "addr": str, "icmp"?: bool, "attemptsAmount"?: int, "source"?: str, "dontFragmentByte"?: bool }
 
 Алгоритм:
-  1) Выполнить: ip netns exec ngfw pgrep -a traceroute
-  2) Спарсить вывод и убедиться, что есть процесс с аргументами, соответствующими полям тела (проверяем только переданные поля):
+  1) Найти процессы traceroute namespace ngfw в таблице процессов из /proc (services/process_table.py);
+     если процесса с addr ещё нет, подождать его появления до MIRADA_TRACEROUTE_WAIT секунд (по умолчанию 2)
+  2) Убедиться по argv из /proc/<pid>/cmdline, что есть процесс с аргументами, соответствующими полям тела (проверяем только переданные поля):
      - если icmp == True, ожидается ключ "-I"; если icmp == False — ключ "-I" отсутствует; если icmp не указан — не проверяем
      - если задан attemptsAmount — ожидается "-m <attemptsAmount>" или "-m<attemptsAmount>"
      - если задан source — ожидается "-i <source>" или "-i<source>"
@@ -18,15 +19,20 @@
 """
 
 import logging
-import subprocess
+import os
 from typing import Dict, Any, List, Optional
 
+from services.process_table import ProcessInfo, ProcessTableError, process_inspector
+
 
 logger = logging.getLogger(__name__)
 
 
 # Константы
 NETNS_NAME = "ngfw"
+TRACEROUTE_NAMES = ("traceroute", "traceroute6")
+# Сколько ждать появления traceroute, запущенного CDM перед проверкой
+WAIT_SECONDS = float(os.environ.get("MIRADA_TRACEROUTE_WAIT", 2.0))
 
 
 def _validate_request(data: Dict[str, Any]) -> Dict[str, Any]:
@@ -73,33 +79,6 @@ def _validate_request(data: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _tokenize_cmdline(rest: str) -> List[str]:
-    """Грубое разбиение командной строки на токены по пробелам.
-    pgrep -a возвращает строку вида: "PID traceroute <args>".
-    Возвращаем список токенов после имени исполняемого файла.
-    """
-    # Ожидается, что rest начинается с "traceroute" или пути .../traceroute
-    parts = [p for p in rest.strip().split() if p]
-    if not parts:
-        return []
-    # Удаляем сам бинарь (первый токен после PID)
-    return parts[1:] if len(parts) > 1 else []
-
-
-def _read_cmdline_tokens(pid: int) -> List[str]:
-    """Читает /proc/<pid>/cmdline и возвращает список аргументов процесса.
-    Возвращает пустой список при ошибке доступа/чтения.
-    """
-    try:
-        with open(f"/proc/{pid}/cmdline", "rb") as f:
-            raw = f.read().split(b"\0")
-        tokens = [p.decode("utf-8", "replace") for p in raw if p]
-        # Обычно первый токен — путь к бинарю traceroute; возвращаем аргументы целиком
-        return tokens
-    except Exception:
-        return []
-
-
 def _has_flag(tokens: List[str], flag: str) -> bool:
     """Проверяет наличие короткого флага среди токенов.
     Учитывает формы "-m 5" и "-m5" для флагов с параметром при отдельной проверке.
@@ -212,87 +191,38 @@ def handle(data: Dict[str, Any]) -> Dict[str, Any]:
 
         params = _validate_request(data)
         addr = params["addr"]
-        icmp = params.get("icmp")
-        attempts = params.get("attemptsAmount")
-        source = params.get("source")
-        dont_frag = params.get("dontFragmentByte")
 
-        cmd = ["ip", "netns", "exec", NETNS_NAME, "pgrep", "-a", "traceroute"]
-        logger.info(f"Выполняем команду: {' '.join(cmd)}")
-        res = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        def exact(process: ProcessInfo) -> bool:
+            return _matches_expected(list(process.args), addr=addr, icmp=params.get("icmp"),
+                                     attempts=params.get("attemptsAmount"), source=params.get("source"),
+                                     dont_frag=params.get("dontFragmentByte"))
 
-        stdout = (res.stdout or "").strip()
-        stderr = (res.stderr or "").strip()
+        # Послабление: traceroute с нужным addr в нужном netns считается найденным,
+        # даже если остальные аргументы не совпали (адрес - токеном или подстрокой командной строки)
+        def relaxed(process: ProcessInfo) -> bool:
+            return _tokens_contain_addr(list(process.args), addr) or _rest_contains_addr(process.command_line, addr)
 
-        if res.returncode != 0 and not stdout:
-            # pgrep возвращает ненулевой код, когда процессы не найдены
-            logger.error(f"traceroute не найден: rc={res.returncode}, stderr={stderr}")
+        try:
+            found = process_inspector.find(TRACEROUTE_NAMES, relaxed)
+            if not found and WAIT_SECONDS > 0:
+                logger.info(f"traceroute с адресом {addr} пока нет, ждём до {WAIT_SECONDS} с")
+                process = process_inspector.wait_for(TRACEROUTE_NAMES, relaxed, timeout=WAIT_SECONDS)
+                found = [process] if process is not None else []
+        except ProcessTableError as e:
+            logger.error(f"Ошибка чтения таблицы процессов: {e}")
             return {"result": "ERROR", "message": "traceroute process not found in ngfw"}
 
-        # Разбираем вывод построчно: "PID traceroute ..."
-        for line in stdout.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            # Отделяем PID
-            try:
-                pid_str, rest = line.split(" ", 1)
-                _ = int(pid_str)  # Валидируем PID
-            except ValueError:
-                # Непредвиденный формат строки — пропускаем
-                continue
-
-            # Используем точные аргументы из /proc/<pid>/cmdline для устойчивости
-            tokens = _read_cmdline_tokens(int(pid_str))
-            if tokens and tokens[0].endswith("/traceroute"):
-                tokens = tokens[1:]
-            elif tokens and tokens[0] == "traceroute":
-                tokens = tokens[1:]
-            else:
-                # Fallback к разбору строки, если /proc не дал ожидаемого формата
-                tokens = _tokenize_cmdline(rest)
-            if _matches_expected(tokens, addr=addr, icmp=icmp, attempts=attempts, source=source, dont_frag=dont_frag):
-                return {"result": "OK"}
-
-        # Послабление: если точного совпадения по всем полям нет,
-        # но существует traceroute с нужным addr в нужном netns — считаем OK
-        for line in stdout.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                _, rest = line.split(" ", 1)
-            except ValueError:
-                continue
-            # Повторяем попытку с /proc/<pid>/cmdline
-            try:
-                pid_for_rest = int(_.strip()) if False else None  # placeholder to keep structure similar
-            except Exception:
-                pid_for_rest = None
-            tokens = _tokenize_cmdline(rest)
-            if pid_for_rest is not None:
-                proc_tokens = _read_cmdline_tokens(pid_for_rest)
-                if proc_tokens and (proc_tokens[0].endswith("/traceroute") or proc_tokens[0] == "traceroute"):
-                    proc_tokens = proc_tokens[1:]
-                if proc_tokens:
-                    tokens = proc_tokens
-            if _tokens_contain_addr(tokens, addr):
-                return {"result": "OK"}
-
-        # Дополнительное послабление: поиск адреса как подстроки в исходной командной строке
-        for line in stdout.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            # Здесь у нас может не быть надёжного PID; используем rest как есть
-            try:
-                _, rest = line.split(" ", 1)
-            except ValueError:
-                continue
-            if _rest_contains_addr(rest, addr):
-                return {"result": "OK"}
-
-        return {"result": "ERROR", "message": "traceroute with expected args not found"}
+        if not found:
+            if not process_inspector.find(TRACEROUTE_NAMES):
+                logger.error("traceroute не найден в namespace ngfw")
+                return {"result": "ERROR", "message": "traceroute process not found in ngfw"}
+            return {"result": "ERROR", "message": "traceroute with expected args not found"}
+
+        exact_matches = [process for process in found if exact(process)]
+        chosen = (exact_matches or found)[0]
+        kind = "точное совпадение" if exact_matches else "совпадение по адресу"
+        logger.info(f"Найден traceroute pid={chosen.pid} ({kind}): {chosen.command_line}")
+        return {"result": "OK"}
 
     except ValueError as ve:
         logger.error(f"Ошибка валидации: {ve}")
@@ -300,5 +230,3 @@ def handle(data: Dict[str, Any]) -> Dict[str, Any]:
     except Exception as e:
         logger.error(f"Внутренняя ошибка в utils/traceroute: {e}")
         return {"result": "ERROR", "message": "internal error"}
-
-
@@ -1,6 +1,6 @@
 #!/bin/bash
 
-# Mirada Agent - Полная установка и запуск с sudo
+# Mirada Agent - Установка (при необходимости) и запуск с sudo
 # Улучшенная версия с поддержкой различных вариантов Python
 
 echo "=== Mirada Agent - Полная установка и запуск с sudo ==="
@@ -16,6 +16,15 @@ echo "✓ Проверка привилегий root пройдена"
 
 cd "$(dirname "$0")"
 
+# Режим запуска: gunicorn (несколько воркеров gthread, см. gunicorn.conf.py)
+# или dev (встроенный сервер Flask, один процесс). Аргумент скрипта важнее переменной
+MIRADA_SERVER=${1:-${MIRADA_SERVER:-gunicorn}}
+if [ "$MIRADA_SERVER" != "gunicorn" ] && [ "$MIRADA_SERVER" != "dev" ]; then
+    echo "ОШИБКА: неизвестный режим запуска '$MIRADA_SERVER' (допустимо: gunicorn, dev)"
+    exit 1
+fi
+echo "Режим запуска: $MIRADA_SERVER"
+
 # Останавливаем предыдущий процесс, если запущен
 if [ -f "mirada-agent.pid" ]; then
     PID=$(cat mirada-agent.pid)
@@ -134,48 +143,79 @@ fi
 echo "Используем: $PYTHON_CMD"
 echo "Используем pip: ${PIP_CMD:-<не найден>}"
 
-# Удаляем старое виртуальное окружение, если есть
-if [ -d "venv" ]; then
-    echo "Удаляем старое виртуальное окружение..."
+# Ключ окружения: requirements.txt и версия Python. Окружение с тем же ключом
+# переиспользуется без pip; при изменении ключа (или MIRADA_REBUILD_VENV=1) пересоздается
+VENV_KEY_FILE="venv/.mirada-venv-key"
+VENV_KEY=$( { cat requirements.txt; "$PYTHON_CMD" -c 'import platform, sys; print(sys.version); print(platform.machine())'; } | sha256sum | cut -d' ' -f1)
+
+VENV_REUSED=false
+if [ -d "venv" ] && [ "${MIRADA_REBUILD_VENV:-0}" != "1" ] && [ -x "venv/bin/python" ] \
+        && [ "$(cat "$VENV_KEY_FILE" 2>/dev/null)" = "$VENV_KEY" ]; then
+    echo "✓ Виртуальное окружение актуально (requirements.txt и Python не менялись), установка пропущена"
+    VENV_REUSED=true
+elif [ -d "venv" ]; then
+    echo "Удаляем устаревшее виртуальное окружение..."
     rm -rf venv
 fi
 
-# Создаем новое виртуальное окружение
-echo "Создание виртуального окружения..."
-if ! "$PYTHON_CMD" -m venv venv 2>/dev/null; then
-    echo "Не удалось создать venv. Пробуем установить python3-venv..."
-    if command -v apt-get > /dev/null 2>&1; then
-        apt-get update -y >/dev/null 2>&1 || true
-        # пробуем установить точную версию venv для текущего python
-        PY_MINOR=$("$PYTHON_CMD" -c 'import sys;print(f"{sys.version_info.major}.{sys.version_info.minor}")')
-        apt-get install -y "python${PY_MINOR}-venv" >/dev/null 2>&1 || apt-get install -y python3-venv >/dev/null 2>&1 || true
-    fi
-    # повторная попытка
+if [ "$VENV_REUSED" = false ]; then
+    # Создаем новое виртуальное окружение
+    echo "Создание виртуального окружения..."
     if ! "$PYTHON_CMD" -m venv venv 2>/dev/null; then
-        echo "ОШИБКА: не удалось создать виртуальное окружение (ensurepip недоступен). Установите пакет python3-venv и повторите."
-        echo "Подсказка: sudo apt install -y python${PY_MINOR}-venv"
-        exit 1
+        echo "Не удалось создать venv. Пробуем установить python3-venv..."
+        if command -v apt-get > /dev/null 2>&1; then
+            apt-get update -y >/dev/null 2>&1 || true
+            # пробуем установить точную версию venv для текущего python
+            PY_MINOR=$("$PYTHON_CMD" -c 'import sys;print(f"{sys.version_info.major}.{sys.version_info.minor}")')
+            apt-get install -y "python${PY_MINOR}-venv" >/dev/null 2>&1 || apt-get install -y python3-venv >/dev/null 2>&1 || true
+        fi
+        # повторная попытка
+        if ! "$PYTHON_CMD" -m venv venv 2>/dev/null; then
+            echo "ОШИБКА: не удалось создать виртуальное окружение (ensurepip недоступен). Установите пакет python3-venv и повторите."
+            echo "Подсказка: sudo apt install -y python${PY_MINOR}-venv"
+            exit 1
+        fi
     fi
-fi
 
-"$(pwd)/venv/bin/python" -m ensurepip --upgrade >/dev/null 2>&1 || true
+    "$(pwd)/venv/bin/python" -m ensurepip --upgrade >/dev/null 2>&1 || true
+fi
 
 # Активируем виртуальное окружение
 source venv/bin/activate
 PYTHON_CMD="$(pwd)/venv/bin/python"
 PIP_CMD="$(pwd)/venv/bin/pip"
 
-# Обновляем pip
-echo "Обновление pip..."
-if ! "$PYTHON_CMD" -m pip install --upgrade pip; then
-    echo "Не удалось обновить pip через бинарь, пробуем через python -m pip"
-    "$PYTHON_CMD" -m ensurepip --upgrade || true
-    "$PYTHON_CMD" -m pip install --upgrade pip
-fi
+if [ "$VENV_REUSED" = false ]; then
+    INSTALLED=false
 
-# Устанавливаем зависимости
-echo "Установка зависимостей..."
-"$PYTHON_CMD" -m pip install --no-cache-dir -r requirements.txt
+    # Сначала - без сети из wheelhouse, который кладет deploy_agent.py
+    if [ -d "wheelhouse" ] && ls wheelhouse/*.whl > /dev/null 2>&1; then
+        echo "Установка зависимостей из локального wheelhouse..."
+        if "$PYTHON_CMD" -m pip install --no-index --find-links wheelhouse -r requirements.txt; then
+            INSTALLED=true
+        else
+            echo "Предупреждение: wheelhouse неполный, устанавливаем из индекса пакетов"
+        fi
+    fi
+
+    if [ "$INSTALLED" = false ]; then
+        # Обновляем pip
+        echo "Обновление pip..."
+        if ! "$PYTHON_CMD" -m pip install --upgrade pip; then
+            echo "Не удалось обновить pip через бинарь, пробуем через python -m pip"
+            "$PYTHON_CMD" -m ensurepip --upgrade || true
+            "$PYTHON_CMD" -m pip install --upgrade pip
+        fi
+
+        # Устанавливаем зависимости (колеса из wheelhouse, если есть, не скачиваются повторно)
+        echo "Установка зависимостей..."
+        FIND_LINKS=()
+        if [ -d "wheelhouse" ]; then
+            FIND_LINKS=(--find-links wheelhouse)
+        fi
+        "$PYTHON_CMD" -m pip install "${FIND_LINKS[@]}" -r requirements.txt
+    fi
+fi
 
 # Проверяем установку
 echo "Провка установки..."
@@ -204,14 +244,26 @@ except ImportError as e:
     print(f'✗ Marshmallow не установлен: {e}')
     sys.exit(1)
 
+if sys.argv[1] == 'gunicorn':
+    try:
+        import gunicorn
+        print(f'✓ Gunicorn установлен: {gunicorn.__version__}')
+    except ImportError as e:
+        print(f'✗ Gunicorn не установлен: {e}')
+        sys.exit(1)
+
 print('✓ Все модули установлены успешно')
-"
+" "$MIRADA_SERVER"
 
 if [ $? -ne 0 ]; then
     echo "✗ Проблема с установкой зависимостей"
+    # Сломанное окружение не должно переиспользоваться при следующем запуске
+    rm -f "$VENV_KEY_FILE"
     exit 1
 fi
 
+echo "$VENV_KEY" > "$VENV_KEY_FILE"
+
 # Определяем порт
 PORT=${MIRADA_PORT:-8000}
 
@@ -276,7 +328,12 @@ fi
 
 # Запускаем в фоне с перенаправлением вывода
 echo "Запуск агента с привилегиями root..."
-nohup "$PYTHON_CMD" main.py > mirada-agent.log 2>&1 &
+if [ "$MIRADA_SERVER" = "gunicorn" ]; then
+    # PID - мастер gunicorn: по его SIGTERM воркеры завершаются штатно
+    nohup "$PYTHON_CMD" -m gunicorn -c gunicorn.conf.py main:app > mirada-agent.log 2>&1 &
+else
+    nohup "$PYTHON_CMD" main.py > mirada-agent.log 2>&1 &
+fi
 PID=$!
 
 # Сохраняем PID
@@ -289,6 +346,7 @@ echo "=== Mirada Agent успешно установлен и запущен с
 echo "PID: $PID"
 echo "Python: $PYTHON_CMD"
 echo "Порт: $PORT"
+echo "Режим: $MIRADA_SERVER"
 echo "Логи: tail -f mirada-agent.log"
 echo "Остановка: sudo ./stop.sh"
 echo "Перезапуск: sudo ./restart.sh"
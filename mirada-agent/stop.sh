@@ -1,9 +1,20 @@
 #!/bin/bash
 
-# Mirada Agent - Полная остановка и очистка с sudo
+# Mirada Agent - Остановка с sudo (с --purge - полная очистка)
 # Улучшенная версия с поддержкой различных систем
 
-echo "=== Mirada Agent - Полная остановка и очистка с sudo ==="
+# --purge: дополнительно удалить виртуальное окружение, кеши pip и Python.
+# Без него окружение остается и следующий start.sh запускается без переустановки
+PURGE=false
+if [ "$1" = "--purge" ]; then
+    PURGE=true
+fi
+
+if [ "$PURGE" = true ]; then
+    echo "=== Mirada Agent - Полная остановка и очистка с sudo ==="
+else
+    echo "=== Mirada Agent - Остановка с sudo ==="
+fi
 
 # Проверяем, запущен ли скрипт с sudo
 if [ "$EUID" -ne 0 ]; then
@@ -107,23 +118,6 @@ else
     echo "Порт $PORT освобожден"
 fi
 
-# Удаляем виртуальное окружение
-echo "Удаление виртуального окружения..."
-if [ -d "venv" ]; then
-    rm -rf venv
-    echo "Виртуальное окружение удалено"
-else
-    echo "Виртуальное окружение не найдено"
-fi
-
-# Очищаем кеши pip
-echo "Очистка кешей pip..."
-if command -v pip > /dev/null 2>&1; then
-    pip cache purge 2>/dev/null || echo "Кеш pip очищен"
-elif command -v pip3 > /dev/null 2>&1; then
-    pip3 cache purge 2>/dev/null || echo "Кеш pip3 очищен"
-fi
-
 # Удаляем логи
 echo "Удаление логов..."
 rm -f mirada-agent.log
@@ -134,12 +128,37 @@ echo "Удаление временных файлов..."
 rm -f *.pid
 rm -f *.tmp
 
-# Очищаем кеши Python
-echo "Очистка кешей Python..."
-find . -name "__pycache__" -type d -exec rm -rf {} + 2>/dev/null || true
-find . -name "*.pyc" -delete 2>/dev/null || true
-find . -name "*.pyo" -delete 2>/dev/null || true
+if [ "$PURGE" = true ]; then
+    # Удаляем виртуальное окружение
+    echo "Удаление виртуального окружения..."
+    if [ -d "venv" ]; then
+        rm -rf venv
+        echo "Виртуальное окружение удалено"
+    else
+        echo "Виртуальное окружение не найдено"
+    fi
+
+    # Очищаем кеши pip
+    echo "Очистка кешей pip..."
+    if command -v pip > /dev/null 2>&1; then
+        pip cache purge 2>/dev/null || echo "Кеш pip очищен"
+    elif command -v pip3 > /dev/null 2>&1; then
+        pip3 cache purge 2>/dev/null || echo "Кеш pip3 очищен"
+    fi
+
+    # Очищаем кеши Python
+    echo "Очистка кешей Python..."
+    find . -name "__pycache__" -type d -exec rm -rf {} + 2>/dev/null || true
+    find . -name "*.pyc" -delete 2>/dev/null || true
+    find . -name "*.pyo" -delete 2>/dev/null || true
+else
+    echo "Виртуальное окружение сохранено (полная очистка: sudo ./stop.sh --purge)"
+fi
 
 echo ""
-echo "=== Mirada Agent полностью остановлен и очищен ==="
+if [ "$PURGE" = true ]; then
+    echo "=== Mirada Agent полностью остановлен и очищен ==="
+else
+    echo "=== Mirada Agent остановлен ==="
+fi
 echo "Для запуска: sudo ./start.sh" 
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Пакетные проверки через mirada-agent: очередь проверок и один запрос /batch.
+
+agent_verification отправляет каждую проверку отдельным POST через SSH-туннель,
+и агент на каждую заново выполняет команды на хосте. AgentBatch копит
+проверки и отправляет их одним запросом POST {agent}/batch. Агент выполняет
+их параллельно (одновременные проверки iptables, tc и адресов ждут один
+снимок состояния), а результаты возвращает в порядке добавления.
+
+Результат каждой проверки - в формате agent_verification:
+{"result": "OK"}, {"result": "ERROR", "message": ...} или "unavailable".
+
+Если агент не знает /batch (старая версия, 404), проверки отправляются по
+одной, так что тест работает с любым агентом.
+
+ИСПОЛЬЗОВАНИЕ:
+    def test_rules(api_client, agent_batch):
+        for rule in rules:
+            api_client.post("/localRules", json=rule)
+            agent_batch.add("/localRules", rule)
+        for result in agent_batch.flush():
+            assert result == {"result": "OK"}
+"""
+import logging
+from typing import List, Optional, Union
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+AgentResult = Union[dict, str]
+
+
+def normalize_agent_result(status_code: int, body, text: str = "") -> AgentResult:
+    """Приводит ответ проверки агента к стандартному формату agent_verification."""
+    if status_code == 200:
+        if isinstance(body, dict):
+            if body.get("result") == "OK":
+                return {"result": "OK"}
+            if body.get("result") == "ERROR":
+                return {"result": "ERROR", "message": body.get("message", "Неизвестная ошибка")}
+            # Легаси - пустой словарь {} трактуется как успех
+            if body == {}:
+                return {"result": "OK"}
+            return {"result": "ERROR", "message": f"Unexpected result: {body}"}
+        return {"result": "ERROR", "message": f"Unexpected result type: {type(body).__name__}"}
+    if status_code == 404:
+        return "unavailable"
+    return {"result": "ERROR", "message": f"HTTP {status_code}: {text or body}"}
+
+
+class AgentBatch:
+    def __init__(self, base_url: str, timeout: float = 120, session: Optional[requests.Session] = None,
+                 concurrency: Optional[int] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.concurrency = concurrency
+        self._checks: List[dict] = []
+
+    def __len__(self):
+        return len(self._checks)
+
+    def add(self, endpoint: str, payload=None, method: str = "POST") -> int:
+        """Ставит проверку в очередь; возвращает её индекс в результатах flush()."""
+        self._checks.append({"endpoint": endpoint, "payload": payload, "method": method})
+        return len(self._checks) - 1
+
+    def flush(self) -> List[AgentResult]:
+        """Отправляет накопленные проверки одним запросом и очищает очередь."""
+        checks, self._checks = self._checks, []
+        if not checks:
+            return []
+        body = {"checks": checks}
+        if self.concurrency:
+            body["concurrency"] = self.concurrency
+        try:
+            response = self.session.post(f"{self.base_url}/batch", json=body, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Agent batch unavailable: {e}")
+            return ["unavailable"] * len(checks)
+
+        if response.status_code == 404:
+            logger.info("Agent has no /batch endpoint, sending checks one by one")
+            return [self._send_one(check) for check in checks]
+        if response.status_code != 200:
+            error = {"result": "ERROR", "message": f"Batch HTTP {response.status_code}: {response.text}"}
+            return [dict(error) for _ in checks]
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        results = body.get("results") if isinstance(body, dict) else None
+        if not isinstance(results, list) or not all(isinstance(item, dict) for item in results):
+            error = {"result": "ERROR", "message": f"Batch returned unexpected body: {response.text[:500]}"}
+            return [dict(error) for _ in checks]
+        if len(results) != len(checks):
+            error = {"result": "ERROR", "message": f"Batch returned {len(results)} results for {len(checks)} checks"}
+            return [dict(error) for _ in checks]
+        return [normalize_agent_result(item.get("status", 0), item.get("body")) for item in results]
+
+    def _send_one(self, check: dict) -> AgentResult:
+        try:
+            response = self.session.request(check["method"], f"{self.base_url}{check['endpoint']}",
+                                            json=check["payload"], timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Agent unavailable: {e}")
+            return "unavailable"
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return normalize_agent_result(response.status_code, body, response.text)
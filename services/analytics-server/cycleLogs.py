@@ -3,6 +3,8 @@ import random
 import string
 import re
 from datetime import datetime
+from services.qa_constants import STREAM_VALIDATION
+from services.stream_validation import iter_json_array
 
 # --- Constants ---
 
@@ -44,7 +46,7 @@ MANDATORY_SCHEMA = {
     "id": str, "severity": (str, int), "tags": list, "timestamp": str,
     "message": str, "seqid": int,
     "user": dict, "alert": dict, "details": dict,
-    "@version": (str, int), "source": (str, int, dict, list), 
+    "@version": (str, int), "source": (str, int, dict, list),
     "event": dict, "hostname": dict, "type": str,
     "@timestamp": str,
 }
@@ -105,37 +107,36 @@ def test_cycle_logs(api_client, key, value, attach_curl_on_fail):
     Test for the /api/cycleLogs endpoint.
 
     This test sends a GET request with random query parameters to ensure stability.
-    It performs basic validation of the response structure.
+    It performs basic validation of the response structure. The list is parsed
+    incrementally, each item is checked as it arrives.
     """
     with attach_curl_on_fail(ENDPOINT, method="GET"):
-        response = api_client.get(ENDPOINT, params={key: value})
+        response = api_client.get(ENDPOINT, params={key: value}, stream=True)
         assert response.status_code == 200, f"Status: {response.status_code}"
-        response_data = response.json()
-        assert isinstance(response_data, list)
-
-        if not response_data:
-            return  # Pass if the list is empty
-
-        for item in response_data:
-            assert isinstance(item, dict)
-            
-            # Basic structure validation - just check that it's a dict with some content
-            assert len(item) > 0, "Empty item in response"
-            
-            # Check that required fields exist (basic ones)
-            required_fields = ["id", "timestamp", "@timestamp"]
-            for field in required_fields:
-                if field in item:
-                    assert item[field] is not None, f"Field {field} is None"
-            
-            # Validate timestamp formats if they exist
-            if 'timestamp' in item:
-                assert is_iso_datetime(item['timestamp']), "Invalid timestamp format"
-            if '@timestamp' in item:
-                assert is_quoted_iso_datetime(item['@timestamp']), "Invalid @timestamp format"
-            
-            # Validate IP fields if they exist (basic format check)
-            ip_fields = ["dstIP", "src_ip", "srcIP", "dst_addr", "dest_ip", "src_addr"]
-            for ip_field in ip_fields:
-                if ip_field in item and item[ip_field]:
-                    assert is_valid_ip_or_empty(item[ip_field]), f"Invalid IP format: {ip_field}" 
\ No newline at end of file
+
+        # ValueError if the body is not a JSON list; an empty list passes
+        with response:
+            items = iter_json_array(response.iter_content(chunk_size=STREAM_VALIDATION["chunk_size"]))
+            for item in items:
+                assert isinstance(item, dict)
+
+                # Basic structure validation - just check that it's a dict with some content
+                assert len(item) > 0, "Empty item in response"
+
+                # Check that required fields exist (basic ones)
+                required_fields = ["id", "timestamp", "@timestamp"]
+                for field in required_fields:
+                    if field in item:
+                        assert item[field] is not None, f"Field {field} is None"
+
+                # Validate timestamp formats if they exist
+                if 'timestamp' in item:
+                    assert is_iso_datetime(item['timestamp']), "Invalid timestamp format"
+                if '@timestamp' in item:
+                    assert is_quoted_iso_datetime(item['@timestamp']), "Invalid @timestamp format"
+
+                # Validate IP fields if they exist (basic format check)
+                ip_fields = ["dstIP", "src_ip", "srcIP", "dst_addr", "dest_ip", "src_addr"]
+                for ip_field in ip_fields:
+                    if ip_field in item and item[ip_field]:
+                        assert is_valid_ip_or_empty(item[ip_field]), f"Invalid IP format: {ip_field}"
\ No newline at end of file
@@ -2,9 +2,10 @@
 Test for the /api/log-records endpoint.
 """
 import pytest
-from conftest import validate_schema
 import ipaddress
 from datetime import datetime
+from services.qa_constants import STREAM_SAMPLE_ITEMS, STREAM_VALIDATION
+from services.stream_validation import ResponseSample
 
 # --- Schema Definition ---
 LOG_RECORD_SCHEMA = {
@@ -121,14 +122,15 @@ def extract_all_datetimes(obj):
 # --- Fixtures ---
 @pytest.fixture(scope="module")
 def api_response(api_client):
-    response = api_client.get("/log-records")
-    return response
+    # Body is streamed: only the status and the first STREAM_SAMPLE_ITEMS records are kept
+    response = api_client.get("/log-records", stream=True)
+    return ResponseSample(response, limit=STREAM_SAMPLE_ITEMS, chunk_size=STREAM_VALIDATION["chunk_size"])
 
 @pytest.fixture(scope="module")
 def log_records(api_response):
     if api_response.status_code != 200:
         pytest.skip(f"API request failed with status {api_response.status_code}, skipping tests.")
-    data = api_response.json()
+    data = api_response.items
     if not data:
         pytest.skip("Response is empty, no log records to test.")
     return data
@@ -138,10 +140,13 @@ def test_status_code(api_response):
     assert api_response.status_code == 200
 
 def test_response_is_list(api_response):
-    assert isinstance(api_response.json(), list)
+    assert api_response.error is None, f"Expected response to be a list: {api_response.error}"
 
-def test_full_schema_validation(log_records):
-    validate_schema(log_records, LOG_RECORD_SCHEMA)
+def test_full_schema_validation(stream_validator):
+    # Records are validated one by one while the response is being read
+    stats = stream_validator("/log-records", LOG_RECORD_SCHEMA)
+    if stats.items == 0:
+        pytest.skip("Response is empty, no log records to test.")
 
 @pytest.mark.parametrize("key", list(LOG_RECORD_SCHEMA["required"].keys()))
 def test_log_key_presence(log_records, key):
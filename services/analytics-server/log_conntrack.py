@@ -2,9 +2,10 @@
 Test for the /api/log_conntrack endpoint.
 """
 import pytest
-from conftest import validate_schema
 import ipaddress
 from datetime import datetime
+from services.qa_constants import STREAM_SAMPLE_ITEMS, STREAM_VALIDATION
+from services.stream_validation import ResponseSample
 
 # --- Schema Definition ---
 # Based on the example, defining required fields (with values) and optional (empty).
@@ -83,19 +84,22 @@ def is_valid_iso_timestamp(ts_string):
 
 @pytest.fixture(scope="module")
 def api_response(api_client):
-    """Fetches the API response once for all tests in the module."""
-    response = api_client.get("/log_conntrack")
-    return response
+    """
+    Fetches the API response once for all tests in the module.
+    The body is streamed: only the status and the first STREAM_SAMPLE_ITEMS logs are kept.
+    """
+    response = api_client.get("/log_conntrack", stream=True)
+    return ResponseSample(response, limit=STREAM_SAMPLE_ITEMS, chunk_size=STREAM_VALIDATION["chunk_size"])
 
 @pytest.fixture(scope="module")
 def conntrack_logs(api_response):
     """
-    Parses the JSON from the API response and skips tests if the list is empty.
+    Returns the sampled logs and skips tests if the list is empty.
     """
     if api_response.status_code != 200:
         pytest.skip(f"API request failed with status {api_response.status_code}, skipping tests.")
     
-    logs = api_response.json()
+    logs = api_response.items
     if not logs:
         pytest.skip("Response is empty, no logs to test.")
     return logs
@@ -110,12 +114,15 @@ def test_status_code(api_response, attach_curl_on_fail):
 def test_response_is_list(api_response, attach_curl_on_fail):
     """Tests that the root of the JSON response is a list."""
     with attach_curl_on_fail("/log_conntrack", method="GET"):
-        assert isinstance(api_response.json(), list)
+        assert api_response.error is None, f"Expected response to be a list: {api_response.error}"
 
-def test_full_schema_validation(conntrack_logs, attach_curl_on_fail):
+def test_full_schema_validation(stream_validator, attach_curl_on_fail):
     endpoint = "/log_conntrack"
     with attach_curl_on_fail(endpoint, method="GET"):
-        validate_schema(conntrack_logs, LOG_CONNTRACK_SCHEMA)
+        # Logs are validated one by one while the response is being read
+        stats = stream_validator(endpoint, LOG_CONNTRACK_SCHEMA)
+    if stats.items == 0:
+        pytest.skip("Response is empty, no logs to test.")
 
 def test_special_fields_are_valid(conntrack_logs, attach_curl_on_fail):
     """
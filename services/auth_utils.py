@@ -1,44 +1,164 @@
 """
 Модуль для работы с авторизацией в системе.
+
+login() выполняет один запрос /users/login. TokenCache поверх него хранит токены
+в файле (общем для сессии и всех воркеров pytest-xdist) с ключом
+(хост Mirada, username, agent), обновляет токен заранее до истечения ttl и
+умеет перелогиниться после 401.
+
+Хост в ключе - настоящий адрес Mirada (--mirada-host), а не URL туннеля
+127.0.0.1:<локальный порт>: порт туннеля в следующем прогоне может достаться
+другому хосту. Файл переживает прогоны, поэтому записи другого хоста при
+чтении отбрасываются.
 """
 
-import requests
 import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import requests
 from qa_constants import SERVICES
+from file_lock import file_lock
+
+DEFAULT_TOKEN_CACHE = Path("logs/auth_tokens.json")
+# ttl по умолчанию, если сервер не вернул его в ответе на login
+DEFAULT_TOKEN_TTL = 3600
+# За сколько секунд до истечения ttl токен обновляется заранее
+TOKEN_REFRESH_MARGIN = 300
 
 
-def login(username: str, password: str, agent: str = "local") -> str:
+def _csi_base_url() -> str:
+    csi_config = SERVICES["csi-server"]
+    return f"http://{csi_config['host']}:{csi_config['port']}{csi_config['base_path']}"
+
+
+def login_response(username: str, password: str, agent: str = "local",
+                   base_url: str = None, session=None) -> dict:
     """
-    Выполняет авторизацию пользователя и возвращает токен.
-    
-    Args:
-        username (str): Имя пользователя
-        password (str): Пароль пользователя
-        agent (str): Агент (по умолчанию "local")
-    
-    Returns:
-        str: Токен авторизации (поле 'id' из ответа)
+    Выполняет авторизацию и возвращает тело ответа /users/login целиком
+    (id, ttl, created, userId).
     """
-    # Получаем конфигурацию csi-server из общего конфига
-    csi_config = SERVICES["csi-server"]
-    host = csi_config["host"]
-    port = csi_config["port"]
-    base_path = csi_config["base_path"]
-    
-    url = f"http://{host}:{port}{base_path}/users/login"
-    
+    url = f"{(base_url or _csi_base_url()).rstrip('/')}/users/login"
+
     payload = {
         "username": username,
         "password": password,
         "agent": agent
     }
-    
+
     headers = {
         "Content-Type": "application/json"
     }
-    
-    response = requests.post(url=url, headers=headers, data=json.dumps(payload))
+
+    response = (session or requests).post(url=url, headers=headers, data=json.dumps(payload))
     response.raise_for_status()
-    
-    response_data = response.json()
-    return response_data['id'] 
\ No newline at end of file
+    return response.json()
+
+
+def login(username: str, password: str, agent: str = "local", base_url: str = None) -> str:
+    """
+    Выполняет авторизацию пользователя и возвращает токен.
+
+    Args:
+        username (str): Имя пользователя
+        password (str): Пароль пользователя
+        agent (str): Агент (по умолчанию "local")
+        base_url (str): Базовый URL csi-server (по умолчанию из SERVICES["csi-server"])
+
+    Returns:
+        str: Токен авторизации (поле 'id' из ответа)
+    """
+    return login_response(username, password, agent, base_url=base_url)['id']
+
+
+class TokenCache:
+    """Файловый кеш токенов, общий для всех воркеров одного прогона."""
+
+    def __init__(self, cache_file: Path = DEFAULT_TOKEN_CACHE, base_url: str = None,
+                 refresh_margin: int = TOKEN_REFRESH_MARGIN, host: str = None):
+        self.cache_file = Path(cache_file)
+        self.base_url = base_url or _csi_base_url()
+        # Без --mirada-host (локальный csi-server) хостом считается сам base_url
+        self.host = host or self.base_url
+        self.refresh_margin = refresh_margin
+        self.logins = 0
+        self._credentials = {}   # key -> password (только в памяти)
+        self._token_keys = {}    # token -> key, включая уже заменённые токены
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+
+    def _key(self, username: str, agent: str) -> str:
+        return f"{self.host}|{username}|{agent}"
+
+    def _read(self) -> dict:
+        """Записи файла, выданные этим хостом (токены других хостов отбрасываются)."""
+        try:
+            entries = json.loads(self.cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return {key: entry for key, entry in entries.items()
+                if isinstance(entry, dict) and entry.get("host") == self.host}
+
+    def _write(self, entries: dict):
+        tmp = self.cache_file.with_name(self.cache_file.name + f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(entries), encoding="utf-8")
+        try:
+            os.chmod(tmp, 0o600)
+        except OSError:
+            pass
+        os.replace(tmp, self.cache_file)
+
+    def _is_fresh(self, entry: dict) -> bool:
+        ttl = entry.get("ttl") or DEFAULT_TOKEN_TTL
+        margin = min(self.refresh_margin, ttl / 2)
+        return entry.get("expires_at", 0) - time.time() > margin
+
+    def _login_locked(self, key: str, entries: dict) -> str:
+        _, username, agent = key.split("|", 2)
+        body = login_response(username, self._credentials[key], agent,
+                              base_url=self.base_url, session=self._session)
+        self.logins += 1
+        ttl = body.get("ttl") or DEFAULT_TOKEN_TTL
+        entries[key] = {"token": body["id"], "ttl": ttl, "expires_at": time.time() + ttl, "host": self.host}
+        self._write(entries)
+        return body["id"]
+
+    def get(self, username: str, password: str, agent: str = "local") -> str:
+        """Возвращает действующий токен; логинится только при отсутствии или скором истечении."""
+        key = self._key(username, agent)
+        with self._lock, file_lock(self.cache_file):
+            self._credentials[key] = password
+            entries = self._read()
+            entry = entries.get(key)
+            if entry and self._is_fresh(entry):
+                token = entry["token"]
+            else:
+                token = self._login_locked(key, entries)
+            self._token_keys[token] = key
+            return token
+
+    def refresh(self, stale_token: str):
+        """
+        Возвращает новый токен взамен отвергнутого сервером (401).
+        None — если токен выдан не этим кешем (например, заведомо невалидный в негативном тесте).
+        """
+        key = self._token_keys.get(stale_token)
+        if key is None:
+            return None
+        with self._lock, file_lock(self.cache_file):
+            entries = self._read()
+            entry = entries.get(key)
+            if entry and entry["token"] != stale_token and self._is_fresh(entry):
+                # Другой воркер уже перелогинился
+                token = entry["token"]
+            else:
+                token = self._login_locked(key, entries)
+            self._token_keys[token] = key
+            return token
+
+    def close(self):
+        self._session.close()
@@ -1,5 +1,4 @@
 import pytest
-import time
 from jsonschema import validate
 from services.qa_constants import SERVICES
 
@@ -17,9 +16,6 @@ SCHEMA = {
     "required": ["count"]
 }
 
-@pytest.fixture(autouse=True)
-def _delay_before_each_test():
-    time.sleep(1)
 
 STABILITY_PARAMS = [
     ("limit", "10"),
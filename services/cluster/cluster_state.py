@@ -1,5 +1,5 @@
 import pytest
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 from qa_constants import SERVICES
 
 ENDPOINT = "/cluster/state"
@@ -51,38 +51,6 @@ PARAMS = [
     ({"invalid_json_in_filter": '{"key":'}, 200),
 ]
 
-def _check_types_recursive(obj, schema):
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Тип {type(obj)} не соответствует anyOf"
-        return
-    if schema.get("type") == "object":
-        assert isinstance(obj, Mapping), f"Ожидался объект, получено: {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Обязательное поле '{req}' отсутствует"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Ожидался список, получено: {type(obj)}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str)
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int)
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool)
-        elif schema.get("type") == "null":
-            assert obj is None
-
-def _try_type(obj, schema):
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
 @pytest.mark.parametrize("params, expected_status", PARAMS)
 def test_cluster_state_robustness(api_client, params, expected_status, attach_curl_on_fail):
     with attach_curl_on_fail(ENDPOINT, params, method="GET"):
@@ -93,4 +61,4 @@ def test_cluster_state_robustness(api_client, params, expected_status, attach_cu
         assert response.status_code == expected_status
         if response.status_code == 200:
             data = response.json()
-            _check_types_recursive(data, CLUSTER_STATE_SCHEMA)
+            assert_schema(data, CLUSTER_STATE_SCHEMA)
@@ -26,6 +26,9 @@ CONFTEST.PY - Конфигурация pytest для тестирования RE
     --port             Переопределение порта (для отладки)
     --request-timeout  Таймаут HTTP запросов в секундах (по умолчанию: 60)
     --resume           Пропуск уже выполненных тестов
+    --http-pool-maxsize Размер общего пула keep-alive соединений на сервис
+    --ssh-multiplex    Туннели через одно мастер-соединение SSH: auto|on|off (по умолчанию: auto)
+    --stream-sample-size Сколько элементов больших массивов проверять потоково (0 - все)
 ===================================================================================
 """
 
@@ -35,7 +38,7 @@ import os
 import sys
 import time
 import logging
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 import json
 from json import JSONDecodeError
 import functools
@@ -52,19 +55,29 @@ _SERVICES_DIR = os.path.dirname(__file__)
 if _SERVICES_DIR not in sys.path:
     sys.path.insert(0, _SERVICES_DIR)
 
-from services.qa_constants import SERVICES, TUNNEL_CONFIG
-from services.auth_utils import login
+from services.qa_constants import SERVICES, TUNNEL_CONFIG, HTTP_POOL, TUNNEL_SUPERVISOR, STREAM_VALIDATION, STATUS_WAITER, RATE_LIMIT
+from services.auth_utils import TokenCache
 from services.tunnel_manager import SSHTunnelManager
+from services.http_pool import HTTPClientRegistry
+from services.rate_limiter import RateLimiterRegistry, service_rate_limits
+from services.tunnel_supervisor import TunnelSupervisor
+from services.xdist_tunnels import shared_tunnel_registry, record_tunnel_stats
+from services.schema_validator import assert_schema, format_errors
+from services.stream_validation import validate_stream
+from services.status_waiter import StatusWaiter
+from services.agent_batch import AgentBatch, normalize_agent_result
 
 # ===================================================================================
 # РЕГИСТРАЦИЯ PYTEST ПЛАГИНОВ
 # ===================================================================================
 # Эти плагины автоматически:
-# - Записывают упавшие тесты в logs/failed_tests_YYYYMMDD_HHMMSS.log
-# - Записывают успешные тесты в logs/passed_tests.json
+# - Записывают упавшие тесты в журнал logs/failed_tests_YYYYMMDD_HHMMSS.jsonl (traceback - по хешу в logs/failed_tracebacks_YYYYMMDD_HHMMSS/)
+# - Записывают успешные тесты в журнал logs/passed_tests.jsonl (в конце сессии - в logs/passed_tests.json)
+# - Разделяют SSH туннели между воркерами pytest-xdist (-n auto)
 pytest_plugins = [
     "services.test_failure_logger",  # Автоматическое логирование упавших тестов
-    "services.test_pass_logger",     # Логирование прошедших тестов в JSON
+    "services.test_pass_logger",     # Журнал прошедших тестов для --resume
+    "services.xdist_tunnels",        # Общие SSH туннели для воркеров xdist
 ]
 
 # ===================================================================================
@@ -81,6 +94,8 @@ def pytest_addoption(parser):
     - --request-timeout: установка таймаута HTTP запросов (секунды)
     - --mirada-host: IP адрес для установки SSH туннелей (обязательный параметр)
     - --resume: режим продолжения выполнения с пропуском успешных тестов
+    - --ssh-multiplex: режим мультиплексирования SSH туннелей (auto/on/off)
+    - --stream-sample-size: размер выборки потоковой валидации массивов
 
     ИСПОЛЬЗОВАНИЕ:
         pytest services/<service>/ --mirada-host=<IP>
@@ -114,6 +129,26 @@ def pytest_addoption(parser):
         help="IP адрес Mirada хоста для автоматического проброса портов через SSH туннели"
     )
     parser.addoption('--resume', action='store_true', help='Run tests with custom resume logic')
+    parser.addoption(
+        "--http-pool-maxsize",
+        action="store",
+        default=None,
+        help="Максимум keep-alive соединений в общем пуле на сервис (по умолчанию HTTP_POOL в qa_constants.py)"
+    )
+    parser.addoption(
+        "--ssh-multiplex",
+        action="store",
+        choices=("auto", "on", "off"),
+        default="auto",
+        help="Мультиплексировать SSH туннели через один ControlMaster (auto: включено везде, кроме Windows)"
+    )
+    parser.addoption(
+        "--stream-sample-size",
+        action="store",
+        type=int,
+        default=None,
+        help="Сколько элементов больших массивов проверять в stream_validator (0 - все; по умолчанию STREAM_VALIDATION в qa_constants.py)"
+    )
 
 
 # ===================================================================================
@@ -310,43 +345,70 @@ def request_timeout(request):
 # ФИКСТУРА 4: api_client - HTTP КЛИЕНТ ДЛЯ API ЗАПРОСОВ
 # ===================================================================================
 @pytest.fixture(scope="module")
-def api_client(api_base_url, request_timeout):
+def api_client(request, api_base_url, request_timeout, http_client_registry, auth_token_cache, tunnel_manager,
+               rate_limiter_registry):
     """
     Инициализирует настроенный HTTP клиент для взаимодействия с API.
 
     КОНФИГУРАЦИЯ:
-    1. Создание сессии requests.Session с постоянным connection pooling
+    1. Создание модульного requests.Session поверх общего пула соединений
+       из http_client_registry (keep-alive переиспользуется между модулями)
     2. Установка стандартных HTTP заголовков:
        - Content-Type: application/json
        - Accept: application/json
-       - Connection: close
     3. Переопределение метода request() для автоматического формирования абсолютных URL
     4. Применение таймаута по умолчанию ко всем HTTP запросам
 
+    Заголовки и cookies принадлежат только текущему модулю - изменения
+    api_client.headers не влияют на другие модули.
+
+    Если сервер ответил 401 на токен, выданный auth_token_cache (токен истёк
+    или был отозван), запрос один раз повторяется с новым токеном.
+
+    Пока супервизор восстанавливает упавший SSH туннель сервиса, запрос ждёт
+    его готовности (до TUNNEL_SUPERVISOR["ready_timeout"] секунд), а не падает
+    с ConnectionError.
+
+    Запросы проходят через адаптивный ограничитель частоты сервиса
+    (rate_limiter_registry): пока backend здоров, пауз нет; после 429/503 или
+    обрыва соединения интервал между запросами увеличивается, а
+    идемпотентные запросы повторяются.
+
     ИСПОЛЬЗОВАНИЕ:
         def test_endpoint(api_client):
             response = api_client.get("/endpoint")
             assert response.status_code == 200
 
     ПАРАМЕТРЫ:
+        request: Объект pytest.FixtureRequest
         api_base_url: Базовый URL API (фикстура scope="module")
         request_timeout: Таймаут в секундах (фикстура scope="module")
+        http_client_registry: Реестр пулов соединений (фикстура scope="session")
+        auth_token_cache: Кеш токенов авторизации (фикстура scope="session")
+        tunnel_manager: Менеджер SSH туннелей с супервизором (фикстура scope="session")
+        rate_limiter_registry: Ограничители частоты запросов по сервисам (фикстура scope="session")
 
     ВОЗВРАЩАЕТ:
         requests.Session: Сконфигурированный HTTP клиент с автоматическим URL resolution
     """
-    # Создаём HTTP сессию
-    session = requests.Session()
+    # Создаём HTTP сессию поверх общего пула (service, host, port)
+    parsed = urlparse(api_base_url)
+    service_name = _service_name_from_path(str(request.node.fspath)) or parsed.netloc
+    session = http_client_registry.session_for(service_name, parsed.hostname, parsed.port or 80)
 
     # Устанавливаем базовые заголовки для всех запросов
     session.headers.update({
         "Content-Type": "application/json",  # Отправляем JSON
         "Accept": "application/json",        # Ожидаем JSON в ответе
-        "Connection": "close"                # Закрываем соединение после запроса
     })
 
+    # Повторный login при 401 на токен из кеша
+    session.hooks["response"].append(_make_relogin_hook(auth_token_cache))
+
     # Сохраняем оригинальный метод request
     original_request = session.request
+    supervisor = getattr(tunnel_manager, "supervisor", None)
+    limiter = rate_limiter_registry.limiter_for(service_name)
 
     # Создаём обёртку для автоматического формирования полного URL
     def request(method, url, *args, **kwargs):
@@ -365,14 +427,93 @@ def api_client(api_base_url, request_timeout):
         # Устанавливаем таймаут, если не указан явно
         kwargs.setdefault("timeout", request_timeout)
 
-        # Выполняем реальный запрос
-        return original_request(method, full_url, *args, **kwargs)
+        # Ждём восстановления туннеля вместо ConnectionError
+        if supervisor is not None:
+            supervisor.wait_ready(parsed.port or 80, TUNNEL_SUPERVISOR["ready_timeout"])
+
+        # Выполняем реальный запрос с учётом лимита частоты сервиса
+        try:
+            return limiter.send(method, lambda: original_request(method, full_url, *args, **kwargs), full_url)
+        except requests.exceptions.ConnectionError:
+            # Супервизор проверяет порт туннеля редко - сообщаем об обрыве сразу
+            if supervisor is not None:
+                supervisor.report_failure(parsed.port or 80)
+            raise
 
     # Подменяем метод request на нашу обёртку
     session.request = request
+    # Session не закрываем: адаптер общий и закрывается реестром в конце сессии
     return session
 
 
+def _service_name_from_path(test_path):
+    """Возвращает имя папки сервиса (services/<service_name>/...) или None."""
+    path_parts = test_path.split(os.sep)
+    try:
+        return path_parts[path_parts.index("services") + 1]
+    except (ValueError, IndexError):
+        return None
+
+
+# ===================================================================================
+# ФИКСТУРА 4.1: http_client_registry - ОБЩИЕ ПУЛЫ HTTP СОЕДИНЕНИЙ
+# ===================================================================================
+@pytest.fixture(scope="session")
+def http_client_registry(request):
+    """
+    Создаёт реестр пулов HTTP соединений на всю сессию pytest.
+
+    ФУНКЦИОНАЛЬНОСТЬ:
+    - Один пул keep-alive соединений на ключ (service, host, port)
+    - Размеры пулов берутся из HTTP_POOL (qa_constants.py), --http-pool-maxsize
+      переопределяет pool_maxsize
+    - Статистика переиспользования выводится в итоговом отчёте pytest
+
+    ВОЗВРАЩАЕТ:
+        HTTPClientRegistry: Реестр, из которого api_client получает Session
+
+    CLEANUP:
+        Закрытие всех пулов после завершения сессии
+    """
+    maxsize_option = request.config.getoption("--http-pool-maxsize")
+    registry = HTTPClientRegistry(
+        pool_connections=HTTP_POOL.get("pool_connections", 2),
+        pool_maxsize=int(maxsize_option) if maxsize_option else HTTP_POOL.get("pool_maxsize", 10),
+        pool_block=HTTP_POOL.get("pool_block", False),
+    )
+    # Сохраняем в config для pytest_terminal_summary
+    request.config.http_client_registry = registry
+    try:
+        yield registry
+    finally:
+        registry.close()
+
+
+# ===================================================================================
+# ФИКСТУРА 4.2: rate_limiter_registry - ОГРАНИЧИТЕЛИ ЧАСТОТЫ ЗАПРОСОВ
+# ===================================================================================
+@pytest.fixture(scope="session")
+def rate_limiter_registry(request):
+    """
+    Создаёт реестр адаптивных ограничителей частоты запросов на всю сессию pytest.
+
+    ФУНКЦИОНАЛЬНОСТЬ:
+    - Один token bucket на сервис, общий для всех модулей сервиса
+    - Параметры по умолчанию - RATE_LIMIT (qa_constants.py), ключ "rate_limit"
+      в SERVICES переопределяет их для сервиса
+    - Вместо фиксированных пауз между тестами: интервал растёт только после
+      429/503 или обрыва соединения и возвращается к норме на успешных ответах
+    - Статистика (только если были 429/503/обрывы) выводится в итоговом отчёте
+
+    ВОЗВРАЩАЕТ:
+        RateLimiterRegistry: Реестр, из которого api_client получает ограничитель сервиса
+    """
+    registry = RateLimiterRegistry(RATE_LIMIT, service_rate_limits(SERVICES))
+    # Сохраняем в config для pytest_terminal_summary
+    request.config.rate_limiter_registry = registry
+    return registry
+
+
 # ===================================================================================
 # ФИКСТУРА 5: agent_base_url - URL ДЛЯ АГЕНТА
 # ===================================================================================
@@ -458,14 +599,15 @@ def agent_base_url(request, tunnel_manager):
 # ФИКСТУРА 6: auth_token - ТОКЕН АВТОРИЗАЦИИ
 # ===================================================================================
 @pytest.fixture(scope="module")
-def auth_token(request):
+def auth_token(request, auth_token_cache):
     """
     Выполняет аутентификацию и возвращает токен доступа для защищённых эндпоинтов.
 
     ПРОЦЕСС:
     1. Извлечение учётных данных из конфигурации pytest
-    2. Выполнение аутентификации через auth_utils.login()
-    3. Получение и кэширование токена на уровне модуля
+    2. Получение токена из auth_token_cache (общий файловый кеш сессии)
+    3. Реальный /users/login выполняется только если токена для (username, agent)
+       ещё нет или он скоро истечёт
 
     УЧЁТНЫЕ ДАННЫЕ ПО УМОЛЧАНИЮ:
         username: "admin"
@@ -480,6 +622,7 @@ def auth_token(request):
 
     ПАРАМЕТРЫ:
         request: Объект pytest.FixtureRequest
+        auth_token_cache: Кеш токенов (фикстура scope="session")
 
     ВОЗВРАЩАЕТ:
         str: JWT токен или аналогичный идентификатор сессии
@@ -492,12 +635,72 @@ def auth_token(request):
     agent = getattr(request.config.option, 'agent', 'local')
 
     try:
-        token = login(username=username, password=password, agent=agent)
+        token = auth_token_cache.get(username=username, password=password, agent=agent)
     except Exception as e:
         pytest.fail(f"Не удалось выполнить авторизацию: {e}")
     return token
 
 
+# ===================================================================================
+# ФИКСТУРА 6.1: auth_token_cache - КЕШ ТОКЕНОВ АВТОРИЗАЦИИ
+# ===================================================================================
+@pytest.fixture(scope="session")
+def auth_token_cache(request):
+    """
+    Создаёт файловый кеш токенов авторизации на всю сессию pytest.
+
+    ФУНКЦИОНАЛЬНОСТЬ:
+    - Файл logs/auth_tokens.json с межпроцессной блокировкой: один login
+      на набор учётных данных для всех модулей и воркеров pytest-xdist
+    - Ключ кеша: (хост --mirada-host, username, agent); токены другого хоста
+      из файла прошлого прогона не используются
+    - Токен обновляется заранее, до истечения ttl из ответа /users/login
+    - api_client повторяет запрос один раз с новым токеном, если сервер
+      ответил 401 на токен, выданный этим кешем
+
+    ВОЗВРАЩАЕТ:
+        TokenCache: Кеш токенов
+    """
+    cache = TokenCache(host=request.config.getoption("--mirada-host", default=None))
+    try:
+        yield cache
+    finally:
+        logger.info(f"Auth token cache: {cache.logins} login(s) in this process")
+        cache.close()
+
+
+def _make_relogin_hook(token_cache):
+    """
+    Создаёт response-хук requests: при 401 на токен из token_cache
+    получает новый токен и один раз повторяет запрос.
+    """
+    def _relogin_on_401(response, *args, **kwargs):
+        if response.status_code != 401:
+            return response
+        sent_token = response.request.headers.get("x-access-token")
+        if not sent_token or getattr(response.request, "_token_retried", False):
+            return response
+        try:
+            fresh_token = token_cache.refresh(sent_token)
+        except Exception as e:
+            logger.warning(f"Re-login after 401 failed: {e}")
+            return response
+        if not fresh_token:
+            return response
+
+        # Дочитываем ответ, чтобы вернуть соединение в пул
+        _ = response.content
+        retry_request = response.request.copy()
+        retry_request.headers["x-access-token"] = fresh_token
+        retry_request._token_retried = True
+        retry_response = response.connection.send(retry_request, **kwargs)
+        retry_response.history.append(response)
+        retry_response.request = retry_request
+        return retry_response
+
+    return _relogin_on_401
+
+
 # ===================================================================================
 # ХУК 7: pytest_runtest_makereport - ОТЧЁТ О ВЫПОЛНЕНИИ ТЕСТА
 # ===================================================================================
@@ -550,10 +753,15 @@ def pytest_runtest_makereport(item, call):
             # Если есть ответ, добавляем и его информацию
             if hasattr(last_request, "response"):
                 response = last_request.response
+                try:
+                    body = response.text
+                except RuntimeError:
+                    # Тело потокового ответа (stream=True) уже прочитано и не сохраняется
+                    body = "<streamed response body is not retained>"
                 report.longrepr.addsection(
                     "Last API Response",
                     f"<- {response.status_code} {response.reason}\n"
-                    f"{response.text}"
+                    f"{body}"
                 )
 
 
@@ -704,45 +912,20 @@ def agent_verification(agent_base_url):
             # Отправляем POST запрос к агенту с данными
             response = requests.post(agent_url, json=payload, timeout=timeout)
 
-            # ОБРАБОТКА УСПЕШНОГО ОТВЕТА (HTTP 200)
-            if response.status_code == 200:
-                result = response.json()
-
-                # Парсим JSON ответ агента согласно стандартному формату
-                if isinstance(result, dict):
-                    # СЛУЧАЙ 1: Успешная проверка - агент вернул {"result": "OK"}
-                    if result.get("result") == "OK":
-                        print("Проверка агента: Успешно")
-                        return {"result": "OK"}
-
-                    # СЛУЧАЙ 2: Ошибка проверки - агент вернул {"result": "ERROR", "message": "..."}
-                    if result.get("result") == "ERROR":
-                        message = result.get("message", "Неизвестная ошибка")
-                        print(f"Проверка агента: Ошибка - {message}")
-                        return {"result": "ERROR", "message": message}
-
-                    # СЛУЧАЙ 3: Легаси - пустой словарь {} трактуется как успех
-                    if result == {}:
-                        print("Проверка агента: Успешно (legacy empty dict)")
-                        return {"result": "OK"}
-
-                    # СЛУЧАЙ 4: Неожиданный формат ответа
-                    print(f"Agent verification: UNEXPECTED_RESULT - {result}")
-                    return {"result": "ERROR", "message": f"Unexpected result: {result}"}
-                else:
-                    # Ответ не является словарём (например, строка или число)
-                    print(f"Agent verification: UNEXPECTED_RESULT_TYPE - {type(result)}")
-                    return {"result": "ERROR", "message": f"Unexpected result type: {type(result).__name__}"}
-
-            # ОБРАБОТКА ОШИБКИ 404 - эндпоинт агента не найден
-            elif response.status_code == 404:
-                print(f"Agent endpoint not found (404): {response.text}")
-                return "unavailable"
+            try:
+                body = response.json()
+            except ValueError:
+                body = None
 
-            # ОБРАБОТКА ДРУГИХ HTTP ОШИБОК (500, 503, и т.д.)
+            # Разбор ответа по стандартному формату (общий с agent_batch)
+            result = normalize_agent_result(response.status_code, body, response.text)
+            if result == "unavailable":
+                print(f"Agent endpoint not found (404): {response.text}")
+            elif result["result"] == "OK":
+                print("Проверка агента: Успешно")
             else:
-                print(f"Agent verification failed with status {response.status_code}: {response.text}")
-                return {"result": "ERROR", "message": f"HTTP {response.status_code}: {response.text}"}
+                print(f"Проверка агента: Ошибка - {result['message']}")
+            return result
 
         # ОБРАБОТКА ОШИБОК СЕТИ И ТАЙМАУТОВ
         except requests.exceptions.RequestException as e:
@@ -758,6 +941,43 @@ def agent_verification(agent_base_url):
     return _check_agent_verification
 
 
+# ===================================================================================
+# ФИКСТУРА 9.1: agent_batch - ПАКЕТНЫЕ ПРОВЕРКИ ЧЕРЕЗ АГЕНТА
+# ===================================================================================
+@pytest.fixture
+def agent_batch(agent_base_url):
+    """
+    Очередь проверок агента, отправляемая одним запросом POST /batch.
+
+    ЧТО ДЕЛАЕТ:
+    Вместо отдельного запроса через SSH-туннель на каждую проверку тест
+    добавляет проверки в очередь (add) и отправляет их разом (flush).
+    Агент выполняет их параллельно; одновременные проверки iptables, tc
+    и адресов ждут один снимок состояния namespace.
+
+    Подходит для проверок, которые не зависят друг от друга: все проверки
+    пакета видят состояние хоста на момент его выполнения.
+
+    ВОЗВРАЩАЕТ:
+        AgentBatch: add(endpoint, payload) -> индекс, flush() -> список результатов
+        в формате agent_verification ({"result": "OK"} / {"result": "ERROR", ...} / "unavailable")
+
+    ПРИМЕР:
+        def test_local_rules(api_client, agent_batch):
+            for rule in RULES:
+                assert api_client.post("/localRules", json=rule).status_code == 200
+                agent_batch.add("/localRules", rule)
+            assert agent_batch.flush() == [{"result": "OK"}] * len(RULES)
+    """
+    batch = AgentBatch(agent_base_url)
+    yield batch
+    # Неотправленные проверки - ошибка теста, а не молчаливый пропуск
+    pending = len(batch)
+    batch.session.close()
+    if pending:
+        pytest.fail(f"agent_batch: {pending} checks were queued but never flushed")
+
+
 # ===================================================================================
 # ФУНКЦИЯ 10: validate_schema - ПРОВЕРКА СХЕМЫ JSON
 # ===================================================================================
@@ -770,6 +990,7 @@ def validate_schema(data, schema):
     - Валидация типов данных полей
     - Проверка необязательных полей при их наличии
     - Поддержка множественных допустимых типов для поля
+    - Принимает и схемы в формате JSON Schema (см. services/schema_validator.py)
 
     ФОРМАТ СХЕМЫ:
         {
@@ -800,44 +1021,86 @@ def validate_schema(data, schema):
     ИСКЛЮЧЕНИЯ:
         AssertionError: При несоответствии данных схеме
     """
-    # Если данные - это список, проверяем каждый элемент
-    if isinstance(data, list):
-        for item in data:
-            validate_schema(item, schema)
-        return
+    # Схема компилируется один раз (services/schema_validator.py); в сообщении -
+    # все несоответствия с путями полей, а не только первое
+    assert_schema(data, schema)
+
+
+# ===================================================================================
+# ФИКСТУРА 10.1: stream_validator - ПОТОКОВАЯ ВАЛИДАЦИЯ БОЛЬШИХ МАССИВОВ
+# ===================================================================================
+@pytest.fixture
+def stream_validator(request, api_client):
+    """
+    Фабрика потоковой проверки эндпоинтов, возвращающих большие JSON-массивы.
 
-    # ПРОВЕРКА ОБЯЗАТЕЛЬНЫХ ПОЛЕЙ
-    for key, expected_type in schema.get("required", {}).items():
-        # Проверяем наличие поля
-        assert key in data, f"Required key '{key}' is missing from data: {json.dumps(data, indent=2)}"
+    Запрос выполняется с stream=True, элементы массива разбираются по мере
+    чтения ответа и проверяются по схеме ОДНОГО элемента
+    (services/stream_validation.py) - ответ целиком в памяти не собирается.
 
-        actual_type = type(data[key])
+    Размер выборки и бюджет ошибок - STREAM_VALIDATION в qa_constants.py,
+    выборку можно переопределить опцией --stream-sample-size или аргументом
+    sample_size. Скорость разбора (элементов/с, байт/с) сохраняется в
+    user_properties теста и выводится в итоговом отчёте сессии.
 
-        # Проверяем тип (может быть несколько допустимых типов)
-        if isinstance(expected_type, tuple):
-            # Например, (int, str) - может быть int или str
-            assert actual_type in expected_type, (
-                f"Key '{key}' has type {actual_type.__name__}, but expected one of {expected_type}."
-            )
-        else:
-            # Один конкретный тип
-            assert actual_type is expected_type, (
-                f"Key '{key}' has type {actual_type.__name__}, but expected {expected_type.__name__}."
-            )
+    ИСПОЛЬЗОВАНИЕ:
+        def test_schema(stream_validator):
+            stats = stream_validator("/ids-events", EVENT_SCHEMA)
+            if not stats.items:
+                pytest.skip("empty list")
 
-    # ПРОВЕРКА НЕОБЯЗАТЕЛЬНЫХ ПОЛЕЙ (только если они присутствуют)
-    for key, expected_type in schema.get("optional", {}).items():
-        if key in data and data[key] is not None:
-            actual_type = type(data[key])
+    ВОЗВРАЩАЕТ:
+        Функцию (url, schema, params=None, **overrides) -> StreamStats;
+        AssertionError при статусе не 200 или несоответствии схеме
+    """
+    cli_sample_size = request.config.getoption("--stream-sample-size", default=None)
 
-            if isinstance(expected_type, tuple):
-                assert actual_type in expected_type, (
-                    f"Optional key '{key}' has type {actual_type.__name__}, but expected one of {expected_type}."
-                )
-            else:
-                assert actual_type is expected_type, (
-                    f"Optional key '{key}' has type {actual_type.__name__}, but expected {expected_type.__name__}."
-                )
+    def _validate(url, schema, params=None, **overrides):
+        options = dict(STREAM_VALIDATION)
+        if cli_sample_size is not None:
+            options["sample_size"] = cli_sample_size or None
+        options.update(overrides)
+
+        response = api_client.get(url, params=params, stream=True)
+        if response.status_code != 200:
+            body = response.text
+            response.close()
+            raise AssertionError(f"Expected status code 200, got {response.status_code}: {body[:500]}")
+
+        stats = validate_stream(response, schema, **options)
+        request.node.user_properties.append(("stream_validation", {"url": url, **stats.as_dict()}))
+        logger.info(f"Stream validation {url}: {stats}")
+        if stats.errors:
+            raise AssertionError(f"{format_errors(stats.errors)}\nStream: {stats}")
+        return stats
+
+    return _validate
+
+
+# ===================================================================================
+# ФИКСТУРА 10.2: status_waiter - ОЖИДАНИЕ СМЕНЫ СОСТОЯНИЯ ОПЕРАЦИИ
+# ===================================================================================
+@pytest.fixture
+def status_waiter():
+    """
+    Ожидание завершения долгих операций вместо фиксированных time.sleep.
+
+    Статус проверяется часто в первые секунды, затем интервал растёт
+    экспоненциально (STATUS_WAITER в qa_constants.py); ожидание
+    заканчивается на первой проверке после смены состояния.
+
+    ИСПОЛЬЗОВАНИЕ:
+        def test_restore(api_client, status_waiter):
+            status_waiter.wait(
+                lambda: api_client.get("/manager/restoreConfigStatus").json(),
+                lambda data: data.get("message") == "OK",
+                timeout=180,
+            )
+
+    ВОЗВРАЩАЕТ:
+        services.status_waiter.StatusWaiter (WaitTimeout, если состояние не наступило)
+    """
+    return StatusWaiter(**STATUS_WAITER)
 
 
 # ===================================================================================
@@ -977,6 +1240,8 @@ def tunnel_manager(request):
     ФУНКЦИОНАЛЬНОСТЬ:
     - Создание единственного экземпляра SSHTunnelManager для всей сессии
     - Установка SSH туннелей для проксирования TCP соединений
+    - Фоновый супервизор (manager.supervisor): перезапуск упавших туннелей
+      и событие готовности, которого ждёт api_client
     - Автоматическое закрытие всех туннелей при завершении сессии
 
     SSH ТУННЕЛИРОВАНИЕ:
@@ -987,6 +1252,17 @@ def tunnel_manager(request):
         scope="session" обеспечивает единственную инициализацию на весь запуск pytest,
         минимизируя накладные расходы на установку SSH соединений.
 
+    РЕЖИМ PYTEST-XDIST (-n auto):
+        Менеджер воркера получает общий реестр туннелей (плагин xdist_tunnels).
+        Туннель на фиксированный порт из TUNNEL_CONFIG создаётся один раз за прогон
+        первым воркером, остальные переиспользуют его; закрывает туннели контроллер.
+
+    МУЛЬТИПЛЕКСИРОВАНИЕ (--ssh-multiplex, по умолчанию auto):
+        Все туннели идут через одно мастер-соединение OpenSSH (ControlMaster):
+        аутентификация выполняется один раз за прогон, а туннель сервиса
+        добавляется командой `ssh -O forward` при первом обращении к нему.
+        На Windows и с --ssh-multiplex=off - отдельный процесс ssh на туннель.
+
     ПАРАМЕТРЫ:
         request: pytest.FixtureRequest объект
 
@@ -1005,18 +1281,32 @@ def tunnel_manager(request):
         yield None
         return
 
-    # Создаём менеджер SSH туннелей
-    manager = SSHTunnelManager(mirada_host)
+    # Создаём менеджер SSH туннелей (под xdist - с общим реестром туннелей)
+    multiplex_mode = request.config.getoption("--ssh-multiplex")
+    manager = SSHTunnelManager(
+        mirada_host,
+        registry=shared_tunnel_registry(request.config),
+        multiplex=(multiplex_mode != "off"),
+    )
+    manager.supervisor = TunnelSupervisor(
+        manager,
+        interval=TUNNEL_SUPERVISOR["interval"],
+        backoff_base=TUNNEL_SUPERVISOR["backoff_base"],
+        backoff_max=TUNNEL_SUPERVISOR["backoff_max"],
+        probe_interval=TUNNEL_SUPERVISOR["probe_interval"],
+    )
+    manager.supervisor.start()
 
     try:
         # Отдаём менеджер для использования в тестах
         yield manager
     finally:
-        # После завершения ВСЕХ тестов закрываем все туннели
+        # Сначала останавливаем супервизор, чтобы он не поднимал закрываемые туннели
+        manager.supervisor.stop()
+        record_tunnel_stats(request.config, manager.supervisor.stats())
+        # После завершения ВСЕХ тестов закрываем все туннели и мастер-соединение
         # Это гарантирует чистоту завершения и отсутствие висящих процессов
-        for key in list(manager.tunnels.keys()):
-            service, port = key.rsplit('_', 1)
-            manager.close_tunnel(service, int(port))
+        manager.close_all()
 
 
 # ===================================================================================
@@ -1293,6 +1583,86 @@ def pytest_configure(config):
     config.resume_enabled = resume_enabled
 
 
+# ===================================================================================
+# ХУК 18: pytest_terminal_summary - СТАТИСТИКА HTTP ПУЛОВ, SSH ТУННЕЛЕЙ И ПОТОКОВОЙ ВАЛИДАЦИИ
+# ===================================================================================
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """
+    Выводит статистику переиспользования соединений по сервисам.
+
+    Для каждого сервиса: число модулей, HTTP запросов, открытых TCP соединений
+    и запросов, обслуженных уже открытым keep-alive соединением.
+
+    Если за прогон SSH туннели обрывались - число обрывов, переподключений
+    супервизора и суммарное время простоя по каждому туннелю.
+
+    Если backend отвечал 429/503 или рвал соединения - статистика
+    ограничителя частоты запросов по сервисам.
+
+    Для тестов, использовавших stream_validator, - число проверенных элементов,
+    объём ответа и скорость разбора.
+    """
+    registry = getattr(config, "http_client_registry", None)
+    stats = registry.stats() if registry is not None else {}
+    if stats:
+        terminalreporter.write_sep("=", "HTTP connection pool reuse")
+        for service, entry in sorted(stats.items()):
+            terminalreporter.write_line(
+                f"{service}: modules={entry['modules']} requests={entry['requests']} "
+                f"connections={entry['connections']} reused={entry['reused']}"
+            )
+
+    _write_tunnel_health(terminalreporter, config)
+    _write_rate_limiting(terminalreporter, config)
+    _write_stream_throughput(terminalreporter)
+
+
+def _write_tunnel_health(terminalreporter, config):
+    """Секция отчёта о переподключениях SSH туннелей (только если были обрывы)."""
+    stats = getattr(config, "_tunnel_stats", None)
+    if not stats:
+        return
+    terminalreporter.write_sep("=", "SSH tunnel health")
+    for key, entry in sorted(stats.items()):
+        terminalreporter.write_line(
+            f"{key}: failures={entry['failures']} reconnects={entry['reconnects']} "
+            f"downtime={entry['downtime']:.1f}s"
+        )
+
+
+def _write_rate_limiting(terminalreporter, config):
+    """Секция отчёта об ограничении частоты запросов (только если backend отвечал 429/503 или рвал соединения)."""
+    registry = getattr(config, "rate_limiter_registry", None)
+    stats = registry.stats() if registry is not None else {}
+    throttled = {service: entry for service, entry in stats.items() if entry["throttled"] or entry["resets"]}
+    if not throttled:
+        return
+    terminalreporter.write_sep("=", "API rate limiting")
+    for service, entry in sorted(throttled.items()):
+        terminalreporter.write_line(
+            f"{service}: requests={entry['requests']} throttled={entry['throttled']} resets={entry['resets']} "
+            f"retries={entry['retries']} waited={entry['waited']:.1f}s rate={entry['rate']:.2f}/s"
+        )
+
+
+def _write_stream_throughput(terminalreporter):
+    """Секция отчёта о скорости потоковой валидации (user_properties приходят и от воркеров xdist)."""
+    rows = []
+    for report in terminalreporter.stats.get("passed", []) + terminalreporter.stats.get("failed", []):
+        if getattr(report, "when", None) != "call":
+            continue
+        rows += [(report.nodeid, value) for name, value in report.user_properties if name == "stream_validation"]
+    if not rows:
+        return
+    terminalreporter.write_sep("=", "Streaming validation throughput")
+    for nodeid, entry in rows:
+        line = (f"{nodeid}: items={entry['items']} bytes={entry['bytes']} time={entry['seconds']:.2f}s "
+                f"items/s={entry['items_per_sec']:.0f} bytes/s={entry['bytes_per_sec']:.0f} errors={entry['errors']}")
+        if entry["stopped_by"]:
+            line += f" stopped_by={entry['stopped_by']}"
+        terminalreporter.write_line(line)
+
+
 # ===================================================================================
 # КОНЕЦ ФАЙЛА conftest.py
 # ===================================================================================
@@ -1304,27 +1674,34 @@ def pytest_configure(config):
 # 2. pytest_configure         - Конфигурация глобальных параметров (resume_enabled)
 #
 # СЕССИОННЫЕ КОМПОНЕНТЫ (scope="session"):
-# 3. tunnel_manager          - Управление SSH туннелями на протяжении сессии
+# 3. tunnel_manager          - Управление SSH туннелями и их супервизор на протяжении сессии
+# 3.1 http_client_registry   - Общие пулы keep-alive соединений (service, host, port)
+# 3.2 auth_token_cache       - Файловый кеш токенов (username, agent) для всех воркеров
+# 3.3 rate_limiter_registry  - Адаптивные ограничители частоты запросов по сервисам
 #
 # МОДУЛЬНЫЕ ФИКСТУРЫ (scope="module"):
 # 4. api_base_url            - Автоматическое определение базового URL сервиса
 # 5. request_timeout         - Извлечение таймаута HTTP запросов из CLI
-# 6. api_client              - Инициализация настроенного requests.Session
+# 6. api_client              - Модульный requests.Session поверх общего пула
 # 7. agent_base_url          - Определение URL для агента валидации
-# 8. auth_token              - Выполнение аутентификации и получение токена
+# 8. auth_token              - Токен авторизации из общего кеша auth_token_cache
 #
 # ФУНКЦИОНАЛЬНЫЕ ФИКСТУРЫ (scope="function"):
 # 9. capture_last_request    - Монкейпатчинг для перехвата HTTP запросов (autouse=True)
 # 10. attach_curl_on_fail    - Генератор контекст-менеджера для cURL команд
 # 11. agent_verification     - Фабрика функции валидации через агента
+# 11.1 stream_validator     - Потоковая проверка больших JSON-массивов по схеме элемента
+# 11.2 status_waiter        - Адаптивное ожидание смены состояния вместо time.sleep
+# 11.3 agent_batch          - Очередь проверок агента, отправляемая одним запросом /batch
 # 12. stable_negative_request - Адаптер handle_negative_response_safely
 # 13. stable_multipart_post  - Адаптер robust_multipart_post
 #
 # ХУКИ PYTEST:
 # 14. pytest_runtest_makereport - Расширение отчётов информацией о HTTP запросах
+# 18. pytest_terminal_summary   - Статистика HTTP соединений, SSH туннелей и потоковой валидации
 #
 # ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ:
-# 15. validate_schema              - Рекурсивная валидация JSON структур
+# 15. validate_schema              - Валидация JSON структур общим валидатором схем
 # 16. handle_negative_response_safely - Устойчивое выполнение запросов с 4xx/5xx
 # 17. robust_multipart_post        - Устойчивая отправка multipart/form-data
 # ===================================================================================
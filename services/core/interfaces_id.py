@@ -9,8 +9,7 @@
 """
 import pytest
 import json
-from collections.abc import Mapping, Sequence
-import time
+from services.schema_validator import assert_schema
 
 ENDPOINT = "/interfaces"
 
@@ -27,11 +26,6 @@ INTERFACE_SCHEMA = {
     "required": ["name", "accessory", "ifType", "active", "pos"],
 }
 
-# Автофикстура для задержки между каждым тестом
-@pytest.fixture(autouse=True)
-def pause_between_tests():
-    yield
-    time.sleep(0.5)
 
 # Осмысленная параметризация для тестирования эндпоинта /interfaces/{id}
 PARAMS = [
@@ -107,43 +101,6 @@ PARAMS = [
 ]
 
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных в объекте на соответствие схеме."""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Тип {type(obj)} не соответствует ни одной из схем в anyOf"
-        return
-
-    schema_type = schema.get("type")
-    if schema_type == "object":
-        assert isinstance(obj, Mapping), f"Ожидался объект (dict), получено: {type(obj).__name__}"
-        for key, prop_schema in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop_schema)
-        for required_key in schema.get("required", []):
-            assert required_key in obj, f"Обязательное поле '{required_key}' отсутствует в объекте"
-    elif schema_type == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Ожидался список (list/tuple), получено: {type(obj).__name__}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    elif schema_type == "string":
-        assert isinstance(obj, str), f"Поле должно быть строкой (string), получено: {type(obj).__name__}"
-    elif schema_type == "integer":
-        assert isinstance(obj, int), f"Поле должно быть целым числом (integer), получено: {type(obj).__name__}"
-    elif schema_type == "boolean":
-        assert isinstance(obj, bool), f"Поле должно быть булевым (boolean), получено: {type(obj).__name__}"
-    elif schema_type == "null":
-        assert obj is None, "Поле должно быть null"
-
-
-def _try_type(obj, schema):
-    """Вспомогательная функция для проверки типа в 'anyOf'."""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
 def _format_curl_command(api_client, endpoint, interface_id, params):
     """Формирует и возвращает cURL-строку для воспроизведения запроса."""
     base_url = getattr(api_client, "base_url", "http://127.0.0.1")
@@ -189,10 +146,10 @@ def test_interfaces_id_parametrized(api_client, params, expected_status):
             if interface_id == "":
                 assert isinstance(data, list), f"Тело ответа не является массивом JSON, получено: {type(data).__name__}"
                 for interface_data in data:
-                    _check_types_recursive(interface_data, INTERFACE_SCHEMA)
+                    assert_schema(interface_data, INTERFACE_SCHEMA)
             else:
                 assert isinstance(data, dict), f"Тело ответа не является объектом JSON, получено: {type(data).__name__}"
-                _check_types_recursive(data, INTERFACE_SCHEMA)
+                assert_schema(data, INTERFACE_SCHEMA)
                 # Дополнительная проверка что name соответствует запрошенному ID
                 assert data["name"] == interface_id, f"Name в ответе {data['name']} не соответствует запрошенному ID {interface_id}"
         elif response.status_code == 204:
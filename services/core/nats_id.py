@@ -1,6 +1,6 @@
 import pytest
 import json
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 
 ENDPOINT = "/nats"
 
@@ -166,43 +166,6 @@ def get_test_params(api_client):
     return params
 
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных в объекте на соответствие схеме."""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Тип {type(obj)} не соответствует ни одной из схем в anyOf"
-        return
-
-    schema_type = schema.get("type")
-    if schema_type == "object":
-        assert isinstance(obj, Mapping), f"Ожидался объект (dict), получено: {type(obj).__name__}"
-        for key, prop_schema in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop_schema)
-        for required_key in schema.get("required", []):
-            assert required_key in obj, f"Обязательное поле '{required_key}' отсутствует в объекте"
-    elif schema_type == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Ожидался список (list/tuple), получено: {type(obj).__name__}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    elif schema_type == "string":
-        assert isinstance(obj, str), f"Поле должно быть строкой (string), получено: {type(obj).__name__}"
-    elif schema_type == "integer":
-        assert isinstance(obj, int), f"Поле должно быть целым числом (integer), получено: {type(obj).__name__}"
-    elif schema_type == "boolean":
-        assert isinstance(obj, bool), f"Поле должно быть булевым (boolean), получено: {type(obj).__name__}"
-    elif schema_type == "null":
-        assert obj is None, "Поле должно быть null"
-
-
-def _try_type(obj, schema):
-    """Вспомогательная функция для проверки типа в 'anyOf'."""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
 def _format_curl_command(api_client, endpoint, nat_id, params):
     """Формирует и возвращает cURL-строку для воспроизведения запроса."""
     base_url = getattr(api_client, "base_url", "http://127.0.0.1")
@@ -274,11 +237,11 @@ def test_nats_id_case(api_client, test_params, expected_status):
                 assert isinstance(data, list), f"Тело ответа для пустого ID должно быть массивом JSON, получено: {type(data).__name__}"
                 # Проверяем структуру каждого NAT в списке
                 for nat_data in data:
-                    _check_types_recursive(nat_data, NAT_SCHEMA)
+                    assert_schema(nat_data, NAT_SCHEMA)
             else:
                 # Для конкретного ID возвращается один объект NAT
                 assert isinstance(data, dict), f"Тело ответа не является объектом JSON, получено: {type(data).__name__}"
-                _check_types_recursive(data, NAT_SCHEMA)
+                assert_schema(data, NAT_SCHEMA)
                 # Дополнительная проверка что ID в ответе соответствует запрошенному
                 assert data.get("id") == nat_id, f"ID в ответе {data.get('id')} не соответствует запрошенному {nat_id}"
         elif response.status_code == 404:
@@ -1,8 +1,7 @@
 """Tests for the /ngfwSwitch/common/memory endpoint."""
 import pytest
 import json
-from collections.abc import Mapping, Sequence
-import time
+from services.schema_validator import assert_schema
 
 ENDPOINT = "/ngfwSwitch/common/memory"
 
@@ -18,11 +17,6 @@ MEMORY_SCHEMA = {
     "required": [],
 }
 
-# Автофикстура для задержки между каждым тестом
-@pytest.fixture(autouse=True)
-def pause_between_tests():
-    yield
-    time.sleep(1)
 
 # Осмысленная параметризация для тестирования эндпоинта /ngfwSwitch/common/memory
 PARAMS = [
@@ -114,43 +108,6 @@ PARAMS = [
 ]
 
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных в объекте на соответствие схеме."""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Тип {type(obj)} не соответствует ни одной из схем в anyOf"
-        return
-
-    schema_type = schema.get("type")
-    if schema_type == "object":
-        assert isinstance(obj, Mapping), f"Ожидался объект (dict), получено: {type(obj).__name__}"
-        for key, prop_schema in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop_schema)
-        for required_key in schema.get("required", []):
-            assert required_key in obj, f"Обязательное поле '{required_key}' отсутствует в объекте"
-    elif schema_type == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Ожидался список (list/tuple), получено: {type(obj).__name__}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    elif schema_type == "string":
-        assert isinstance(obj, str), f"Поле должно быть строкой (string), получено: {type(obj).__name__}"
-    elif schema_type == "integer":
-        assert isinstance(obj, int), f"Поле должно быть целым числом (integer), получено: {type(obj).__name__}"
-    elif schema_type == "boolean":
-        assert isinstance(obj, bool), f"Поле должно быть булевым (boolean), получено: {type(obj).__name__}"
-    elif schema_type == "null":
-        assert obj is None, "Поле должно быть null"
-
-
-def _try_type(obj, schema):
-    """Вспомогательная функция для проверки типа в 'anyOf'."""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
 def _format_curl_command(api_client, endpoint, params):
     """Формирует и возвращает cURL-строку для воспроизведения запроса."""
     base_url = getattr(api_client, "base_url", "http://127.0.0.1")
@@ -191,7 +148,7 @@ def test_ngfw_switch_common_memory_parametrized(api_client, params, expected_sta
         if response.status_code == 200:
             data = response.json()
             assert isinstance(data, dict), f"Тело ответа не является объектом JSON, получено: {type(data).__name__}"
-            _check_types_recursive(data, MEMORY_SCHEMA)
+            assert_schema(data, MEMORY_SCHEMA)
             
             # Дополнительная проверка что все значения памяти - строки с числами
             for field in ["total", "used", "free", "buffer"]:
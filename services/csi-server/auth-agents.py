@@ -1,6 +1,6 @@
 import json
 import pytest
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 from services.qa_constants import SERVICES
 
 ENDPOINT = "/auth-agents"
@@ -31,43 +31,6 @@ response_schemas = {
     }
 }
 
-def _check_types_recursive(obj, schema):
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Value {obj} does not match anyOf {schema['anyOf']}"
-        return
-    if schema.get("type") == "object":
-        assert isinstance(obj, Mapping), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Expected array, got {type(obj)}"
-        if "items" in schema and isinstance(schema["items"], list):
-            for idx, (item, item_schema) in enumerate(zip(obj, schema["items"])):
-                _check_types_recursive(item, item_schema)
-        else:
-            for item in obj:
-                _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int), f"Expected integer, got {type(obj)}"
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-        elif schema.get("type") == "null":
-            assert obj is None, f"Expected null, got {type(obj)}"
-
-def _try_type(obj, schema):
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
 POSITIVE_CASES = [
     pytest.param({"use_auth_token": True}, None, "", 200, id="valid-token"),
     pytest.param({"use_auth_token": True, "Content-Type": "application/json"}, None, "", 200, id="valid-token-json-content-type"),
@@ -111,7 +74,7 @@ def test_get_auth_agents_positive(api_client, auth_token, attach_curl_on_fail, h
         response = api_client.get(full_endpoint, params=params, headers=headers)
         assert response.status_code == expected_status
         if expected_status == 200:
-            _check_types_recursive(response.json(), response_schemas["GET"])
+            assert_schema(response.json(), response_schemas["GET"])
 
 @pytest.mark.parametrize("headers, params, endpoint_suffix, expected_status", NEGATIVE_CASES)
 def test_get_auth_agents_negative(api_client, auth_token, attach_curl_on_fail, headers, params, endpoint_suffix, expected_status):
@@ -168,7 +131,7 @@ def test_post_auth_agents_positive(api_client, auth_token, attach_curl_on_fail,
     with attach_curl_on_fail(ENDPOINT, data, headers, "POST"):
         response = api_client.post(ENDPOINT, json=data, headers=headers)
         assert response.status_code == 200
-        _check_types_recursive(response.json(), response_schemas["POST"])
+        assert_schema(response.json(), response_schemas["POST"])
         # Cleanup
         agent_id = data["id"]
         api_client.delete(f"{ENDPOINT}/{agent_id}", headers={"x-access-token": auth_token})
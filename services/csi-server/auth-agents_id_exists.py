@@ -1,5 +1,6 @@
 import pytest
 from typing import Any, Dict, List, Union
+from services.schema_validator import assert_schema
 
 ENDPOINT = "/auth-agents/{id}/exists"
 
@@ -11,41 +12,6 @@ SUCCESS_RESPONSE_SCHEMA = {
     "required": ["exists"]
 }
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных в объекте на соответствие схеме."""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Тип {type(obj)} не соответствует ни одной из схем в anyOf"
-        return
-
-    schema_type = schema.get("type")
-    if schema_type == "object":
-        assert isinstance(obj, dict), f"Ожидался объект (dict), получено: {type(obj).__name__}"
-        for key, prop_schema in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop_schema)
-        for required_key in schema.get("required", []):
-            assert required_key in obj, f"Обязательное поле '{required_key}' отсутствует в объекте"
-    elif schema_type == "array":
-        assert isinstance(obj, list) and not isinstance(obj, str), f"Ожидался список (list), получено: {type(obj).__name__}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    elif schema_type == "string":
-        assert isinstance(obj, str), f"Поле должно быть строкой (string), получено: {type(obj).__name__}"
-    elif schema_type == "integer":
-        assert isinstance(obj, int), f"Поле должно быть целым числом (integer), получено: {type(obj).__name__}"
-    elif schema_type == "boolean":
-        assert isinstance(obj, bool), f"Поле должно быть булевым (boolean), получено: {type(obj).__name__}"
-    elif schema_type == "null":
-        assert obj is None, "Поле должно быть null"
-
-def _try_type(obj, schema):
-    """Вспомогательная функция для проверки типа в 'anyOf'."""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
 @pytest.mark.parametrize("test_id, description, auth_type, agent_id, expected_status", [
     ("P01", "Valid auth token with local agent", "valid", "local", 200),
     ("P02", "Valid auth token with existing agent", "valid", "admin", 200),
@@ -71,7 +37,7 @@ def test_positive_auth_agents_exists_cases(api_client, auth_token, test_id, desc
         assert response.status_code == expected_status, f"[{test_id}] {description}: Expected {expected_status}, got {response.status_code}"
         
         if expected_status == 200:
-            _check_types_recursive(response.json(), SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response.json(), SUCCESS_RESPONSE_SCHEMA)
 
 @pytest.mark.parametrize("test_id, description, auth_type, agent_id, expected_status", [
     ("N01", "No auth header", "none", "local", 401),
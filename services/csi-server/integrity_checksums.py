@@ -11,7 +11,7 @@
 import pytest
 import json
 import re
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 
 ENDPOINT = "/integrity/checksums"
 
@@ -48,45 +48,6 @@ def is_valid_sha256(checksum):
     # SHA-256 хеш должен быть 64 символа длиной и содержать только hex символы
     return len(checksum) == 64 and re.match(r'^[a-fA-F0-9]+$', checksum) is not None
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных в объекте на соответствие схеме."""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Тип {type(obj)} не соответствует ни одной из схем в anyOf"
-        return
-
-    schema_type = schema.get("type")
-    if schema_type == "object":
-        assert isinstance(obj, Mapping), f"Ожидался объект (dict), получено: {type(obj).__name__}"
-        for key, prop_schema in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop_schema)
-        for required_key in schema.get("required", []):
-            assert required_key in obj, f"Обязательное поле '{required_key}' отсутствует в объекте"
-    elif schema_type == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Ожидался список (list/tuple), получено: {type(obj).__name__}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    elif schema_type == "string":
-        assert isinstance(obj, str), f"Поле должно быть строкой (string), получено: {type(obj).__name__}"
-        # Проверяем паттерн если он задан
-        if "pattern" in schema:
-            pattern = schema["pattern"]
-            assert re.match(pattern, obj), f"Строка не соответствует паттерну {pattern}: {obj}"
-    elif schema_type == "integer":
-        assert isinstance(obj, int), f"Поле должно быть целым числом (integer), получено: {type(obj).__name__}"
-    elif schema_type == "boolean":
-        assert isinstance(obj, bool), f"Поле должно быть булевым (boolean), получено: {type(obj).__name__}"
-    elif schema_type == "null":
-        assert obj is None, "Поле должно быть null"
-
-def _try_type(obj, schema):
-    """Вспомогательная функция для проверки типа в 'anyOf'."""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
 def _validate_checksums_structure(data):
     """Проверяет структуру checksums и валидность хешей (мягкий режим)."""
     # Секции и подразделы могут отсутствовать; валидируем только присутствующие
@@ -227,7 +188,7 @@ def test_integrity_checksums_parametrized(api_client, auth_token, params, expect
             data = response.json()
             
             # Проверяем соответствие схеме
-            _check_types_recursive(data, INTEGRITY_CHECKSUMS_SCHEMA)
+            assert_schema(data, INTEGRITY_CHECKSUMS_SCHEMA)
             
             # Проверяем структуру checksums
             _validate_checksums_structure(data)
@@ -286,7 +247,7 @@ def test_integrity_checksums_basic(api_client, auth_token):
         data = response.json()
         
         # Проверяем соответствие схеме
-        _check_types_recursive(data, INTEGRITY_CHECKSUMS_SCHEMA)
+        assert_schema(data, INTEGRITY_CHECKSUMS_SCHEMA)
         
         # Проверяем структуру checksums
         _validate_checksums_structure(data)
@@ -1,5 +1,6 @@
 import json
 import pytest
+from services.schema_validator import assert_schema
 
 # Константы для тестируемого эндпоинта и схемы успешного ответа
 ENDPOINT = "/licenses/generate-activation-code"
@@ -55,34 +56,6 @@ def test_licenses_generate_activation_code_agent_verification(agent_verification
     _handle_agent_response(agent_result)
 
 
-def _check_types_recursive(obj, schema):
-    if schema.get("type") == "object":
-        assert isinstance(obj, dict), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, list) and not isinstance(obj, str), f"Expected array, got {type(obj)}"
-        if "items" in schema and isinstance(schema["items"], list):
-            for item, item_schema in zip(obj, schema["items"]):
-                _check_types_recursive(item, item_schema)
-        elif "items" in schema and isinstance(schema["items"], dict):
-            for item in obj:
-                _check_types_recursive(item, schema["items"])
-    elif schema.get("type") == "string":
-        assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-    elif schema.get("type") == "integer":
-        assert isinstance(obj, int), f"Expected integer, got {type(obj)}"
-    elif schema.get("type") == "number":
-        assert isinstance(obj, (int, float)), f"Expected number, got {type(obj)}"
-    elif schema.get("type") == "boolean":
-        assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-    elif schema.get("type") == "null":
-        assert obj is None, f"Expected null, got {type(obj)}"
-
-
 def _get_license_number(api_client, api_base_url, auth_token, attach_curl_on_fail):
     endpoint = "/licenses"
     url = f"{api_base_url}{endpoint}"
@@ -174,15 +147,15 @@ def test_licenses_generate_activation_code_positive(api_client, api_base_url, au
             r2 = api_client.post(url, headers=headers, json=body)
             assert r1.status_code == 200 and r2.status_code == 200, f"Ожидается 200 OK; получено {r1.status_code}/{r2.status_code}"
             d1 = r1.json(); d2 = r2.json()
-            _check_types_recursive(d1, SUCCESS_RESPONSE_SCHEMA)
-            _check_types_recursive(d2, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(d1, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(d2, SUCCESS_RESPONSE_SCHEMA)
             assert d1["value"] != d2["value"], "Значение должно отличаться для одно и того же ввода (разное createdAt)"
             return
 
         response = api_client.post(url, headers=headers, json=body)
         assert response.status_code == 200, f"Ожидается 200 OK; получено {response.status_code}"
         data = response.json()
-        _check_types_recursive(data, SUCCESS_RESPONSE_SCHEMA)
+        assert_schema(data, SUCCESS_RESPONSE_SCHEMA)
 
         # Проверка суффикса в зависимости от bundled
         license_num = body.get("licenseNumber")
@@ -373,7 +346,7 @@ def test_licenses_generate_activation_code_auth(api_client, api_base_url, auth_t
         assert response.status_code == case["expect_code"], f"Ожидается {case['expect_code']}; получено {response.status_code}"
         if response.status_code == 200 and response.content:
             data = response.json()
-            _check_types_recursive(data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(data, SUCCESS_RESPONSE_SCHEMA)
 
 
 # ------------------------ Системные/сервисные сбои ------------------------
@@ -10,9 +10,8 @@
 """
 import pytest
 import json
-import re
 import uuid
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 
 ENDPOINT = "/licenses/serial-number"
 
@@ -32,47 +31,6 @@ def is_valid_uuid(serial_number):
     except ValueError:
         return False
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных в объекте на соответствие схеме."""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Тип {type(obj)} не соответствует ни одной из схем в anyOf"
-        return
-
-    schema_type = schema.get("type")
-    if schema_type == "object":
-        assert isinstance(obj, Mapping), f"Ожидался объект (dict), получено: {type(obj).__name__}"
-        for key, prop_schema in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop_schema)
-        for required_key in schema.get("required", []):
-            assert required_key in obj, f"Обязательное поле '{required_key}' отсутствует в объекте"
-    elif schema_type == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Ожидался список (list/tuple), получено: {type(obj).__name__}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    elif schema_type == "string":
-        assert isinstance(obj, str), f"Поле должно быть строкой (string), получено: {type(obj).__name__}"
-        # Проверяем паттерн если он задан
-        if "pattern" in schema:
-            pattern = schema["pattern"]
-            assert re.match(pattern, obj), f"Строка не соответствует паттерну {pattern}: {obj}"
-    elif schema_type == "integer":
-        assert isinstance(obj, int), f"Поле должно быть целым числом (integer), получено: {type(obj).__name__}"
-    elif schema_type == "boolean":
-        assert isinstance(obj, bool), f"Поле должно быть булевым (boolean), получено: {type(obj).__name__}"
-    elif schema_type == "null":
-        assert obj is None, "Поле должно быть null"
-
-
-def _try_type(obj, schema):
-    """Вспомогательная функция для проверки типа в 'anyOf'."""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
 def _format_curl_command(api_client, endpoint, params, auth_token=None):
     """Формирует и возвращает cURL-строку для воспроизведения запроса."""
     base_url = getattr(api_client, "base_url", "http://127.0.0.1")
@@ -100,9 +58,6 @@ def _format_curl_command(api_client, endpoint, params, auth_token=None):
     return curl_command
 
 
-
-
-
 # Осмысленная параметризация для тестирования эндпоинта /licenses/serial-number
 PARAMS = [
     # --- Базовые позитивные сценарии ---
@@ -188,7 +143,7 @@ def test_licenses_serial_number_parametrized(api_client, auth_token, params, exp
             assert isinstance(data, str), f"Тело ответа не является строкой JSON, получено: {type(data).__name__}"
             
             # Проверяем структуру и формат серийного номера
-            _check_types_recursive(data, SERIAL_NUMBER_SCHEMA)
+            assert_schema(data, SERIAL_NUMBER_SCHEMA, strict=True)
             
             # Дополнительная проверка валидности UUID
             assert is_valid_uuid(data), f"Серийный номер не является валидным UUID: {data}"
@@ -207,9 +162,6 @@ def test_licenses_serial_number_parametrized(api_client, auth_token, params, exp
         pytest.fail(error_message, pytrace=False)
 
 
-
-
-
 def test_licenses_serial_number_basic(api_client, auth_token):
     """
     Базовый тест для эндпоинта /licenses/serial-number без параметров.
@@ -233,7 +185,7 @@ def test_licenses_serial_number_basic(api_client, auth_token):
         assert isinstance(data, str), f"Тело ответа не является строкой JSON, получено: {type(data).__name__}"
         
         # Проверяем структуру и формат серийного номера
-        _check_types_recursive(data, SERIAL_NUMBER_SCHEMA)
+        assert_schema(data, SERIAL_NUMBER_SCHEMA, strict=True)
         
         # Дополнительная проверка валидности UUID
         assert is_valid_uuid(data), f"Серийный номер не является валидным UUID: {data}"
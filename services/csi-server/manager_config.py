@@ -24,8 +24,8 @@ import json
 import os
 from pathlib import Path
 import requests # Added for ConnectionError
-import time
 from typing import Type, Dict, List, Optional
+from services.status_waiter import StatusWaiter, WaitTimeout
 
 ENDPOINT = "/manager/config"
 
@@ -36,7 +36,7 @@ API_TIMEOUTS = {
     'GET_CONFIG': 180,
     'POST_CONFIG': 25,  # Увеличен с 5 до 120 секунд для POST операций
     'STATUS_CHECK': 180,
-    'STATUS_INTERVAL': 1,
+    'RESTORE_START': 10,  # Сколько ждать перехода восстановления в промежуточное состояние
     'POST_DELAY': 5
 }
 
@@ -135,54 +135,70 @@ class ConfigArchiveValidator:
 
 class StatusPoller:
     """Утилита для опроса статуса операций."""
-    
-    def __init__(self, api_client, headers: Dict[str, str]):
+
+    # Состояния, в которых операция ещё выполняется
+    PROGRESS_STATES = ["updating", "processing", "PENDING", "IN_PROGRESS"]
+
+    def __init__(self, api_client, headers: Dict[str, str], waiter: StatusWaiter):
         self.api_client = api_client
         self.headers = headers
-    
+        self.waiter = waiter
+
+    def _fetch_status(self, endpoint: str) -> Dict:
+        response = self.api_client.get(endpoint, headers=self.headers, timeout=10)
+        assert response.status_code == 200, f"Ожидается 200 OK; получено {response.status_code}"
+
+        data = response.json()
+        assert isinstance(data, dict) and "message" in data, "Ожидается JSON с полем 'message'"
+        return data
+
+    def wait_started(self, endpoint: str, success_states: List[str] = None, timeout: float = None) -> Optional[Dict]:
+        """
+        Ждёт, пока операция перейдёт в промежуточное состояние (статус ещё может
+        быть финальным от предыдущей операции). Возвращает None, если за timeout
+        статус так и не сменился - операция могла завершиться между проверками.
+        """
+        if success_states is None:
+            success_states = ["OK"]
+        if timeout is None:
+            timeout = API_TIMEOUTS['RESTORE_START']
+        try:
+            return self.waiter.wait(
+                lambda: self._fetch_status(endpoint),
+                lambda data: data.get("message") not in success_states,
+                timeout=timeout,
+                description=f"start of {endpoint}",
+            )
+        except WaitTimeout:
+            return None
+
     def poll_until_complete(
-        self, 
-        endpoint: str, 
+        self,
+        endpoint: str,
         success_states: List[str] = None,
-        max_attempts: int = None
+        timeout: float = None
     ) -> Dict:
         """Опрашивает эндпоинт до получения финального статуса."""
         if success_states is None:
             success_states = ["OK"]
-        if max_attempts is None:
-            max_attempts = API_TIMEOUTS['STATUS_CHECK']
-            
-        consecutive_failures = 0
-        max_consecutive_failures = 10
-        
-        for attempt in range(max_attempts):
-            try:
-                response = self.api_client.get(endpoint, headers=self.headers, timeout=10)
-                assert response.status_code == 200, f"Ожидается 200 OK; получено {response.status_code}"
-                
-                data = response.json()
-                assert isinstance(data, dict) and "message" in data, "Ожидается JSON с полем 'message'"
-                
-                if data.get("message") in success_states:
-                    return data
-                
-                # Проверяем промежуточные состояния
-                valid_states = success_states + ["updating", "processing", "PENDING", "IN_PROGRESS"]
-                assert data.get("message") in valid_states, f"Неожиданное состояние: {data}"
-                
-                consecutive_failures = 0  # Сбрасываем счетчик при успешном запросе
-                time.sleep(API_TIMEOUTS['STATUS_INTERVAL'])
-                
-            except Exception as e:
-                consecutive_failures += 1
-                print(f"Ошибка при проверке статуса (попытка {attempt + 1}): {e}")
-                
-                if consecutive_failures >= max_consecutive_failures:
-                    raise TimeoutError(f"Слишком много последовательных ошибок: {consecutive_failures}")
-                
-                time.sleep(API_TIMEOUTS['STATUS_INTERVAL'])
-        
-        raise TimeoutError(f"Операция не завершилась за {max_attempts} попыток")
+        if timeout is None:
+            timeout = API_TIMEOUTS['STATUS_CHECK']
+        valid_states = success_states + self.PROGRESS_STATES
+
+        def is_complete(data: Dict) -> bool:
+            # Неожиданное состояние считается ошибкой проверки, как и сетевые ошибки
+            assert data.get("message") in valid_states, f"Неожиданное состояние: {data}"
+            return data.get("message") in success_states
+
+        try:
+            return self.waiter.wait(
+                lambda: self._fetch_status(endpoint),
+                is_complete,
+                timeout=timeout,
+                description=endpoint,
+            )
+        except WaitTimeout as e:
+            raise TimeoutError(f"Операция не завершилась: {e}") from e
 
 
 class ManagerConfigClient:
@@ -329,9 +345,9 @@ def manager_config_client(api_client, api_headers) -> ManagerConfigClient:
 
 
 @pytest.fixture(scope="function") 
-def status_poller(api_client, api_headers) -> StatusPoller:
+def status_poller(api_client, api_headers, status_waiter) -> StatusPoller:
     """Утилита для опроса статусов операций."""
-    return StatusPoller(api_client, api_headers)
+    return StatusPoller(api_client, api_headers, status_waiter)
 
 
 # Основные параметры для тестирования API
@@ -705,7 +721,6 @@ def test_manager_config_post_with_valid_zip_restores_successfully(api_client, ap
     
     try:
         # Act - POST запрос зависает, поэтому используем короткий таймаут и сразу проверяем статус
-        import time
         
         # Запускаем POST запрос в фоне с очень коротким таймаутом
         print("Отправка POST запроса...")
@@ -718,9 +733,9 @@ def test_manager_config_post_with_valid_zip_restores_successfully(api_client, ap
             print(f"POST запрос завершился с ошибкой (ожидаемо): {type(e).__name__}")
             # Это ожидаемое поведение - POST зависает, но операция запускается
         
-        # Даем серверу время на обработку файла
+        # Ждём, пока сервер начнёт обработку файла (статус уйдёт из OK)
         print("Ожидание начала обработки конфигурации...")
-        time.sleep(10)
+        status_poller.wait_started("/manager/restoreConfigStatus", success_states=["OK"])
         
         # Assert - проверяем статус восстановления
         print("Проверка статуса восстановления...")
@@ -755,7 +770,6 @@ def test_manager_config_post_with_agent_verification(api_client, api_headers, st
     
     try:
         # Act - POST запрос зависает, поэтому используем короткий таймаут и сразу проверяем статус
-        import time
         
         # Запускаем POST запрос в фоне с очень коротким таймаутом
         print("Отправка POST запроса...")
@@ -768,9 +782,9 @@ def test_manager_config_post_with_agent_verification(api_client, api_headers, st
             print(f"POST запрос завершился с ошибкой (ожидаемо): {type(e).__name__}")
             # Это ожидаемое поведение - POST зависает, но операция запускается
         
-        # Даем серверу время на обработку файла
+        # Ждём, пока сервер начнёт обработку файла (статус уйдёт из OK)
         print("Ожидание начала обработки конфигурации...")
-        time.sleep(10)
+        status_poller.wait_started("/manager/restoreConfigStatus", success_states=["OK"])
         
         # Ожидание завершения операции
         print("Проверка статуса восстановления...")
@@ -2,6 +2,7 @@ import json
 import os
 import pytest
 from qa_constants import SERVICES
+from services.schema_validator import assert_schema
 try:
     from services.auth_utils import login
 except Exception:
@@ -86,25 +87,6 @@ def _get_auth_token_for_agent() -> str:
     except Exception as e:
         pytest.fail(f"Не удалось получить токен: {e}")
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных по схеме"""
-    if schema.get("type") == "object":
-        assert isinstance(obj, dict), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "string":
-        assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-    elif schema.get("type") == "number":
-        assert isinstance(obj, (int, float)), f"Expected number, got {type(obj)}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, list), f"Expected array, got {type(obj)}"
-        for item in obj:
-            if "items" in schema:
-                _check_types_recursive(item, schema["items"])
-
 def test_manager_reboot_unauthorized(api_client, api_base_url, attach_curl_on_fail):
     """
     Тест попытки перезапуска системы без токена аутентификации.
@@ -186,7 +168,7 @@ def test_manager_reboot_success(api_client, api_base_url, auth_token, attach_cur
     if response.content:
         try:
             response_data = response.json()
-            _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
         except json.JSONDecodeError:
             # Если ответ не JSON, это нормально для статуса 204
             pass
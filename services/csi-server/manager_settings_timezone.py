@@ -2,6 +2,7 @@
 import json
 import pytest
 from qa_constants import SERVICES
+from services.schema_validator import assert_schema
 
 ENDPOINT = "/manager/settings/timezone"
 
@@ -57,7 +58,6 @@ def _validate_object(obj, properties: dict, prefix: str = "root"):
             _check_type(f"{prefix}.{key}", obj[key], prop)
 
 
-
 # ---------- ПАРАМЕТРИЗАЦИЯ ----------
 # 30 осмысленных кейсов для GET запроса с различными query параметрами
 BASE_PARAMS = [
@@ -242,38 +242,6 @@ def test_post_format_errors(api_client, auth_token, format_case, attach_curl_on_
 
 # ===== ДОБАВЛЕНО: ТЕСТЫ ТОЛЬКО ДЛЯ POST ПО R5 =====
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных по схеме (расширение под тип null)."""
-    if schema.get("type") == "object":
-        assert isinstance(obj, dict), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, list) and not isinstance(obj, str), f"Expected array, got {type(obj)}"
-        item_schema = schema.get("items")
-        if isinstance(item_schema, list):
-            for item, sch in zip(obj, item_schema):
-                _check_types_recursive(item, sch)
-        elif item_schema is not None:
-            for item in obj:
-                _check_types_recursive(item, item_schema)
-    else:
-        t = schema.get("type")
-        if t == "string":
-            assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-        elif t == "integer":
-            assert isinstance(obj, int), f"Expected integer, got {type(obj)}"
-        elif t == "number":
-            assert isinstance(obj, (int, float)) and not isinstance(obj, bool), f"Expected number, got {type(obj)}"
-        elif t == "boolean":
-            assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-        elif t == "null":
-            assert obj is None, f"Expected null, got {type(obj)}"
-
-
 # Позитивные кейсы (до 15), строго POST
 VALID_TZ_CASES = [
     pytest.param({"data": "UTC"}, id="tz-UTC"),
@@ -304,7 +272,7 @@ def test_post_timezone_positive(api_client, auth_token, api_base_url, payload, a
 
         # Валидируем структуру ответа по SUCCESS_RESPONSE_SCHEMA
         data = r.json()
-        _check_types_recursive(data, SUCCESS_RESPONSE_SCHEMA)
+        assert_schema(data, SUCCESS_RESPONSE_SCHEMA, strict=True)
         
         # Дополнительная проверка через агента для успешных запросов
         timezone_value = payload.get("data", "unknown")
@@ -1,13 +1,8 @@
 import json
 import pytest
 import uuid
+from services.schema_validator import assert_schema
 
-# Между тестами в этом модуле делаем паузу 3 секунды, чтобы разгрузить backend
-@pytest.fixture(autouse=True)
-def _delay_between_uploader_password_tests():
-    yield
-    import time
-    time.sleep(3)
 
 # Константы для тестируемого эндпоинта и схемы успешного ответа
 ENDPOINT = "/manager/uploaderPassword"
@@ -22,25 +17,6 @@ SUCCESS_RESPONSE_SCHEMA = {
 }
 
 
-def _check_types_recursive(obj, schema):
-    if schema.get("type") == "object":
-        assert isinstance(obj, dict), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "string":
-        assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-    elif schema.get("type") == "number":
-        assert isinstance(obj, (int, float)), f"Expected number, got {type(obj)}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, list), f"Expected array, got {type(obj)}"
-        for item in obj:
-            if "items" in schema:
-                _check_types_recursive(item, schema["items"])
-
-
 def _print_validation(step: str, success: bool, details: str = ""):
     """
     Выводит результат валидации шага проверки.
@@ -313,8 +289,7 @@ def test_manager_uploader_password_cases(api_client, api_base_url, auth_token, a
         # Валидация схемы при ответе 200 с телом
         if response.status_code == 200 and response.content:
             data = response.json()
-            _check_types_recursive(data, SUCCESS_RESPONSE_SCHEMA)
-
+            assert_schema(data, SUCCESS_RESPONSE_SCHEMA)
 
 
 # ---------------------------- ДОПОЛНИТЕЛЬНЫЕ ТЕСТЫ ----------------------------
@@ -446,7 +421,7 @@ def test_manager_uploader_password_positive(api_client, api_base_url, auth_token
 
         if response.status_code == 200 and response.content:
             data = response.json()
-            _check_types_recursive(data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(data, SUCCESS_RESPONSE_SCHEMA)
 
         # Дополнительная проверка через агента только для успешных кейсов (статус 204)
         if response.status_code == 204 and case.get("body"):
@@ -582,5 +557,5 @@ def test_manager_uploader_password_negative(api_client, api_base_url, auth_token
 
         if response.status_code == 200 and response.content:
             data = response.json()
-            _check_types_recursive(data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(data, SUCCESS_RESPONSE_SCHEMA)
 
@@ -1,5 +1,6 @@
 import pytest
 import warnings
+from services.schema_validator import assert_schema
 
 # ВЕРХ ФАЙЛА: обязательные константы
 ENDPOINT = "/notifications/delete-all"
@@ -13,51 +14,8 @@ SUCCESS_RESPONSE_SCHEMA = {
 
 
 # ----- УТИЛИТЫ ДЛЯ ВАЛИДАЦИИ СХЕМЫ (R6) -----
-def _check_types_recursive(obj, schema):
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Value {obj} does not match anyOf {schema['anyOf']}"
-        return
-
-    s_type = schema.get("type")
-    if s_type == "object":
-        assert isinstance(obj, dict), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif s_type == "array":
-        assert isinstance(obj, list) and not isinstance(obj, str), f"Expected array, got {type(obj)}"
-        items_schema = schema.get("items")
-        if isinstance(items_schema, list):
-            for item, item_schema in zip(obj, items_schema):
-                _check_types_recursive(item, item_schema)
-        elif items_schema is not None:
-            for item in obj:
-                _check_types_recursive(item, items_schema)
-    else:
-        if s_type == "string":
-            assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-        elif s_type == "integer":
-            assert isinstance(obj, int), f"Expected integer, got {type(obj)}"
-        elif s_type == "number":
-            assert isinstance(obj, (int, float)), f"Expected number, got {type(obj)}"
-        elif s_type == "boolean":
-            assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-        elif s_type == "null":
-            assert obj is None, f"Expected null, got {type(obj)}"
-
-
-def _try_type(obj, schema):
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
 def _validate_success_response(data):
-    _check_types_recursive(data, SUCCESS_RESPONSE_SCHEMA)
+    assert_schema(data, SUCCESS_RESPONSE_SCHEMA)
 
 
 # ----- КЕЙСЫ: АУТЕНТИФИКАЦИОННЫЕ ОШИБКИ → 401 -----
@@ -8,7 +8,7 @@
 """
 import pytest
 import json
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 
 ENDPOINT = "/security-settings/password-requirements"
 
@@ -43,43 +43,6 @@ PARAMS = [
 ]
 
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных в объекте на соответствие схеме."""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Тип {type(obj)} не соответствует ни одной из схем в anyOf"
-        return
-
-    schema_type = schema.get("type")
-    if schema_type == "object":
-        assert isinstance(obj, Mapping), f"Ожидался объект (dict), получено: {type(obj).__name__}"
-        for key, prop_schema in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop_schema)
-        for required_key in schema.get("required", []):
-            assert required_key in obj, f"Обязательное поле '{required_key}' отсутствует в объекте"
-    elif schema_type == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Ожидался список (list/tuple), получено: {type(obj).__name__}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    elif schema_type == "string":
-        assert isinstance(obj, str), f"Поле должно быть строкой (string), получено: {type(obj).__name__}"
-    elif schema_type == "integer":
-        assert isinstance(obj, int), f"Поле должно быть целым числом (integer), получено: {type(obj).__name__}"
-    elif schema_type == "boolean":
-        assert isinstance(obj, bool), f"Поле должно быть булевым (boolean), получено: {type(obj).__name__}"
-    elif schema_type == "null":
-        assert obj is None, "Поле должно быть null"
-
-
-def _try_type(obj, schema):
-    """Вспомогательная функция для проверки типа в 'anyOf'."""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
 def _format_curl_command(api_client, endpoint, params, auth_token=None):
     """Формирует и возвращает cURL-строку для воспроизведения запроса."""
     base_url = getattr(api_client, "base_url", "http://127.0.0.1")
@@ -104,9 +67,6 @@ def _format_curl_command(api_client, endpoint, params, auth_token=None):
     return curl_command
 
 
-
-
-
 @pytest.mark.parametrize("params, expected_status", PARAMS)
 def test_security_settings_password_requirements_parametrized(api_client, auth_token, params, expected_status):
     """
@@ -126,7 +86,7 @@ def test_security_settings_password_requirements_parametrized(api_client, auth_t
         if response.status_code == 200:
             data = response.json()
             assert isinstance(data, dict), f"Тело ответа не является объектом JSON, получено: {type(data).__name__}"
-            _check_types_recursive(data, PASSWORD_REQUIREMENTS_SCHEMA)
+            assert_schema(data, PASSWORD_REQUIREMENTS_SCHEMA)
 
     except (AssertionError, json.JSONDecodeError, Exception) as e:
         curl_command = _format_curl_command(api_client, ENDPOINT, params, auth_token)
@@ -158,7 +118,7 @@ def test_security_settings_password_requirements_basic(api_client, auth_token):
 
         data = response.json()
         assert isinstance(data, dict), f"Тело ответа не является объектом JSON, получено: {type(data).__name__}"
-        _check_types_recursive(data, PASSWORD_REQUIREMENTS_SCHEMA)
+        assert_schema(data, PASSWORD_REQUIREMENTS_SCHEMA)
 
     except (AssertionError, json.JSONDecodeError, Exception) as e:
         curl_command = _format_curl_command(api_client, ENDPOINT, {}, auth_token)
@@ -173,4 +133,3 @@ def test_security_settings_password_requirements_basic(api_client, auth_token):
         pytest.fail(error_message, pytrace=False)
 
 
-
@@ -3,6 +3,7 @@ import json
 import pytest
 import urllib.parse
 from qa_constants import SERVICES
+from services.status_waiter import WaitTimeout
 
 ENDPOINT = "/service/environment/{stack}/{service}"
 
@@ -33,6 +34,23 @@ SUCCESS_RESPONSE_SCHEMA = {
 def _url(base_path: str, stack: str, service: str) -> str:
     return f"{base_path}{ENDPOINT.format(stack=stack, service=service)}"
 
+
+def _wait_for_variable(status_waiter, api_client, url, headers, name, expected, timeout):
+    """
+    GET переменных окружения, пока сервис после перезапуска не вернёт name == expected.
+    По истечении timeout возвращает последний ответ (сервис может ещё перезапускаться).
+    """
+    def applied(r):
+        return r.status_code == 200 and r.json().get(name) == expected
+
+    try:
+        return status_waiter.wait(lambda: api_client.get(url, headers=headers), applied,
+                                  timeout=timeout, description=f"{name}={expected}")
+    except WaitTimeout as e:
+        if e.last_value is not None:
+            return e.last_value
+        return api_client.get(url, headers=headers)
+
 def _check_type(name, value, spec):
     t = spec.get("type")
     if t == "string":
@@ -671,7 +689,7 @@ def test_set_environment_variable(api_client, auth_token, api_base_url, attach_c
         assert isinstance(data["result"], str), f"Поле 'result' должно быть строкой"
         assert data["result"] == "envvars are set, restarting the system", f"Ожидается 'envvars are set, restarting the system', получено '{data['result']}'"
 
-def test_verify_environment_changes(api_client, auth_token, api_base_url, attach_curl_on_fail):
+def test_verify_environment_changes(api_client, auth_token, api_base_url, attach_curl_on_fail, status_waiter):
     """Шаг 4: Верификация изменений переменных окружения"""
     url = f"{api_base_url}{ENDPOINT.format(stack='ngfw', service='ids')}"
     headers = {"x-access-token": auth_token}
@@ -687,12 +705,8 @@ def test_verify_environment_changes(api_client, auth_token, api_base_url, attach
         r = api_client.post(url, json=test_data, headers=headers)
         assert r.status_code == 200, f"Ожидается 200; получено {r.status_code}"
         
-        # Ждем некоторое время для перезапуска системы
-        import time
-        time.sleep(5)
-        
-        # Проверяем, что переменная была установлена
-        r = api_client.get(url, headers=headers)
+        # Ждём перезапуска системы: до 5 секунд, пока переменная не применится
+        r = _wait_for_variable(status_waiter, api_client, url, headers, "FILE_ALARMS_LOG_LEVEL", "Warning", timeout=5)
         assert r.status_code in (200, 204, 400), f"Ожидается 200, 204 или 400; получено {r.status_code}"
         
         if r.status_code == 204:
@@ -734,7 +748,7 @@ def test_restore_original_environment(api_client, auth_token, api_base_url, atta
         assert isinstance(data["result"], str), f"Поле 'result' должно быть строкой"
         assert data["result"] == "envvars are set, restarting the system", f"Ожидается 'envvars are set, restarting the system', получено '{data['result']}'"
 
-def test_environment_variable_workflow(api_client, auth_token, api_base_url, attach_curl_on_fail):
+def test_environment_variable_workflow(api_client, auth_token, api_base_url, attach_curl_on_fail, status_waiter):
     """Полный workflow тест: получение -> изменение -> верификация -> восстановление"""
     url = f"{api_base_url}{ENDPOINT.format(stack='ngfw', service='ids')}"
     headers = {"x-access-token": auth_token}
@@ -761,12 +775,8 @@ def test_environment_variable_workflow(api_client, auth_token, api_base_url, att
         assert "result" in data, f"Ответ должен содержать поле 'result'"
         assert data["result"] == "envvars are set, restarting the system", f"Ожидается 'envvars are set, restarting the system'"
         
-        # Шаг 3: Ждем перезапуска системы
-        import time
-        time.sleep(10)
-        
-        # Шаг 4: Проверяем изменения
-        r = api_client.get(url, headers=headers)
+        # Шаг 3-4: Ждём перезапуска системы (до 10 секунд) и проверяем изменения
+        r = _wait_for_variable(status_waiter, api_client, url, headers, "FILE_ALARMS_LOG_LEVEL", "Error", timeout=10)
         if r.status_code == 200:
             updated_vars = r.json()
             assert isinstance(updated_vars, dict), f"Обновленные переменные должны быть объектом"
@@ -1,6 +1,7 @@
 import json
 import pytest
 from qa_constants import SERVICES
+from services.schema_validator import assert_schema
 
 ENDPOINT = "/system-report/check"
 
@@ -16,25 +17,6 @@ SUCCESS_RESPONSE_SCHEMA = {
     "required": ["status"]
 }
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных по схеме"""
-    if schema.get("type") == "object":
-        assert isinstance(obj, dict), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "string":
-        assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-    elif schema.get("type") == "number":
-        assert isinstance(obj, (int, float)), f"Expected number, got {type(obj)}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, list), f"Expected array, got {type(obj)}"
-        for item in obj:
-            if "items" in schema:
-                _check_types_recursive(item, schema["items"])
-
 @pytest.mark.parametrize("auth_method,headers,expected_status", [
     # 1. С x-access-token заголовком (основной метод)
     ("x_access_token", {"x-access-token": "token_placeholder"}, [200]),
@@ -82,7 +64,7 @@ def test_system_report_check_authentication_methods(
         # Если ответ успешный и содержит JSON, валидируем схему
         if response.status_code == 200 and response.content:
             response_data = response.json()
-            _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 @pytest.mark.parametrize("invalid_token", [
     "invalid_token_123",
@@ -210,7 +192,7 @@ def test_system_report_check_with_payload_data(
             
             if response.content:
                 response_data = response.json()
-                _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+                assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_empty_payload(
     api_client, 
@@ -234,7 +216,7 @@ def test_system_report_check_empty_payload(
         
         if response.content:
             response_data = response.json()
-            _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_large_payload(
     api_client, 
@@ -276,7 +258,7 @@ def test_system_report_check_large_payload(
         
         if response.content:
             response_data = response.json()
-            _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_malformed_json(
     api_client, 
@@ -335,7 +317,7 @@ def test_system_report_check_unicode_payload(
         
         if response.content:
             response_data = response.json()
-            _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_special_characters(
     api_client, 
@@ -365,7 +347,7 @@ def test_system_report_check_special_characters(
         
         if response.content:
             response_data = response.json()
-            _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_numeric_values(
     api_client, 
@@ -399,7 +381,7 @@ def test_system_report_check_numeric_values(
             
             if response.content:
                 response_data = response.json()
-                _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+                assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_boolean_values(
     api_client, 
@@ -431,7 +413,7 @@ def test_system_report_check_boolean_values(
             
             if response.content:
                 response_data = response.json()
-                _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+                assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_array_values(
     api_client, 
@@ -464,7 +446,7 @@ def test_system_report_check_array_values(
             
             if response.content:
                 response_data = response.json()
-                _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+                assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_nested_objects(
     api_client, 
@@ -496,7 +478,7 @@ def test_system_report_check_nested_objects(
             
             if response.content:
                 response_data = response.json()
-                _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+                assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_null_values(
     api_client, 
@@ -528,7 +510,7 @@ def test_system_report_check_null_values(
             
             if response.content:
                 response_data = response.json()
-                _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+                assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_very_long_strings(
     api_client, 
@@ -561,7 +543,7 @@ def test_system_report_check_very_long_strings(
             
             if response.status_code == 200 and response.content:
                 response_data = response.json()
-                _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+                assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_very_large_numbers(
     api_client, 
@@ -593,7 +575,7 @@ def test_system_report_check_very_large_numbers(
             
             if response.content:
                 response_data = response.json()
-                _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+                assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_date_formats(
     api_client, 
@@ -626,7 +608,7 @@ def test_system_report_check_date_formats(
             
             if response.content:
                 response_data = response.json()
-                _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+                assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_duplicate_keys(
     api_client, 
@@ -654,7 +636,7 @@ def test_system_report_check_duplicate_keys(
         
         if response.status_code == 200 and response.content:
             response_data = response.json()
-            _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_extra_headers(
     api_client, 
@@ -683,7 +665,7 @@ def test_system_report_check_extra_headers(
         
         if response.content:
             response_data = response.json()
-            _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_response_time(
     api_client, 
@@ -718,7 +700,7 @@ def test_system_report_check_response_time(
         
         if response.content:
             response_data = response.json()
-            _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
 def test_system_report_check_concurrent_requests(
     api_client, 
@@ -793,7 +775,7 @@ def test_system_report_check_positive_cases(api_client, api_base_url, auth_token
         print("Validation: main API returned 200 OK — proceeding to agent verification")
         if response.content:
             data = response.json()
-            _check_types_recursive(data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(data, SUCCESS_RESPONSE_SCHEMA)
             print("Validation: response schema OK — continue")
 
         # Дополнительная проверка через агента: отправляем то же тело, что и в основной API
@@ -855,7 +837,7 @@ def test_system_report_check_more_positive_cases(api_client, api_base_url, auth_
         print("Validation: main API returned 200 OK — proceeding to agent verification")
         if response.content:
             data = response.json()
-            _check_types_recursive(data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(data, SUCCESS_RESPONSE_SCHEMA)
             print("Validation: response schema OK — continue")
 
         # Дополнительная проверка через агента: отправляем то же тело, что и в основной API
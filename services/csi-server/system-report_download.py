@@ -4,6 +4,7 @@ Tests for system-report download API endpoint.
 import pytest
 import requests
 from qa_constants import SERVICES
+from services.schema_validator import assert_schema
 
 
 ENDPOINT = "/system-report/download"
@@ -68,8 +69,6 @@ def test_system_report_download_success(api_client, auth_token, attach_curl_on_f
         )
 
 
-
-
 @pytest.mark.parametrize("test_case", [
     {
         "name": "missing_auth_token",
@@ -147,34 +146,8 @@ def test_system_report_download_method_not_allowed(api_client, attach_curl_on_fa
     )
 
 
-
-
 # -------------------- Helpers and additional POST-only tests (add-only) --------------------
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных по упрощенной схеме."""
-    if isinstance(schema, dict) and schema.get("type") == "object":
-        assert isinstance(obj, dict), f"Expected object, got {type(obj)}"
-        properties = schema.get("properties", {})
-        for key, prop_schema in properties.items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop_schema)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-        return
-    if isinstance(schema, dict) and schema.get("type") == "array":
-        assert isinstance(obj, list), f"Expected array, got {type(obj)}"
-        item_schema = schema.get("items")
-        if item_schema is not None:
-            for item in obj:
-                _check_types_recursive(item, item_schema)
-        return
-    # Листовые типы: поддерживаем базовые python-типы
-    expected_type = schema if not isinstance(schema, dict) else schema.get("py_type")
-    if expected_type is not None:
-        assert isinstance(obj, expected_type), f"Expected {expected_type.__name__}, got {type(obj).__name__}"
-
-
 # Схема метаданных ответа (заголовки и бинарные данные) для POST-скачивания
 RESPONSE_META_SCHEMA = {
     "type": "object",
@@ -240,7 +213,7 @@ def test_system_report_download_positive_cases(
         "content_length": len(response.content),
         "binary_data": response.content,
     }
-    _check_types_recursive(response_meta, RESPONSE_META_SCHEMA)
+    assert_schema(response_meta, RESPONSE_META_SCHEMA)
 
 
 @pytest.mark.parametrize(
@@ -1,8 +1,11 @@
 import json
 import pytest
 from qa_constants import SERVICES
+from services.schema_validator import assert_schema
+from services.status_waiter import WaitTimeout
 
 ENDPOINT = "/system-report/generate"
+REPORT_GENERATION_TIMEOUT = 900  # 15 минут
 
 # Схема ответа для успешного выполнения
 SUCCESS_RESPONSE_SCHEMA = {
@@ -13,31 +16,13 @@ SUCCESS_RESPONSE_SCHEMA = {
     "required": ["status"]
 }
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных по схеме"""
-    if schema.get("type") == "object":
-        assert isinstance(obj, dict), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "string":
-        assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-    elif schema.get("type") == "number":
-        assert isinstance(obj, (int, float)), f"Expected number, got {type(obj)}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, list), f"Expected array, got {type(obj)}"
-        for item in obj:
-            if "items" in schema:
-                _check_types_recursive(item, schema["items"])
-
 def test_system_report_generate_positive_case(
     api_client,
     api_base_url,
     auth_token,
     attach_curl_on_fail,
-    agent_verification # Добавляем фикстуру agent_verification
+    agent_verification, # Добавляем фикстуру agent_verification
+    status_waiter
 ):
     """
     Позитивный тестовый случай для POST /system-report/generate без тела запроса,
@@ -52,18 +37,17 @@ def test_system_report_generate_positive_case(
     check_response = api_client.post(check_url, headers=headers)
     check_data = check_response.json()
     
-    import time
     if check_data.get("status") == "GENERATION_IN_PROGRESS":
         # Опрашиваем до тех пор, пока не станет GENERATED
-        max_attempts = 180  # 15 минут при 5 сек задержке
-        attempt = 0
-        while attempt < max_attempts and check_data.get("status") != "GENERATED":
-            time.sleep(5)
-            check_response = api_client.post(check_url, headers=headers)
-            check_data = check_response.json()
-            attempt += 1
-        if check_data.get("status") != "GENERATED":
-            pytest.fail("Timeout: Status did not become GENERATED within 15 minutes")
+        try:
+            status_waiter.wait(
+                lambda: api_client.post(check_url, headers=headers).json(),
+                lambda data: data.get("status") == "GENERATED",
+                timeout=REPORT_GENERATION_TIMEOUT,
+                description="system report generation",
+            )
+        except WaitTimeout as e:
+            pytest.fail(f"Timeout: Status did not become GENERATED within 15 minutes ({e})")
 
     # 1) Выполняем подготовительный запрос к агенту (без тела)
     print("Validation: Выполняем подготовительный запрос к агенту по пути '/system-report/generate/prepare' без тела")
@@ -87,7 +71,7 @@ def test_system_report_generate_positive_case(
 
     if response.content:
         response_data = response.json()
-        _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+        assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA)
 
     # 3) Запрос агенту на проверку выполнения эндпоинта (без тела)
     print("Validation: Выполняем запрос к агенту на проверку эндпоинта '/system-report/generate' без тела")
@@ -11,7 +11,7 @@
 """
 import pytest
 import json
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 from datetime import datetime
 import re
 
@@ -136,35 +136,6 @@ def _validate_commit_hash(hash_string):
         raise AssertionError(f"Невалидный SHA-1 хеш: {hash_string}")
 
 
-def _check_types_recursive(obj, schema):
-    """
-    Рекурсивно проверяет соответствие объекта схеме JSON.
-    Поддерживает вложенные объекты, массивы и примитивные типы.
-    """
-    schema_type = schema.get("type")
-    if schema_type == "object":
-        assert isinstance(obj, Mapping), f"Ожидался объект (dict), получено: {type(obj).__name__}"
-        
-        # Обычная проверка для объектов
-        for key, prop_schema in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop_schema)
-        for required_key in schema.get("required", []):
-            assert required_key in obj, f"Обязательное поле '{required_key}' отсутствует в объекте"
-    elif schema_type == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Ожидался список (list/tuple), получено: {type(obj).__name__}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    elif schema_type == "string":
-        assert isinstance(obj, str), f"Поле должно быть строкой (string), получено: {type(obj).__name__}"
-    elif schema_type == "integer":
-        assert isinstance(obj, int), f"Поле должно быть целым числом (integer), получено: {type(obj).__name__}"
-    elif schema_type == "boolean":
-        assert isinstance(obj, bool), f"Поле должно быть булевым (boolean), получено: {type(obj).__name__}"
-    elif schema_type == "null":
-        assert obj is None, "Поле должно быть null"
-
-
 def _validate_update_images_response(data):
     """Дополнительная валидация специфичная для update/images/current."""
     # Проверка дат
@@ -250,7 +221,7 @@ def test_update_images_current_parametrized(api_client, auth_token, params, expe
             assert isinstance(data, dict), f"Тело ответа не является объектом JSON, получено: {type(data).__name__}"
 
             # Проверяем структуру ответа
-            _check_types_recursive(data, UPDATE_IMAGES_CURRENT_SCHEMA)
+            assert_schema(data, UPDATE_IMAGES_CURRENT_SCHEMA)
 
             # Дополнительная валидация специфичная для update/images/current
             _validate_update_images_response(data)
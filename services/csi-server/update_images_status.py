@@ -11,7 +11,7 @@
 """
 import pytest
 import json
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 from datetime import datetime
 import re
 
@@ -177,43 +177,6 @@ def _validate_commit_hash(hash_string):
         pytest.fail(f"Неверный формат хеша коммита: {hash_string}. Ожидается SHA-1 хеш (40 символов)")
 
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных в объекте на соответствие схеме."""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Тип {type(obj)} не соответствует ни одной из схем в anyOf"
-        return
-
-    schema_type = schema.get("type")
-    if schema_type == "object":
-        assert isinstance(obj, Mapping), f"Ожидался объект (dict), получено: {type(obj).__name__}"
-        for key, prop_schema in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop_schema)
-        for required_key in schema.get("required", []):
-            assert required_key in obj, f"Обязательное поле '{required_key}' отсутствует в объекте"
-    elif schema_type == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Ожидался список (list/tuple), получено: {type(obj).__name__}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    elif schema_type == "string":
-        assert isinstance(obj, str), f"Поле должно быть строкой (string), получено: {type(obj).__name__}"
-    elif schema_type == "integer":
-        assert isinstance(obj, int), f"Поле должно быть целым числом (integer), получено: {type(obj).__name__}"
-    elif schema_type == "boolean":
-        assert isinstance(obj, bool), f"Поле должно быть булевым (boolean), получено: {type(obj).__name__}"
-    elif schema_type == "null":
-        assert obj is None, "Поле должно быть null"
-
-
-def _try_type(obj, schema):
-    """Вспомогательная функция для проверки типа в 'anyOf'."""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
 def _validate_update_images_status_response(data):
     """Валидирует ответ API update/images/status."""
     # Проверяем основную структуру
@@ -224,7 +187,7 @@ def _validate_update_images_status_response(data):
     # Проверяем поле latest (может быть null)
     if data["latest"] is not None:
         # Если latest не null, проверяем его структуру
-        _check_types_recursive(data["latest"], UPDATE_IMAGES_STATUS_SCHEMA["properties"]["current"])
+        assert_schema(data["latest"], UPDATE_IMAGES_STATUS_SCHEMA["properties"]["current"])
     
     # Проверяем поле current
     current = data["current"]
@@ -319,7 +282,7 @@ def test_update_images_status_parametrized(api_client, auth_token, params, expec
         if response.status_code == 200:
             data = response.json()
             # Проверяем основную структуру ответа
-            _check_types_recursive(data, UPDATE_IMAGES_STATUS_SCHEMA)
+            assert_schema(data, UPDATE_IMAGES_STATUS_SCHEMA)
             # Дополнительная валидация специфичных полей
             _validate_update_images_status_response(data)
             
@@ -1,6 +1,7 @@
 import json
 import pytest
 from qa_constants import SERVICES
+from services.schema_validator import assert_schema
 
 ENDPOINT = "/users"
 
@@ -84,54 +85,13 @@ response_schemas = {
 }
 
 # ----- ФУНКЦИИ ВАЛИДАЦИИ СХЕМ -----
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных по схеме"""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Value {obj} does not match anyOf {schema['anyOf']}"
-        return
-    
-    if schema.get("type") == "object":
-        assert isinstance(obj, dict), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, list) and not isinstance(obj, str), f"Expected array, got {type(obj)}"
-        if "items" in schema and isinstance(schema["items"], list):
-            for idx, (item, item_schema) in enumerate(zip(obj, schema["items"])):
-                _check_types_recursive(item, item_schema)
-        else:
-            for item in obj:
-                _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int), f"Expected integer, got {type(obj)}"
-        elif schema.get("type") == "number":
-            assert isinstance(obj, (int, float)), f"Expected number, got {type(obj)}"
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-        elif schema.get("type") == "null":
-            assert obj is None, f"Expected null, got {type(obj)}"
-
-def _try_type(obj, schema):
-    """Пытается проверить тип объекта по схеме, возвращает True/False"""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
 def _validate_response_schema(data, method):
     """Валидирует ответ API по схеме для указанного метода"""
     schema = response_schemas.get(method)
     if not schema:
         pytest.fail(f"Схема для метода {method} не найдена")
     
-    _check_types_recursive(data, schema)
+    assert_schema(data, schema)
 
 # ----- ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ -----
 
@@ -390,7 +350,6 @@ def test_create_user_minimal(api_client, auth_token, api_base_url, payload, atta
             pytest.fail(f"API вернул неожиданный статус: {response.status_code}")
 
 
-
 # Кейс 2: Пользователь с блокированным статусом
 @pytest.mark.parametrize("payload", [
     {
@@ -1,6 +1,6 @@
 import json
 import pytest
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 from services.qa_constants import SERVICES
 
 ENDPOINT = "/users/count"
@@ -10,43 +10,6 @@ SUCCESS_RESPONSE_SCHEMA = {
     "type": "integer"
 }
 
-def _check_types_recursive(obj, schema):
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Value {obj} does not match anyOf {schema['anyOf']}"
-        return
-    if schema.get("type") == "object":
-        assert isinstance(obj, Mapping), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Expected array, got {type(obj)}"
-        if "items" in schema and isinstance(schema["items"], list):
-            for idx, (item, item_schema) in enumerate(zip(obj, schema["items"])):
-                _check_types_recursive(item, item_schema)
-        else:
-            for item in obj:
-                _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int) and not isinstance(obj, bool), f"Expected integer, got {type(obj)}"
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-        elif schema.get("type") == "null":
-            assert obj is None, f"Expected null, got {type(obj)}"
-
-def _try_type(obj, schema):
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
 POSITIVE_CASES = [
     pytest.param({"use_auth_token": True}, None, "", 200, id="valid-token-basic"),
     pytest.param({"use_auth_token": True, "Accept": "application/json"}, None, "", 200, id="valid-token-accept-json"),
@@ -83,7 +46,7 @@ def test_get_users_count_positive(api_client, auth_token, attach_curl_on_fail, h
         response = api_client.get(full_endpoint, params=params, headers=headers)
         assert response.status_code == expected_status
         if expected_status == 200:
-            _check_types_recursive(response.json(), SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response.json(), SUCCESS_RESPONSE_SCHEMA, strict=True)
 
 @pytest.mark.parametrize("headers, params, endpoint_suffix, expected_status", NEGATIVE_CASES)
 def test_get_users_count_negative(api_client, attach_curl_on_fail, headers, params, endpoint_suffix, expected_status):
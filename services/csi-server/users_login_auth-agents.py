@@ -1,6 +1,6 @@
 import pytest
 import json
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 
 ENDPOINT = "/users/login/auth-agents"
 
@@ -16,45 +16,6 @@ SUCCESS_RESPONSE_SCHEMA = {
     }
 }
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных по схеме"""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Value {obj} does not match anyOf {schema['anyOf']}"
-        return
-    
-    if schema.get("type") == "object":
-        assert isinstance(obj, Mapping), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Expected array, got {type(obj)}"
-        if "items" in schema:
-            for item in obj:
-                _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int) and not isinstance(obj, bool), f"Expected integer, got {type(obj)}"
-        elif schema.get("type") == "number":
-            assert isinstance(obj, (int, float)) and not isinstance(obj, bool), f"Expected number, got {type(obj)}"
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-        elif schema.get("type") == "null":
-            assert obj is None, f"Expected null, got {type(obj)}"
-
-def _try_type(obj, schema):
-    """Пытается проверить тип объекта по схеме, возвращает True/False"""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
 POSITIVE_CASES = [
     pytest.param({}, None, "", 200, id="P01: basic-request"),
     pytest.param({"Accept": "application/json"}, None, "", 200, id="P02: accept-json"),
@@ -79,7 +40,7 @@ def test_get_auth_agents(api_client, attach_curl_on_fail, headers, params, endpo
         if expected_status == 200:
             response_data = response.json()
             assert isinstance(response_data, list), f"Response should be an array, got {type(response_data)}"
-            _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA, strict=True)
             # Дополнительная валидация - проверяем структуру каждого элемента
             for item in response_data:
                 assert "name" in item, f"Missing 'name' field in auth agent: {item}"
@@ -1,6 +1,7 @@
 import pytest
 import json
-from collections.abc import Mapping, Sequence
+from collections.abc import Mapping
+from services.schema_validator import assert_schema
 
 ENDPOINT = "/users/login/password-requirements"
 
@@ -22,45 +23,6 @@ SUCCESS_RESPONSE_SCHEMA = {
     "required": ["agent", "settings"]
 }
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивно проверяет типы данных по схеме"""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Value {obj} does not match anyOf {schema['anyOf']}"
-        return
-    
-    if schema.get("type") == "object":
-        assert isinstance(obj, Mapping), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Expected array, got {type(obj)}"
-        if "items" in schema:
-            for item in obj:
-                _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int) and not isinstance(obj, bool), f"Expected integer, got {type(obj)}"
-        elif schema.get("type") == "number":
-            assert isinstance(obj, (int, float)) and not isinstance(obj, bool), f"Expected number, got {type(obj)}"
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-        elif schema.get("type") == "null":
-            assert obj is None, f"Expected null, got {type(obj)}"
-
-def _try_type(obj, schema):
-    """Пытается проверить тип объекта по схеме, возвращает True/False"""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
 POSITIVE_CASES = [
     pytest.param({"use_auth_token": True}, None, "", 200, id="P01: valid-token-basic"),
     pytest.param({"use_auth_token": True, "Accept": "application/json"}, None, "", 200, id="P02: valid-token-accept-json"),
@@ -102,7 +64,7 @@ def test_get_password_requirements_positive(api_client, auth_token, attach_curl_
         if expected_status == 200:
             response_data = response.json()
             assert isinstance(response_data, Mapping), f"Response should be an object, got {type(response_data)}"
-            _check_types_recursive(response_data, SUCCESS_RESPONSE_SCHEMA)
+            assert_schema(response_data, SUCCESS_RESPONSE_SCHEMA, strict=True)
             # Дополнительная валидация - проверяем структуру ответа
             assert "agent" in response_data, f"Missing 'agent' field in response: {response_data}"
             assert "settings" in response_data, f"Missing 'settings' field in response: {response_data}"
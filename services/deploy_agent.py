@@ -3,13 +3,22 @@
 Утилита для автоматического развертывания mirada-agent на удаленном хосте.
 
 Функционал:
-- Копирование папки mirada-agent на указанный хост через SCP
+- Инкрементальная синхронизация (по умолчанию): дерево агента хэшируется в
+  манифест (путь -> sha256), манифест сравнивается с сохранённым на хосте
+  (.deploy-manifest.json), и одним SSH-соединением потоком tar передаются
+  только изменённые файлы; удалённые локально файлы удаляются на хосте,
+  настройка прав и проверка выполняются в том же соединении
+- Полное копирование папки mirada-agent через SCP (--sync scp)
+- Колеса зависимостей под Python хоста (wheelhouse/, кэш в ~/.cache/mirada-agent):
+  start.sh ставит зависимости из них без сети (--no-wheelhouse - не передавать)
 - Исключение служебных папок и кэшей
 - Проверка доступности SSH ключей
 
 Использование:
     python services/deploy_agent.py --mirada-host=192.168.1.100
     python services/deploy_agent.py --mirada-host=192.168.1.100 --verbose
+    python services/deploy_agent.py --mirada-host=192.168.1.100 --full       # передать все файлы
+    python services/deploy_agent.py --mirada-host=192.168.1.100 --sync scp   # прежнее копирование через SCP
 """
 
 import os
@@ -18,11 +27,17 @@ import subprocess
 import tempfile
 import shutil
 import argparse
+import fnmatch
+import hashlib
+import io
+import json
 import logging
+import shlex
+import tarfile
 import time
 import platform
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 # Настройка логирования
 logging.basicConfig(
@@ -80,15 +95,33 @@ class AgentDeployManager:
         '*.pid',
         'nohup.out',
     ]
+
+    # Манифест развернутых файлов на хосте: {относительный путь: sha256}
+    MANIFEST_NAME = ".deploy-manifest.json"
+    # Список файлов для удаления, передается в том же архиве
+    REMOVED_LIST_NAME = ".deploy-removed"
+    # Колеса зависимостей на хосте: start.sh ставит из них без сети
+    WHEELHOUSE_DIR = "wheelhouse"
+    # Локальный кэш колес: каталог на (версия Python хоста, архитектура, requirements.txt)
+    WHEELHOUSE_CACHE = Path.home() / ".cache" / "mirada-agent" / "wheelhouse"
     
-    def __init__(self, mirada_host: str):
+    def __init__(self, mirada_host: str, sync_mode: str = "incremental", full: bool = False,
+                 wheelhouse: bool = True):
         """
         Инициализация менеджера развертывания.
         
         Args:
             mirada_host: IP адрес или hostname Mirada хоста
+            sync_mode: "incremental" - передача изменённых файлов по манифесту, "scp" - полное копирование
+            full: в режиме incremental передать все файлы, не сверяясь с манифестом хоста
+            wheelhouse: передать колеса зависимостей для установки без сети
         """
         self.mirada_host = mirada_host
+        self.sync_mode = sync_mode
+        self.full = full
+        self.wheelhouse = wheelhouse
+        # Файлы вне дерева агента: {путь на хосте относительно агента: локальный путь}
+        self.extra_files: Dict[str, Path] = {}
         self.username = "codemaster"
         self.project_root = self._find_project_root()
         self.agent_source_path = self.project_root / "mirada-agent"
@@ -129,6 +162,10 @@ class AgentDeployManager:
             base_cmd.extend(['-o', 'LogLevel=ERROR'])
         else:
             base_cmd.extend(['-o', 'LogLevel=ERROR'])
+            # Одно TCP/SSH-соединение на все команды развертывания (мультиплексирование OpenSSH)
+            control_path = os.path.join(tempfile.gettempdir(), 'mirada-deploy-%C')
+            base_cmd.extend(['-o', 'ControlMaster=auto', '-o', f'ControlPath={control_path}',
+                             '-o', 'ControlPersist=60'])
         
         base_cmd.append(f'{self.username}@{self.mirada_host}')
         return base_cmd
@@ -229,6 +266,10 @@ class AgentDeployManager:
                 ignore=self._create_ignore_function()
             )
             
+            for relative_path, local_path in self.extra_files.items():
+                (target_dir / relative_path).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(local_path, target_dir / relative_path)
+            
             logger.info(f"Очищенная копия создана: {target_dir}")
             return target_dir
             
@@ -237,30 +278,22 @@ class AgentDeployManager:
             shutil.rmtree(temp_dir, ignore_errors=True)
             raise
     
+    def _is_excluded(self, name: str) -> bool:
+        """Проверяет, исключается ли файл или папка с таким именем."""
+        for pattern in self.EXCLUDE_PATTERNS:
+            if '*' in pattern:
+                # Обрабатываем wildcard паттерны
+                if fnmatch.fnmatch(name, pattern):
+                    return True
+            elif name == pattern:
+                # Точное совпадение (файл или директория)
+                return True
+        return False
+
     def _create_ignore_function(self):
         """Создает функцию для игнорирования файлов при копировании."""
         def ignore_patterns(directory, files):
-            ignored = []
-            for file in files:
-                file_path = Path(directory) / file
-                
-                # Проверяем каждый паттерн исключения
-                for pattern in self.EXCLUDE_PATTERNS:
-                    if '*' in pattern:
-                        # Обрабатываем wildcard паттерны
-                        import fnmatch
-                        if fnmatch.fnmatch(file, pattern):
-                            ignored.append(file)
-                            break
-                    else:
-                        # Точное совпадение
-                        if file == pattern:
-                            ignored.append(file)
-                            break
-                        # Или если это директория
-                        elif file_path.is_dir() and file == pattern:
-                            ignored.append(file)
-                            break
+            ignored = [file for file in files if self._is_excluded(file)]
             
             if ignored:
                 logger.debug(f"Исключены из {directory}: {ignored}")
@@ -268,7 +301,199 @@ class AgentDeployManager:
             return ignored
         
         return ignore_patterns
-    
+
+    # --- Колеса зависимостей ---
+
+    def _remote_python(self) -> Optional[Tuple[str, str]]:
+        """Версия python3 хоста (X.Y) и архитектура - для них скачиваются колеса."""
+        cmd = self._get_ssh_command() + [
+            'python3 -c "import platform, sys; print(\'%d.%d\' % sys.version_info[:2], platform.machine())"'
+        ]
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=30)
+        except subprocess.TimeoutExpired:
+            return None
+        parts = result.stdout.decode().split()
+        return (parts[0], parts[1]) if result.returncode == 0 and len(parts) == 2 else None
+
+    def _prepare_wheelhouse(self) -> None:
+        """
+        Скачивает колеса requirements.txt под Python хоста в локальный кэш и
+        добавляет их к передаваемым файлам (wheelhouse/). Ошибка не прерывает
+        развертывание: недостающие зависимости start.sh ставит из индекса пакетов.
+        """
+        remote = self._remote_python()
+        if remote is None:
+            logger.warning("Не удалось определить Python хоста, колеса зависимостей не передаются")
+            return
+        version, machine = remote
+        requirements = (self.agent_source_path / "requirements.txt").read_bytes()
+        key = hashlib.sha256(requirements + f"{version} {machine}".encode()).hexdigest()[:16]
+        cache_dir = self.WHEELHOUSE_CACHE / f"py{version}-{machine}-{key}"
+        complete_marker = cache_dir / ".complete"
+
+        if not complete_marker.exists():
+            logger.info(f"Скачивание колес зависимостей для Python {version} ({machine})...")
+            # По одному требованию: пакет без колеса под эту платформу не лишает колес остальные
+            failed = []
+            for requirement in requirements.decode().splitlines():
+                requirement = requirement.split('#', 1)[0].strip()
+                if not requirement:
+                    continue
+                cmd = [
+                    sys.executable, '-m', 'pip', 'download', '--disable-pip-version-check', '--quiet',
+                    requirement, '-d', str(cache_dir),
+                    '--only-binary=:all:', '--implementation', 'cp', '--python-version', version,
+                    '--platform', f'manylinux2014_{machine}', '--platform', f'manylinux_2_17_{machine}',
+                ]
+                try:
+                    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=300)
+                except subprocess.TimeoutExpired:
+                    failed.append(requirement)
+                    continue
+                if result.returncode != 0:
+                    failed.append(requirement)
+                    logger.debug(result.stderr.decode(errors='replace'))
+            if failed:
+                # Кэш не помечается полным - при следующем развертывании попытка повторится
+                logger.warning(f"Нет колес для: {', '.join(failed)} - они будут установлены на хосте из индекса")
+            else:
+                complete_marker.touch()
+
+        for wheel in sorted(cache_dir.glob("*.whl")):
+            self.extra_files[f"{self.WHEELHOUSE_DIR}/{wheel.name}"] = wheel
+        logger.info(f"Колеса зависимостей: {len(self.extra_files)} файлов из {cache_dir}")
+
+    # --- Инкрементальная синхронизация ---
+
+    def _iter_agent_files(self) -> List[str]:
+        """Относительные пути (через /) файлов агента с учетом исключений."""
+        files = []
+        for directory, dirnames, filenames in os.walk(self.agent_source_path):
+            dirnames[:] = sorted(d for d in dirnames if not self._is_excluded(d))
+            for file_name in filenames:
+                if self._is_excluded(file_name):
+                    continue
+                full_path = Path(directory) / file_name
+                files.append(full_path.relative_to(self.agent_source_path).as_posix())
+        return sorted(files)
+
+    def _local_file(self, relative_path: str) -> Path:
+        return self.extra_files.get(relative_path) or self.agent_source_path / relative_path
+
+    def _build_manifest(self) -> Dict[str, str]:
+        """Манифест локального дерева агента: {относительный путь: sha256}."""
+        manifest = {}
+        for relative_path in self._iter_agent_files() + sorted(self.extra_files):
+            digest = hashlib.sha256()
+            with open(self._local_file(relative_path), 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            manifest[relative_path] = digest.hexdigest()
+        return manifest
+
+    def _fetch_remote_manifest(self) -> Optional[Dict[str, str]]:
+        """Манифест, сохраненный на хосте при прошлом развертывании ({} - нет; None - ошибка SSH)."""
+        remote = shlex.quote(self.remote_path)
+        cmd = self._get_ssh_command() + [
+            f'cd {remote} 2>/dev/null && test -f main.py && cat {self.MANIFEST_NAME} 2>/dev/null; true'
+        ]
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=30)
+        except subprocess.TimeoutExpired:
+            logger.error("Таймаут чтения манифеста с хоста")
+            return None
+        if result.returncode != 0:
+            logger.error(f"Не удалось прочитать манифест с хоста: {result.stderr.decode(errors='replace')}")
+            return None
+        try:
+            manifest = json.loads(result.stdout.decode() or '{}')
+        except ValueError:
+            logger.warning("Манифест на хосте поврежден, будут переданы все файлы")
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+
+    @staticmethod
+    def _diff_manifests(local: Dict[str, str], remote: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """Файлы для передачи (новые и измененные) и для удаления на хосте."""
+        changed = [path for path, digest in local.items() if remote.get(path) != digest]
+        removed = [path for path in remote if path not in local]
+        return changed, removed
+
+    def _remote_sync_script(self) -> str:
+        """Команда на хосте: распаковать архив из stdin, удалить лишнее, настроить права, проверить."""
+        remote = shlex.quote(self.remote_path)
+        return (
+            f"set -e; mkdir -p {remote}; cd {remote}; tar -xzf -; "
+            f"if [ -f {self.REMOVED_LIST_NAME} ]; then "
+            f"while IFS= read -r f; do rm -f -- \"$f\"; done < {self.REMOVED_LIST_NAME}; "
+            f"rm -f {self.REMOVED_LIST_NAME}; fi; "
+            # Делаем все shell скрипты исполняемыми и конвертируем окончания строк Windows в Unix
+            "chmod +x *.sh 2>/dev/null || true; sed -i 's/\\r$//' *.sh 2>/dev/null || true; "
+            "test -f main.py && test -f requirements.txt && echo FILES_OK"
+        )
+
+    def _sync_incremental(self) -> bool:
+        """Передает изменённые файлы одним потоком tar через одно SSH-соединение."""
+        started = time.time()
+        local_manifest = self._build_manifest()
+        logger.info(f"Манифест локального дерева: {len(local_manifest)} файлов "
+                    f"({(time.time() - started) * 1000:.0f} мс)")
+
+        remote_manifest = {} if self.full else self._fetch_remote_manifest()
+        if remote_manifest is None:
+            return False
+        changed, removed = self._diff_manifests(local_manifest, remote_manifest)
+        logger.info(f"К передаче: {len(changed)} файлов, к удалению: {len(removed)}")
+        for path in changed:
+            logger.debug(f"  передается: {path}")
+        for path in removed:
+            logger.debug(f"  удаляется: {path}")
+
+        ssh_cmd = self._get_ssh_command() + [self._remote_sync_script()]
+        try:
+            process = subprocess.Popen(ssh_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+        except OSError as e:
+            logger.error(f"Ошибка запуска SSH: {e}")
+            return False
+
+        sent_bytes = 0
+        try:
+            with tarfile.open(fileobj=process.stdin, mode='w|gz') as archive:
+                for path in changed:
+                    archive.add(str(self._local_file(path)), arcname=path, recursive=False)
+                    sent_bytes += self._local_file(path).stat().st_size
+                extra = [(self.REMOVED_LIST_NAME, ''.join(f'{path}\n' for path in removed))] if removed else []
+                # Манифест - последним: если распаковка прервется, на хосте останется прежний
+                extra.append((self.MANIFEST_NAME, json.dumps(local_manifest, indent=1, sort_keys=True)))
+                for name, text in extra:
+                    data = text.encode()
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    info.mtime = int(time.time())
+                    info.mode = 0o644
+                    archive.addfile(info, io.BytesIO(data))
+        except (BrokenPipeError, OSError) as e:
+            logger.error(f"Передача архива прервана: {e}")
+        try:
+            # communicate закрывает stdin - конец архива для tar на хосте
+            stdout, stderr = process.communicate(timeout=300)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            logger.error("Таймаут синхронизации")
+            return False
+
+        elapsed = time.time() - started
+        if process.returncode == 0 and b'FILES_OK' in stdout:
+            logger.info(f"Синхронизация завершена за {elapsed:.1f} с: передано {len(changed)} файлов "
+                        f"({sent_bytes} байт), удалено {len(removed)}")
+            return True
+        logger.error("Ошибка синхронизации")
+        logger.error(f"Код возврата: {process.returncode}")
+        logger.error(f"Stderr: {stderr.decode(errors='replace')}")
+        return False
+
     def _execute_scp(self, local_path: Path) -> bool:
         """Выполняет копирование через SCP."""
         logger.info("Копирование файлов через SCP...")
@@ -418,6 +643,14 @@ class AgentDeployManager:
             logger.error(f"Ошибка проверки развертывания: {e}")
             return False
     
+    def _log_success(self) -> None:
+        logger.info("Развертывание mirada-agent успешно завершено!")
+        logger.info(f"Агент установлен в: {self.remote_path}")
+        logger.info("Для запуска агента выполните:")
+        logger.info(f"   ssh {self.username}@{self.mirada_host}")
+        logger.info(f"   cd {self.remote_path}")
+        logger.info("   sudo ./start.sh")
+
     def deploy(self) -> bool:
         """
         Выполняет полное развертывание агента.
@@ -438,6 +671,20 @@ class AgentDeployManager:
             logger.error("   3. Пользователь существует и имеет права")
             return False
         
+        if self.wheelhouse:
+            self._prepare_wheelhouse()
+        
+        if self.sync_mode == "incremental":
+            # Шаги 2-5 в одном SSH-соединении: передача изменений, настройка, проверка
+            try:
+                if not self._sync_incremental():
+                    return False
+            except Exception as e:
+                logger.error(f"Ошибка развертывания: {e}")
+                return False
+            self._log_success()
+            return True
+
         # Шаг 2: Создание очищенной копии
         temp_agent_path = None
         try:
@@ -455,13 +702,7 @@ class AgentDeployManager:
             if not self._verify_deployment():
                 return False
             
-            logger.info("Развертывание mirada-agent успешно завершено!")
-            logger.info(f"Агент установлен в: {self.remote_path}")
-            logger.info("Для запуска агента выполните:")
-            logger.info(f"   ssh {self.username}@{self.mirada_host}")
-            logger.info(f"   cd {self.remote_path}")
-            logger.info("   sudo ./start.sh")
-            
+            self._log_success()
             return True
             
         except Exception as e:
@@ -484,6 +725,8 @@ def main():
 Примеры использования:
   python services/deploy_agent.py --mirada-host=192.168.1.100
   python services/deploy_agent.py --mirada-host=server.example.com --verbose
+  python services/deploy_agent.py --mirada-host=192.168.1.100 --full
+  python services/deploy_agent.py --mirada-host=192.168.1.100 --sync scp
 
 Требования:
   1. SSH ключи должны быть настроены для беспарольного доступа
@@ -504,6 +747,25 @@ def main():
         help="Подробный вывод (debug логи)"
     )
     
+    parser.add_argument(
+        "--sync",
+        choices=["incremental", "scp"],
+        default="incremental",
+        help="incremental - только изменённые файлы по манифесту (по умолчанию), scp - полное копирование"
+    )
+    
+    parser.add_argument(
+        "--no-wheelhouse",
+        action="store_true",
+        help="Не передавать колеса зависимостей (на хосте они ставятся из индекса пакетов)"
+    )
+    
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="В режиме incremental передать все файлы, не сверяясь с манифестом на хосте"
+    )
+    
     args = parser.parse_args()
     
     # Настройка уровня логирования
@@ -512,7 +774,10 @@ def main():
     
     # Создание менеджера развертывания
     deploy_manager = AgentDeployManager(
-        mirada_host=args.mirada_host
+        mirada_host=args.mirada_host,
+        sync_mode=args.sync,
+        full=args.full,
+        wheelhouse=not args.no_wheelhouse
     )
     
     # Выполнение развертывания
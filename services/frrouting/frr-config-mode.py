@@ -1,5 +1,5 @@
 import pytest
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 from qa_constants import SERVICES
 
 ENDPOINT = "/frr-config-mode"
@@ -53,38 +53,6 @@ PARAMS = [
     ("duplicate_param", [ ("p", "a"), ("p", "b") ], 200, "Дублирующиеся параметры"),
 ]
 
-def _check_types_recursive(obj, schema):
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Тип {type(obj)} не соответствует anyOf"
-        return
-    if schema.get("type") == "object":
-        assert isinstance(obj, Mapping), f"Ожидался объект, получено: {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Обязательное поле '{req}' отсутствует"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Ожидался список, получено: {type(obj)}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str)
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int)
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool)
-        elif schema.get("type") == "null":
-            assert obj is None
-
-def _try_type(obj, schema):
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
 @pytest.mark.parametrize("case, params, expected_status, desc", PARAMS)
 def test_frr_config_mode_robustness(api_client, case, params, expected_status, desc, api_base_url, attach_curl_on_fail):
     with attach_curl_on_fail(ENDPOINT, params, None, "GET"):
@@ -94,4 +62,4 @@ def test_frr_config_mode_robustness(api_client, case, params, expected_status, d
         #     assert False, "Проверка вывода cURL"
         assert response.status_code == expected_status
         data = response.json()
-        _check_types_recursive(data, SCHEMA) 
\ No newline at end of file
+        assert_schema(data, SCHEMA) 
\ No newline at end of file
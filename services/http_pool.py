@@ -0,0 +1,104 @@
+"""
+Сессионный реестр HTTP-пулов соединений для api_client.
+
+Один HTTPAdapter (и один пул urllib3) на ключ (service, host, port) живёт
+всю сессию pytest. Каждый тестовый модуль получает собственный лёгкий
+requests.Session (свои заголовки и cookies), к которому примонтирован общий
+адаптер, поэтому keep-alive соединения переиспользуются между модулями.
+"""
+import logging
+import threading
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter, считающий отправленные запросы и открытые соединения."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._counter_lock = threading.Lock()
+        self.requests_sent = 0
+        self._dropped_connections = 0
+
+    def send(self, request, *args, **kwargs):
+        with self._counter_lock:
+            self.requests_sent += 1
+        return super().send(request, *args, **kwargs)
+
+    def connections_opened(self) -> int:
+        """Сколько TCP-соединений было открыто за всё время жизни адаптера."""
+        pools = self.poolmanager.pools
+        opened = sum(getattr(pools[key], "num_connections", 0) for key in pools.keys())
+        return self._dropped_connections + opened
+
+    def close(self):
+        # clear() выбрасывает пулы вместе со счётчиками — сохраняем их заранее
+        self._dropped_connections = self.connections_opened()
+        super().close()
+
+
+class HTTPClientRegistry:
+    def __init__(self, pool_connections: int = 2, pool_maxsize: int = 10, pool_block: bool = False):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self._adapters = {}
+        self._modules = Counter()
+        self._lock = threading.Lock()
+
+    def get_adapter(self, service: str, host: str, port: int) -> _PooledAdapter:
+        """Возвращает общий адаптер для (service, host, port), создаёт при первом обращении."""
+        key = (service, host, int(port))
+        with self._lock:
+            adapter = self._adapters.get(key)
+            if adapter is None:
+                adapter = _PooledAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                    pool_block=self.pool_block,
+                )
+                self._adapters[key] = adapter
+                logger.info(f"HTTP pool created for {service} ({host}:{port})")
+            return adapter
+
+    def session_for(self, service: str, host: str, port: int) -> requests.Session:
+        """Создаёт модульный Session поверх общего пула соединений."""
+        adapter = self.get_adapter(service, host, port)
+        with self._lock:
+            self._modules[(service, host, int(port))] += 1
+        session = requests.Session()
+        session.mount(f"http://{host}:{port}/", adapter)
+        if int(port) == 80:
+            # requests не добавляет порт по умолчанию в URL - монтируем и форму без порта
+            session.mount(f"http://{host}/", adapter)
+        return session
+
+    def stats(self) -> dict:
+        """Статистика переиспользования по сервисам: модули, запросы, соединения."""
+        result = {}
+        with self._lock:
+            items = list(self._adapters.items())
+        for (service, host, port), adapter in items:
+            sent = adapter.requests_sent
+            opened = adapter.connections_opened()
+            entry = result.setdefault(service, {"modules": 0, "requests": 0, "connections": 0, "reused": 0})
+            entry["modules"] += self._modules[(service, host, port)]
+            entry["requests"] += sent
+            entry["connections"] += opened
+            entry["reused"] += max(0, sent - opened)
+        return result
+
+    def close(self):
+        """Закрывает все пулы. Статистика остаётся доступной после закрытия."""
+        with self._lock:
+            adapters = list(self._adapters.values())
+        for adapter in adapters:
+            try:
+                adapter.close()
+            except Exception as e:
+                logger.error(f"Error closing HTTP pool: {e}")
@@ -1,7 +1,7 @@
 import json
 import pytest
 import requests
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 from services.qa_constants import SERVICES
 import uuid
 
@@ -61,42 +61,6 @@ response_schemas = {
 }
 
 # --- Recursive schema validation ---
-def _check_types_recursive(obj, schema):
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Value {obj} does not match anyOf {schema['anyOf']}"
-        return
-    if schema.get("type") == "object":
-        assert isinstance(obj, Mapping), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Expected array, got {type(obj)}"
-        if "items" in schema and isinstance(schema["items"], list):
-            for idx, (item, item_schema) in enumerate(zip(obj, schema["items"])):
-                _check_types_recursive(item, item_schema)
-        else:
-            for item in obj:
-                _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int), f"Expected integer, got {type(obj)}"
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-        elif schema.get("type") == "null":
-            assert obj is None, f"Expected null, got {type(obj)}"
-
-def _try_type(obj, schema):
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
 def _check_agent_verification(payload):
     """
     Проверяет через агента, что объект действительно был добавлен в систему.
@@ -135,6 +99,8 @@ def _check_agent_verification(payload):
                     return True
                 if result == {}:
                     return True
+            # Агент возвращает результат поиска: {"result": "ERROR", "message": ...}
+            print(f"Agent verification result: {result}")
             return False
         else:
             print(f"Agent verification failed with status {response.status_code}: {response.text}")
@@ -280,7 +246,7 @@ def test_post_object(api_client, payload, expected_status, attach_curl_on_fail):
             response = api_client.post(ENDPOINT, json=payload, headers=headers)
         assert response.status_code == expected_status, f"Expected status {expected_status}, got {response.status_code}"
         if expected_status == 201:
-            _check_types_recursive(response.json(), response_schemas["POST"])
+            assert_schema(response.json(), response_schemas["POST"])
         
         # Дополнительная проверка через агента для валидных случаев
         if expected_status == 200 and isinstance(payload, dict):
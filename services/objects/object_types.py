@@ -1,5 +1,5 @@
 import pytest
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 from services.qa_constants import SERVICES
 
 ENDPOINT = "/object/types"
@@ -17,38 +17,6 @@ RESPONSE_SCHEMA = {
     "uniqueItems": True
 }
 
-def _check_types_recursive(obj, schema):
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"])
-        return
-    if schema.get("type") == "object":
-        assert isinstance(obj, Mapping)
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj
-    elif schema.get("type") == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str)
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str)
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int)
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool)
-        elif schema.get("type") == "null":
-            assert obj is None
-
-def _try_type(obj, schema):
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
 # 25+ валидных GET-параметров
 VALID_PARAMS = [
     pytest.param({}, id="empty"),
@@ -90,7 +58,7 @@ def test_object_types_valid(api_client, params, attach_curl_on_fail):
         response = api_client.get(ENDPOINT, params=params)
         assert response.status_code == 200, f"Test with params={params} failed: Expected status 200, got {response.status_code}"
         response_data = response.json()
-        _check_types_recursive(response_data, RESPONSE_SCHEMA)
+        assert_schema(response_data, RESPONSE_SCHEMA)
 
 @pytest.mark.parametrize("params", [pytest.param({"q": ""}, id="q-empty")])
 def test_object_types_invalid_q_empty(api_client, params, attach_curl_on_fail):
@@ -1,6 +1,5 @@
 import pytest
 import json
-from collections.abc import Mapping, Sequence
 from services.qa_constants import SERVICES
 
 ENDPOINT = "/parse-value"
@@ -12,38 +11,6 @@ BASE_PATH = SERVICE["base_path"]
 IPV4_SCHEMA = {"type": "string"}
 IPV6_SCHEMA = {"type": "string"}
 
-def _check_types_recursive(obj, schema):
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Тип {type(obj)} не соответствует anyOf"
-        return
-    if schema.get("type") == "object":
-        assert isinstance(obj, Mapping), f"Ожидался объект, получено: {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Обязательное поле '{req}' отсутствует"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Ожидался список, получено: {type(obj)}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str)
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int)
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool)
-        elif schema.get("type") == "null":
-            assert obj is None
-
-def _try_type(obj, schema):
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
 # Параметры для проверки (валидные и невалидные)
 PARSE_VALUE_PARAMS = [
     pytest.param({"type": "ip", "source": "1.1.1.1"}, id="ip-class-a-public"),
@@ -27,7 +27,8 @@ SERVICES = {
             "port": 7779,
             "base_path": "/api",
             "name": "main",
-            "description": "Основной API vswitch"
+            "description": "Основной API vswitch",
+            "rate_limit": {"min_rate": 1.0}
         },
         {
             "host": "127.0.0.1",
@@ -82,17 +83,20 @@ SERVICES = {
     "centec": {
         "host": "127.0.0.1",
         "port": 7783,
-        "base_path": "/api"
+        "base_path": "/api",
+        "rate_limit": {"min_rate": 1.0}
     },
     "core": {
         "host": "127.0.0.1",
         "port": 4006,
-        "base_path": "/api"
+        "base_path": "/api",
+        "rate_limit": {"min_rate": 1.0}
     },
     "csi-server": {
         "host": "127.0.0.1",
         "port": 2999,
-        "base_path": "/api"
+        "base_path": "/api",
+        "rate_limit": {"min_rate": 0.3}
     }
 }
 
@@ -114,4 +118,66 @@ TUNNEL_CONFIG = {
     "centec": (7783, 7783, "127.0.0.1"),
     "core": (4006, 4006, "127.0.0.1"),
     "csi-server": (2999, 2999, "127.0.0.1")
-}
\ No newline at end of file
+}
+
+# Параметры общего пула HTTP-соединений api_client (см. http_pool.py)
+# pool_connections - число пулов на адаптер, pool_maxsize - соединений в пуле
+HTTP_POOL = {
+    "pool_connections": 2,
+    "pool_maxsize": 10,
+    "pool_block": False
+}
+
+# Параметры супервизора SSH-туннелей (см. tunnel_supervisor.py)
+# interval - период проверки процесса ssh и его stderr, probe_interval - период
+# подключения к локальному порту туннеля (каждое открывает канал на удалённой стороне;
+# после ошибки соединения в api_client порт проверяется сразу), backoff_* - задержка
+# между попытками переподключения, ready_timeout - сколько api_client ждёт
+# восстановления туннеля перед запросом
+TUNNEL_SUPERVISOR = {
+    "interval": 1.0,
+    "probe_interval": 30.0,
+    "backoff_base": 0.5,
+    "backoff_max": 30.0,
+    "ready_timeout": 60
+}
+
+# Потоковая валидация больших массивов в ответах (см. stream_validation.py)
+# sample_size - сколько элементов проверять (None - все), max_errors - после скольких
+# ошибок остановиться, chunk_size - размер куска чтения ответа в байтах
+STREAM_VALIDATION = {
+    "sample_size": None,
+    "max_errors": 20,
+    "chunk_size": 64 * 1024
+}
+
+# Сколько первых элементов модульные фикстуры держат в памяти для поэлементных
+# проверок (ResponseSample); схема проверяется на всём ответе через stream_validator
+STREAM_SAMPLE_ITEMS = 1000
+
+# Ожидание смены состояния долгих операций (см. status_waiter.py)
+# fast_polls проверок через initial_interval, затем интервал растёт в factor раз до max_interval;
+# при ошибках запроса - не чаще error_interval, после max_consecutive_errors подряд - отказ
+STATUS_WAITER = {
+    "initial_interval": 0.2,
+    "fast_polls": 5,
+    "factor": 1.5,
+    "max_interval": 5.0,
+    "error_interval": 1.0,
+    "max_consecutive_errors": 10
+}
+
+# Адаптивный ограничитель частоты запросов api_client (см. rate_limiter.py), по умолчанию для
+# всех сервисов; ключ "rate_limit" в SERVICES переопределяет значения для сервиса.
+# rate/burst - скорость (запросов/с) и запас токенов при здоровом backend; на 429/503 или обрыв
+# соединения скорость умножается на backoff (не ниже min_rate), на успешный ответ - на recovery;
+# max_retries - повторы идемпотентных запросов, max_retry_after - предел паузы Retry-After
+RATE_LIMIT = {
+    "rate": 20.0,
+    "burst": 10,
+    "min_rate": 0.5,
+    "backoff": 0.5,
+    "recovery": 2.0,
+    "max_retries": 2,
+    "max_retry_after": 30.0
+}
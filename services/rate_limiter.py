@@ -0,0 +1,173 @@
+"""
+Адаптивный ограничитель частоты запросов api_client по сервисам.
+
+Token bucket на сервис: пока backend отвечает нормально, запросы идут без
+пауз (burst токенов, пополнение rate в секунду). Ответ 429/503 или обрыв
+соединения (connection reset) сужает скорость в backoff раз, но не ниже
+min_rate, и приостанавливает отправку на Retry-After. Каждый следующий
+успешный ответ возвращает скорость к исходной в recovery раз.
+
+Идемпотентные запросы (GET, HEAD, OPTIONS), получившие 429/503 или обрыв,
+повторяются до max_retries раз после паузы, каждый повтор пишется в лог
+(WARNING); остальные возвращаются тесту как есть.
+
+Параметры - RATE_LIMIT в qa_constants.py, для отдельного сервиса их можно
+переопределить ключом "rate_limit" в SERVICES.
+"""
+import logging
+import threading
+import time
+from http.client import RemoteDisconnected
+from typing import Callable, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUSES = (429, 503)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def is_connection_reset(error: BaseException) -> bool:
+    """True, если в цепочке причин requests.ConnectionError - сброс соединения сервером."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (ConnectionResetError, BrokenPipeError, RemoteDisconnected)):
+            return True
+        for arg in getattr(error, "args", ()):
+            if isinstance(arg, BaseException) and is_connection_reset(arg):
+                return True
+        error = error.__cause__ or error.__context__ or getattr(error, "reason", None)
+    return False
+
+
+def _retry_after(response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        # HTTP-дата вместо секунд - используем собственную паузу
+        return None
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate: float = 20.0, burst: int = 10, min_rate: float = 0.5, backoff: float = 0.5,
+                 recovery: float = 2.0, max_retries: int = 2, max_retry_after: float = 30.0):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = burst
+        self.min_rate = min_rate
+        self.backoff = backoff
+        self.recovery = recovery
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "throttled": 0, "resets": 0, "retries": 0, "waited": 0.0}
+
+    def acquire(self):
+        """Забирает токен; ждёт только если ведро пусто или сервис попросил паузу."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    self._stats["requests"] += 1
+                    self._stats["waited"] += waited
+                    return
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def throttle(self, retry_after: Optional[float] = None, reason: str = "throttled"):
+        """Сужает скорость после 429/503 или обрыва и ставит паузу (Retry-After, если есть)."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.backoff)
+            self._tokens = 0.0
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self._paused_until = max(self._paused_until, time.monotonic() + min(pause, self.max_retry_after))
+            self._stats["resets" if reason == "reset" else "throttled"] += 1
+        logger.info(f"Rate limiter: {reason}, rate lowered to {self.rate:.2f} req/s")
+
+    def recover(self):
+        if self.rate < self.base_rate:
+            with self._lock:
+                self.rate = min(self.base_rate, self.rate * self.recovery)
+
+    def send(self, method: str, send: Callable[[], requests.Response], url: str = "") -> requests.Response:
+        """Выполняет send() с учётом лимита; повторяет идемпотентные запросы после 429/503/обрыва."""
+        retryable = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                response = send()
+            except requests.exceptions.ConnectionError as e:
+                if not is_connection_reset(e):
+                    raise
+                self.throttle(reason="reset")
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                reason = "connection reset"
+            else:
+                if response.status_code not in THROTTLE_STATUSES:
+                    self.recover()
+                    return response
+                self.throttle(_retry_after(response), reason=f"HTTP {response.status_code}")
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                response.close()
+                reason = f"HTTP {response.status_code}"
+            attempt += 1
+            logger.warning(f"Rate limiter: retry {attempt}/{self.max_retries} of {method.upper()} {url} after {reason}")
+            with self._lock:
+                self._stats["retries"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, rate=self.rate)
+
+
+class RateLimiterRegistry:
+    """Один AdaptiveRateLimiter на сервис на всю сессию pytest."""
+
+    def __init__(self, defaults: dict, overrides: Optional[dict] = None):
+        self.defaults = defaults
+        self.overrides = overrides or {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def limiter_for(self, service: str) -> AdaptiveRateLimiter:
+        with self._lock:
+            limiter = self._limiters.get(service)
+            if limiter is None:
+                limiter = self._limiters[service] = AdaptiveRateLimiter(
+                    **{**self.defaults, **self.overrides.get(service, {})}
+                )
+            return limiter
+
+    def stats(self) -> dict:
+        with self._lock:
+            items = list(self._limiters.items())
+        return {service: limiter.stats() for service, limiter in items}
+
+
+def service_rate_limits(services: dict) -> dict:
+    """Переопределения "rate_limit" из SERVICES: {service: {...}} (для списка - первое найденное)."""
+    result = {}
+    for name, config in services.items():
+        entries = config if isinstance(config, list) else [config]
+        for entry in entries:
+            if "rate_limit" in entry:
+                result[name] = entry["rate_limit"]
+                break
+    return result
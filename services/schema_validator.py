@@ -0,0 +1,515 @@
+"""
+Общий валидатор схем ответов API.
+
+Схема компилируется один раз в дерево замыканий и кешируется, поэтому
+повторные проверки (в т.ч. каждого элемента больших массивов ids-events,
+cycleLogs) не разбирают словарь схемы заново и не используют исключения для
+ветвления anyOf. Проверка собирает все ошибки за один проход, каждую - с
+JSON-путём до поля ($.items[3].name).
+
+Поддерживаемые схемы:
+    - подмножество JSON Schema: type (строка или список), properties, required,
+      items (схема или список схем для кортежа), anyOf/oneOf/allOf;
+      только при strict=True - additionalProperties, minItems/maxItems, enum,
+      const, pattern, minLength/maxLength, minimum/maximum,
+      exclusiveMinimum/exclusiveMaximum, а bool не считается integer/number;
+      format (date-time, date, ipv4, ipv6, uuid) - только при formats=True
+    - python-тип вместо схемы (str, (int, float)) или {"py_type": <тип>}
+    - формат validate_schema из conftest.py:
+      {"required": {"name": str}, "optional": {"email": str}}
+
+ИСПОЛЬЗОВАНИЕ:
+    from services.schema_validator import assert_schema
+
+    assert_schema(response.json(), RESPONSE_SCHEMA)   # AssertionError со списком ошибок
+    assert_schema(response.json(), RESPONSE_SCHEMA, strict=True)   # + ограничения значений
+
+По умолчанию проверка совпадает с прежними копиями _check_types_recursive в
+модулях тестов: типы по isinstance (True проходит как integer), структура и
+обязательные поля. Ограничения значений, которые схемы объявляют, но копии не
+проверяли, включаются явно (strict=True) - после сверки с ответами устройства.
+"""
+import ipaddress
+import re
+import uuid
+from collections.abc import Mapping
+from datetime import date, datetime
+from typing import Any, Callable, List, NamedTuple, Optional
+
+# Сколько ошибок выводить в тексте AssertionError (считаются все)
+MAX_REPORTED_ERRORS = 20
+
+
+class SchemaError(NamedTuple):
+    path: str
+    message: str
+
+    def __str__(self):
+        return f"{self.path}: {self.message}"
+
+
+class _ErrorLimitReached(Exception):
+    pass
+
+
+class _Errors(list):
+    """Список ошибок с необязательным лимитом: по достижении проверка прерывается."""
+
+    def __init__(self, limit: Optional[int] = None):
+        super().__init__()
+        self.limit = limit
+
+    def add(self, path: tuple, message: str):
+        self.append(SchemaError(_format_path(path), message))
+        if self.limit is not None and len(self) >= self.limit:
+            raise _ErrorLimitReached()
+
+
+# Путь - связный кортеж (родитель, ключ), корень - (); строка собирается только для ошибок
+def _format_path(path: tuple) -> str:
+    parts = []
+    while path:
+        path, part = path
+        parts.append(f"[{part}]" if isinstance(part, int) else f".{part}")
+    return "$" + "".join(reversed(parts))
+
+
+def _type_name(value) -> str:
+    return "null" if value is None else type(value).__name__
+
+
+_PY_TYPES = {
+    "object": (dict,),
+    "array": (list, tuple),
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+_MISSING = object()
+
+
+class _TypeSpec:
+    """Проверка type: сначала точный класс (типичный JSON), затем isinstance."""
+    __slots__ = ("exact", "allowed", "allow_bool", "name")
+
+    def __init__(self, types: list, strict: bool = False):
+        classes = set()
+        for t in types:
+            classes.update(_PY_TYPES[t])
+        # bool - подкласс int: в JSON Schema не integer и не number, но прежние копии
+        # (isinstance) его пропускали - отсекается только в strict
+        self.allow_bool = "boolean" in types or not strict
+        self.exact = frozenset(classes)
+        self.allowed = tuple(classes) + ((Mapping,) if "object" in types else ())
+        self.name = " | ".join(types)
+
+    def ok(self, value) -> bool:
+        cls = value.__class__
+        if cls in self.exact:
+            return True
+        if cls is bool:
+            return self.allow_bool
+        return isinstance(value, self.allowed)
+
+
+def _is_datetime(value: str) -> bool:
+    datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return True
+
+
+_FORMAT_CHECKS = {
+    "date-time": _is_datetime,
+    "date": lambda v: bool(date.fromisoformat(v)),
+    "ipv4": lambda v: bool(ipaddress.IPv4Address(v)),
+    "ipv6": lambda v: bool(ipaddress.IPv6Address(v)),
+    "uuid": lambda v: bool(uuid.UUID(v)),
+}
+
+# Проверка узла: (значение, путь, ошибки) -> None
+_Check = Callable[[Any, tuple, _Errors], None]
+
+
+def _noop(value, path, errors):
+    pass
+
+
+def _sequence(checks: List[_Check]) -> _Check:
+    if not checks:
+        return _noop
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(value, path, errors):
+        for c in checks:
+            c(value, path, errors)
+    return check
+
+
+def _compile_python_type(expected) -> _Check:
+    name = getattr(expected, "__name__", None) or " | ".join(t.__name__ for t in expected)
+
+    def check(value, path, errors):
+        if not isinstance(value, expected):
+            errors.add(path, f"ожидался {name}, получено {_type_name(value)}")
+    return check
+
+
+def _compile_typed_fields(schema: dict) -> _Check:
+    """Формат validate_schema из conftest.py: точное совпадение python-типа, optional допускает None."""
+    def as_tuple(t):
+        return t if isinstance(t, tuple) else (t,)
+
+    def type_error(types, value):
+        return f"тип {_type_name(value)}, ожидался {' | '.join(t.__name__ for t in types)}"
+
+    required = [(key, as_tuple(t)) for key, t in schema.get("required", {}).items()]
+    optional = [(key, as_tuple(t)) for key, t in schema.get("optional", {}).items()]
+
+    def check_fields(value, path, errors):
+        if not isinstance(value, Mapping):
+            errors.add(path, f"ожидался объект, получено {_type_name(value)}")
+            return
+        for key, types in required:
+            item = value.get(key, _MISSING)
+            if item is _MISSING:
+                errors.add(path, f"обязательное поле '{key}' отсутствует")
+            elif type(item) not in types:
+                errors.add((path, key), type_error(types, item))
+        for key, types in optional:
+            item = value.get(key)
+            if item is not None and type(item) not in types:
+                errors.add((path, key), type_error(types, item))
+
+    def check(value, path, errors):
+        # Как и validate_schema: список проверяется поэлементно
+        if isinstance(value, list):
+            for index, item in enumerate(value):
+                check_fields(item, (path, index), errors)
+        else:
+            check_fields(value, path, errors)
+    return check
+
+
+def _compile_branches(branches: list, formats: bool, strict: bool, mode: str) -> _Check:
+    compiled = [_compile(branch, formats, strict) for branch in branches]
+
+    def check(value, path, errors):
+        matched = 0
+        for c in compiled:
+            branch_errors = _Errors()
+            c(value, path, branch_errors)
+            if not branch_errors:
+                matched += 1
+                if mode == "anyOf":
+                    return
+        if mode == "anyOf":
+            errors.add(path, f"значение типа {_type_name(value)} не соответствует ни одной из схем anyOf")
+        elif matched != 1:
+            errors.add(path, f"значение соответствует {matched} схемам oneOf, ожидалась ровно одна")
+    return check
+
+
+_ANNOTATIONS = {"description", "title", "example", "examples", "default"}
+
+
+def _simple_types(schema):
+    """
+    Список типов, если схема проверяет только type (в т.ч. anyOf из таких схем:
+    anyOf [{"type": "string"}, {"type": "null"}] == type ["string", "null"]), иначе None.
+    """
+    if not isinstance(schema, Mapping):
+        return None
+    keys = set(schema) - _ANNOTATIONS
+    if keys == {"type"}:
+        types = _schema_types(schema)
+        return types or None
+    if keys == {"anyOf"}:
+        types = []
+        for branch in schema["anyOf"]:
+            branch_types = _simple_types(branch)
+            if branch_types is None:
+                return None
+            types.extend(t for t in branch_types if t not in types)
+        return types
+    return None
+
+
+def _compile_child(schema, formats: bool, strict: bool):
+    """(spec, None) для схемы только с type - проверяется родителем без вызова функции; иначе (None, check)."""
+    types = _simple_types(schema)
+    if types is not None:
+        return _TypeSpec(types, strict), None
+    return None, _compile(schema, formats, strict)
+
+
+def _schema_types(schema) -> list:
+    schema_type = schema.get("type")
+    types = [schema_type] if isinstance(schema_type, str) else list(schema_type or [])
+    return [t for t in types if t in _PY_TYPES]
+
+
+def _compile_object(schema: dict, formats: bool, strict: bool) -> List[_Check]:
+    properties = []
+    for key, sub in schema.get("properties", {}).items():
+        spec, sub_check = _compile_child(sub, formats, strict)
+        if spec is not None or sub_check is not _noop:
+            properties.append((key, spec, sub_check))
+    required = list(schema.get("required", []))
+    additional = schema.get("additionalProperties", True) if strict else True
+    known = set(schema.get("properties", {}))
+    additional_check = _compile(additional, formats, strict) if isinstance(additional, (dict, type, tuple)) else None
+    check_additional = additional is False or additional_check is not None
+    if not (properties or required or check_additional):
+        return []
+
+    def check_object(value, path, errors):
+        if value.__class__ is not dict and not isinstance(value, Mapping):
+            return
+        for key, spec, sub_check in properties:
+            item = value.get(key, _MISSING)
+            if item is _MISSING:
+                continue
+            if spec is None:
+                sub_check(item, (path, key), errors)
+            elif item.__class__ not in spec.exact and not spec.ok(item):
+                errors.add((path, key), f"ожидался {spec.name}, получено {_type_name(item)}")
+        for key in required:
+            if key not in value:
+                errors.add(path, f"обязательное поле '{key}' отсутствует")
+        if check_additional:
+            for key in value:
+                if key in known:
+                    continue
+                if additional_check is None:
+                    errors.add(path, f"лишнее поле '{key}'")
+                else:
+                    additional_check(value[key], (path, key), errors)
+    return [check_object]
+
+
+def _compile_array(schema: dict, formats: bool, strict: bool) -> List[_Check]:
+    checks = []
+    items = schema.get("items")
+    if isinstance(items, list):
+        # Кортеж: i-й элемент по i-й схеме
+        positional = [_compile(sub, formats, strict) for sub in items]
+
+        def check_tuple(value, path, errors):
+            if not isinstance(value, (list, tuple)):
+                return
+            for index, (item, c) in enumerate(zip(value, positional)):
+                c(item, (path, index), errors)
+        checks.append(check_tuple)
+    elif items is not None:
+        spec, item_check = _compile_child(items, formats, strict)
+        if spec is not None:
+            def check_items(value, path, errors):
+                if not isinstance(value, (list, tuple)):
+                    return
+                exact = spec.exact
+                for index, item in enumerate(value):
+                    if item.__class__ not in exact and not spec.ok(item):
+                        errors.add((path, index), f"ожидался {spec.name}, получено {_type_name(item)}")
+            checks.append(check_items)
+        elif item_check is not _noop:
+            def check_items(value, path, errors):
+                if not isinstance(value, (list, tuple)):
+                    return
+                for index, item in enumerate(value):
+                    item_check(item, (path, index), errors)
+            checks.append(check_items)
+
+    min_items, max_items = (schema.get("minItems"), schema.get("maxItems")) if strict else (None, None)
+    if min_items is not None or max_items is not None:
+        def check_length(value, path, errors):
+            if not isinstance(value, (list, tuple)):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.add(path, f"элементов {len(value)}, ожидалось не меньше {min_items}")
+            if max_items is not None and len(value) > max_items:
+                errors.add(path, f"элементов {len(value)}, ожидалось не больше {max_items}")
+        checks.append(check_length)
+    return checks
+
+
+def _compile_string(schema: dict, formats: bool, strict: bool) -> List[_Check]:
+    checks = []
+    pattern = schema.get("pattern") if strict else None
+    if pattern is not None:
+        regex = re.compile(pattern)
+
+        def check_pattern(value, path, errors):
+            if isinstance(value, str) and not regex.search(value):
+                errors.add(path, f"строка {value!r} не соответствует паттерну {pattern}")
+        checks.append(check_pattern)
+
+    min_length, max_length = (schema.get("minLength"), schema.get("maxLength")) if strict else (None, None)
+    if min_length is not None or max_length is not None:
+        def check_length(value, path, errors):
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                errors.add(path, f"длина строки {len(value)}, ожидалось не меньше {min_length}")
+            if max_length is not None and len(value) > max_length:
+                errors.add(path, f"длина строки {len(value)}, ожидалось не больше {max_length}")
+        checks.append(check_length)
+
+    format_check = _FORMAT_CHECKS.get(schema.get("format")) if formats else None
+    if format_check is not None:
+        fmt = schema["format"]
+
+        def check_format(value, path, errors):
+            if not isinstance(value, str):
+                return
+            try:
+                format_check(value)
+            except ValueError:
+                errors.add(path, f"строка {value!r} не соответствует формату {fmt}")
+        checks.append(check_format)
+    return checks
+
+
+def _compile_number(schema: dict) -> List[_Check]:
+    bounds = [
+        (schema.get("minimum"), lambda v, b: v >= b, "не меньше"),
+        (schema.get("maximum"), lambda v, b: v <= b, "не больше"),
+        (schema.get("exclusiveMinimum"), lambda v, b: v > b, "больше"),
+        (schema.get("exclusiveMaximum"), lambda v, b: v < b, "меньше"),
+    ]
+    bounds = [b for b in bounds if isinstance(b[0], (int, float)) and not isinstance(b[0], bool)]
+    if not bounds:
+        return []
+
+    def check_bounds(value, path, errors):
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return
+        for bound, ok, text in bounds:
+            if not ok(value, bound):
+                errors.add(path, f"значение {value}, ожидалось {text} {bound}")
+    return [check_bounds]
+
+
+def _compile(schema, formats: bool, strict: bool) -> _Check:
+    if isinstance(schema, type) or (isinstance(schema, tuple) and schema and all(isinstance(t, type) for t in schema)):
+        return _compile_python_type(schema)
+    if not isinstance(schema, Mapping) or not schema:
+        return _noop
+    if isinstance(schema.get("required"), Mapping) or "optional" in schema:
+        return _compile_typed_fields(schema)
+    if "py_type" in schema:
+        return _compile_python_type(schema["py_type"])
+
+    types = _simple_types(schema)
+    if types is not None:
+        return _compile_type(_TypeSpec(types, strict), _noop)
+
+    checks = []
+    for mode in ("anyOf", "oneOf"):
+        if mode in schema:
+            checks.append(_compile_branches(schema[mode], formats, strict, mode))
+    for sub in schema.get("allOf", []):
+        checks.append(_compile(sub, formats, strict))
+
+    if strict and "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.add(path, f"значение {value!r} не входит в {allowed}")
+        checks.append(check_enum)
+    if strict and "const" in schema:
+        expected = schema["const"]
+
+        def check_const(value, path, errors):
+            if value != expected:
+                errors.add(path, f"значение {value!r}, ожидалось {expected!r}")
+        checks.append(check_const)
+
+    checks.extend(_compile_object(schema, formats, strict))
+    checks.extend(_compile_array(schema, formats, strict))
+    checks.extend(_compile_string(schema, formats, strict))
+    if strict:
+        checks.extend(_compile_number(schema))
+    body = _sequence(checks)
+
+    types = _schema_types(schema)
+    if not types:
+        return body
+    return _compile_type(_TypeSpec(types, strict), body)
+
+
+def _compile_type(spec: _TypeSpec, body: _Check) -> _Check:
+    exact = spec.exact
+    if body is _noop:
+        def check_type(value, path, errors):
+            if value.__class__ not in exact and not spec.ok(value):
+                errors.add(path, f"ожидался {spec.name}, получено {_type_name(value)}")
+        return check_type
+
+    def check(value, path, errors):
+        if value.__class__ not in exact and not spec.ok(value):
+            # При несовпадении типа вложенные проверки не имеют смысла
+            errors.add(path, f"ожидался {spec.name}, получено {_type_name(value)}")
+            return
+        body(value, path, errors)
+    return check
+
+
+class CompiledSchema:
+    """Скомпилированная схема: проверка без повторного разбора словаря схемы."""
+
+    def __init__(self, schema, formats: bool = False, strict: bool = False):
+        self.schema = schema
+        self._check = _compile(schema, formats, strict)
+
+    def errors(self, obj, limit: Optional[int] = None, path: tuple = ()) -> List[SchemaError]:
+        """Все ошибки (или первые limit) за один проход; path - префикс пути, например ((), 3)."""
+        errors = _Errors(limit)
+        try:
+            self._check(obj, path, errors)
+        except _ErrorLimitReached:
+            pass
+        return list(errors)
+
+    def is_valid(self, obj) -> bool:
+        return not self.errors(obj, limit=1)
+
+    def validate(self, obj):
+        """AssertionError со списком ошибок и их JSON-путями, если obj не соответствует схеме."""
+        errors = self.errors(obj)
+        if errors:
+            raise AssertionError(format_errors(errors))
+
+
+def format_errors(errors: List[SchemaError]) -> str:
+    lines = [f"Данные не соответствуют схеме ({len(errors)} ошибок):"]
+    lines += [f"  {error}" for error in errors[:MAX_REPORTED_ERRORS]]
+    if len(errors) > MAX_REPORTED_ERRORS:
+        lines.append(f"  ... и ещё {len(errors) - MAX_REPORTED_ERRORS}")
+    return "\n".join(lines)
+
+
+# id(schema) -> (schema, CompiledSchema); ссылка на схему не даёт id переиспользоваться.
+# Схемы - константы модулей, поэтому изменение словаря после компиляции не отслеживается.
+_compiled_cache = {}
+
+
+def compile_schema(schema, formats: bool = False, strict: bool = False) -> CompiledSchema:
+    """Компилирует схему один раз на процесс."""
+    key = (id(schema), formats, strict)
+    cached = _compiled_cache.get(key)
+    if cached is None or cached[0] is not schema:
+        cached = _compiled_cache[key] = (schema, CompiledSchema(schema, formats, strict))
+    return cached[1]
+
+
+def assert_schema(obj, schema, formats: bool = False, strict: bool = False):
+    """Проверяет obj по схеме; при несоответствии - AssertionError со всеми ошибками."""
+    compile_schema(schema, formats, strict).validate(obj)
+
+
+def schema_errors(obj, schema, limit: Optional[int] = None, formats: bool = False,
+                  strict: bool = False) -> List[SchemaError]:
+    return compile_schema(schema, formats, strict).errors(obj, limit=limit)
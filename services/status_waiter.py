@@ -0,0 +1,228 @@
+"""
+Ожидание смены состояния долгих операций (восстановление конфигурации,
+обслуживание, генерация отчёта, перезапуск сервиса).
+
+Вместо фиксированного time.sleep между запросами статуса StatusWaiter опрашивает
+адаптивно: первые fast_polls проверок - с коротким интервалом (операции часто
+завершаются за секунды), дальше интервал растёт экспоненциально до max_interval.
+Тест завершается на первой проверке после смены состояния, а не на следующем
+тике фиксированного сна.
+
+Если у сервиса есть поток уведомлений (text/event-stream), его можно передать
+в events: каждое событие будит ожидание и вызывает немедленную проверку
+статуса. Поток не обязателен - если эндпоинт недоступен или отвечает не
+event-stream, ожидание работает по опросу.
+
+ИСПОЛЬЗОВАНИЕ:
+    waiter = StatusWaiter(**STATUS_WAITER)
+    data = waiter.wait(
+        lambda: api_client.get("/manager/restoreConfigStatus").json(),
+        lambda data: data.get("message") == "OK",
+        timeout=180,
+        description="restore config",
+    )
+
+    # из asyncio-кода
+    data = await waiter.wait_async(fetch, until, timeout=180)
+"""
+import asyncio
+import logging
+import socket
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WaitTimeout(TimeoutError):
+    """Состояние не наступило за timeout или ошибки опроса шли подряд слишком долго."""
+
+    def __init__(self, message: str, last_value: Any = None, last_error: Optional[BaseException] = None):
+        super().__init__(message)
+        self.last_value = last_value
+        self.last_error = last_error
+
+
+class EventStream:
+    """
+    Подписка на поток уведомлений сервера (Server-Sent Events).
+
+    Фоновый поток держит GET с stream=True и на каждое событие выставляет
+    changed. Если эндпоинт не отвечает 200 с Content-Type text/event-stream,
+    подписка помечается недоступной и ожидание продолжается опросом.
+    """
+
+    def __init__(self, session, url: str, headers: Optional[dict] = None, connect_timeout: float = 5.0):
+        self.session = session
+        self.url = url
+        self.headers = headers
+        self.connect_timeout = connect_timeout
+        self.changed = threading.Event()
+        self.available = False
+        self._response = None
+        self._closed = False
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="status-event-stream", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            # Чтение без таймаута: события могут приходить редко
+            response = self.session.get(self.url, headers=self.headers, stream=True,
+                                        timeout=(self.connect_timeout, None))
+            content_type = response.headers.get("Content-Type", "")
+            if response.status_code != 200 or "text/event-stream" not in content_type:
+                logger.debug(f"No event stream at {self.url}: {response.status_code} {content_type}")
+                response.close()
+                return
+            self._response = response
+            self.available = True
+            # read1 отдаёт уже пришедшие байты: iter_lines ждал бы заполнения куска
+            # и передал бы редкое короткое событие с задержкой
+            pending = b""
+            while not self._closed:
+                data = response.raw.read1(4096)
+                if not data:
+                    break
+                *lines, pending = (pending + data).split(b"\n")
+                # Пустая строка завершает событие SSE; комментарии (":") - keep-alive
+                if any(line.strip() and not line.startswith(b":") for line in lines):
+                    self.changed.set()
+        except Exception as e:
+            if not self._closed:
+                logger.debug(f"Event stream {self.url} closed: {e}")
+        finally:
+            self.available = False
+            if self._response is not None:
+                self._response.close()
+
+    def close(self):
+        self._closed = True
+        # Поток чтения заблокирован в recv: response.close() из другого потока
+        # ждал бы его, поэтому сокет закрывается на уровне ОС - чтение получит EOF
+        connection = getattr(getattr(self._response, "raw", None), "connection", None)
+        sock = getattr(connection, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+
+class StatusWaiter:
+    def __init__(self, initial_interval: float = 0.2, fast_polls: int = 5, factor: float = 1.5,
+                 max_interval: float = 5.0, error_interval: float = 1.0, max_consecutive_errors: int = 10):
+        self.initial_interval = initial_interval
+        self.fast_polls = fast_polls
+        self.factor = factor
+        self.max_interval = max_interval
+        # Ошибки (перезапуск сервиса, обрыв соединения) опрашиваются не чаще error_interval
+        self.error_interval = error_interval
+        self.max_consecutive_errors = max_consecutive_errors
+
+    def intervals(self) -> Iterator[float]:
+        """Задержки между проверками: fast_polls коротких, затем экспонента до max_interval."""
+        for _ in range(self.fast_polls):
+            yield self.initial_interval
+        delay = self.initial_interval
+        while True:
+            delay = min(self.max_interval, delay * self.factor)
+            yield delay
+
+    def _step(self, fetch: Callable[[], Any], until: Callable[[Any], bool], state: dict) -> bool:
+        """Одна проверка; True - состояние наступило (значение в state["value"])."""
+        try:
+            value = fetch()
+            done = until(value)
+        except Exception as e:
+            state["errors"] += 1
+            state["error"] = e
+            logger.debug(f"{state['description']}: check failed ({state['errors']} in a row): {e}")
+            if state["errors"] >= self.max_consecutive_errors:
+                raise WaitTimeout(
+                    f"{state['description']}: {state['errors']} ошибок подряд, последняя: {e}",
+                    state.get("value"), e,
+                ) from e
+            return False
+        state["errors"] = 0
+        state["value"] = value
+        return bool(done)
+
+    def _timeout_error(self, state: dict, timeout: float) -> WaitTimeout:
+        return WaitTimeout(
+            f"{state['description']}: состояние не наступило за {timeout:.0f}s, "
+            f"последнее значение: {state.get('value')!r}",
+            state.get("value"), state.get("error"),
+        )
+
+    def _delay(self, intervals: Iterator[float], state: dict, deadline: float) -> float:
+        delay = next(intervals)
+        if state["errors"]:
+            delay = max(delay, self.error_interval)
+        return max(0.0, min(delay, deadline - time.monotonic()))
+
+    def wait(self, fetch: Callable[[], Any], until: Callable[[Any], bool], timeout: float,
+             events: Optional[EventStream] = None, description: str = "status") -> Any:
+        """
+        Вызывает fetch() до тех пор, пока until(значение) не вернёт True.
+
+        Исключения fetch/until (сетевые ошибки, AssertionError на неожиданном
+        состоянии) считаются неудачной проверкой; после max_consecutive_errors
+        подряд - WaitTimeout. Возвращает значение, на котором until сработал.
+
+        ПАРАМЕТРЫ:
+            timeout: предельное время ожидания в секундах
+            events: необязательная подписка EventStream - событие будит ожидание сразу
+            description: имя операции для сообщений об ошибках
+
+        ИСКЛЮЧЕНИЯ:
+            WaitTimeout: состояние не наступило за timeout
+        """
+        deadline = time.monotonic() + timeout
+        intervals = self.intervals()
+        state = {"errors": 0, "description": description}
+        while True:
+            if events is not None:
+                events.changed.clear()
+            if self._step(fetch, until, state):
+                return state["value"]
+            if time.monotonic() >= deadline:
+                raise self._timeout_error(state, timeout)
+            delay = self._delay(intervals, state, deadline)
+            if events is not None and events.available:
+                events.changed.wait(delay)
+            else:
+                time.sleep(delay)
+
+    async def wait_async(self, fetch: Callable[[], Any], until: Callable[[Any], bool], timeout: float,
+                         events: Optional[EventStream] = None, description: str = "status") -> Any:
+        """То же, что wait(), для asyncio: fetch выполняется в потоке, цикл событий не блокируется."""
+        deadline = time.monotonic() + timeout
+        intervals = self.intervals()
+        state = {"errors": 0, "description": description}
+        while True:
+            if events is not None:
+                events.changed.clear()
+            if await asyncio.to_thread(self._step, fetch, until, state):
+                return state["value"]
+            if time.monotonic() >= deadline:
+                raise self._timeout_error(state, timeout)
+            delay = self._delay(intervals, state, deadline)
+            if events is not None and events.available:
+                await asyncio.to_thread(events.changed.wait, delay)
+            else:
+                await asyncio.sleep(delay)
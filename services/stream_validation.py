@@ -0,0 +1,236 @@
+"""
+Потоковая валидация больших JSON-массивов в ответах API.
+
+Эндпоинты вроде analytics-server /ids-events, /log-records, /log_conntrack,
+/cycleLogs и vswitch /connections отдают массивы на десятки мегабайт.
+response.json() держит в памяти и текст ответа, и всё дерево объектов;
+здесь ответ читается кусками (stream=True), элементы массива верхнего уровня
+разбираются по одному и сразу проверяются скомпилированной схемой
+(services/schema_validator.py). В памяти - только текущий кусок и один элемент.
+
+Проверка останавливается, когда проверено sample_size элементов или набрано
+max_errors ошибок; соединение при этом закрывается, остаток ответа не читается.
+Результат - StreamStats: число элементов, байт, время, элементов/с и байт/с.
+
+ИСПОЛЬЗОВАНИЕ:
+    from services.stream_validation import assert_stream_schema
+
+    response = api_client.get("/ids-events", stream=True)
+    stats = assert_stream_schema(response, EVENT_SCHEMA, sample_size=5000)
+    print(stats)   # 5000 items, 3.1 MiB in 0.42s (11904 items/s, 7.4 MiB/s)
+
+    sample = ResponseSample(api_client.get("/log-records", stream=True), limit=1000)
+    sample.status_code, sample.items   # статус и первые 1000 записей
+"""
+import codecs
+import json
+import time
+from typing import Iterable, Iterator, List, Optional
+
+from services.schema_validator import SchemaError, compile_schema, format_errors
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+class StreamStats:
+    """Итог потоковой проверки: объём, скорость и найденные ошибки."""
+
+    def __init__(self):
+        self.items = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.errors: List[SchemaError] = []
+        # None - массив дочитан до конца, иначе "sample_size" или "max_errors"
+        self.stopped_by: Optional[str] = None
+
+    @property
+    def items_per_sec(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 3),
+            "items_per_sec": round(self.items_per_sec, 1),
+            "bytes_per_sec": round(self.bytes_per_sec, 1),
+            "errors": len(self.errors),
+            "stopped_by": self.stopped_by,
+        }
+
+    def __str__(self):
+        mib = 1024 * 1024
+        text = (f"{self.items} items, {self.bytes / mib:.1f} MiB in {self.seconds:.2f}s "
+                f"({self.items_per_sec:.0f} items/s, {self.bytes_per_sec / mib:.1f} MiB/s)")
+        if self.stopped_by:
+            text += f", stopped by {self.stopped_by}"
+        return text
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator:
+    """
+    Элементы JSON-массива верхнего уровня по мере поступления кусков байт.
+
+    Разбор - json.JSONDecoder.raw_decode над буфером текущего куска: элемент
+    принимается, только когда после него уже виден "," или "]", поэтому число,
+    строка или литерал на границе кусков не обрезается.
+
+    ИСКЛЮЧЕНИЯ:
+        ValueError: корень ответа - не массив или JSON некорректен
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf, pos, eof = "", 0, False
+    state = "start"   # start -> first (после "[") -> item (после элемента) -> next (после ",")
+
+    def fill():
+        # Дочитывает кусок; обработанный префикс буфера отбрасывается только здесь,
+        # а не после каждого элемента, чтобы не копировать буфер на каждом шаге
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            eof = True
+            text = utf8.decode(b"", final=True)
+        else:
+            text = utf8.decode(chunk)
+        buf = buf[pos:] + text
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buf):
+            if fill():
+                continue
+            raise ValueError(f"Неожиданный конец JSON-массива (состояние: {state})")
+
+        char = buf[pos]
+        if state == "start":
+            if char != "[":
+                raise ValueError(f"Ожидался JSON-массив, получено: {buf[pos:pos + 40]!r}")
+            pos += 1
+            state = "first"
+        elif char == "]" and state in ("first", "item"):
+            return
+        elif char == "," and state == "item":
+            pos += 1
+            state = "next"
+        elif state in ("first", "next"):
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if fill():
+                    continue
+                raise
+            # Элемент принимается, только если за ним идёт "," или "]": иначе он мог
+            # оборваться на границе куска (1500. | 0, 1e | 3) - дочитываем и разбираем заново
+            tail = end
+            while tail < len(buf) and buf[tail] in _WHITESPACE:
+                tail += 1
+            if (tail >= len(buf) or buf[tail] not in ",]") and fill():
+                continue
+            pos = end
+            state = "item"
+            yield item
+        else:
+            raise ValueError(f"Некорректный JSON-массив около: {buf[pos:pos + 40]!r}")
+
+
+class ResponseSample:
+    """
+    Статус и первые элементы JSON-массива из ответа, полученного с stream=True.
+
+    Читается только начало тела - не больше limit элементов, затем соединение
+    закрывается. Для модульных фикстур, которым нужны статус и выборка записей
+    для поэлементных проверок; полная проверка схемы - validate_stream.
+
+    АТРИБУТЫ:
+        status_code: статус ответа
+        items: первые элементы массива (пусто при статусе не 200 или ошибке разбора)
+        truncated: в ответе больше limit элементов
+        error: ValueError, если тело - не JSON-массив, иначе None
+        text: начало тела ответа при статусе не 200 (для сообщений тестов)
+    """
+
+    def __init__(self, response, limit: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.status_code = response.status_code
+        self.items: list = []
+        self.truncated = False
+        self.error: Optional[ValueError] = None
+        self.text = ""
+        try:
+            if self.status_code != 200:
+                self.text = response.text[:500]
+                return
+            for item in iter_json_array(response.iter_content(chunk_size=chunk_size)):
+                if limit is not None and len(self.items) >= limit:
+                    self.truncated = True
+                    break
+                self.items.append(item)
+        except ValueError as e:
+            self.error = e
+        finally:
+            response.close()
+
+
+def validate_stream(response, schema, sample_size: Optional[int] = None, max_errors: Optional[int] = None,
+                    formats: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE) -> StreamStats:
+    """
+    Проверяет каждый элемент массива из ответа по schema (схема одного элемента).
+
+    response должен быть получен с stream=True, иначе тело уже целиком в памяти.
+    Пути ошибок - от корня ответа: $[1042].alert.severity.
+
+    ПАРАМЕТРЫ:
+        sample_size: проверить не более стольких элементов (None - все)
+        max_errors: остановиться после стольких ошибок (None - без ограничения)
+        formats: проверять format (date-time, ipv4, ...) - см. compile_schema
+        chunk_size: размер куска чтения из сокета
+
+    ИСКЛЮЧЕНИЯ:
+        ValueError: тело ответа - не JSON-массив
+    """
+    compiled = compile_schema(schema, formats)
+    stats = StreamStats()
+    started = time.perf_counter()
+
+    def counted():
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            stats.bytes += len(chunk)
+            yield chunk
+
+    try:
+        for index, item in enumerate(iter_json_array(counted())):
+            stats.items += 1
+            budget = None if max_errors is None else max_errors - len(stats.errors)
+            stats.errors.extend(compiled.errors(item, limit=budget, path=((), index)))
+            if max_errors is not None and len(stats.errors) >= max_errors:
+                stats.stopped_by = "max_errors"
+                break
+            if sample_size is not None and stats.items >= sample_size:
+                stats.stopped_by = "sample_size"
+                break
+    finally:
+        stats.seconds = time.perf_counter() - started
+        # Недочитанный ответ не возвращается в пул - соединение просто закрывается
+        response.close()
+    return stats
+
+
+def assert_stream_schema(response, schema, **kwargs) -> StreamStats:
+    """validate_stream + AssertionError со всеми найденными ошибками и скоростью разбора."""
+    stats = validate_stream(response, schema, **kwargs)
+    if stats.errors:
+        raise AssertionError(f"{format_errors(stats.errors)}\nStream: {stats}")
+    return stats
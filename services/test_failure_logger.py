@@ -1,20 +1,46 @@
 """
 Pytest plugin для логирования непройденных тестов.
+
+Поведение:
+    - Журнал: logs/failed_tests_YYYYMMDD_HHMMSS.jsonl, одна JSON-запись на
+      упавшую фазу теста (setup/call/teardown): nodeid, имя и файл теста,
+      фаза, длительность, сообщение об ошибке, место падения, хеш traceback
+      и сводка последнего запроса api_client (метод, URL, статус, время
+      ответа, начало тела ответа до BODY_LIMIT байт)
+    - Traceback хранится один раз на подпись: logs/failed_tracebacks_YYYYMMDD_HHMMSS/<хеш>.txt.
+      Подпись - текст traceback без секций отчёта (Last API Request/Response) и
+      адресов объектов, поэтому ошибка общей фикстуры или недоступный backend,
+      уронившие сотни тестов, дают один файл, а записи ссылаются на него по хешу
+    - Хук теста только собирает запись и кладёт её в очередь (QueueHandler);
+      в файлы пишет поток QueueListener: записи, накопившиеся в очереди,
+      уходят одним os.write в файл с O_APPEND (не больше BATCH_SIZE за раз)
+    - Файлы создаются при первом падении; под pytest-xdist контроллер передаёт
+      воркерам свою метку времени через workerinput, и все воркеры пишут в
+      один журнал и один каталог traceback (файл traceback создаётся с O_EXCL)
+    - Очередь дописывается и журнал сбрасывается на диск в pytest_unconfigure
 """
 
+import hashlib
+import json
 import logging
+import os
+import queue
+import re
+import sys
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 import pytest
 
 
 class TestLoggingConfig:
     """Конфигурация логирования тестов."""
-    
+
     # Основные настройки
     LOG_DIR = "logs"
     DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
-    
+
     @classmethod
     def get_environment_specific_config(cls):
         """Возвращает конфигурацию в зависимости от окружения."""
@@ -24,40 +50,213 @@ class TestLoggingConfig:
 # Создаем глобальный экземпляр конфигурации
 logging_config = TestLoggingConfig.get_environment_specific_config()
 
+BATCH_SIZE = 100
+BODY_LIMIT = 2048
+MESSAGE_LIMIT = 1000
+HASH_LENGTH = 16
+
+_ADDRESS_RE = re.compile(r"0x[0-9a-fA-F]+")
 
 _failure_logger = None
+_listener = None
+_seen_tracebacks: set[str] = set()
+
+
+class _JsonLinesHandler(logging.Handler):
+    """Пишет записи пачками в JSONL журнал и traceback - в файлы по хешу (поток QueueListener)."""
+
+    def __init__(self, journal_path: Path, tracebacks_dir: Path):
+        super().__init__()
+        self.journal_path = journal_path
+        self.tracebacks_dir = tracebacks_dir
+        self._fd: int | None = None
+        self._buffer: list[bytes] = []
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            traceback = getattr(record, "traceback", None)
+            if traceback is not None:
+                self._write_traceback(*traceback)
+            line = json.dumps(record.failure, ensure_ascii=False, default=str) + "\n"
+            self._buffer.append(line.encode("utf-8"))
+            if len(self._buffer) >= BATCH_SIZE:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def _write_traceback(self, digest: str, text: str):
+        self.tracebacks_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(self.tracebacks_dir / f"{digest}.txt", os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return  # тот же traceback уже записал другой воркер xdist
+        try:
+            os.write(fd, text.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def flush(self):
+        if not self._buffer:
+            return
+        data, self._buffer = b"".join(self._buffer), []
+        try:
+            if self._fd is None:
+                self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                self._fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, data)
+        except OSError as e:
+            sys.stderr.write(f"[failed-tests-log] failed to write journal: {e}\n")
+
+    def close(self):
+        self.flush()
+        if self._fd is not None:
+            try:
+                os.fsync(self._fd)
+                os.close(self._fd)
+            except OSError as e:
+                sys.stderr.write(f"[failed-tests-log] failed to close journal: {e}\n")
+            self._fd = None
+        super().close()
+
+
+class _BatchingQueueListener(QueueListener):
+    """QueueListener, который сбрасывает накопленную пачку, как только очередь опустела."""
+
+    def dequeue(self, block):
+        if block and self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+        return self.queue.get(block)
+
+
+def _log_timestamp(config) -> str:
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput and workerinput.get("failure_log_timestamp"):
+        return workerinput["failure_log_timestamp"]
+    return datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+def _traceback_text(report) -> str:
+    """Traceback отчёта без секций longrepr: Last API Request/Response у каждого теста свои."""
+    longrepr = report.longrepr
+    sections = getattr(longrepr, "sections", None)
+    if not sections:
+        return report.longreprtext
+    longrepr.sections = []
+    try:
+        return report.longreprtext
+    finally:
+        longrepr.sections = sections
+
+
+def _crash_info(report) -> tuple[str, str | None]:
+    crash = getattr(report.longrepr, "reprcrash", None)
+    if crash is None:
+        message = report.longreprtext.strip().splitlines()
+        return (message[-1] if message else ""), None
+    return crash.message, f"{crash.path}:{crash.lineno}"
+
+
+def _last_request_summary(item) -> dict | None:
+    """Сводка последнего запроса api_client (его сохраняет фикстура capture_last_request)."""
+    api_client = getattr(item, "funcargs", {}).get("api_client")
+    last_request = getattr(api_client, "last_request", None)
+    if last_request is None:
+        return None
+    summary = {"method": last_request.method, "url": last_request.url}
+    response = getattr(last_request, "response", None)
+    if response is not None:
+        summary["status"] = response.status_code
+        summary["reason"] = response.reason
+        if response.elapsed is not None:
+            summary["elapsed_ms"] = round(response.elapsed.total_seconds() * 1000, 1)
+        try:
+            content = response.content or b""
+            summary["body_bytes"] = len(content)
+            summary["body"] = content[:BODY_LIMIT].decode(response.encoding or "utf-8", errors="replace")
+        except RuntimeError:
+            # Тело потокового ответа (stream=True) уже прочитано и не сохраняется
+            summary["body"] = "<streamed response body is not retained>"
+    return summary
 
 
 def pytest_configure(config):
-    """Инициализация логгера."""
-    global _failure_logger
-    
+    """Инициализация логгера: очередь в хуках, запись файлов - в потоке QueueListener."""
+    global _failure_logger, _listener
+
+    timestamp = _log_timestamp(config)
+    config._failure_log_timestamp = timestamp
     log_dir = Path(logging_config.LOG_DIR)
-    log_dir.mkdir(exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = log_dir / f"failed_tests_{timestamp}.log"
-    
+    handler = _JsonLinesHandler(log_dir / f"failed_tests_{timestamp}.jsonl",
+                                log_dir / f"failed_tracebacks_{timestamp}")
+
+    log_queue = queue.SimpleQueue()
     logger = logging.getLogger("test_failure_logger")
     logger.setLevel(logging.INFO)
-    handler = logging.FileHandler(log_file, encoding='utf-8')
-    formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(message)s', datefmt=logging_config.DATE_FORMAT)
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    logger.addHandler(QueueHandler(log_queue))
     logger.propagate = False
-    
+
+    _listener = _BatchingQueueListener(log_queue, handler)
+    _listener.start()
     _failure_logger = logger
 
 
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """Передаёт воркеру метку времени журнала контроллера (хук xdist)."""
+    timestamp = getattr(node.config, "_failure_log_timestamp", None)
+    if timestamp:
+        node.workerinput["failure_log_timestamp"] = timestamp
+
+
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
-    """Логирует ошибки и падения тестов."""
+    """Ставит в очередь запись об упавшей фазе теста."""
     outcome = yield
     report = outcome.get_result()
 
-    if report.failed and _failure_logger:
-        test_name = item.name
-        test_file = str(item.fspath)
-        traceback = getattr(report, 'longreprtext', '')
-        stage = report.when.upper()  # CALL, SETUP, TEARDOWN
-        message = f"{stage} FAILED: {test_name} in {test_file}\n{traceback}"
-        _failure_logger.error(message)
\ No newline at end of file
+    if not report.failed or _failure_logger is None:
+        return
+    try:
+        text = _traceback_text(report)
+        digest = hashlib.sha256(_ADDRESS_RE.sub("0x?", text).encode("utf-8")).hexdigest()[:HASH_LENGTH]
+        message, location = _crash_info(report)
+        workerinput = getattr(item.config, "workerinput", None)
+        failure = {
+            "time": datetime.now().strftime(logging_config.DATE_FORMAT),
+            "ts": round(time.time(), 3),
+            "nodeid": item.nodeid,
+            "test_name": item.name,
+            "file": str(item.fspath),
+            "stage": report.when,
+            "outcome": report.outcome,
+            "duration": round(report.duration, 3),
+            "message": message[:MESSAGE_LIMIT],
+            "location": location,
+            "traceback_hash": digest,
+            "last_request": _last_request_summary(item),
+            "worker": workerinput.get("workerid") if workerinput else None,
+        }
+        # Текст traceback уходит в очередь только при первой встрече подписи
+        traceback = None
+        if digest not in _seen_tracebacks:
+            _seen_tracebacks.add(digest)
+            traceback = (digest, text)
+        _failure_logger.error(item.nodeid, extra={"failure": failure, "traceback": traceback})
+    except Exception as e:
+        sys.stderr.write(f"[failed-tests-log] failed to log {item.nodeid}: {e}\n")
+
+
+def pytest_unconfigure(config):
+    """Дописывает очередь и закрывает журнал."""
+    global _failure_logger, _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    if _failure_logger is not None:
+        for handler in list(_failure_logger.handlers):
+            _failure_logger.removeHandler(handler)
+    _listener = None
+    _failure_logger = None
@@ -1,93 +1,147 @@
-"""Минимальный pytest плагин: сохраняет прошедшие тесты в один JSON файл (массив).
+"""Минимальный pytest плагин: журнал прошедших тестов для режима --resume.
 
 Поведение:
     - Без опций командной строки
-    - Путь фиксированный: logs/passed_tests.json
-    - Формат файла: JSON массив объектов
-    - Перед каждым прогоном файл очищается (перезаписывается пустым массивом [])
-    - Запись на диск выполняется один раз в конце сессии
+    - Журнал: logs/passed_tests.jsonl, одна JSON-запись на строку, только дозапись.
+      Каждая запись - один os.write в файл с O_APPEND, поэтому воркеры pytest-xdist
+      пишут в общий журнал без блокировок и без перезаписи файла
+    - fsync выполняется пачками (FSYNC_BATCH записей или FSYNC_INTERVAL секунд)
+      и в конце сессии; после kill процесса запись уже в кеше ОС
+    - Итоговый файл logs/passed_tests.json (JSON массив объектов, прежний формат)
+      собирается из журнала один раз в pytest_sessionfinish
+    - Без --resume журнал и итоговый файл очищаются перед прогоном
+    - С --resume множество уже прошедших nodeid загружается один раз при старте,
+      проверка в pytest_runtest_setup - поиск в set
 """
 
 from pathlib import Path
 import json
+import os
 import sys
+import time
 import pytest
 from _pytest.reports import TestReport
 
 DEFAULT_PASSED_FILE = Path("logs/passed_tests.json")
-_passed_records: list[dict] = []
-_already_passed_cache: set[str] | None = None
+PASSED_JOURNAL_FILE = Path("logs/passed_tests.jsonl")
+FSYNC_BATCH = 50
+FSYNC_INTERVAL = 5.0
+
+_already_passed: set[str] = set()
+_journal_fd: int | None = None
+_unsynced = 0
+_last_fsync = 0.0
+
+
+def _is_xdist_worker(config) -> bool:
+    return hasattr(config, "workerinput")
+
+
+def _read_records() -> list[dict]:
+    """Записи итогового файла и журнала (строка, оборванная при падении, пропускается)."""
+    records = []
+    try:
+        if DEFAULT_PASSED_FILE.exists():
+            records.extend(json.loads(DEFAULT_PASSED_FILE.read_text(encoding="utf-8")))
+    except Exception as e:
+        sys.stderr.write(f"[passed-tests-log] failed to read JSON: {e}\n")
+    try:
+        if PASSED_JOURNAL_FILE.exists():
+            with PASSED_JOURNAL_FILE.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+    except Exception as e:
+        sys.stderr.write(f"[passed-tests-log] failed to read journal: {e}\n")
+    return records
+
+
+def _fsync(force: bool = False):
+    global _unsynced, _last_fsync
+    if _journal_fd is None or not _unsynced:
+        return
+    now = time.monotonic()
+    if force or _unsynced >= FSYNC_BATCH or now - _last_fsync >= FSYNC_INTERVAL:
+        os.fsync(_journal_fd)
+        _unsynced = 0
+        _last_fsync = now
 
 
 def pytest_configure(config):
-    """Инициализация плагина: создаем директорию и очищаем файл."""
+    """Инициализация плагина: очищаем журнал (без --resume) и загружаем индекс прошедших тестов."""
+    global _already_passed, _journal_fd, _last_fsync
     DEFAULT_PASSED_FILE.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Очищаем файл только если НЕ указан --resume
+
+    # Очищаем файлы только если НЕ указан --resume; под xdist - только контроллер,
+    # до запуска воркеров
     resume_enabled = getattr(config, 'resume_enabled', False)
-    if not resume_enabled:
+    if not resume_enabled and not _is_xdist_worker(config):
         try:
             DEFAULT_PASSED_FILE.write_text("[]", encoding="utf-8")
+            PASSED_JOURNAL_FILE.write_text("", encoding="utf-8")
         except Exception as e:
             sys.stderr.write(f"[passed-tests-log] failed to init JSON file: {e}\n")
 
+    _already_passed = {x["nodeid"] for x in _read_records()} if resume_enabled else set()
+
+    try:
+        _journal_fd = os.open(PASSED_JOURNAL_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        _last_fsync = time.monotonic()
+    except OSError as e:
+        sys.stderr.write(f"[passed-tests-log] failed to open journal: {e}\n")
+
 
 def pytest_runtest_setup(item: pytest.Item):
     """Пропускаем тест, если он уже passed ранее."""
-    global _already_passed_cache
-    
-    # Ленивая загрузка кеша один раз для всей сессии
-    if _already_passed_cache is None:
-        try:
-            if DEFAULT_PASSED_FILE.exists():
-                with DEFAULT_PASSED_FILE.open("r", encoding="utf-8") as f:
-                    passed_tests = json.load(f)
-                _already_passed_cache = {x["nodeid"] for x in passed_tests}
-            else:
-                _already_passed_cache = set()
-        except Exception:
-            _already_passed_cache = set()
-    
-    if item.nodeid in _already_passed_cache:
+    if item.nodeid in _already_passed:
         pytest.skip(f"Already passed: {item.nodeid}")
 
 
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item: pytest.Item, call):
-    """Записываем прошедшие тесты."""
+    """Дописываем прошедший тест в журнал."""
+    global _unsynced
     outcome = yield
     report: TestReport = outcome.get_result()
-    
-    if report.when == "call" and report.outcome == "passed":
+
+    if report.when == "call" and report.outcome == "passed" and _journal_fd is not None:
         record = {
             "test_name": item.name,
             "nodeid": item.nodeid,
             "file": str(item.fspath),
             "outcome": report.outcome,
         }
-        _passed_records.append(record)
-        resume_enabled = getattr(item.config, 'resume_enabled', False)
         try:
-            if resume_enabled:
-                if DEFAULT_PASSED_FILE.exists():
-                    with DEFAULT_PASSED_FILE.open("r", encoding="utf-8") as f:
-                        old_records = json.load(f)
-                else:
-                    old_records = []
-                all_records = old_records + [record]
-                DEFAULT_PASSED_FILE.write_text(
-                    json.dumps(all_records, ensure_ascii=False, indent=2),
-                    encoding="utf-8"
-                )
-            else:
-                DEFAULT_PASSED_FILE.write_text(
-                    json.dumps(_passed_records, ensure_ascii=False, indent=2),
-                    encoding="utf-8"
-                )
+            os.write(_journal_fd, (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            _unsynced += 1
+            _fsync()
         except Exception as e:
-            sys.stderr.write(f"[passed-tests-log] failed to write JSON: {e}\n")
+            sys.stderr.write(f"[passed-tests-log] failed to write journal: {e}\n")
 
 
 def pytest_sessionfinish(session, exitstatus):
-    """Сохраняем все прошедшие тесты в JSON файл."""
-    pass
\ No newline at end of file
+    """Сбрасываем журнал на диск и собираем из него итоговый logs/passed_tests.json."""
+    global _journal_fd
+    if _journal_fd is not None:
+        try:
+            _fsync(force=True)
+            os.close(_journal_fd)
+        except OSError as e:
+            sys.stderr.write(f"[passed-tests-log] failed to close journal: {e}\n")
+        _journal_fd = None
+
+    # Воркеры xdist к этому моменту уже завершились - компактирует только контроллер
+    if _is_xdist_worker(session.config):
+        return
+    try:
+        unique = {}
+        for record in _read_records():
+            unique.setdefault(record["nodeid"], record)
+        tmp = DEFAULT_PASSED_FILE.with_name(DEFAULT_PASSED_FILE.name + ".tmp")
+        tmp.write_text(json.dumps(list(unique.values()), ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, DEFAULT_PASSED_FILE)
+        PASSED_JOURNAL_FILE.write_text("", encoding="utf-8")
+    except Exception as e:
+        sys.stderr.write(f"[passed-tests-log] failed to compact journal: {e}\n")
@@ -0,0 +1,48 @@
+"""
+Разбор JSON-массива кусками (services/stream_validation.iter_json_array).
+
+Сервер не нужен: куски байт задаются списком, граница кусков режет числа,
+строки, литералы и многобайтовые символы UTF-8.
+"""
+import json
+
+import pytest
+
+from services.stream_validation import iter_json_array
+
+PARAMS = [
+    pytest.param([b"[1500.", b"0]"], [1500.0], id="P01: float_split_at_dot"),
+    pytest.param([b"[1e", b"3]"], [1000.0], id="P02: exponent_split"),
+    pytest.param([b"[12", b"34, 5]"], [1234, 5], id="P03: integer_split"),
+    pytest.param([b"[-", b"7]"], [-7], id="P04: sign_split"),
+    pytest.param([b'["ab', b'c", "d"]'], ["abc", "d"], id="P05: string_split"),
+    pytest.param([b'["a\\', b'"b"]'], ['a"b'], id="P06: escape_split"),
+    pytest.param([b"[tr", b"ue, nu", b"ll]"], [True, None], id="P07: literals_split"),
+    pytest.param([b'[{"k": 1', b'0}, 2 ', b" ]"], [{"k": 10}, 2], id="P08: object_and_whitespace_split"),
+    pytest.param([b'["\xd0\xbf\xd1', b'\x80\xd0\xb8"]'], ["при"], id="P09: utf8_split"),
+    pytest.param([b"[", b"]"], [], id="P10: empty_array"),
+]
+
+
+@pytest.mark.parametrize("chunks, expected", PARAMS)
+def test_items_split_across_chunks(chunks, expected):
+    assert list(iter_json_array(chunks)) == expected
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_every_split_matches_json_loads(size):
+    data = [1500.0, 1e3, -12, "строка с \"кавычками\"", True, None, {"a": [1, 2.5]}, []]
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    chunks = [body[i:i + size] for i in range(0, len(body), size)]
+    assert list(iter_json_array(chunks)) == json.loads(body)
+
+
+@pytest.mark.parametrize("chunks", [
+    pytest.param([b'{"a": 1}'], id="N01: not_an_array"),
+    pytest.param([b"[1, 2"], id="N02: truncated"),
+    pytest.param([b"[1 2]"], id="N03: missing_comma"),
+    pytest.param([b"[1500.", b"x]"], id="N04: broken_number"),
+])
+def test_invalid_json_raises(chunks):
+    with pytest.raises(ValueError):
+        list(iter_json_array(chunks))
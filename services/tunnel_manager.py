@@ -1,23 +1,143 @@
 """
 Упрощённый менеджер SSH-туннелей для проброса портов.
 Только базовые функции: создать/закрыть туннель, проверить порт.
+
+При запуске под pytest-xdist менеджеры воркеров разделяют туннели через
+SharedTunnelRegistry: туннель на фиксированный локальный порт создаёт первый
+воркер, которому он понадобился, остальные переиспользуют его, а закрывает
+все туннели контроллер xdist в конце прогона.
+
+На Unix туннели мультиплексируются через одно мастер-соединение OpenSSH
+(ControlMaster): SSH-рукопожатие и аутентификация выполняются один раз, а
+каждый туннель добавляется к мастеру командой `ssh -O forward` при первом
+обращении к сервису. Под xdist мастер тоже общий — его control-сокет хранится
+в реестре. На Windows (OpenSSH без ControlMaster) каждый туннель — отдельный
+процесс ssh.
+
+За живостью туннелей следит TunnelSupervisor (tunnel_supervisor.py): он
+перезапускает упавшие туннели через SSHTunnelManager.restart_tunnel.
 """
 import subprocess
 import socket
 import logging
 import platform
 import os
+import json
+import signal
+import time
+import tempfile
+import threading
+from collections import deque
+from pathlib import Path
+
+from file_lock import file_lock
 
 logger = logging.getLogger(__name__)
 
 IS_WINDOWS = platform.system() == "Windows"
 IS_UNIX = not IS_WINDOWS
 
+# Ключ мастер-соединения в SharedTunnelRegistry
+MASTER_KEY = "__master__"
+# Строки stderr ssh, после которых живой процесс уже не пробрасывает трафик
+SSH_FAILURE_MARKERS = (
+    "Timeout, server",
+    "Broken pipe",
+    "Connection closed by",
+    "Connection reset by",
+    "client_loop: send disconnect",
+)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    if IS_WINDOWS:
+        # Без psutil на Windows проверить PID безопасно нельзя — полагаемся на проверку порта
+        return True
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+class SharedTunnelRegistry:
+    """Файл с туннелями прогона: {tunnel_key: {"pid": ..., "local_port": ...}}."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def lock(self):
+        return file_lock(self.path)
+
+    def read(self) -> dict:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, tunnel_key: str, pid: int, local_port: int, **extra):
+        """Вызывается под lock()."""
+        entries = self.read()
+        entries[tunnel_key] = {"pid": pid, "local_port": local_port, **extra}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(entries), encoding="utf-8")
+
+    def log_path(self, tunnel_key: str) -> Path:
+        return self.path.with_name(f"{self.path.stem}_{tunnel_key}.log")
+
+    def terminate_all(self):
+        """Останавливает все ssh процессы прогона (вызывается контроллером xdist)."""
+        with self.lock():
+            entries = self.read()
+            stopped = set()
+            for tunnel_key, entry in entries.items():
+                pid = entry.get("pid")
+                # Туннели мастера имеют его PID — останавливаем мастер один раз
+                if not pid or pid in stopped or not _pid_alive(pid):
+                    continue
+                stopped.add(pid)
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                    logger.info(f"Shared tunnel {tunnel_key} closed (PID: {pid})")
+                except OSError as e:
+                    logger.error(f"Error closing shared tunnel {tunnel_key}: {e}")
+            # Пустые логи ssh не нужны, непустые оставляем для диагностики
+            logs = [self.log_path(key) for key in entries]
+            stale = [p for p in logs if p.exists() and p.stat().st_size == 0]
+            sockets = [Path(e["control_path"]) for e in entries.values() if e.get("control_path")]
+            for path in [self.path, self.path.with_name(self.path.name + ".lock")] + stale + sockets:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+
 class SSHTunnelManager:
-    def __init__(self, mirada_host: str, username: str = "codemaster"):
+    def __init__(self, mirada_host: str, username: str = "codemaster", registry: SharedTunnelRegistry = None,
+                 multiplex: bool = IS_UNIX):
         self.mirada_host = mirada_host
         self.username = username
+        self.registry = registry
+        # ControlMaster не поддерживается OpenSSH для Windows
+        self.multiplex = multiplex and IS_UNIX
         self.tunnels = {}
+        # tunnel_key -> (service_name, local_port, remote_port, remote_host) для перезапуска
+        self.specs = {}
+        self.control_path = None
+        self._master = None
+        self._ssh_exe = None
+        # Хвост stderr собственных процессов ssh: tunnel_key (или MASTER_KEY) -> deque строк
+        self._stderr_tails = {}
+        # create/close/restart вызываются и из тестов, и из потока супервизора
+        self._lock = threading.RLock()
 
     def _test_agent_health(self, local_port: int) -> bool:
         """Проверяет доступность агента по локальному порту."""
@@ -33,7 +153,12 @@ class SSHTunnelManager:
             return False
 
     def _get_ssh_executable(self):
-        """Возвращает путь к SSH клиенту."""
+        """Возвращает путь к SSH клиенту (ищется один раз на менеджер)."""
+        if self._ssh_exe is None:
+            self._ssh_exe = self._find_ssh_executable()
+        return self._ssh_exe
+
+    def _find_ssh_executable(self):
         candidates = [
             'ssh',
             'C:\\Windows\\System32\\OpenSSH\\ssh.exe',
@@ -53,6 +178,13 @@ class SSHTunnelManager:
 
     def create_tunnel(self, service_name: str, local_port: int, remote_port: int, remote_host: str = "127.0.0.1") -> bool:
         """Создаёт SSH-туннель."""
+        with self._lock:
+            if not self._create_tunnel_locked(service_name, local_port, remote_port, remote_host):
+                return False
+            self.specs[f"{service_name}_{local_port}"] = (service_name, local_port, remote_port, remote_host)
+            return True
+
+    def _create_tunnel_locked(self, service_name: str, local_port: int, remote_port: int, remote_host: str) -> bool:
         tunnel_key = f"{service_name}_{local_port}"
         if tunnel_key in self.tunnels:
             proc = self.tunnels[tunnel_key]
@@ -62,60 +194,284 @@ class SSHTunnelManager:
             else:
                 del self.tunnels[tunnel_key]
 
-        ssh_exe = self._get_ssh_executable()
-        if not ssh_exe:
-            logger.error("SSH client not found.")
-            return False
+        if self.registry is None:
+            return self._open_tunnel(tunnel_key, local_port, remote_port, remote_host)
 
-        ssh_cmd = [
-            ssh_exe,
-            "-N",
-            "-L", f"127.0.0.1:{local_port}:{remote_host}:{remote_port}",
+        # Режим xdist: под блокировкой переиспользуем туннель другого воркера или создаём свой
+        with self.registry.lock():
+            entry = self.registry.read().get(tunnel_key)
+            if entry and _pid_alive(entry["pid"]) and self._is_port_available(local_port):
+                self.tunnels[tunnel_key] = _SharedTunnelProcess(entry["pid"])
+                logger.info(f"Tunnel {tunnel_key} reused from another worker (PID: {entry['pid']})")
+                return True
+            if not self._open_tunnel(tunnel_key, local_port, remote_port, remote_host):
+                return False
+            self.registry.record(tunnel_key, self.tunnels[tunnel_key].pid, local_port)
+            return True
+
+    def _open_tunnel(self, tunnel_key: str, local_port: int, remote_port: int, remote_host: str) -> bool:
+        if self.multiplex:
+            return self._forward_tunnel(tunnel_key, local_port, remote_port, remote_host)
+        return self._spawn_tunnel(tunnel_key, local_port, remote_port, remote_host)
+
+    def _ssh_options(self) -> list:
+        known_hosts = "NUL" if IS_WINDOWS else "/dev/null"
+        return [
             "-o", "BatchMode=yes",
             "-o", "StrictHostKeyChecking=no",
-            f"{self.username}@{self.mirada_host}"
+            "-o", f"UserKnownHostsFile={known_hosts}",
+            # Обрыв TCP соединения ssh замечает сам и завершается - супервизор увидит это по poll()
+            "-o", "ServerAliveInterval=15",
+            "-o", "ServerAliveCountMax=3",
         ]
-        if IS_WINDOWS:
-            ssh_cmd += ["-o", "UserKnownHostsFile=NUL"]
-        else:
-            ssh_cmd += ["-o", "UserKnownHostsFile=/dev/null"]
 
+    def _popen_kwargs(self, log_key: str):
+        """Параметры Popen для долгоживущего ssh и открытый лог-файл (под xdist) или None."""
+        # stderr читает _drain_stderr, stdout у ssh -N пуст
         popen_kwargs = {
-            'stdout': subprocess.PIPE,
+            'stdout': subprocess.DEVNULL,
             'stderr': subprocess.PIPE,
-            'stdin': subprocess.PIPE,
+            'stdin': subprocess.DEVNULL,
         }
+        log_file = None
+        if self.registry is not None:
+            # Общий туннель переживает создавший его воркер: вывод в файл, а не в pipe
+            log_file = open(self.registry.log_path(log_key), "ab")
+            popen_kwargs.update({'stdout': log_file, 'stderr': log_file})
         if IS_UNIX and hasattr(os, 'setsid'):
             popen_kwargs['preexec_fn'] = os.setsid
         elif IS_WINDOWS:
             popen_kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        return popen_kwargs, log_file
+
+    def _drain_stderr(self, key: str, proc):
+        """Фоновое чтение stderr ssh: pipe не переполняется, хвост доступен супервизору."""
+        tail = self._stderr_tails[key] = deque(maxlen=20)
+        if proc.stderr is None:
+            return
+
+        def _reader():
+            try:
+                for line in iter(proc.stderr.readline, b""):
+                    tail.append(line.decode(errors="replace").rstrip())
+            except (OSError, ValueError):
+                pass
+
+        threading.Thread(target=_reader, name=f"ssh-stderr-{key}", daemon=True).start()
+
+    def stderr_tail(self, tunnel_key: str) -> list:
+        """
+        Последние строки stderr процесса ssh, который держит туннель. У проброса
+        через мастер своего процесса нет - это stderr мастера, общий для всех
+        пробросов (см. stderr_source).
+        """
+        key = MASTER_KEY if self.multiplex else tunnel_key
+        return list(self._stderr_tails.get(key, ()))
+
+    def stderr_source(self, tunnel_key: str) -> str:
+        """Чей stderr возвращает stderr_tail: для подписи в логах."""
+        return "SSH master" if self.multiplex else f"ssh {tunnel_key}"
+
+    def is_healthy(self, tunnel_key: str, probe: bool = True) -> bool:
+        """
+        Процесс туннеля жив и в stderr нет признаков обрыва; с probe - ещё и
+        локальный порт принимает соединения (а для проброса через мастер
+        мастер отвечает на ssh -O check).
+
+        Подключение к порту проброса открывает канал на удалённой стороне,
+        поэтому супервизор делает его редко (см. TunnelSupervisor.probe_interval).
+        """
+        proc = self.tunnels.get(tunnel_key)
+        spec = self.specs.get(tunnel_key)
+        if proc is None or spec is None or proc.poll() is not None:
+            return False
+        if any(marker in line for line in self.stderr_tail(tunnel_key) for marker in SSH_FAILURE_MARKERS):
+            return False
+        if not probe:
+            return True
+        if isinstance(proc, _ForwardedTunnel) and not self._master_alive():
+            return False
+        return self._is_port_available(spec[1])
+
+    def restart_tunnel(self, tunnel_key: str) -> bool:
+        """Пересоздаёт туннель по сохранённым параметрам create_tunnel."""
+        with self._lock:
+            spec = self.specs.get(tunnel_key)
+            if spec is None:
+                return False
+            proc = self.tunnels.pop(tunnel_key, None)
+            if proc is not None and proc.poll() is None:
+                # Живой, но неработающий туннель: свой ssh останавливаем, проброс через мастер снимаем
+                proc.terminate()
+            if self.multiplex and not self._master_alive() and self._master is not None:
+                if self._master.poll() is None:
+                    self._master.terminate()
+                self._master = None
+            return self._create_tunnel_locked(*spec)
+
+    def _wait_port(self, proc, local_port: int, timeout: float = 10.0) -> bool:
+        """Ждёт, пока туннель начнёт принимать соединения: частые проверки с растущим шагом."""
+        delay = 0.05
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                return False
+            if self._is_port_available(local_port):
+                return True
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        return False
+
+    def _control(self, command: str, *args) -> subprocess.CompletedProcess:
+        """Выполняет `ssh -S <control_path> -O <command>` для мастер-соединения."""
+        cmd = [self._get_ssh_executable(), "-S", self.control_path, "-O", command, *args,
+               f"{self.username}@{self.mirada_host}"]
+        return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL,
+                              timeout=15)
+
+    def _master_alive(self) -> bool:
+        if self._master is None or self._master.poll() is not None:
+            return False
+        try:
+            return self._control("check").returncode == 0
+        except Exception:
+            return False
+
+    def _ensure_master(self) -> bool:
+        """Поднимает мастер-соединение (или подключается к общему мастеру xdist)."""
+        if self._master_alive():
+            return True
+        self._master = None
+        if self.registry is not None:
+            # Вызывается под registry.lock() из create_tunnel
+            entry = self.registry.read().get(MASTER_KEY)
+            if entry and _pid_alive(entry["pid"]):
+                self.control_path = entry["control_path"]
+                self._master = _SharedTunnelProcess(entry["pid"])
+                if self._master_alive():
+                    logger.info(f"SSH master reused from another worker (PID: {entry['pid']})")
+                    return True
+                self._master = None
 
+        ssh_exe = self._get_ssh_executable()
+        if not ssh_exe:
+            logger.error("SSH client not found.")
+            return False
+        # Путь к unix-сокету ограничен ~100 символами, поэтому короткий каталог
+        sock_dir = "/tmp" if os.path.isdir("/tmp") else tempfile.gettempdir()
+        self.control_path = os.path.join(sock_dir, f"qa-ssh-{os.getpid()}-{self.mirada_host}.sock")
+        # Сокет убитого мастера остаётся на диске, и новый ssh -M молча работал бы без мультиплексирования
+        try:
+            os.unlink(self.control_path)
+        except OSError:
+            pass
+        ssh_cmd = [
+            ssh_exe, "-M", "-S", self.control_path, "-N",
+            "-o", "ControlPersist=no",
+            *self._ssh_options(),
+            f"{self.username}@{self.mirada_host}",
+        ]
+        popen_kwargs, log_file = self._popen_kwargs(MASTER_KEY)
         try:
             proc = subprocess.Popen(ssh_cmd, **popen_kwargs)
-            for _ in range(5):
-                if proc.poll() is None and self._is_port_available(local_port):
-                    self.tunnels[tunnel_key] = proc
-                    logger.info(f"Tunnel {tunnel_key} created (PID: {proc.pid})")
+            self._master = proc
+            self._drain_stderr(MASTER_KEY, proc)
+            delay = 0.1
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                if proc.poll() is not None:
+                    break
+                if os.path.exists(self.control_path) and self._master_alive():
+                    logger.info(f"SSH master connection established (PID: {proc.pid})")
+                    if self.registry is not None:
+                        self.registry.record(MASTER_KEY, proc.pid, 0, control_path=self.control_path)
                     return True
-                else:
-                    logger.info(f"Waiting for tunnel {tunnel_key}...")
-                    import time; time.sleep(2)
-            proc.terminate()
-            logger.error(f"Tunnel {tunnel_key} failed to start.")
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+            if proc.poll() is None:
+                proc.terminate()
+            self._master = None
+            logger.error("SSH master connection failed to start.")
+            return False
+        except Exception as e:
+            self._master = None
+            logger.error(f"Error starting SSH master connection: {e}")
             return False
+        finally:
+            if log_file is not None:
+                log_file.close()
+
+    def _forward_tunnel(self, tunnel_key: str, local_port: int, remote_port: int, remote_host: str) -> bool:
+        """Добавляет проброс порта к мастер-соединению без нового SSH-рукопожатия."""
+        if not self._ensure_master():
+            return False
+        spec = f"127.0.0.1:{local_port}:{remote_host}:{remote_port}"
+        try:
+            result = self._control("forward", "-L", spec)
         except Exception as e:
             logger.error(f"Error creating tunnel: {e}")
             return False
+        if result.returncode != 0:
+            logger.error(f"Tunnel {tunnel_key} failed to start: {result.stderr.decode(errors='replace').strip()}")
+            return False
+        # Мастер открывает listen-сокет до ответа на -O forward; ждём лишь на всякий случай
+        tunnel = _ForwardedTunnel(self, spec)
+        if self._wait_port(tunnel, local_port, timeout=2.0):
+            self.tunnels[tunnel_key] = tunnel
+            logger.info(f"Tunnel {tunnel_key} forwarded via SSH master (PID: {self._master.pid})")
+            return True
+        logger.error(f"Tunnel {tunnel_key} failed to start.")
+        return False
+
+    def _spawn_tunnel(self, tunnel_key: str, local_port: int, remote_port: int, remote_host: str) -> bool:
+        ssh_exe = self._get_ssh_executable()
+        if not ssh_exe:
+            logger.error("SSH client not found.")
+            return False
+
+        ssh_cmd = [
+            ssh_exe,
+            "-N",
+            "-L", f"127.0.0.1:{local_port}:{remote_host}:{remote_port}",
+            *self._ssh_options(),
+            f"{self.username}@{self.mirada_host}"
+        ]
+
+        popen_kwargs, log_file = self._popen_kwargs(tunnel_key)
+        try:
+            proc = subprocess.Popen(ssh_cmd, **popen_kwargs)
+            self._drain_stderr(tunnel_key, proc)
+            if self._wait_port(proc, local_port):
+                self.tunnels[tunnel_key] = proc
+                logger.info(f"Tunnel {tunnel_key} created (PID: {proc.pid})")
+                return True
+            if proc.poll() is None:
+                proc.terminate()
+            logger.error(f"Tunnel {tunnel_key} failed to start: {' | '.join(self.stderr_tail(tunnel_key))}")
+            return False
+        except Exception as e:
+            logger.error(f"Error creating tunnel: {e}")
+            return False
+        finally:
+            if log_file is not None:
+                log_file.close()
 
     def close_tunnel(self, service_name: str, local_port: int) -> bool:
         """Закрывает SSH-туннель."""
         tunnel_key = f"{service_name}_{local_port}"
+        with self._lock:
+            # Намеренно закрытый туннель супервизор не перезапускает
+            self.specs.pop(tunnel_key, None)
+            return self._close_tunnel_locked(tunnel_key)
+
+    def _close_tunnel_locked(self, tunnel_key: str) -> bool:
         if tunnel_key not in self.tunnels:
             logger.info(f"Tunnel {tunnel_key} not found.")
             return True
         proc = self.tunnels[tunnel_key]
         try:
-            if proc.poll() is None:
+            # Общие туннели xdist закрывает контроллер, воркер только забывает о них
+            if self.registry is None and proc.poll() is None:
                 proc.terminate()
             del self.tunnels[tunnel_key]
             logger.info(f"Tunnel {tunnel_key} closed.")
@@ -123,3 +479,57 @@ class SSHTunnelManager:
         except Exception as e:
             logger.error(f"Error closing tunnel: {e}")
             return False
+
+    def close_all(self):
+        """Закрывает все туннели менеджера и его мастер-соединение."""
+        with self._lock:
+            self._close_all_locked()
+
+    def _close_all_locked(self):
+        for key in list(self.tunnels.keys()):
+            self.specs.pop(key, None)
+            self._close_tunnel_locked(key)
+        # Общий мастер xdist останавливает контроллер
+        if self.registry is None and self._master is not None and self._master.poll() is None:
+            try:
+                self._control("exit")
+            except Exception as e:
+                logger.error(f"Error closing SSH master connection: {e}")
+            try:
+                self._master.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._master.terminate()
+            logger.info("SSH master connection closed.")
+        self._master = None
+
+
+class _ForwardedTunnel:
+    """Туннель внутри мастер-соединения: минимальный интерфейс Popen."""
+
+    def __init__(self, manager: SSHTunnelManager, spec: str):
+        self.manager = manager
+        self.spec = spec
+        self.pid = manager._master.pid
+
+    def poll(self):
+        master = self.manager._master
+        return None if master is not None and master.poll() is None else 0
+
+    def terminate(self):
+        try:
+            self.manager._control("cancel", "-L", self.spec)
+        except Exception as e:
+            logger.error(f"Error cancelling forward {self.spec}: {e}")
+
+
+class _SharedTunnelProcess:
+    """Туннель, созданный другим воркером: минимальный интерфейс Popen."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+
+    def poll(self):
+        return None if _pid_alive(self.pid) else 0
+
+    def terminate(self):
+        pass
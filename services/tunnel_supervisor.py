@@ -0,0 +1,188 @@
+"""
+Фоновый супервизор SSH-туннелей.
+
+Поток раз в interval секунд проверяет каждый туннель SSHTunnelManager по
+признакам, которые ничего не стоят: poll() процесса ssh и хвост его stderr.
+Подключение к локальному порту (и ssh -O check мастера) открывает канал на
+удалённой стороне, поэтому делается раз в probe_interval секунд, пока туннель
+в простое, и сразу после того, как api_client сообщил об ошибке соединения
+(report_failure). Упавший туннель перезапускается с экспоненциальной задержкой
+и случайным разбросом, чтобы воркеры xdist не переподключались синхронно.
+
+Для каждого локального порта есть событие готовности: api_client перед
+запросом ждёт его (wait_ready) вместо того, чтобы падать с ConnectionError,
+пока туннель восстанавливается. Число переподключений и суммарное время
+простоя попадают в итоговый отчёт сессии.
+"""
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TunnelSupervisor:
+    def __init__(self, manager, interval: float = 1.0, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 probe_interval: float = 30.0):
+        self.manager = manager
+        self.interval = interval
+        self.probe_interval = probe_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._ready = {}        # local_port -> threading.Event
+        self._down_since = {}   # tunnel_key -> time.monotonic() начала простоя
+        self._attempts = {}     # tunnel_key -> неудачных попыток подряд
+        self._next_try = {}     # tunnel_key -> время следующей попытки перезапуска
+        self._stats = {}        # tunnel_key -> {"reconnects", "failures", "downtime"}
+        self._next_probe = {}   # tunnel_key -> время следующей проверки порта
+        self._suspect = set()   # tunnel_key, для которых api_client видел ошибку соединения
+        self._lock = threading.Lock()
+        # Проверку и перезапуск одного туннеля выполняет только один поток
+        self._check_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ssh-tunnel-supervisor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        # Незакрытый простой тоже учитываем в отчёте
+        now = time.monotonic()
+        with self._lock:
+            for key, since in self._down_since.items():
+                self._entry(key)["downtime"] += now - since
+            self._down_since.clear()
+            # Ожидающие тесты не должны висеть после остановки
+            for event in self._ready.values():
+                event.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check_once()
+            except Exception as e:
+                logger.error(f"Tunnel supervisor check failed: {e}")
+
+    def _entry(self, key: str) -> dict:
+        return self._stats.setdefault(key, {"reconnects": 0, "failures": 0, "downtime": 0.0})
+
+    def _event(self, local_port: int) -> threading.Event:
+        with self._lock:
+            event = self._ready.get(local_port)
+            if event is None:
+                # Туннель, созданный через create_tunnel, уже принимает соединения
+                event = self._ready[local_port] = threading.Event()
+                event.set()
+            return event
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempts))
+        return delay * random.uniform(0.5, 1.5)
+
+    def check_once(self):
+        """Один проход проверки всех туннелей менеджера."""
+        for key in list(self.manager.specs):
+            if self._stop.is_set():
+                return
+            self._check(key)
+
+    def _check(self, key: str):
+        with self._check_lock:
+            spec = self.manager.specs.get(key)
+            if spec is None:
+                return
+            event = self._event(spec[1])
+            now = time.monotonic()
+            with self._lock:
+                probe = (key in self._suspect or key in self._down_since
+                         or now >= self._next_probe.get(key, 0))
+                if probe:
+                    self._suspect.discard(key)
+                    self._next_probe[key] = now + self.probe_interval
+            if self.manager.is_healthy(key, probe=probe):
+                self._mark_up(key, event)
+                return
+
+            now = time.monotonic()
+            with self._lock:
+                if key not in self._down_since:
+                    self._down_since[key] = now
+                    self._entry(key)["failures"] += 1
+                    event.clear()
+                    tail = " | ".join(self.manager.stderr_tail(key)[-3:])
+                    source = self.manager.stderr_source(key)
+                    logger.warning(f"Tunnel {key} is down{f' ({source} stderr: {tail})' if tail else ''}")
+                if now < self._next_try.get(key, 0):
+                    return
+
+            if self.manager.restart_tunnel(key):
+                with self._lock:
+                    self._entry(key)["reconnects"] += 1
+                logger.info(f"Tunnel {key} reconnected")
+                self._mark_up(key, event)
+            else:
+                with self._lock:
+                    attempts = self._attempts.get(key, 0) + 1
+                    self._attempts[key] = attempts
+                    delay = self._backoff(attempts)
+                    self._next_try[key] = time.monotonic() + delay
+                logger.warning(f"Tunnel {key} reconnect attempt {attempts} failed, next in {delay:.1f}s")
+
+    def _mark_up(self, key: str, event: threading.Event):
+        with self._lock:
+            since = self._down_since.pop(key, None)
+            if since is not None:
+                self._entry(key)["downtime"] += time.monotonic() - since
+            self._attempts.pop(key, None)
+            self._next_try.pop(key, None)
+        event.set()
+
+    def wait_ready(self, local_port: int, timeout: float = None) -> bool:
+        """
+        Блокирует до готовности туннеля на local_port.
+        Порт, который супервизор не ведёт (прямое подключение, --host/--port), считается готовым.
+        """
+        if self._stop.is_set():
+            return True
+        key = next((k for k, spec in list(self.manager.specs.items()) if spec[1] == local_port), None)
+        if key is None:
+            return True
+        event = self._event(local_port)
+        if event.is_set():
+            # Смерть ssh между проходами супервизора видна по poll() без сетевых проверок
+            proc = self.manager.tunnels.get(key)
+            if proc is not None and proc.poll() is None:
+                return True
+            self._check(key)
+        return event.wait(timeout)
+
+    def report_failure(self, local_port: int):
+        """
+        Ошибка соединения через туннель на local_port (вызывает api_client):
+        туннель сразу проверяется с подключением к порту и при обрыве перезапускается.
+        """
+        if self._stop.is_set():
+            return
+        key = next((k for k, spec in list(self.manager.specs.items()) if spec[1] == local_port), None)
+        if key is None:
+            return
+        with self._lock:
+            self._suspect.add(key)
+        self._check(key)
+
+    def stats(self) -> dict:
+        """{tunnel_key: {"reconnects": int, "failures": int, "downtime": секунды}}."""
+        now = time.monotonic()
+        with self._lock:
+            result = {key: dict(entry) for key, entry in self._stats.items()}
+            for key, since in self._down_since.items():
+                result.setdefault(key, {"reconnects": 0, "failures": 0, "downtime": 0.0})
+                result[key]["downtime"] += now - since
+        return result
@@ -4,6 +4,7 @@ import requests
 from typing import List, Dict, Any, Union
 from services.qa_constants import SERVICES
 import re
+from services.schema_validator import assert_schema
 
 # =====================================================================================================================
 # Constants
@@ -51,6 +52,8 @@ response_schemas = {
                 "error": {"type": "string"}
             },
             "required": ["index", "cmd"],
+            # Хотя бы одно из res/error обязательно
+            "anyOf": [{"required": ["res"]}, {"required": ["error"]}],
         },
         "minItems": 1,
         "maxItems": 2
@@ -144,35 +147,6 @@ def test_certs_stability_with_params(api_client, attach_curl_on_fail, param, val
 # Helpers for schema validation and curl logging
 # =====================================================================================================================
 
-def _check_types_recursive(obj, schema):
-    if isinstance(schema, type):
-        assert isinstance(obj, schema), f"Expected {schema}, got {type(obj)}"
-        return
-    if schema.get("type") == "object":
-        assert isinstance(obj, dict), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-        # Для POST: хотя бы одно из res/error обязательно
-        if set(["res", "error"]).intersection(schema.get("properties", {}).keys()):
-            assert ("res" in obj or "error" in obj), f"Object must have 'res' or 'error': {obj}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, list), f"Expected array, got {type(obj)}"
-        if "minItems" in schema:
-            assert len(obj) >= schema["minItems"], f"Array too short: {len(obj)} < {schema['minItems']}"
-        if "maxItems" in schema:
-            assert len(obj) <= schema["maxItems"], f"Array too long: {len(obj)} > {schema['maxItems']}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    elif schema.get("type") == "string":
-        assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-    elif schema.get("type") == "integer":
-        assert isinstance(obj, int), f"Expected integer, got {type(obj)}"
-    else:
-        raise AssertionError(f"Unknown schema type: {schema}")
-
 # R24: manual curl helpers removed; rely on attach_curl_on_fail fixture
 
 def _has_uuid_path(cmd):
@@ -271,7 +245,7 @@ def test_certificates_certs_post_valid(api_client, attach_curl_on_fail, payload,
         response = api_client.post(ENDPOINT, json=payload, headers=post_headers)
         assert response.status_code == expected_status, f"Expected status {expected_status}, got {response.status_code}"
         data = response.json()
-        _check_types_recursive(data, response_schemas["POST"])
+        assert_schema(data, response_schemas["POST"], strict=True)
         for item in data:
             if "error" not in item or not item["error"]:
                 assert _has_uuid_path(item["cmd"]), f"cmd does not contain uuid path: {item}"
@@ -4,6 +4,7 @@ import base64
 import requests
 from services.qa_constants import SERVICES
 import os
+from services.schema_validator import assert_schema
 
 # =====================================================================================================================
 # Constants
@@ -40,42 +41,6 @@ response_schemas = {
 # Helpers for schema validation and curl logging
 # =====================================================================================================================
 
-def _check_types_recursive(obj, schema):
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Value {obj} does not match anyOf {schema['anyOf']}"
-        return
-    if schema.get("type") == "object":
-        assert isinstance(obj, dict), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, list), f"Expected array, got {type(obj)}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    elif schema.get("type") == "string":
-        assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-    elif schema.get("type") == "integer":
-        assert isinstance(obj, int), f"Expected integer, got {type(obj)}"
-    elif schema.get("type") == "boolean":
-        assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-    elif schema.get("type") == "null":
-        assert obj is None, f"Expected null, got {type(obj)}"
-    # Не проверяем unknown type
-
-def _try_type(obj, schema):
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
-
-
-
 # =====================================================================================================================
 # Фикстуры для валидных/текущих сертификатов и ключей
 # =====================================================================================================================
@@ -180,7 +145,7 @@ def test_certificates_certs_set(api_client, payload, expected_status, resp_schem
         assert response.status_code == expected_status, f"Expected status {expected_status}, got {response.status_code}"
         data = response.json()
         # Проверка схемы
-        _check_types_recursive(data, response_schemas[resp_schema])
+        assert_schema(data, response_schemas[resp_schema])
         # Дополнительные проверки по статусу
         if expected_status == 200:
             assert data.get("result") == "OK", f"Expected result OK, got {data}"
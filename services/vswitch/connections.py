@@ -11,13 +11,32 @@ from typing import List, Dict, Any, Union
 ENDPOINT = "/connections"
 
 # The schema is defined based on documentation/expectations for when the list is not empty.
-# It is not used in current tests but is kept for future reference and maintenance.
+# Its field list is also the "required" list of CONNECTION_STREAM_SCHEMA below.
 CONNECTION_ITEM_SCHEMA = {
     "proto": (str, int), "ether_type": str, "id": int, "dst_addr": str, "src_addr": str,
     "bytes": int, "packets": int, "state": str, "status": str, "repl_dst_port": int,
     "repl_src_port": int, "dst_port": int, "src_port": int,
 }
 
+# Checks applied to every connection object of a non-empty list: all fields are present,
+# key fields have the expected types, ports are in range, counters are non-negative.
+PORT_SCHEMA = {"type": "integer", "minimum": 0, "maximum": 65535}
+CONNECTION_STREAM_SCHEMA = {
+    "type": "object",
+    "required": list(CONNECTION_ITEM_SCHEMA),
+    "properties": {
+        "proto": {"type": ["string", "integer"]},
+        "ether_type": {"type": "string"},
+        "id": {"type": "integer"},
+        "dst_addr": {"type": "string"},
+        "src_addr": {"type": "string"},
+        "dst_port": PORT_SCHEMA,
+        "src_port": PORT_SCHEMA,
+        "bytes": {"minimum": 0},
+        "packets": {"minimum": 0},
+    },
+}
+
 # =====================================================================================================================
 # Fixtures
 # =====================================================================================================================
@@ -46,43 +65,14 @@ def test_connections_response_is_list(response_data, attach_curl_on_fail):
     with attach_curl_on_fail(ENDPOINT, method="GET"):
         assert isinstance(response_data, list), f"Expected list, got {type(response_data)}"
 
-def test_connections_response_structure(response_data, attach_curl_on_fail):
-    """Test 3: Verifies that the response contains valid connection objects with proper structure."""
+def test_connections_response_structure(stream_validator, attach_curl_on_fail):
+    """
+    Test 3: Verifies that the response contains valid connection objects with proper structure.
+    The connection table can be large, so it is parsed incrementally and each
+    connection is validated as it arrives.
+    """
     with attach_curl_on_fail(ENDPOINT, method="GET"):
-        # Проверяем, что это список
-        assert isinstance(response_data, list), f"Expected list, got {type(response_data)}"
-        
-        # Если список не пустой, проверяем структуру каждого элемента
-        if response_data:
-            for i, connection in enumerate(response_data):
-                assert isinstance(connection, dict), f"Connection {i} is not a dict: {type(connection)}"
-                
-                # Проверяем обязательные поля согласно схеме
-                required_fields = ['proto', 'ether_type', 'id', 'dst_addr', 'src_addr', 
-                                 'bytes', 'packets', 'state', 'status', 'repl_dst_port', 
-                                 'repl_src_port', 'dst_port', 'src_port']
-                
-                for field in required_fields:
-                    assert field in connection, f"Connection {i} missing required field: {field}"
-                
-                # Проверяем типы ключевых полей
-                assert isinstance(connection['proto'], (str, int)), f"Connection {i} proto should be string or int, got {type(connection['proto'])}"
-                assert isinstance(connection['ether_type'], str), f"Connection {i} ether_type should be string, got {type(connection['ether_type'])}"
-                assert isinstance(connection['id'], int), f"Connection {i} id should be int, got {type(connection['id'])}"
-                assert isinstance(connection['dst_addr'], str), f"Connection {i} dst_addr should be string, got {type(connection['dst_addr'])}"
-                assert isinstance(connection['src_addr'], str), f"Connection {i} src_addr should be string, got {type(connection['src_addr'])}"
-                
-                # Проверяем, что порты являются числами
-                assert isinstance(connection['dst_port'], int), f"Connection {i} dst_port should be int, got {type(connection['dst_port'])}"
-                assert isinstance(connection['src_port'], int), f"Connection {i} src_port should be int, got {type(connection['src_port'])}"
-                
-                # Проверяем диапазон портов (0-65535)
-                assert 0 <= connection['dst_port'] <= 65535, f"Connection {i} dst_port out of range: {connection['dst_port']}"
-                assert 0 <= connection['src_port'] <= 65535, f"Connection {i} src_port out of range: {connection['src_port']}"
-                
-                # Проверяем, что bytes и packets неотрицательные
-                assert connection['bytes'] >= 0, f"Connection {i} bytes should be non-negative, got {connection['bytes']}"
-                assert connection['packets'] >= 0, f"Connection {i} packets should be non-negative, got {connection['packets']}"
+        stream_validator(ENDPOINT, CONNECTION_STREAM_SCHEMA)
 
 # =====================================================================================================================
 # Parametrized Stability Tests
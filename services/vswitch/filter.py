@@ -3,6 +3,7 @@ import pytest
 import requests
 import uuid
 from services.qa_constants import SERVICES
+from services.schema_validator import assert_schema
 
 # --- Константы и endpoint ---
 ENDPOINT = "filter"
@@ -11,7 +12,6 @@ PORT = SERVICE["port"]
 BASE_PATH = SERVICE["base_path"]
 
 
-
 @pytest.fixture(scope="module")
 def api_client(request_timeout):
     base_url = f"http://{SERVICE['host']}:{SERVICE['port']}{BASE_PATH}"
@@ -79,40 +79,6 @@ response_schemas = {
 }
 
 # --- Проверка структуры ответа рекурсивно ---
-def _check_types_recursive(obj, schema):
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Value {obj} does not match anyOf {schema['anyOf']}"
-        return
-    if schema.get("type") == "object":
-        assert isinstance(obj, dict), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, list), f"Expected array, got {type(obj)}"
-        for item in obj:
-            _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int), f"Expected integer, got {type(obj)}"
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-        elif schema.get("type") == "null":
-            assert obj is None, f"Expected null, got {type(obj)}"
-
-def _try_type(obj, schema):
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
-
-
 # --- Генерация уникальных валидных payload ---
 def make_unique_rule(action="accept", zones=None):
     if zones is None:
@@ -435,11 +401,11 @@ def test_post_filter(api_client, attach_curl_on_fail, agent_verification, payloa
             resp_json = response.json()
             # Для кейса дубликата — возможно частичный успех (error не null)
             if case_id in ["insert-duplicate-rule"]:
-                _check_types_recursive(resp_json, response_schemas["POST_OK_PARTIAL"])
+                assert_schema(resp_json, response_schemas["POST_OK_PARTIAL"])
                 # хотя бы одна запись с error != null
                 assert any(x.get("error") for x in resp_json), "No partial errors found for duplicate"
             else:
-                _check_types_recursive(resp_json, response_schemas["POST"])
+                assert_schema(resp_json, response_schemas["POST"])
                 # Проверяем, что у всех error == null
                 assert all(x.get("error") is None for x in resp_json), "Unexpected error in successful insert"
         elif expected_status == 400:
@@ -449,11 +415,11 @@ def test_post_filter(api_client, attach_curl_on_fail, agent_verification, payloa
                     resp_json = response.json()
                     # parse-error или error-object
                     if "parse-error" in resp_json:
-                        _check_types_recursive(resp_json, response_schemas["POST_ERROR"])
+                        assert_schema(resp_json, response_schemas["POST_ERROR"])
                     elif isinstance(resp_json.get("error"), dict):
-                        _check_types_recursive(resp_json, response_schemas["POST_OBJECT_ERROR"])
+                        assert_schema(resp_json, response_schemas["POST_OBJECT_ERROR"])
                     else:
-                        _check_types_recursive(resp_json, response_schemas["POST_ERROR"])
+                        assert_schema(resp_json, response_schemas["POST_ERROR"])
                 except Exception:
                     pass  # Не JSON — допустимо для битого JSON (malformed-json)
             else:
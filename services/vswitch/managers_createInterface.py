@@ -1,10 +1,9 @@
 import json
 import pytest
 import requests
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 from services.qa_constants import SERVICES
 import uuid
-import time
 
 # =====================================================================================================================
 # Constants
@@ -15,14 +14,6 @@ SERVICE = SERVICES["vswitch"][0]  # Используем первый серви
 PORT = SERVICE["port"]
 BASE_PATH = SERVICE["base_path"]
 
-# =====================================================================================================================
-# Delay before each test in this module
-# =====================================================================================================================
-
-@pytest.fixture(autouse=True)
-def _delay_before_each_test():
-    time.sleep(1)
-
 # =====================================================================================================================
 # Response Schemas
 # =====================================================================================================================
@@ -48,44 +39,6 @@ response_schemas = {
 # Recursive Schema Validation
 # =====================================================================================================================
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивная проверка типов согласно схеме."""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Value {obj} does not match anyOf {schema['anyOf']}"
-        return
-    if schema.get("type") == "object":
-        assert isinstance(obj, Mapping), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Expected array, got {type(obj)}"
-        if "items" in schema and isinstance(schema["items"], list):
-            for idx, (item, item_schema) in enumerate(zip(obj, schema["items"])):
-                _check_types_recursive(item, item_schema)
-        else:
-            for item in obj:
-                _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int), f"Expected integer, got {type(obj)}"
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-        elif schema.get("type") == "null":
-            assert obj is None, f"Expected null, got {type(obj)}"
-
-def _try_type(obj, schema):
-    """Попытка проверить тип без исключения."""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
 # =====================================================================================================================
 # Curl Command Formatter
 # =====================================================================================================================
@@ -296,7 +249,7 @@ def test_post_createInterface(api_client, attach_curl_on_fail, payload, expected
         response = api_client.post(ENDPOINT, json=payload, headers=headers)
         assert response.status_code == expected_status, f"Expected status {expected_status}, got {response.status_code}"
         response_data = response.json()
-        _check_types_recursive(response_data, response_schemas["POST"])
+        assert_schema(response_data, response_schemas["POST"])
 
         if expected_status == 200 and isinstance(payload, dict) and "name" in payload:
             assert isinstance(response_data, list), "Response should be an array"
@@ -489,7 +442,7 @@ def test_createInterface_stability(api_client, attach_curl_on_fail, test_id):
         response = api_client.post(ENDPOINT, json=payload, headers=headers)
         assert response.status_code == 200
         data = response.json()
-        _check_types_recursive(data, response_schemas["POST"])
+        assert_schema(data, response_schemas["POST"])
         assert isinstance(data, list), "Response should be an array"
         
         # Дополнительная проверка через агента
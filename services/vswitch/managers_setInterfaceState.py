@@ -1,6 +1,6 @@
 import json
 import pytest
-from collections.abc import Mapping, Sequence
+from services.schema_validator import assert_schema
 from services.qa_constants import SERVICES
 
 # =====================================================================================================================
@@ -37,44 +37,6 @@ response_schemas = {
 # Recursive Schema Validation
 # =====================================================================================================================
 
-def _check_types_recursive(obj, schema):
-    """Рекурсивная проверка типов согласно схеме."""
-    if "anyOf" in schema:
-        assert any(_try_type(obj, s) for s in schema["anyOf"]), f"Value {obj} does not match anyOf {schema['anyOf']}"
-        return
-    if schema.get("type") == "object":
-        assert isinstance(obj, Mapping), f"Expected object, got {type(obj)}"
-        for key, prop in schema.get("properties", {}).items():
-            if key in obj:
-                _check_types_recursive(obj[key], prop)
-        for req in schema.get("required", []):
-            assert req in obj, f"Missing required field: {req}"
-    elif schema.get("type") == "array":
-        assert isinstance(obj, Sequence) and not isinstance(obj, str), f"Expected array, got {type(obj)}"
-        if "items" in schema and isinstance(schema["items"], list):
-            for idx, (item, item_schema) in enumerate(zip(obj, schema["items"])):
-                _check_types_recursive(item, item_schema)
-        else:
-            for item in obj:
-                _check_types_recursive(item, schema["items"])
-    else:
-        if schema.get("type") == "string":
-            assert isinstance(obj, str), f"Expected string, got {type(obj)}"
-        elif schema.get("type") == "integer":
-            assert isinstance(obj, int), f"Expected integer, got {type(obj)}"
-        elif schema.get("type") == "boolean":
-            assert isinstance(obj, bool), f"Expected boolean, got {type(obj)}"
-        elif schema.get("type") == "null":
-            assert obj is None, f"Expected null, got {type(obj)}"
-
-def _try_type(obj, schema):
-    """Попытка проверить тип без исключения."""
-    try:
-        _check_types_recursive(obj, schema)
-        return True
-    except AssertionError:
-        return False
-
 # =====================================================================================================================
 # Helpers
 # =====================================================================================================================
@@ -314,7 +276,7 @@ def test_post_setInterfaceState(api_client, attach_curl_on_fail, agent_verificat
         # Для успешных запросов проверяем схему ответа
         if expected_status == 200:
             data = response.json()
-            _check_types_recursive(data, response_schemas["POST"])
+            assert_schema(data, response_schemas["POST"])
             
             # Проверяем, что ответ - это массив
             assert isinstance(data, list), "Response should be an array"
@@ -404,7 +366,7 @@ def test_post_setInterfaceState_dynamic(api_client, attach_curl_on_fail, agent_v
             # Для успешных запросов проверяем схему ответа
             if expected_status == 200:
                 data = response.json()
-                _check_types_recursive(data, response_schemas["POST"])
+                assert_schema(data, response_schemas["POST"])
                 
                 # Проверяем, что ответ - это массив
                 assert isinstance(data, list), "Response should be an array"
@@ -469,7 +431,7 @@ def test_setInterfaceState_response_structure(api_client, attach_curl_on_fail, a
         assert response.status_code == 200
         
         data = response.json()
-        _check_types_recursive(data, response_schemas["POST"])
+        assert_schema(data, response_schemas["POST"])
         
         # Дополнительные проверки структуры
         assert len(data) > 0, "Response should contain at least one command"
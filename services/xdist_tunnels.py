@@ -0,0 +1,84 @@
+"""Pytest плагин: общие SSH-туннели для воркеров pytest-xdist.
+
+Поведение:
+    - Без -n плагин ничего не делает, каждый прогон работает как раньше
+    - Контроллер xdist выбирает файл реестра туннелей logs/tunnels/tunnels_<pid>.json
+      и передаёт путь воркерам через workerinput
+    - Воркеры создают туннели лениво и регистрируют их в файле; туннель на
+      фиксированный порт из TUNNEL_CONFIG создаётся ровно один раз за прогон
+    - Контроллер останавливает все зарегистрированные туннели в pytest_unconfigure
+    - Статистика супервизора туннелей воркеров (переподключения, простой)
+      передаётся контроллеру через workeroutput и сводится в один отчёт
+"""
+
+import os
+from pathlib import Path
+import pytest
+
+from services.tunnel_manager import SharedTunnelRegistry
+
+TUNNEL_REGISTRY_DIR = Path("logs/tunnels")
+
+
+def is_xdist_controller(config) -> bool:
+    return bool(getattr(config.option, "numprocesses", None)) and not hasattr(config, "workerinput")
+
+
+def shared_tunnel_registry(config):
+    """Реестр туннелей для текущего процесса или None, если прогон не под xdist."""
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput and workerinput.get("tunnel_registry"):
+        return SharedTunnelRegistry(workerinput["tunnel_registry"])
+    return None
+
+
+def record_tunnel_stats(config, stats: dict):
+    """
+    Сохраняет статистику TunnelSupervisor для итогового отчёта.
+    На воркере xdist - в workeroutput (уходит контроллеру), иначе - в config._tunnel_stats.
+    """
+    workeroutput = getattr(config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["tunnel_stats"] = stats
+    else:
+        merge_tunnel_stats(config, stats)
+
+
+def merge_tunnel_stats(config, stats: dict):
+    # Простой общего туннеля видят все воркеры сразу - берём максимум, а не сумму
+    merged = getattr(config, "_tunnel_stats", None)
+    if merged is None:
+        merged = config._tunnel_stats = {}
+    for key, entry in stats.items():
+        target = merged.setdefault(key, {"reconnects": 0, "failures": 0, "downtime": 0.0})
+        target["reconnects"] += entry.get("reconnects", 0)
+        target["failures"] = max(target["failures"], entry.get("failures", 0))
+        target["downtime"] = max(target["downtime"], entry.get("downtime", 0.0))
+
+
+def pytest_configure(config):
+    if is_xdist_controller(config) and config.getoption("--mirada-host", default=None):
+        path = TUNNEL_REGISTRY_DIR / f"tunnels_{os.getpid()}.json"
+        config._tunnel_registry = SharedTunnelRegistry(path.resolve())
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """Передаёт воркеру путь к реестру туннелей (хук xdist)."""
+    registry = getattr(node.config, "_tunnel_registry", None)
+    if registry is not None:
+        node.workerinput["tunnel_registry"] = str(registry.path)
+
+
+def pytest_unconfigure(config):
+    registry = getattr(config, "_tunnel_registry", None)
+    if registry is not None:
+        registry.terminate_all()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Забирает статистику туннелей завершившегося воркера (хук xdist)."""
+    stats = getattr(node, "workeroutput", {}).get("tunnel_stats")
+    if stats:
+        merge_tunnel_stats(node.config, stats)